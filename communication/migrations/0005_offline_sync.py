@@ -0,0 +1,17 @@
+# Generated by Django 5.1.1 on 2026-10-19 13:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('communication', '0004_task_created_by'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['updated_at', 'id'], name='communicati_updated_7a1715_idx'),
+        ),
+    ]
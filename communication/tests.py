@@ -1,3 +1,34 @@
-from django.test import TestCase
+from core import testing
 
-# Create your tests here.
+NO_TEMPLATE = 'its template does not exist yet'
+POST_ONLY = 'POST only'
+
+
+class CommunicationQueryBudgetTests(testing.QueryBudgetTestCase):
+    namespace = 'communication'
+    budgets = {
+        'inbox': {'max_queries': 6},
+        'chat_room': {'max_queries': 7, 'kwargs': lambda s: {'chat_id': s.chat.id}},
+    }
+    unbudgeted = {
+        'sent_emails': NO_TEMPLATE,
+        'compose_email': NO_TEMPLATE,
+        'view_email': "the template links to the missing 'reply_email' URL",
+        'delete_email': POST_ONLY,
+        'chat_list': NO_TEMPLATE,
+        'create_chat': NO_TEMPLATE,
+        'leave_chat': POST_ONLY,
+        'task_list': NO_TEMPLATE,
+        'view_task': NO_TEMPLATE,
+        'create_task': NO_TEMPLATE,
+        'update_task': NO_TEMPLATE,
+        'complete_task': POST_ONLY,
+        'announcement_list': NO_TEMPLATE,
+        'create_announcement': NO_TEMPLATE,
+        'newsletter_list': NO_TEMPLATE,
+        'create_newsletter': NO_TEMPLATE,
+        'notification_list': NO_TEMPLATE,
+        'mark_notification_read': POST_ONLY,
+        'search_employees': 'calls Employee.get_full_name(), which the model does not define',
+        'dashboard': NO_TEMPLATE,
+    }
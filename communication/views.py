@@ -23,6 +23,9 @@ from .forms import (
 )
 from core.models import Employee, Department
 
+# Latest messages shown when a chat room opens.
+CHAT_HISTORY = 50
+
 # Email Views
 
 @login_required
@@ -106,7 +109,8 @@ def create_chat(request):
 @login_required
 def chat_room(request, chat_id):
     chat = get_object_or_404(InAppChat, id=chat_id, participants=request.user)
-    messages = ChatMessage.objects.filter(chat=chat).order_by('timestamp')
+    latest = ChatMessage.objects.filter(chat=chat).select_related('sender').order_by('-timestamp', '-id')
+    messages = list(latest[:CHAT_HISTORY])[::-1]
     
     if request.method == 'POST':
         form = ChatMessageForm(request.POST, request.FILES)
@@ -3,7 +3,7 @@ from django.contrib.auth.admin import UserAdmin
 
 from .models import (
     Zone, State, LGA, Department, Division, GradeLevel,
-    OfficialAppointment, Bank, PFA, Employee, 
+    OfficialAppointment, Bank, PFA, Employee, SlowQuery,
 )
 
 
@@ -54,6 +54,14 @@ class PFAAdmin(admin.ModelAdmin):
     search_fields = ('name', 'code')
 
 
+class SlowQueryAdmin(admin.ModelAdmin):
+    list_display = ('normalized_sql', 'count', 'mean_ms', 'worst_ms', 'last_view', 'last_seen')
+    search_fields = ('normalized_sql', 'last_view')
+    readonly_fields = [field.name for field in SlowQuery._meta.fields]
+
+    def has_add_permission(self, request):
+        return False
+
 
 # Register your models here
 admin.site.register(Zone, ZoneAdmin)
@@ -65,4 +73,5 @@ admin.site.register(Division, DivisionAdmin)
 admin.site.register(GradeLevel, GradeLevelAdmin)
 admin.site.register(OfficialAppointment, OfficialAppointmentAdmin)
 admin.site.register(Bank, BankAdmin)
-admin.site.register(PFA, PFAAdmin)
\ No newline at end of file
+admin.site.register(PFA, PFAAdmin)
+admin.site.register(SlowQuery, SlowQueryAdmin)
@@ -4,3 +4,20 @@ from django.apps import AppConfig
 class CoreConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'core'
+
+    def ready(self):
+        from django.db.backends.signals import connection_created
+        from django.db.models.signals import post_delete, post_migrate, post_save, pre_migrate, pre_save
+        from .change_log import after_migrate, before_migrate
+        from .slow_query_log import install_slow_query_wrapper
+        from .sync import BY_MODEL, record_deleted, record_pre_save, record_saved
+        from .write_contention import install_write_contention_wrapper
+
+        connection_created.connect(install_slow_query_wrapper, dispatch_uid='core.slow_query_log')
+        connection_created.connect(install_write_contention_wrapper, dispatch_uid='core.write_contention')
+        pre_migrate.connect(before_migrate, sender=self, dispatch_uid='core.change_log')
+        post_migrate.connect(after_migrate, sender=self, dispatch_uid='core.change_log')
+        for model in BY_MODEL:
+            pre_save.connect(record_pre_save, sender=model, dispatch_uid='core.sync')
+            post_save.connect(record_saved, sender=model, dispatch_uid='core.sync')
+            post_delete.connect(record_deleted, sender=model, dispatch_uid='core.sync')
@@ -0,0 +1,195 @@
+# core/benchmark.py
+"""
+Load benchmark for the main pages, run by `manage.py benchmark`.
+
+Each endpoint is requested a fixed number of times through the Django test
+client, spread over a number of threads that each hold their own database
+connection. The result is a JSON-serialisable dict with throughput, latency
+percentiles and the median query count per endpoint, so runs against the
+same seed_scale data set can be compared. compare_reports() checks a fresh
+report against a stored baseline for `manage.py check_performance`.
+"""
+import copy
+import statistics
+import threading
+import time
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.db import connection
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from communication.models import InAppChat, InAppEmail, ChatMessage, Task
+from finance.models import Expenditure
+
+from .models import Employee, File
+from .profiling import PERCENTILES, percentile
+
+# Page name -> function of the benchmark user returning the URL to request.
+# Only pages that render: the timings of an error page say nothing. The HR
+# employee list and leave requests join when their views work (see the
+# unbudgeted entries of the query budget tests).
+ENDPOINTS = {
+    'dashboard': lambda user: reverse('core:dashboard'),
+    'inbox': lambda user: reverse('communication:inbox'),
+    'chat_room': lambda user: reverse('communication:chat_room', args=[
+        InAppChat.objects.filter(participants=user).order_by('pk').values_list('pk', flat=True).first()]),
+    'search': lambda user: reverse('core:search') + '?q=Musa',
+    'calendar': lambda user: reverse('core:calendar'),
+    'reports': lambda user: reverse('core:reports'),
+    'employee_list': lambda user: reverse('core:employee_list'),
+    'department_dashboard': lambda user: reverse('hr:department_dashboard', args=[user.current_department_id]),
+}
+
+# hr and communication are not mounted in the project URLconf yet; the query
+# budget harness URLconf mounts them.
+BENCHMARK_URLCONF = 'core.testing'
+
+# Row counts stored with each report, so that runs on different data sets
+# are not compared by mistake.
+DATA_SET_MODELS = [Employee, ChatMessage, InAppEmail, Task, File, Expenditure]
+
+
+def _worker(url, cookies, count, samples, lock):
+    client = Client(raise_request_exception=False)
+    client.cookies = copy.deepcopy(cookies)
+    try:
+        for _ in range(count):
+            start = time.perf_counter()
+            with CaptureQueriesContext(connection) as queries:
+                response = client.get(url)
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            with lock:
+                samples.append((elapsed_ms, len(queries.captured_queries), response.status_code))
+    finally:
+        connection.close()
+
+
+def benchmark_endpoint(url, cookies, requests, concurrency):
+    samples = []
+    lock = threading.Lock()
+    shares = [requests // concurrency + (1 if n < requests % concurrency else 0) for n in range(concurrency)]
+    threads = [
+        threading.Thread(target=_worker, args=(url, cookies, share, samples, lock))
+        for share in shares if share
+    ]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    latencies = sorted(sample[0] for sample in samples)
+    result = {
+        'url': url,
+        'requests': len(samples),
+        # A redirect (to the login page, say) did not measure the page either.
+        'errors': sum(1 for sample in samples if not 200 <= sample[2] < 300),
+        'throughput_rps': round(len(samples) / elapsed, 2) if elapsed else 0,
+        'mean_ms': round(statistics.fmean(latencies), 2) if latencies else 0,
+        'max_ms': round(latencies[-1], 2) if latencies else 0,
+        'queries': int(statistics.median(sample[1] for sample in samples)) if samples else 0,
+    }
+    for pct in PERCENTILES:
+        result[f'p{pct}_ms'] = round(percentile(latencies, pct), 2)
+    return result
+
+
+def run_benchmark(user, endpoints=None, requests=100, concurrency=4, warmup=1):
+    """Benchmark `endpoints` (default: all of ENDPOINTS) signed in as `user`."""
+    names = endpoints or list(ENDPOINTS)
+    unknown = set(names) - set(ENDPOINTS)
+    if unknown:
+        raise ValueError(f'Unknown endpoints: {", ".join(sorted(unknown))}')
+
+    # Measure with production settings: DEBUG also turns on the browser-reload
+    # middleware, which needs a URL that BENCHMARK_URLCONF does not mount.
+    with override_settings(ROOT_URLCONF=BENCHMARK_URLCONF, DEBUG=False,
+                           ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver']):
+        client = Client(raise_request_exception=False)
+        client.force_login(user)
+        results = {}
+        for name in names:
+            url = ENDPOINTS[name](user)
+            # Warm-up requests fill caches and per-user rows created on first visit.
+            for _ in range(warmup):
+                client.get(url)
+            results[name] = benchmark_endpoint(url, client.cookies, requests, concurrency)
+
+    return {
+        'timestamp': datetime.now(dt_timezone.utc).isoformat(),
+        'user': user.employee_id,
+        'requests': requests,
+        'concurrency': concurrency,
+        'data_set': data_set(),
+        'endpoints': results,
+    }
+
+
+def data_set():
+    return {model._meta.label: model.objects.count() for model in DATA_SET_MODELS}
+
+
+def compare_reports(baseline, current, metric='p95_ms', tolerance=0.2):
+    """
+    Compare `current` against `baseline`, endpoint by endpoint.
+
+    An endpoint regresses when `metric` grows by more than `tolerance` (a
+    fraction of the baseline value), when it issues more queries or when any
+    of its requests failed. Returns one row per endpoint present in either
+    report.
+    """
+    rows = []
+    for name in dict.fromkeys([*baseline['endpoints'], *current['endpoints']]):
+        before = baseline['endpoints'].get(name)
+        after = current['endpoints'].get(name)
+        row = {'endpoint': name, 'before_ms': None, 'after_ms': None, 'change': None,
+               'before_queries': None, 'after_queries': None, 'regressions': []}
+        if before:
+            row['before_ms'] = before[metric]
+            row['before_queries'] = before['queries']
+        if after:
+            row['after_ms'] = after[metric]
+            row['after_queries'] = after['queries']
+        if before and after:
+            if before[metric]:
+                row['change'] = after[metric] / before[metric] - 1
+            if after[metric] > before[metric] * (1 + tolerance):
+                row['regressions'].append(f'{metric} +{row["change"]:.0%}' if row['change'] is not None else metric)
+            if after['queries'] > before['queries']:
+                row['regressions'].append(f'queries +{after["queries"] - before["queries"]}')
+        if after and after['errors']:
+            row['regressions'].append(f'{after["errors"]} errors')
+        rows.append(row)
+    return rows
+
+
+def format_diff_table(rows, metric='p95_ms'):
+    headers = ['endpoint', f'base {metric}', f'new {metric}', 'change', 'base queries', 'new queries', 'status']
+    lines = []
+    for row in rows:
+        if row['regressions']:
+            status = 'REGRESSED: ' + ', '.join(row['regressions'])
+        elif row['before_ms'] is None:
+            status = 'new'
+        elif row['after_ms'] is None:
+            status = 'not run'
+        else:
+            status = 'ok'
+        lines.append([
+            row['endpoint'],
+            '-' if row['before_ms'] is None else f'{row["before_ms"]:.1f}',
+            '-' if row['after_ms'] is None else f'{row["after_ms"]:.1f}',
+            '-' if row['change'] is None else f'{row["change"]:+.1%}',
+            '-' if row['before_queries'] is None else str(row['before_queries']),
+            '-' if row['after_queries'] is None else str(row['after_queries']),
+            status,
+        ])
+    widths = [max([len(headers[i])] + [len(line[i]) for line in lines]) for i in range(len(headers))]
+    return '\n'.join(
+        '  '.join(cell.ljust(width) for cell, width in zip(line, widths)).rstrip()
+        for line in [headers, ['-' * width for width in widths], *lines]
+    )
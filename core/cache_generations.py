@@ -0,0 +1,40 @@
+# core/cache_generations.py
+"""
+Cache generations shared by every worker.
+
+The forecast, risk heatmap and coverage caches live in each process's
+local memory and put a generation in their keys. A change bumps the
+generation, which retires every copy cached under the old one. The
+generations themselves are kept in the 'shared' cache, which all workers
+on the host read, so a change committed by one worker retires the copies
+cached by the others.
+
+A bump stores a fresh random value instead of incrementing, so two
+concurrent bumps cannot leave the old value behind. A generation that is
+missing (never bumped, or culled) is given a fresh value as well, so it
+never maps back to a key cached under an earlier one.
+"""
+from uuid import uuid4
+
+from django.core.cache import caches
+
+ALIAS = 'shared'
+
+
+def bump(keys):
+    caches[ALIAS].set_many({key: uuid4().hex for key in keys}, None)
+
+
+def get_many(keys):
+    """{key: generation} for every one of `keys`."""
+    shared = caches[ALIAS]
+    generations = shared.get_many(keys)
+    for key in keys:
+        if key not in generations:
+            shared.add(key, uuid4().hex, None)
+            generations[key] = shared.get(key)
+    return generations
+
+
+def get(key):
+    return get_many([key])[key]
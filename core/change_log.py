@@ -0,0 +1,150 @@
+# core/change_log.py
+"""
+Change-data capture for downstream systems.
+
+Every insert, update and delete on the CAPTURED tables appends a ChangeLog
+row holding the model, the primary key, the operation and the row's
+columns as JSON (as stored; EXCLUDED columns such as password hashes are
+left out). An update that changes only EXCLUDED or QUIET columns, such as
+the last_login written on every sign-in, is not logged. The rows are written by SQLite triggers, so they commit or roll
+back with the write itself and also cover bulk_create, queryset update()
+and raw SQL, which signals would miss.
+
+Triggers are dropped before `migrate` runs (a trigger naming a column
+blocks dropping it) and recreated from the current model fields after it,
+so they always match the schema. On other databases nothing is installed.
+
+Consumers read the log in sequence order after the last sequence number
+they applied: changes() here, the `api/changes/` feed, or `manage.py
+stream_changes`, and store the `seq` of the last row as their cursor.
+
+`manage.py prune_change_log` drops the rows older than RETENTION, so a
+consumer must read at least that often. One whose cursor falls before the
+oldest row left gets CursorExpired (410 Gone from the feed) rather than a
+silent gap, and must reload from the tables before following the log again.
+"""
+from datetime import timedelta
+
+from django.apps import apps
+from django.db import connections, router
+from django.utils import timezone
+
+from .models import ChangeLog
+
+CAPTURED = ['core.Employee', 'hr.EmployeeDetail', 'hr.LeaveRequest', 'finance.Expenditure', 'finance.Budget',
+            'monitoring.Project', 'communication.Task']
+EXCLUDED = {'core.Employee': {'password'}}
+# Columns whose changes alone are not logged; they are still part of the rows that are.
+QUIET = {'core.Employee': {'last_login'}}
+PAGE_SIZE = 500
+MAX_PAGE_SIZE = 5000
+OPERATIONS = {'INSERT': 'NEW', 'UPDATE': 'NEW', 'DELETE': 'OLD'}
+# SQLite functions take at most 127 arguments; larger rows are built from several objects.
+PAIRS_PER_OBJECT = 50
+RETENTION = timedelta(days=30)
+
+
+class CursorExpired(Exception):
+    pass
+
+
+def _trigger_name(model, operation):
+    return f'change_log_{model._meta.db_table}_{operation.lower()}'
+
+
+def _columns(model, skip=()):
+    return [field.column for field in model._meta.concrete_fields if field.attname not in skip]
+
+
+def _payload(model, label, row, quote):
+    columns = _columns(model, EXCLUDED.get(label, ()))
+    objects = [
+        'json_object({})'.format(', '.join(f"'{column}', {row}.{quote(column)}" for column in chunk))
+        for chunk in (columns[start:start + PAIRS_PER_OBJECT] for start in range(0, len(columns), PAIRS_PER_OBJECT))
+    ]
+    payload = objects[0]
+    for other in objects[1:]:
+        payload = f'json_patch({payload}, {other})'
+    return payload
+
+
+def trigger_sql(label, quote):
+    """CREATE TRIGGER statements capturing writes to the model `label`."""
+    model = apps.get_model(label)
+    table = quote(model._meta.db_table)
+    log = quote(ChangeLog._meta.db_table)
+    watched = _columns(model, EXCLUDED.get(label, set()) | QUIET.get(label, set()))
+    changed = ' OR '.join(f'OLD.{quote(column)} IS NOT NEW.{quote(column)}' for column in watched)
+    statements = []
+    for operation, row in OPERATIONS.items():
+        when = f'WHEN {changed} ' if operation == 'UPDATE' else ''
+        statements.append(
+            f"CREATE TRIGGER {quote(_trigger_name(model, operation))} AFTER {operation} ON {table} {when}BEGIN "
+            f"INSERT INTO {log} (model, object_id, operation, data, changed_at) VALUES ("
+            f"'{label}', {row}.{quote(model._meta.pk.column)}, '{operation}', {_payload(model, label, row, quote)}, "
+            f"strftime('%Y-%m-%d %H:%M:%f', 'now')); END"
+        )
+    return statements
+
+
+def uninstall(using='default'):
+    connection = connections[using]
+    if connection.vendor != 'sqlite' or not router.allow_migrate_model(using, ChangeLog):
+        return
+    quote = connection.ops.quote_name
+    with connection.cursor() as cursor:
+        for label in CAPTURED:
+            for operation in OPERATIONS:
+                cursor.execute(f'DROP TRIGGER IF EXISTS {quote(_trigger_name(apps.get_model(label), operation))}')
+
+
+def install(using='default'):
+    """(Re)create the capture triggers from the current model fields."""
+    connection = connections[using]
+    if connection.vendor != 'sqlite' or not router.allow_migrate_model(using, ChangeLog):
+        return
+    tables = set(connection.introspection.table_names())
+    if ChangeLog._meta.db_table not in tables:
+        return
+    uninstall(using)
+    with connection.cursor() as cursor:
+        for label in CAPTURED:
+            if apps.get_model(label)._meta.db_table in tables:
+                for statement in trigger_sql(label, connection.ops.quote_name):
+                    cursor.execute(statement)
+
+
+def before_migrate(sender, using='default', **kwargs):
+    """pre_migrate receiver."""
+    uninstall(using)
+
+
+def after_migrate(sender, using='default', **kwargs):
+    """post_migrate receiver."""
+    install(using)
+
+
+def changes(after=0, limit=PAGE_SIZE, models=None):
+    """
+    Up to `limit` ChangeLog rows after sequence number `after`, oldest first,
+    optionally for some models only. Raises CursorExpired when rows after
+    `after` have been pruned.
+    """
+    oldest = ChangeLog.objects.order_by('seq').values_list('seq', flat=True).first()
+    if oldest is not None and after < oldest - 1:
+        raise CursorExpired(f'Changes after {after} have been pruned; the oldest kept is {oldest}.')
+    rows = ChangeLog.objects.filter(seq__gt=after)
+    if models:
+        rows = rows.filter(model__in=models)
+    return list(rows.order_by('seq')[:max(1, min(limit, MAX_PAGE_SIZE))])
+
+
+def serialize(entry):
+    return {'seq': entry.seq, 'model': entry.model, 'object_id': entry.object_id, 'operation': entry.operation,
+            'data': entry.data, 'changed_at': entry.changed_at.isoformat()}
+
+
+def prune(now=None):
+    """Drop the ChangeLog rows older than RETENTION; returns how many went."""
+    removed, _ = ChangeLog.objects.filter(changed_at__lt=(now or timezone.now()) - RETENTION).delete()
+    return removed
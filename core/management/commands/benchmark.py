@@ -0,0 +1,42 @@
+# core/management/commands/benchmark.py
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.benchmark import ENDPOINTS, run_benchmark
+from core.models import Employee
+
+from .seed_scale import BENCHMARK_EMPLOYEE_ID
+
+
+class Command(BaseCommand):
+    help = 'Measure throughput and latency percentiles of the main pages and print them as JSON'
+
+    def add_arguments(self, parser):
+        parser.add_argument('endpoints', nargs='*', help=f'Pages to benchmark, from {", ".join(ENDPOINTS)} (default: all)')
+        parser.add_argument('--requests', type=int, default=100, help='Requests per page')
+        parser.add_argument('--concurrency', type=int, default=4, help='Concurrent clients')
+        parser.add_argument('--warmup', type=int, default=1, help='Unmeasured requests per page')
+        parser.add_argument('--employee-id', default=BENCHMARK_EMPLOYEE_ID, help='Employee to sign in as')
+        parser.add_argument('--output', help='Write the JSON report to this file instead of stdout')
+
+    def handle(self, *args, **options):
+        try:
+            user = Employee.objects.get(employee_id=options['employee_id'])
+        except Employee.DoesNotExist:
+            raise CommandError(f'Employee {options["employee_id"]} does not exist; run seed_scale first.')
+        if options['requests'] < 1 or options['concurrency'] < 1:
+            raise CommandError('--requests and --concurrency must be at least 1.')
+
+        try:
+            report = run_benchmark(user, options['endpoints'], options['requests'], options['concurrency'],
+                                   options['warmup'])
+        except ValueError as exc:
+            raise CommandError(exc)
+        output = json.dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as handle:
+                handle.write(output + '\n')
+            self.stdout.write(self.style.SUCCESS(f'Report written to {options["output"]}'))
+        else:
+            self.stdout.write(output)
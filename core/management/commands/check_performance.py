@@ -0,0 +1,74 @@
+# core/management/commands/check_performance.py
+import json
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core.benchmark import PERCENTILES, compare_reports, format_diff_table, run_benchmark
+from core.models import Employee
+
+from .seed_scale import BENCHMARK_EMPLOYEE_ID
+
+DEFAULT_BASELINE = settings.BASE_DIR / 'core' / 'benchmark_baseline.json'
+
+
+class Command(BaseCommand):
+    help = (
+        'Benchmark the main pages and compare the result with the committed baseline; '
+        'exits with an error if any page got slower than the tolerance, issues more queries or failed a request'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--baseline', default=str(DEFAULT_BASELINE), help='Baseline report (JSON)')
+        parser.add_argument('--report', help='Compare this saved benchmark report instead of running a new one')
+        parser.add_argument('--tolerance', type=float, default=0.2,
+                            help='Allowed latency growth as a fraction of the baseline (default 0.2)')
+        parser.add_argument('--metric', default='p95_ms', choices=[f'p{pct}_ms' for pct in PERCENTILES] + ['mean_ms'])
+        parser.add_argument('--update-baseline', action='store_true',
+                            help='Write the fresh run to the baseline file instead of comparing')
+
+    def handle(self, *args, **options):
+        baseline = None
+        try:
+            with open(options['baseline']) as handle:
+                baseline = json.load(handle)
+        except FileNotFoundError:
+            if not options['update_baseline']:
+                raise CommandError(f'No baseline at {options["baseline"]}; create one with --update-baseline.')
+
+        if options['report']:
+            with open(options['report']) as handle:
+                current = json.load(handle)
+        else:
+            current = self.run(baseline)
+
+        if options['update_baseline']:
+            failing = [name for name, result in current['endpoints'].items() if result['errors']]
+            if failing:
+                raise CommandError(f'Not writing a baseline with failing endpoints: {", ".join(failing)}')
+            with open(options['baseline'], 'w') as handle:
+                handle.write(json.dumps(current, indent=2) + '\n')
+            self.stdout.write(self.style.SUCCESS(f'Baseline written to {options["baseline"]}'))
+            return
+
+        if baseline.get('data_set') != current.get('data_set'):
+            self.stderr.write(self.style.WARNING(
+                'The data set differs from the baseline run; latencies may not be comparable.\n'
+                f'  baseline: {baseline.get("data_set")}\n  current:  {current.get("data_set")}'))
+
+        rows = compare_reports(baseline, current, options['metric'], options['tolerance'])
+        self.stdout.write(format_diff_table(rows, options['metric']))
+        regressed = [row['endpoint'] for row in rows if row['regressions']]
+        if regressed:
+            raise CommandError(f'{len(regressed)} endpoint(s) regressed: {", ".join(regressed)}')
+        self.stdout.write(self.style.SUCCESS(f'No regressions (tolerance {options["tolerance"]:.0%}).'))
+
+    def run(self, baseline):
+        """Benchmark every endpoint with the baseline's user and load; endpoints the baseline lacks show as new."""
+        baseline = baseline or {}
+        employee_id = baseline.get('user', BENCHMARK_EMPLOYEE_ID)
+        try:
+            user = Employee.objects.get(employee_id=employee_id)
+        except Employee.DoesNotExist:
+            raise CommandError(f'Employee {employee_id} does not exist; run seed_scale first.')
+        return run_benchmark(user, None, baseline.get('requests', 100), baseline.get('concurrency', 4))
@@ -0,0 +1,29 @@
+# core/management/commands/national_report.py
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from core.national_reports import REPORTS, generate_national_report
+from finance.reports import WRITERS
+
+
+class Command(BaseCommand):
+    help = 'Generate a nationwide report, one state or zone per worker process, merged into one file'
+
+    def add_arguments(self, parser):
+        parser.add_argument('report', choices=list(REPORTS))
+        parser.add_argument('--year', type=int, help='Year for expenditure_by_state (default: this year)')
+        parser.add_argument('--format', default='CSV', choices=list(WRITERS))
+        parser.add_argument('--shard-by', default='state', choices=['state', 'zone'])
+        parser.add_argument('--workers', type=int, help='Worker processes (default: NATIONAL_REPORT_WORKERS or CPUs)')
+
+    def handle(self, *args, **options):
+        params = {}
+        if options['report'] == 'expenditure_by_state':
+            params['year'] = options['year'] or timezone.now().year
+
+        name, stats = generate_national_report(
+            options['report'], params, options['format'], options['shard_by'], options['workers'])
+        for stat in stats[:5]:
+            self.stdout.write(f'{stat["shard"]}: {stat["rows"]} rows in {stat["seconds"]}s')
+        self.stdout.write(self.style.SUCCESS(
+            f'{sum(stat["rows"] for stat in stats)} rows from {len(stats)} shards written to {name}'))
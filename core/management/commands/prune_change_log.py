@@ -0,0 +1,12 @@
+# core/management/commands/prune_change_log.py
+from django.core.management.base import BaseCommand
+
+from core import change_log
+
+
+class Command(BaseCommand):
+    help = 'Drop change log rows older than the change log retention window'
+
+    def handle(self, *args, **options):
+        removed = change_log.prune()
+        self.stdout.write(self.style.SUCCESS(f'Removed {removed} change log row(s).'))
@@ -0,0 +1,12 @@
+# core/management/commands/prune_sync_history.py
+from django.core.management.base import BaseCommand
+
+from core import sync
+
+
+class Command(BaseCommand):
+    help = 'Drop sync tombstones and receipts older than the sync retention window'
+
+    def handle(self, *args, **options):
+        removed = sync.prune()
+        self.stdout.write(self.style.SUCCESS(f'Removed {removed} tombstone(s) and receipt(s).'))
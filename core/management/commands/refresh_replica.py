@@ -0,0 +1,12 @@
+# core/management/commands/refresh_replica.py
+from django.core.management.base import BaseCommand
+
+from core import replica
+
+
+class Command(BaseCommand):
+    help = 'Snapshot the primary database into the read replica with the SQLite online backup API'
+
+    def handle(self, *args, **options):
+        seconds = replica.refresh()
+        self.stdout.write(self.style.SUCCESS(f'Refreshed {replica.replica_path()} in {seconds:.2f}s.'))
@@ -0,0 +1,331 @@
+# core/management/commands/seed_scale.py
+"""
+Fills the database with production-sized synthetic data for load testing.
+
+    python manage.py seed_scale --employees 50000 --chat-messages 1000000
+
+Every volume is configurable. Rows are generated lazily and written with
+bulk_create in batches of --batch-size, one transaction per batch, so memory
+stays flat however large the volumes are. All generated employees have IDs
+starting with SCL; SCL00000 is a superuser that the benchmark command signs
+in as.
+"""
+import random
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+from itertools import islice
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from communication.models import InAppEmail, InAppChat, ChatMessage, Task
+from core.models import Employee, Zone, State, LGA, Department, GradeLevel, File, FileHistory
+from finance import ledger
+from finance.models import Budget, Expenditure
+from hr.models import EmployeeDetail
+from monitoring.models import Project
+
+ZONES = [
+    ('NC', 'North Central'), ('NE', 'North East'), ('NW', 'North West'),
+    ('SE', 'South East'), ('SS', 'South South'), ('SW', 'South West'),
+]
+
+# (code, name, zone, number of LGAs)
+STATES = [
+    ('AB', 'Abia', 'SE', 17), ('AD', 'Adamawa', 'NE', 21), ('AK', 'Akwa Ibom', 'SS', 31),
+    ('AN', 'Anambra', 'SE', 21), ('BA', 'Bauchi', 'NE', 20), ('BY', 'Bayelsa', 'SS', 8),
+    ('BE', 'Benue', 'NC', 23), ('BO', 'Borno', 'NE', 27), ('CR', 'Cross River', 'SS', 18),
+    ('DE', 'Delta', 'SS', 25), ('EB', 'Ebonyi', 'SE', 13), ('ED', 'Edo', 'SS', 18),
+    ('EK', 'Ekiti', 'SW', 16), ('EN', 'Enugu', 'SE', 17), ('GO', 'Gombe', 'NE', 11),
+    ('IM', 'Imo', 'SE', 27), ('JI', 'Jigawa', 'NW', 27), ('KD', 'Kaduna', 'NW', 23),
+    ('KN', 'Kano', 'NW', 44), ('KT', 'Katsina', 'NW', 34), ('KE', 'Kebbi', 'NW', 21),
+    ('KO', 'Kogi', 'NC', 21), ('KW', 'Kwara', 'NC', 16), ('LA', 'Lagos', 'SW', 20),
+    ('NA', 'Nasarawa', 'NC', 13), ('NI', 'Niger', 'NC', 25), ('OG', 'Ogun', 'SW', 20),
+    ('ON', 'Ondo', 'SW', 18), ('OS', 'Osun', 'SW', 30), ('OY', 'Oyo', 'SW', 33),
+    ('PL', 'Plateau', 'NC', 17), ('RI', 'Rivers', 'SS', 23), ('SO', 'Sokoto', 'NW', 23),
+    ('TA', 'Taraba', 'NE', 16), ('YO', 'Yobe', 'NE', 17), ('ZA', 'Zamfara', 'NW', 14),
+    ('FCT', 'Federal Capital Territory', 'NC', 6),
+]
+
+DEPARTMENTS = [
+    ('HRM', 'Human Resource Management'), ('FIN', 'Finance and Accounts'),
+    ('PRS', 'Planning, Research and Statistics'), ('VSD', 'Vocational Skills Development'),
+    ('SSE', 'Small Scale Enterprises'), ('REP', 'Rural Employment Promotion'),
+    ('SPW', 'Special Public Works'), ('GSV', 'General Services'),
+]
+
+FIRST_NAMES = ['Ada', 'Bola', 'Chinedu', 'Danjuma', 'Emeka', 'Funmi', 'Garba', 'Halima', 'Ifeoma', 'Jide',
+               'Kemi', 'Lami', 'Musa', 'Ngozi', 'Obinna', 'Rukayat', 'Segun', 'Tunde', 'Uche', 'Zainab']
+SURNAMES = ['Abubakar', 'Adeyemi', 'Bello', 'Eze', 'Ibrahim', 'Nwosu', 'Okafor', 'Olawale', 'Usman', 'Yusuf']
+
+ID_PREFIX = 'SCL'
+BENCHMARK_EMPLOYEE_ID = f'{ID_PREFIX}00000'
+
+
+def batched(iterable, size):
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+class Command(BaseCommand):
+    help = 'Generate production-sized synthetic data for load testing'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--employees', type=int, default=50000)
+        parser.add_argument('--years', type=int, default=3, help='Years of budgets and expenditures')
+        parser.add_argument('--projects', type=int, default=2000)
+        parser.add_argument('--expenditures', type=int, default=300000)
+        parser.add_argument('--chats', type=int, default=500)
+        parser.add_argument('--chat-messages', type=int, default=1000000)
+        parser.add_argument('--emails', type=int, default=200000)
+        parser.add_argument('--tasks', type=int, default=100000)
+        parser.add_argument('--files', type=int, default=50000)
+        parser.add_argument('--file-history', type=int, default=200000)
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--seed', type=int, default=42, help='Random seed, for repeatable data sets')
+        parser.add_argument('--password', default='benchmark', help=f'Password of {BENCHMARK_EMPLOYEE_ID}')
+
+    def handle(self, *args, **options):
+        if Employee.objects.filter(employee_id=BENCHMARK_EMPLOYEE_ID).exists():
+            raise CommandError('Scale data is already present; run seed_scale against an empty database.')
+        if options['employees'] < 1:
+            raise CommandError('--employees must be at least 1.')
+
+        self.random = random.Random(options['seed'])
+        self.batch_size = options['batch_size']
+        self.now = timezone.now()
+        self.today = self.now.date()
+
+        self.step('geography', self.seed_geography)
+        self.step('employees', self.seed_employees, options['employees'], options['password'])
+        self.step('projects', self.seed_projects, options['projects'])
+        self.step('budgets', self.seed_budgets, options['years'])
+        self.step('expenditures', self.seed_expenditures, options['expenditures'], options['years'])
+        self.step('chats', self.seed_chats, options['chats'], options['chat_messages'])
+        self.step('emails', self.seed_emails, options['emails'])
+        self.step('tasks', self.seed_tasks, options['tasks'])
+        self.step('files', self.seed_files, options['files'], options['file_history'])
+        self.stdout.write(self.style.SUCCESS(f'Done. Benchmark user: {BENCHMARK_EMPLOYEE_ID}'))
+
+    def step(self, label, method, *args):
+        start = time.perf_counter()
+        count = method(*args)
+        self.stdout.write(f'{label}: {count} rows in {time.perf_counter() - start:.1f}s')
+
+    def bulk_create(self, model, objects):
+        """Write `objects` in batches and return the number of rows created."""
+        total = 0
+        for batch in batched(objects, self.batch_size):
+            with transaction.atomic():
+                model.objects.bulk_create(batch)
+            total += len(batch)
+        return total
+
+    def employee_ids(self, count):
+        return [self.employees[self.random.randrange(len(self.employees))] for _ in range(count)]
+
+    def seed_geography(self):
+        Zone.objects.bulk_create([Zone(code=code, name=name) for code, name in ZONES], ignore_conflicts=True)
+        State.objects.bulk_create(
+            [State(code=code, name=name, zone_id=zone) for code, name, zone, _ in STATES], ignore_conflicts=True)
+        LGA.objects.bulk_create([
+            LGA(code=f'{code}{n:02d}', name=f'{name} LGA {n}', state_id=code)
+            for code, name, _, lga_count in STATES for n in range(1, lga_count + 1)
+        ], ignore_conflicts=True)
+        Department.objects.bulk_create(
+            [Department(code=code, name=name) for code, name in DEPARTMENTS], ignore_conflicts=True)
+        GradeLevel.objects.bulk_create([
+            GradeLevel(level=level, name=f'GL {level:02d}', per_diem=Decimal(2000 + level * 1000),
+                       local_running=Decimal(1000 + level * 500), estacode=Decimal(50 + level * 20),
+                       assumption_of_duty=Decimal(level * 10000))
+            for level in range(1, 18)
+        ], ignore_conflicts=True)
+
+        self.states = [(code, zone) for code, _, zone, _ in STATES]
+        self.lgas = {code: [f'{code}{n:02d}' for n in range(1, lga_count + 1)] for code, _, _, lga_count in STATES}
+        self.departments = [code for code, _ in DEPARTMENTS]
+        return len(ZONES) + len(STATES) + sum(len(lgas) for lgas in self.lgas.values()) + len(DEPARTMENTS) + 17
+
+    def seed_employees(self, count, password):
+        Employee.objects.create_superuser(
+            employee_id=BENCHMARK_EMPLOYEE_ID, ippis_number=f'IPPIS{BENCHMARK_EMPLOYEE_ID}',
+            email='benchmark@nde.gov.ng', password=password, first_name='Bench', last_name='Mark',
+            current_department_id='HRM', current_state_id='FCT', current_zone_id='NC',
+            current_grade_level_id=12, password_change_required=False)
+
+        def employees():
+            for n in range(1, count):
+                state, zone = self.states[n % len(self.states)]
+                yield Employee(
+                    employee_id=f'{ID_PREFIX}{n:05d}', ippis_number=f'IPPIS{ID_PREFIX}{n:05d}',
+                    email=f'scale{n}@nde.gov.ng', first_name=self.random.choice(FIRST_NAMES),
+                    last_name=self.random.choice(SURNAMES), current_department_id=self.departments[n % len(self.departments)],
+                    current_state_id=state, current_zone_id=zone, current_grade_level_id=self.random.randint(4, 16),
+                    password='!')
+
+        self.bulk_create(Employee, employees())
+        self.employees = list(
+            Employee.objects.filter(employee_id__startswith=ID_PREFIX).order_by('id').values_list('id', flat=True))
+
+        def details():
+            rows = Employee.objects.filter(employee_id__startswith=ID_PREFIX).order_by('id').values_list(
+                'id', 'employee_id', 'first_name', 'last_name', 'current_state_id', 'current_department_id',
+                'current_grade_level_id')
+            for n, (pk, employee_id, first_name, last_name, state, department, grade) in enumerate(rows.iterator()):
+                lga = self.random.choice(self.lgas[state])
+                yield EmployeeDetail(
+                    employee_id=pk, file_number=f'S{n:06d}', first_name=first_name, surname=last_name,
+                    gender=self.random.choice('MF'), phone_number=f'080{n:08d}',
+                    date_of_birth=date(1965 + n % 35, 1 + n % 12, 1 + n % 28),
+                    date_of_first_appointment=date(1990 + n % 33, 1 + n % 12, 1),
+                    state_of_origin_id=state, lga_of_origin_id=lga, state_of_residence_id=state,
+                    lga_of_residence_id=lga, state_of_posting_id=state, station_id=lga,
+                    current_department_id=department, current_grade_level_id=grade, current_step=1 + n % 15)
+
+        return count + self.bulk_create(EmployeeDetail, details())
+
+    def seed_projects(self, count):
+        def projects():
+            for n in range(count):
+                start = self.today - timedelta(days=self.random.randint(0, 1000))
+                yield Project(
+                    title=f'Scale project {n}', description='Empowerment programme delivery',
+                    current_status=self.random.choice(['NOT_STARTED', 'IN_PROGRESS', 'ON_HOLD', 'COMPLETED']),
+                    start_date=start, end_date=start + timedelta(days=self.random.randint(90, 720)),
+                    department_id=self.departments[n % len(self.departments)],
+                    state_id=self.states[n % len(self.states)][0], project_manager_id=self.random.choice(self.employees),
+                    assigned_to_id=self.random.choice(self.employees))
+
+        total = self.bulk_create(Project, projects())
+        self.projects = list(
+            Project.objects.filter(title__startswith='Scale project').values_list('id', 'department_id', 'state_id'))
+        return total
+
+    def seed_budgets(self, years):
+        first_year = self.today.year - years + 1
+        approver = self.employees[0]
+
+        def budgets():
+            for year in range(first_year, self.today.year + 1):
+                for department in self.departments:
+                    yield Budget(year=year, budget_type='DEPARTMENT', department_id=department,
+                                 amount=Decimal(self.random.randint(500, 5000) * 1000000), approved_by_id=approver)
+                for state, _ in self.states:
+                    yield Budget(year=year, budget_type='STATE', state_id=state,
+                                 amount=Decimal(self.random.randint(100, 1000) * 1000000), approved_by_id=approver)
+                for project, _, _ in self.projects:
+                    yield Budget(year=year, budget_type='PROJECT', project_id=project,
+                                 amount=Decimal(self.random.randint(5, 200) * 1000000), approved_by_id=approver)
+
+        return self.bulk_create(Budget, budgets())
+
+    def seed_expenditures(self, count, years):
+        first_day = date(self.today.year - years + 1, 1, 1)
+        span = (self.today - first_day).days + 1
+
+        def expenditures():
+            for n in range(count):
+                if self.projects and n % 2:
+                    project, department, state = self.random.choice(self.projects)
+                    expenditure_type = 'PROJECT'
+                else:
+                    project, department, state = None, self.random.choice(self.departments), None
+                    expenditure_type = self.random.choice(['OPERATIONAL', 'CAPITAL'])
+                yield Expenditure(
+                    amount=Decimal(self.random.randint(10000, 50000000)) / 100, description=f'Scale expenditure {n}',
+                    date=first_day + timedelta(days=self.random.randrange(span)), expenditure_type=expenditure_type,
+                    department_id=department, project_id=project,
+                    state_id=state or self.random.choice(self.states)[0],
+                    approved_by_id=self.employees[0], submitted_by_id=self.random.choice(self.employees))
+
+        total = self.bulk_create(Expenditure, expenditures())
+        # bulk_create bypasses Expenditure.save(), which keeps the ledger current.
+        ledger.rebuild()
+        return total
+
+    def seed_chats(self, count, messages):
+        if not count:
+            return 0
+        chats = InAppChat.objects.bulk_create([
+            InAppChat(is_group_chat=True, group_name=f'Scale group {n}') for n in range(count)
+        ])
+        participants_per_chat = min(50, len(self.employees))
+
+        def participants():
+            for n, chat in enumerate(chats):
+                members = set(self.random.sample(self.employees, participants_per_chat))
+                # The benchmark user sits in a tenth of the groups.
+                if n % 10 == 0:
+                    members.add(self.employees[0])
+                for employee in members:
+                    yield InAppChat.participants.through(inappchat_id=chat.id, employee_id=employee)
+
+        self.bulk_create(InAppChat.participants.through, participants())
+
+        def chat_messages():
+            for n in range(messages):
+                yield ChatMessage(chat_id=chats[n % count].id, sender_id=self.random.choice(self.employees),
+                                  content=f'Scale message {n}')
+
+        return count + self.bulk_create(ChatMessage, chat_messages())
+
+    def seed_emails(self, count):
+        total = 0
+        for batch in batched(range(count), self.batch_size):
+            with transaction.atomic():
+                emails = InAppEmail.objects.bulk_create([
+                    InAppEmail(sender_id=self.random.choice(self.employees), subject=f'Scale memo {n}',
+                               body='Please treat as urgent.')
+                    for n in batch
+                ])
+                recipients = []
+                for n, email in zip(batch, emails):
+                    # One in twenty emails reaches the benchmark user's inbox.
+                    addressees = {self.employees[0]} if n % 20 == 0 else set()
+                    addressees.update(self.employee_ids(self.random.randint(1, 3)))
+                    recipients.extend(
+                        InAppEmail.recipients.through(inappemail_id=email.id, employee_id=employee)
+                        for employee in addressees)
+                InAppEmail.recipients.through.objects.bulk_create(recipients)
+            total += len(batch)
+        return total
+
+    def seed_tasks(self, count):
+        def tasks():
+            for n in range(count):
+                assigner = self.random.choice(self.employees)
+                yield Task(
+                    title=f'Scale task {n}', description='Follow up and report.', assigned_by_id=assigner,
+                    assigned_to_id=self.employees[0] if n % 50 == 0 else self.random.choice(self.employees),
+                    created_by_id=assigner, department_id=self.departments[n % len(self.departments)],
+                    priority=self.random.choice(['LOW', 'MEDIUM', 'HIGH', 'URGENT']),
+                    status=self.random.choice(['PENDING', 'IN_PROGRESS', 'COMPLETED']),
+                    due_date=self.now + timedelta(days=self.random.randint(-60, 60)))
+
+        return self.bulk_create(Task, tasks())
+
+    def seed_files(self, count, history):
+        def files():
+            for n in range(count):
+                yield File(
+                    title=f'Scale file {n}', file_number=f'{ID_PREFIX}/F/{n}',
+                    file_type=self.random.choice(['OPEN', 'SECRET', 'EMPLOYEE', 'CONTRACT']),
+                    current_department_id=self.departments[n % len(self.departments)],
+                    assigned_to_id=self.random.choice(self.employees), created_by_id=self.random.choice(self.employees))
+
+        total = self.bulk_create(File, files())
+        if not total:
+            return 0
+        file_ids = list(File.objects.filter(file_number__startswith=f'{ID_PREFIX}/F/').values_list('id', flat=True))
+
+        def file_history():
+            for n in range(history):
+                from_department, to_department = self.random.sample(self.departments, 2)
+                yield FileHistory(file_id=self.random.choice(file_ids), action=f'Minuted {n}',
+                                  from_department_id=from_department, to_department_id=to_department,
+                                  performed_by_id=self.random.choice(self.employees))
+
+        return total + self.bulk_create(FileHistory, file_history())
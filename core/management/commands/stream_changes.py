@@ -0,0 +1,39 @@
+# core/management/commands/stream_changes.py
+import json
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core import change_log
+
+
+class Command(BaseCommand):
+    help = 'Write the change log after a sequence number to stdout as JSON lines'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--after', type=int, default=0, help='Last sequence number already applied (default 0)')
+        parser.add_argument('--models', default='', help='Comma-separated model labels (default: all captured)')
+        parser.add_argument('--batch-size', type=int, default=change_log.PAGE_SIZE, help='Rows read per query')
+        parser.add_argument('--follow', action='store_true', help='Keep polling for new changes')
+        parser.add_argument('--interval', type=float, default=2.0, help='Seconds between polls with --follow')
+
+    def handle(self, *args, **options):
+        models = [label for label in options['models'].split(',') if label]
+        unknown = set(models) - set(change_log.CAPTURED)
+        if unknown:
+            raise CommandError(f'Not captured: {", ".join(sorted(unknown))}.')
+        after = options['after']
+        while True:
+            try:
+                entries = change_log.changes(after, options['batch_size'], models)
+            except change_log.CursorExpired as exc:
+                raise CommandError(exc)
+            for entry in entries:
+                self.stdout.write(json.dumps(change_log.serialize(entry)))
+            if entries:
+                after = entries[-1].seq
+                self.stdout.flush()
+                continue
+            if not options['follow']:
+                return
+            time.sleep(options['interval'])
@@ -0,0 +1,27 @@
+# core/management/commands/stress_writes.py
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.write_contention import stress
+
+
+class Command(BaseCommand):
+    help = ('Run concurrent chat, leave and session writes against a scratch SQLite database with the '
+            'connection settings of the primary, and print failures and lock waits as JSON')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=8, help='Concurrent writers, each with its own connection')
+        parser.add_argument('--transactions', type=int, default=200, help='Write transactions per writer')
+        parser.add_argument('--pause', type=float, default=0.0,
+                            help='Average seconds a writer sleeps between transactions')
+        parser.add_argument('--untuned', action='store_true',
+                            help="Use Django's stock SQLite settings without retries, for comparison")
+
+    def handle(self, *args, **options):
+        if options['workers'] < 1 or options['transactions'] < 1:
+            raise CommandError('--workers and --transactions must be at least 1.')
+        report = stress(options['workers'], options['transactions'], options['pause'], tuned=not options['untuned'])
+        self.stdout.write(json.dumps(report, indent=2))
+        if report['failed']:
+            raise CommandError(f'{report["failed"]} of {report["transactions"]} write transactions failed.')
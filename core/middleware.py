@@ -0,0 +1,57 @@
+# core/middleware.py
+import random
+import time
+from contextlib import ExitStack
+
+from django.db import connections
+
+from .profiling import RequestProfile, current_profile, record_profile, sample_rate
+from .slow_query_log import current_view
+
+
+class RequestProfilingMiddleware:
+    """
+    Samples a fraction of requests (PROFILING_SAMPLE_RATE, 0 to 1) and records
+    wall time, SQL count and time, cache hits/misses and template render time.
+    Unsampled requests only pay for one random() call.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.sample_rate = sample_rate()
+
+    def __call__(self, request):
+        if self.sample_rate <= 0 or random.random() >= self.sample_rate:
+            return self.get_response(request)
+
+        profile = RequestProfile()
+        token = current_profile.set(profile)
+        start = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(profile.time_query))
+                response = self.get_response(request)
+        finally:
+            current_profile.reset(token)
+
+        profile.finish(request, response, time.perf_counter() - start)
+        record_profile(profile)
+        return response
+
+
+class SlowQueryContextMiddleware:
+    """Makes the resolved view name available to the slow-query log."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        token = current_view.set(request.path)
+        try:
+            return self.get_response(request)
+        finally:
+            current_view.reset(token)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        current_view.set(request.resolver_match.view_name)
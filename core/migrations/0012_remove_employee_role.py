@@ -0,0 +1,41 @@
+# Generated by Django 5.1.1 on 2026-10-19 16:02
+
+from django.db import migrations
+
+
+ROLE_CHOICES = (
+    ('DG', 'Director General'),
+    ('DIR', 'Director'),
+    ('ZD', 'Zonal Director'),
+    ('SC', 'State Coordinator'),
+    ('STAFF', 'Staff'),
+)
+
+
+def copy_role(apps, schema_editor):
+    """Carry each employee's role group over to current_role before the column goes.
+
+    A group matches a role by its code or its label, ignoring case. Employees whose
+    group matches neither keep the current_role they already have.
+    """
+    Employee = apps.get_model('core', 'Employee')
+    roles = {}
+    for code, label in ROLE_CHOICES:
+        roles[code.lower()] = roles[label.lower()] = code
+    for group, code in roles.items():
+        Employee.objects.filter(role__name__iexact=group).update(current_role=code)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_change_log'),
+    ]
+
+    operations = [
+        migrations.RunPython(copy_role, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='employee',
+            name='role',
+        ),
+    ]
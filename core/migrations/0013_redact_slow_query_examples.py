@@ -0,0 +1,21 @@
+# Generated by Django 5.1.1 on 2026-10-19 18:40
+
+from django.db import migrations
+from django.db.models import F
+
+
+def redact_examples(apps, schema_editor):
+    """Examples logged so far kept their parameter values; keep only the fingerprinted SQL."""
+    SlowQuery = apps.get_model('core', 'SlowQuery')
+    SlowQuery.objects.update(example_sql=F('normalized_sql'), example_params='')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0012_remove_employee_role'),
+    ]
+
+    operations = [
+        migrations.RunPython(redact_examples, migrations.RunPython.noop),
+    ]
@@ -41,7 +41,8 @@ class Employee(AbstractBaseUser, PermissionsMixin):
     first_name = models.CharField(max_length=100, blank=True, null=True, verbose_name="First Name")
     last_name = models.CharField(max_length=100, blank=True, null=True, verbose_name="Last Name")
     email = models.EmailField(unique=True, verbose_name="Email Address")
-    employee_profile = models.OneToOneField(EmployeeDetail, on_delete=models.CASCADE, null=True, blank=True)
+    employee_profile = models.OneToOneField(EmployeeDetail, on_delete=models.CASCADE, null=True, blank=True,
+                                            related_name='profile_of')
     in_app_email = models.EmailField(unique=True, blank=True, null=True, verbose_name="In-App Email")
     in_app_chat_name = models.CharField(max_length=100, unique=True, blank=True, null=True, verbose_name="In-App Chat Name")
     phone_number = models.CharField(max_length=11, blank=True, null=True, verbose_name="Phone Number")
@@ -293,4 +294,83 @@ class Event(models.Model):
     color = models.CharField(max_length=7, default="#3788d8")  # Hex color code
 
     def __str__(self):
-        return self.title
\ No newline at end of file
+        return self.title
+
+class SlowQuery(models.Model):
+    """Statements slower than SLOW_QUERY_THRESHOLD_MS, one row per normalized SQL fingerprint"""
+
+    fingerprint = models.CharField(max_length=40, unique=True)
+    normalized_sql = models.TextField()
+    example_sql = models.TextField(blank=True)
+    example_params = models.TextField(blank=True)
+    last_view = models.CharField(max_length=200, blank=True)
+    stack = models.TextField(blank=True)
+    explain_plan = models.TextField(blank=True)
+    count = models.PositiveIntegerField(default=0)
+    total_ms = models.FloatField(default=0)
+    worst_ms = models.FloatField(default=0)
+    first_seen = models.DateTimeField()
+    last_seen = models.DateTimeField(db_index=True)
+
+    class Meta:
+        ordering = ['-worst_ms']
+        verbose_name = "Slow Query"
+        verbose_name_plural = "Slow Queries"
+
+    @property
+    def mean_ms(self):
+        return self.total_ms / self.count if self.count else 0
+
+    def __str__(self):
+        return f"{self.normalized_sql[:80]} ({self.count}x, worst {self.worst_ms:.0f} ms)"
+
+
+class Tombstone(models.Model):
+    """
+    A synced record that was deleted, or moved out of the scope of some
+    clients, so that offline clients drop their copy (see core.sync).
+    """
+    resource = models.CharField(max_length=30)
+    object_id = models.PositiveBigIntegerField()
+    removed_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    def __str__(self):
+        return f"{self.resource} {self.object_id} removed {self.removed_at:%Y-%m-%d %H:%M}"
+
+
+class SyncReceipt(models.Model):
+    """The record a client's queued create became, so that a replayed upload does not create it twice."""
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='sync_receipts')
+    client_id = models.CharField(max_length=64)
+    resource = models.CharField(max_length=30)
+    object_id = models.PositiveBigIntegerField()
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    class Meta:
+        unique_together = ('user', 'client_id')
+
+    def __str__(self):
+        return f"{self.user_id}/{self.client_id} -> {self.resource} {self.object_id}"
+
+
+class ChangeLog(models.Model):
+    """One write to a captured table, appended in the writing transaction by triggers (see core.change_log)."""
+    OPERATION_CHOICES = [
+        ('INSERT', 'Insert'),
+        ('UPDATE', 'Update'),
+        ('DELETE', 'Delete'),
+    ]
+
+    # AUTOINCREMENT on SQLite: sequence numbers grow in commit order and are never reused.
+    seq = models.BigAutoField(primary_key=True)
+    model = models.CharField(max_length=50)
+    object_id = models.CharField(max_length=64)
+    operation = models.CharField(max_length=6, choices=OPERATION_CHOICES)
+    data = models.JSONField()
+    changed_at = models.DateTimeField()
+
+    class Meta:
+        indexes = [models.Index(fields=['model', 'seq'])]
+
+    def __str__(self):
+        return f"#{self.seq} {self.operation} {self.model} {self.object_id}"
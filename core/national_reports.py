@@ -0,0 +1,229 @@
+# core/national_reports.py
+"""
+Nationwide reports, sharded by state or zone.
+
+A national report is split into one shard per state (or zone). Shards run in
+a process pool, largest first, and each worker process opens its own
+connection to the report's snapshot and streams its rows into a partial CSV
+file. The parent then merges the partial files, in geographic order, into a
+single CSV or XLSX file using the finance report writers. Wall time is close
+to the time of the largest shard rather than the sum of all of them.
+
+The snapshot is a report-private copy of the read replica (core.replica),
+so every shard sees the same data even when refresh_replica renames a newer
+snapshot over the replica mid-report. Without a fresh replica the shards
+read the primary, each as of the time it runs.
+"""
+import csv
+import multiprocessing
+from abc import ABC, abstractmethod
+import shutil
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import date
+from pathlib import Path
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.models import Count, Q
+
+from finance.models import Expenditure
+from finance.reports import WRITERS, chunk_size
+from monitoring.models import Project
+
+from . import replica
+from .models import Employee, State
+
+UNASSIGNED = 'Unassigned'
+# Database alias of the report-private replica copy, configured only while a report runs.
+SNAPSHOT = 'national_report_snapshot'
+
+
+@dataclass
+class NationalReport(ABC):
+    title: str
+    headers: list
+    state_field: str
+
+    @abstractmethod
+    def queryset(self, params):
+        """The report's rows as a values_list() queryset, in output order."""
+
+    def rows(self, state_codes, params, using):
+        """Rows for the states in `state_codes`; None stands for rows without a state."""
+        shard = Q(**{f'{self.state_field}__in': [code for code in state_codes if code is not None]})
+        if None in state_codes:
+            shard |= Q(**{f'{self.state_field}__isnull': True})
+        return self.queryset(params).using(using).filter(shard).iterator(chunk_size=chunk_size())
+
+    def shard_sizes(self, params, using):
+        """{state code: row count}, used to schedule the largest shards first."""
+        return dict(
+            self.queryset(params).using(using).order_by().values_list(self.state_field).annotate(rows=Count('pk'))
+            .values_list(self.state_field, 'rows')
+        )
+
+
+class NominalRoll(NationalReport):
+    def queryset(self, params):
+        return Employee.objects.filter(active_status=True).order_by('current_state__name', 'employee_id').values_list(
+            'current_zone__name', 'current_state__name', 'employee_id', 'ippis_number', 'last_name', 'first_name',
+            'current_department__name', 'current_grade_level__name', 'current_role', 'date_of_first_appointment',
+            'date_of_retirement')
+
+
+class ExpenditureByState(NationalReport):
+    def queryset(self, params):
+        return Expenditure.objects.filter(date__year=params['year']).order_by('date', 'id').values_list(
+            'state__zone__name', 'state__name', 'date', 'department__name', 'project__title', 'expenditure_type',
+            'amount', 'description')
+
+
+class ProjectStatusByState(NationalReport):
+    def queryset(self, params):
+        return (
+            Project.objects.order_by('title', 'pk')
+            .annotate(
+                milestones_total=Count('milestones'),
+                milestones_done=Count('milestones', filter=Q(milestones__completed_date__isnull=False)),
+            )
+            .values_list('state__zone__name', 'state__name', 'title', 'department__name', 'current_status',
+                         'status_updated_at', 'start_date', 'end_date', 'milestones_total', 'milestones_done')
+        )
+
+
+REPORTS = {
+    'nominal_roll': NominalRoll(
+        'Staff nominal roll',
+        ['Zone', 'State', 'Employee ID', 'IPPIS number', 'Surname', 'First name', 'Department', 'Grade level',
+         'Role', 'First appointment', 'Retirement'],
+        'current_state'),
+    'expenditure_by_state': ExpenditureByState(
+        'Expenditure by state',
+        ['Zone', 'State', 'Date', 'Department', 'Project', 'Type', 'Amount', 'Description'],
+        'state'),
+    'project_status_by_state': ProjectStatusByState(
+        'Project status by state',
+        ['Zone', 'State', 'Project', 'Department', 'Status', 'Status updated', 'Start', 'End', 'Milestones',
+         'Milestones completed'],
+        'state'),
+}
+
+
+def shards(shard_by='state', using=DEFAULT_DB_ALIAS):
+    """[(label, [state codes])] in geographic order, plus a shard for rows without a state."""
+    states = list(State.objects.using(using).order_by('zone__name', 'name').values_list('code', 'name', 'zone__name'))
+    if shard_by == 'zone':
+        grouped = {}
+        for code, _, zone in states:
+            grouped.setdefault(zone, []).append(code)
+        result = list(grouped.items())
+    else:
+        result = [(name, [code]) for code, name, _ in states]
+    return result + [(UNASSIGNED, [None])]
+
+
+@contextmanager
+def snapshot(directory):
+    """
+    The alias the report reads: a copy of the replica in `directory` when
+    there is a fresh one, or the primary. The copy reads the file that is
+    open when it starts, so a refresh renaming a new snapshot over it
+    mid-copy does not mix the two.
+    """
+    if not replica.available():
+        yield DEFAULT_DB_ALIAS
+        return
+    path = Path(directory) / 'snapshot.sqlite3'
+    shutil.copyfile(replica.replica_path(), path)
+    # Forked workers inherit the alias.
+    connections.settings[SNAPSHOT] = dict(connections.settings[replica.REPLICA], NAME=f'file:{path}?mode=ro')
+    try:
+        yield SNAPSHOT
+    finally:
+        connections[SNAPSHOT].close()
+        del connections[SNAPSHOT]
+        del connections.settings[SNAPSHOT]
+
+
+def _init_worker():
+    # The parent closes its connections before forking; make sure every
+    # worker starts without one and opens its own on first use.
+    connections.close_all()
+
+
+def _write_shard(report_name, index, state_codes, params, directory, using):
+    start = time.perf_counter()
+    report = REPORTS[report_name]
+    path = Path(directory) / f'{index:04d}.csv'
+    rows = 0
+    with open(path, 'w', newline='', encoding='utf-8') as handle:
+        writer = csv.writer(handle)
+        for row in report.rows(state_codes, params, using):
+            writer.writerow(row)
+            rows += 1
+    return index, rows, time.perf_counter() - start
+
+
+def _merged_rows(paths):
+    for path in paths:
+        with open(path, newline='', encoding='utf-8') as handle:
+            yield from csv.reader(handle)
+
+
+def generate_national_report(report_name, params=None, file_format='CSV', shard_by='state', workers=None):
+    """
+    Build `report_name` for the whole country and save it to default storage.
+    Returns (storage name, per-shard statistics).
+    """
+    report = REPORTS[report_name]
+    params = params or {}
+    workers = workers or getattr(settings, 'NATIONAL_REPORT_WORKERS', None) or multiprocessing.cpu_count()
+
+    with tempfile.TemporaryDirectory() as directory, snapshot(directory) as using:
+        shard_list = shards(shard_by, using)
+        sizes = report.shard_sizes(params, using)
+        estimates = [sum(sizes.get(code, 0) for code in codes) for _, codes in shard_list]
+        # Largest shards first, so that the slowest state is never started last.
+        order = sorted(range(len(shard_list)), key=lambda index: estimates[index], reverse=True)
+
+        if workers == 1:
+            results = [
+                _write_shard(report_name, index, shard_list[index][1], params, directory, using) for index in order
+            ]
+        else:
+            # Worker processes must not inherit open connections. Forked
+            # workers also inherit the configured Django app registry.
+            connections.close_all()
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                     mp_context=multiprocessing.get_context('fork')) as pool:
+                futures = [
+                    pool.submit(_write_shard, report_name, index, shard_list[index][1], params, directory, using)
+                    for index in order
+                ]
+                results = [future.result() for future in futures]
+
+        writer_class = WRITERS[file_format]
+        path = Path(directory) / f'{report_name}.{writer_class.extension}'
+        writer = writer_class(path)
+        try:
+            paths = [Path(directory) / f'{index:04d}.csv' for index in range(len(shard_list))]
+            writer.write_section(report.title, report.headers, _merged_rows(paths))
+        finally:
+            writer.close()
+
+        suffix = '_'.join(str(value) for value in params.values())
+        name = f'national_reports/{report_name}{"_" + suffix if suffix else ""}_{date.today():%Y%m%d}.{writer_class.extension}'
+        with open(path, 'rb') as handle:
+            name = default_storage.save(name, File(handle))
+
+    stats = sorted(
+        ({'shard': shard_list[index][0], 'rows': rows, 'seconds': round(seconds, 2)} for index, rows, seconds in results),
+        key=lambda stat: stat['seconds'], reverse=True,
+    )
+    return name, stats
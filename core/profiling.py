@@ -0,0 +1,190 @@
+# core/profiling.py
+"""
+Request profiling: per-request timings collected by
+core.middleware.RequestProfilingMiddleware.
+
+A sampled request gets a RequestProfile in a context variable. The database
+execute wrapper, the cache backend and the template backend below add to it
+while the request runs, and the finished profile is appended to an
+in-process ring buffer and written to the 'core.profiling' logger.
+"""
+import json
+import logging
+import threading
+import time
+from collections import deque
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache.backends.locmem import LocMemCache
+from django.template.backends.django import DjangoTemplates
+from django.utils import timezone
+
+logger = logging.getLogger('core.profiling')
+
+current_profile = ContextVar('current_profile', default=None)
+
+_buffer = deque(maxlen=getattr(settings, 'PROFILING_BUFFER_SIZE', 5000))
+_buffer_lock = threading.Lock()
+
+PERCENTILES = (50, 95, 99)
+
+
+def sample_rate():
+    return getattr(settings, 'PROFILING_SAMPLE_RATE', 0)
+
+
+class RequestProfile:
+    def __init__(self):
+        self.started_at = timezone.now()
+        self.sql_count = 0
+        self.sql_time = 0.0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.template_time = 0.0
+        self.wall_time = 0.0
+        self.method = ''
+        self.path = ''
+        self.url_name = ''
+        self.status = None
+
+    def time_query(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.sql_count += 1
+            self.sql_time += time.perf_counter() - start
+
+    def finish(self, request, response, wall_time):
+        match = request.resolver_match
+        self.wall_time = wall_time
+        self.method = request.method
+        self.path = request.path
+        self.url_name = match.view_name if match else ''
+        self.status = response.status_code
+
+    def as_dict(self):
+        return {
+            'timestamp': self.started_at.isoformat(),
+            'method': self.method,
+            'path': self.path,
+            'url_name': self.url_name,
+            'status': self.status,
+            'wall_ms': round(self.wall_time * 1000, 2),
+            'sql_count': self.sql_count,
+            'sql_ms': round(self.sql_time * 1000, 2),
+            'cache_hits': self.cache_hits,
+            'cache_misses': self.cache_misses,
+            'template_ms': round(self.template_time * 1000, 2),
+        }
+
+
+def record_profile(profile):
+    entry = profile.as_dict()
+    with _buffer_lock:
+        _buffer.append(entry)
+    logger.info(json.dumps(entry))
+
+
+def recent_profiles():
+    with _buffer_lock:
+        return list(_buffer)
+
+
+def clear_profiles():
+    with _buffer_lock:
+        _buffer.clear()
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0
+    rank = max(1, -(-pct * len(sorted_values) // 100))
+    return sorted_values[int(rank) - 1]
+
+
+def summarize_profiles(entries=None):
+    """Per-URL-name latency percentiles and averages, slowest p95 first."""
+    grouped = {}
+    for entry in recent_profiles() if entries is None else entries:
+        grouped.setdefault(entry['url_name'] or entry['path'], []).append(entry)
+
+    summaries = []
+    for url_name, group in grouped.items():
+        wall = sorted(entry['wall_ms'] for entry in group)
+        count = len(group)
+        lookups = sum(entry['cache_hits'] + entry['cache_misses'] for entry in group)
+        summary = {
+            'url_name': url_name,
+            'count': count,
+            'avg_sql_count': round(sum(entry['sql_count'] for entry in group) / count, 1),
+            'avg_sql_ms': round(sum(entry['sql_ms'] for entry in group) / count, 2),
+            'avg_template_ms': round(sum(entry['template_ms'] for entry in group) / count, 2),
+            'cache_hit_rate': round(sum(entry['cache_hits'] for entry in group) / lookups * 100, 1) if lookups else None,
+        }
+        for pct in PERCENTILES:
+            summary[f'p{pct}_ms'] = percentile(wall, pct)
+        summaries.append(summary)
+    return sorted(summaries, key=lambda summary: summary['p95_ms'], reverse=True)
+
+
+class ProfilingLocMemCache(LocMemCache):
+    """LocMemCache that counts hits and misses for the profiled request."""
+
+    _missing = object()
+
+    def get(self, key, default=None, version=None):
+        value = super().get(key, self._missing, version)
+        if value is self._missing:
+            self._count(misses=1)
+            return default
+        self._count(hits=1)
+        return value
+
+    def get_many(self, keys, version=None):
+        # Read through LocMemCache.get, not self.get, so that each key is counted once here.
+        keys, values = list(keys), {}
+        for key in keys:
+            value = super().get(key, self._missing, version)
+            if value is not self._missing:
+                values[key] = value
+        self._count(misses=len(keys) - len(values), hits=len(values))
+        return values
+
+    def _count(self, misses=0, hits=0):
+        profile = current_profile.get()
+        if profile is not None:
+            profile.cache_misses += misses
+            profile.cache_hits += hits
+
+
+class ProfilingTemplate:
+    """Wraps a backend template to time top-level renders."""
+
+    def __init__(self, template):
+        self.template = template
+
+    def __getattr__(self, name):
+        return getattr(self.template, name)
+
+    def render(self, context=None, request=None):
+        profile = current_profile.get()
+        if profile is None:
+            return self.template.render(context, request)
+        start = time.perf_counter()
+        try:
+            return self.template.render(context, request)
+        finally:
+            profile.template_time += time.perf_counter() - start
+
+
+class ProfilingDjangoTemplates(DjangoTemplates):
+    """DjangoTemplates backend whose templates report their render time."""
+
+    def from_string(self, template_code):
+        return ProfilingTemplate(super().from_string(template_code))
+
+    def get_template(self, template_name):
+        return ProfilingTemplate(super().get_template(template_name))
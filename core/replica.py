@@ -0,0 +1,104 @@
+# core/replica.py
+"""
+Read replica for heavy read-only paths.
+
+In the SQLite deployment the replica is a snapshot of the primary database
+(DATABASES['default']) made with SQLite's online backup API by refresh(),
+which `manage.py refresh_replica` runs from cron every few minutes. The
+snapshot is written next to REPLICA_PATH and renamed over it, so readers
+never see a half-written copy, and is opened read-only
+(DATABASES['replica'] is a `mode=ro` URI).
+
+Report scans read the snapshot file, so they never hold a lock on the
+primary that writers would wait for. They see the data as of the last
+refresh. The refresh copies the database in one backup step: a stepwise
+backup restarts whenever another connection writes, and under a steady
+write load would never finish. The copy holds a read lock on the primary
+for its duration (under a second for a 400 MB file). Under WAL journaling
+that lock does not block writers.
+
+Two ways to read from it:
+
+* using_reporting(queryset): the queryset, pinned to the replica;
+* `with replica_reads():` (or as a decorator): every read in the block is
+  sent there by ReplicaRouter (core.routers), including those made inside
+  helpers that build their own querysets. A queryset created in the block
+  but evaluated after it reads the primary; pin it with using_reporting().
+
+Writes always go to the primary. When no snapshot exists, or the snapshot
+is older than REPLICA_MAX_AGE, or the replica alias points at the primary
+itself (as it does in tests), reads stay on the primary.
+"""
+import os
+import sqlite3
+import time
+from contextlib import closing, contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+REPLICA = 'replica'
+
+_reading = ContextVar('core.replica.reading', default=False)
+
+
+def replica_path():
+    return Path(getattr(settings, 'REPLICA_PATH', settings.BASE_DIR / 'replica.sqlite3'))
+
+
+def age():
+    """Seconds since the snapshot was taken, or None when there is none."""
+    try:
+        return time.time() - os.path.getmtime(replica_path())
+    except OSError:
+        return None
+
+
+def available():
+    if REPLICA not in settings.DATABASES:
+        return False
+    if connections[REPLICA].settings_dict['NAME'] == connections[DEFAULT_DB_ALIAS].settings_dict['NAME']:
+        return False
+    snapshot_age = age()
+    return snapshot_age is not None and snapshot_age <= getattr(settings, 'REPLICA_MAX_AGE', 15 * 60)
+
+
+def reading():
+    """Whether reads are currently routed to the replica."""
+    return _reading.get()
+
+
+@contextmanager
+def replica_reads():
+    token = _reading.set(available())
+    try:
+        yield
+    finally:
+        _reading.reset(token)
+
+
+def using_reporting(queryset):
+    """`queryset` on the replica, or unchanged when the replica is unavailable."""
+    return queryset.using(REPLICA) if available() else queryset
+
+
+def refresh(using=DEFAULT_DB_ALIAS, path=None):
+    """Snapshot the `using` database to `path` (default REPLICA_PATH); returns the seconds the copy took."""
+    path = Path(path or replica_path())
+    partial = path.with_name(f'{path.name}.partial')
+    partial.unlink(missing_ok=True)
+    source = connections[using]
+    source.ensure_connection()
+    start = time.perf_counter()
+    with closing(sqlite3.connect(partial)) as target:
+        source.connection.backup(target)
+        # A copy of a WAL database is WAL too, and could not be opened read-only without its -shm file.
+        target.execute('PRAGMA journal_mode=DELETE')
+    seconds = time.perf_counter() - start
+    os.replace(partial, path)
+    if REPLICA in settings.DATABASES:
+        # Reopen on the new file on next use.
+        connections[REPLICA].close()
+    return seconds
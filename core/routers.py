@@ -0,0 +1,30 @@
+# core/routers.py
+from django.db import DEFAULT_DB_ALIAS
+
+from .replica import REPLICA, reading
+
+
+class ReplicaRouter:
+    """Sends reads made inside replica_reads() to the snapshot replica (see core.replica); writes to the primary."""
+
+    def db_for_read(self, model, **hints):
+        if reading():
+            return REPLICA
+        return None
+
+    def db_for_write(self, model, **hints):
+        # A record read from the snapshot is saved to the primary.
+        instance = hints.get('instance')
+        if instance is not None and instance._state.db == REPLICA:
+            return DEFAULT_DB_ALIAS
+        return None
+
+    def allow_relation(self, obj1, obj2, **hints):
+        if {obj1._state.db, obj2._state.db} <= {DEFAULT_DB_ALIAS, REPLICA}:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db == REPLICA:
+            return False
+        return None
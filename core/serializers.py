@@ -0,0 +1,29 @@
+# core/serializers.py
+from rest_framework import serializers
+
+from communication.models import Task
+from hr.models import LeaveRequest
+
+
+class TaskSyncSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Task
+        fields = ['id', 'title', 'description', 'assigned_to', 'department', 'priority', 'status', 'due_date',
+                  'assigned_by', 'created_by', 'created_at', 'updated_at']
+        read_only_fields = ['assigned_by', 'created_by', 'created_at', 'updated_at']
+
+
+class LeaveRequestSyncSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = LeaveRequest
+        fields = ['id', 'leave_type', 'start_date', 'end_date', 'reason', 'status', 'employee', 'approved_by',
+                  'created_at', 'updated_at']
+        # Approval happens online; a field officer files and edits their own requests.
+        read_only_fields = ['status', 'employee', 'approved_by', 'created_at', 'updated_at']
+
+    def validate(self, attrs):
+        start = attrs.get('start_date', getattr(self.instance, 'start_date', None))
+        end = attrs.get('end_date', getattr(self.instance, 'end_date', None))
+        if start and end and end < start:
+            raise serializers.ValidationError({'end_date': 'The leave cannot end before it starts.'})
+        return attrs
@@ -0,0 +1,225 @@
+# core/slow_query_log.py
+"""
+Slow-query log.
+
+install_slow_query_wrapper() runs on every new database connection and adds
+an execute wrapper that times each statement. Statements slower than
+SLOW_QUERY_THRESHOLD_MS are handed, with their parameters, the calling view
+and a stack summary, to a background worker. The worker runs EXPLAIN QUERY
+PLAN on its own connection and counts the statement on the core.SlowQuery
+row for its fingerprint, so the request that issued the query never waits
+on the log.
+
+Parameters and literals can hold passwords, NINs, phone numbers or bank
+details, so the stored example keeps only their types and placeholders.
+"""
+import hashlib
+import logging
+import queue
+import re
+import threading
+import time
+import traceback
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import IntegrityError, OperationalError, connections, transaction
+from django.db.models import F
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+current_view = ContextVar('current_view', default='')
+
+_local = threading.local()
+_queue = queue.Queue(maxsize=1000)
+_worker = None
+_worker_lock = threading.Lock()
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r'\b\d+(?:\.\d+)?\b')
+_PLACEHOLDER = re.compile(r'%s|\?')
+_IN_LIST = re.compile(r'\(\s*\?(?:\s*,\s*\?)+\s*\)')
+_WHITESPACE = re.compile(r'\s+')
+
+
+def threshold_ms():
+    return getattr(settings, 'SLOW_QUERY_THRESHOLD_MS', 200)
+
+
+def normalize_sql(sql):
+    """Replace literals and placeholders so that equivalent statements match."""
+    sql = _STRING_LITERAL.sub('?', sql)
+    sql = _NUMBER_LITERAL.sub('?', sql)
+    sql = _PLACEHOLDER.sub('?', sql)
+    sql = _IN_LIST.sub('(...)', sql)
+    return _WHITESPACE.sub(' ', sql).strip()
+
+
+def redact_sql(sql):
+    """`sql` with its string and number literals replaced by placeholders, layout kept."""
+    return _NUMBER_LITERAL.sub('?', _STRING_LITERAL.sub('?', sql))
+
+
+def redact_params(params):
+    """The shape of `params` with every value replaced by its type name, e.g. [int, str, None]."""
+    if isinstance(params, (list, tuple)):
+        return '[' + ', '.join(redact_params(value) for value in params) + ']'
+    if isinstance(params, dict):
+        return '{' + ', '.join(f'{key!r}: {redact_params(value)}' for key, value in params.items()) + '}'
+    if params is None:
+        return 'None'
+    return type(params).__name__
+
+
+def fingerprint(normalized_sql):
+    return hashlib.sha1(normalized_sql.encode()).hexdigest()
+
+
+def stack_summary(limit=8):
+    """The innermost project frames that led to the query, outermost first."""
+    base_dir = str(settings.BASE_DIR)
+    frames = [
+        frame for frame in traceback.extract_stack()
+        if frame.filename.startswith(base_dir) and 'site-packages' not in frame.filename
+        and not frame.filename.endswith('slow_query_log.py')
+    ]
+    return '\n'.join(
+        f'{frame.filename[len(base_dir) + 1:]}:{frame.lineno} in {frame.name}' for frame in frames[-limit:]
+    )
+
+
+def slow_query_wrapper(execute, sql, params, many, context):
+    if getattr(_local, 'recording', False):
+        return execute(sql, params, many, context)
+
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        if elapsed_ms >= threshold_ms():
+            report_slow_query(context['connection'].alias, sql, params, many, elapsed_ms)
+
+
+def report_slow_query(alias, sql, params, many, elapsed_ms):
+    item = {
+        'alias': alias,
+        'sql': sql,
+        'params': params,
+        'many': many,
+        'elapsed_ms': elapsed_ms,
+        'view_name': current_view.get(),
+        'stack': stack_summary(),
+        'seen_at': timezone.now(),
+    }
+    try:
+        _queue.put_nowait(item)
+    except queue.Full:
+        logger.warning('Slow query log queue is full, dropping %.1f ms query', elapsed_ms)
+        return
+    _ensure_worker()
+
+
+def install_slow_query_wrapper(sender, connection, **kwargs):
+    """connection_created receiver; reconnects reuse the same wrapper list."""
+    if slow_query_wrapper not in connection.execute_wrappers:
+        connection.execute_wrappers.append(slow_query_wrapper)
+
+
+def _ensure_worker():
+    global _worker
+    with _worker_lock:
+        if _worker is None or not _worker.is_alive():
+            _worker = threading.Thread(target=_drain_queue, name='slow-query-log', daemon=True)
+            _worker.start()
+
+
+def _drain_queue():
+    while True:
+        item = _queue.get()
+        try:
+            for attempt in range(3):
+                try:
+                    record_slow_query(item)
+                    break
+                except OperationalError:
+                    # SQLite refuses a lock upgrade while another writer is active.
+                    if attempt == 2:
+                        raise
+                    time.sleep(0.1 * (attempt + 1))
+        except Exception:
+            logger.exception('Could not record slow query')
+        finally:
+            _queue.task_done()
+
+
+def explain(alias, sql, params, many):
+    if many or not sql.lstrip().upper().startswith(('SELECT', 'WITH')):
+        return ''
+    connection = connections[alias]
+    prefix = 'EXPLAIN QUERY PLAN ' if connection.vendor == 'sqlite' else 'EXPLAIN '
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(prefix + sql, params)
+            rows = cursor.fetchall()
+    except Exception as exc:
+        return f'EXPLAIN failed: {exc}'
+    if connection.vendor != 'sqlite':
+        # Other backends quote the parameters in filter conditions.
+        return _STRING_LITERAL.sub('?', '\n'.join(' '.join(str(value) for value in row) for row in rows))
+
+    # SQLite rows are (id, parent, notused, detail); indent children under parents.
+    depth = {0: -1}
+    lines = []
+    for node_id, parent_id, _, detail in rows:
+        depth[node_id] = depth.get(parent_id, -1) + 1
+        lines.append('  ' * depth[node_id] + detail)
+    return '\n'.join(lines)
+
+
+def record_slow_query(item):
+    """Count the item on the SlowQuery row for its fingerprint and trim the table."""
+    from .models import SlowQuery
+
+    _local.recording = True
+    try:
+        normalized = normalize_sql(item['sql'])
+        key = fingerprint(normalized)
+        elapsed_ms = item['elapsed_ms']
+        # Counted with F() in the UPDATE, so that other processes logging the same fingerprint add up.
+        counts = {
+            'count': F('count') + 1,
+            'total_ms': F('total_ms') + elapsed_ms,
+            'last_seen': item['seen_at'],
+            'last_view': item['view_name'],
+        }
+        with transaction.atomic():
+            if not SlowQuery.objects.filter(fingerprint=key).update(**counts):
+                try:
+                    with transaction.atomic():
+                        SlowQuery.objects.create(
+                            fingerprint=key, normalized_sql=normalized, count=1, total_ms=elapsed_ms,
+                            first_seen=item['seen_at'], last_seen=item['seen_at'], last_view=item['view_name'],
+                        )
+                except IntegrityError:
+                    # Another process inserted the fingerprint since the UPDATE.
+                    SlowQuery.objects.filter(fingerprint=key).update(**counts)
+
+            worse = SlowQuery.objects.filter(fingerprint=key, worst_ms__lte=elapsed_ms)
+            if worse.exists():
+                # Keep the worst example, with its plan, for diagnosis.
+                worse.update(
+                    worst_ms=elapsed_ms,
+                    example_sql=redact_sql(item['sql']),
+                    example_params=redact_params(item['params'])[:2000],
+                    stack=item['stack'],
+                    explain_plan=explain(item['alias'], item['sql'], item['params'], item['many']),
+                )
+
+            max_rows = getattr(settings, 'SLOW_QUERY_LOG_MAX_ROWS', 500)
+            stale = list(SlowQuery.objects.order_by('-last_seen').values_list('id', flat=True)[max_rows:])
+            if stale:
+                SlowQuery.objects.filter(id__in=stale).delete()
+    finally:
+        _local.recording = False
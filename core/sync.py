@@ -0,0 +1,321 @@
+# core/sync.py
+"""
+Offline delta sync for field and LGA officers.
+
+A client keeps local copies of the records in its scope (RESOURCES: its
+tasks, its leave requests, the expenditures it may see) and talks to
+`api/sync/` in as few round trips as a flaky connection allows:
+
+* pull(): given the opaque watermark of its last pull, the client gets the
+  records changed since, keyset ordered on (updated_at, id) per resource,
+  as a header of field names and one list of values per record, and the
+  ids of records removed since (Tombstone rows, written when a record is
+  deleted or moves out of someone's scope, e.g. a reassigned task). It
+  applies the removals first, then the changes, and pulls again while
+  `more` is set. Tombstones are paged ahead of changes, so a page never
+  carries a change that a later page's removal would wrongly drop.
+* push(): a batch of queued local creates, updates and deletes, applied
+  one by one, each in its own transaction, with a result per change:
+  created, updated, deleted, conflict (the record changed on the server
+  since the client's `base` updated_at; the server copy is returned),
+  invalid, not_found or forbidden. A create carries a client id; its
+  SyncReceipt makes a replayed upload return the record it already made.
+  A change is forbidden when the user may not write the resource at all
+  (Resource.writable(), for expenditures the finance API's write roles)
+  or when it would leave the record outside what they may edit, e.g. a
+  task reassigned away from them; the change is then rolled back.
+
+Watermarks step back SYNC_LAG from the time of the pull, so a write that
+committed just after the pull read is picked up by the next one (and a
+few records are sent twice; applying them is idempotent). A watermark
+older than RETENTION, the age past which tombstones and receipts are
+pruned (`manage.py prune_sync_history`), gets `reset`: a full snapshot
+that replaces the client's copy.
+"""
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+from django.core import signing
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from communication.models import Task
+from finance.models import Expenditure
+from finance.serializers import ExpenditureSerializer
+from finance.views import ExpenditureViewSet
+from hr.models import LeaveRequest
+
+from .models import SyncReceipt, Tombstone
+from .serializers import LeaveRequestSyncSerializer, TaskSyncSerializer
+
+PAGE_SIZE = 500
+MAX_PAGE_SIZE = 2000
+MAX_CHANGES = 500
+SYNC_LAG = timedelta(seconds=5)
+RETENTION = timedelta(days=30)
+SALT = 'core.sync'
+
+
+class Resource:
+    """How one model is synced: what a client sees, may change, and receives of each record."""
+    name = None
+    model = None
+    serializer_class = None
+    fields = []
+    # Fields that decide whose scope a record is in; changing one writes a tombstone.
+    scope_fields = []
+
+    def visible(self, user):
+        raise NotImplementedError
+
+    def editable(self, user):
+        return self.visible(user)
+
+    def writable(self, user, op):
+        """Whether `user` may `op` ('create', 'update' or 'delete') records of this resource at all."""
+        return True
+
+    def create_kwargs(self, user):
+        return {}
+
+    def row(self, instance):
+        return {name: getattr(instance, self.model._meta.get_field(name).attname) for name in self.fields}
+
+
+class TaskResource(Resource):
+    name = 'tasks'
+    model = Task
+    serializer_class = TaskSyncSerializer
+    fields = TaskSyncSerializer.Meta.fields
+    scope_fields = ['assigned_to_id', 'assigned_by_id', 'created_by_id']
+
+    def visible(self, user):
+        return Task.objects.filter(Q(assigned_to=user) | Q(assigned_by=user) | Q(created_by=user))
+
+    def create_kwargs(self, user):
+        return {'assigned_by': user, 'created_by': user}
+
+
+class LeaveRequestResource(Resource):
+    name = 'leave_requests'
+    model = LeaveRequest
+    serializer_class = LeaveRequestSyncSerializer
+    fields = LeaveRequestSyncSerializer.Meta.fields
+    scope_fields = ['employee_id', 'approved_by_id']
+
+    def visible(self, user):
+        return LeaveRequest.objects.filter(Q(employee=user) | Q(approved_by=user))
+
+    def editable(self, user):
+        return LeaveRequest.objects.filter(employee=user, status='pending')
+
+    def create_kwargs(self, user):
+        return {'employee': user}
+
+
+class ExpenditureResource(Resource):
+    name = 'expenditures'
+    model = Expenditure
+    serializer_class = ExpenditureSerializer
+    fields = ['id', 'amount', 'description', 'date', 'expenditure_type', 'department', 'state', 'project',
+              'program', 'approved_by', 'submitted_by', 'updated_at']
+    scope_fields = ['department_id', 'state_id', 'submitted_by_id']
+
+    def view(self, user):
+        # The finance API acting for `user`: synced writes follow its scope and write roles.
+        return ExpenditureViewSet(request=SimpleNamespace(user=user))
+
+    def visible(self, user):
+        return self.view(user).scope(Expenditure.objects.all())
+
+    def editable(self, user):
+        # Approved expenditures are settled.
+        return self.visible(user).filter(approved_by__isnull=True)
+
+    def writable(self, user, op):
+        if op == 'delete':
+            return user.is_superuser
+        return user.is_superuser or user.current_role in ExpenditureViewSet.write_roles
+
+    def create_kwargs(self, user):
+        return {'submitted_by': user}
+
+
+RESOURCES = {resource.name: resource
+             for resource in (TaskResource(), LeaveRequestResource(), ExpenditureResource())}
+BY_MODEL = {resource.model: resource for resource in RESOURCES.values()}
+
+
+def record_pre_save(sender, instance, raw=False, **kwargs):
+    """pre_save receiver for the synced models: remember whose scope the record was in."""
+    if raw or instance.pk is None:
+        return
+    resource = BY_MODEL[sender]
+    instance._sync_scope = sender.objects.filter(pk=instance.pk).values_list(*resource.scope_fields).first()
+
+
+def record_saved(sender, instance, created, raw=False, **kwargs):
+    """post_save receiver: a record that changed scope is removed from its old holders' copies."""
+    if raw or created:
+        return
+    resource = BY_MODEL[sender]
+    previous = getattr(instance, '_sync_scope', None)
+    if previous is not None and previous != tuple(getattr(instance, field) for field in resource.scope_fields):
+        Tombstone.objects.create(resource=resource.name, object_id=instance.pk)
+
+
+def scope(instance):
+    """The scope fields of a synced record, for record_bulk_saved(); None for other models."""
+    resource = BY_MODEL.get(type(instance))
+    return None if resource is None else tuple(getattr(instance, field) for field in resource.scope_fields)
+
+
+def record_bulk_saved(pairs):
+    """record_saved() for bulk_update(), which sends no signals: (scope() before the update, instance) pairs."""
+    Tombstone.objects.bulk_create([
+        Tombstone(resource=BY_MODEL[type(instance)].name, object_id=instance.pk)
+        for previous, instance in pairs if previous is not None and previous != scope(instance)
+    ])
+
+
+def record_deleted(sender, instance, **kwargs):
+    """post_delete receiver for the synced models."""
+    Tombstone.objects.create(resource=BY_MODEL[sender].name, object_id=instance.pk)
+
+
+def watermark(issued, tombstone, cursors):
+    return signing.dumps({'issued': issued.isoformat(), 'tombstone': tombstone, 'cursors': cursors},
+                         salt=SALT, compress=True)
+
+
+def read_watermark(token):
+    """The state behind a watermark from watermark(); raises signing.BadSignature if it was tampered with."""
+    state = signing.loads(token, salt=SALT)
+    state['issued'] = datetime.fromisoformat(state['issued'])
+    return state
+
+
+def pull(user, since=None, limit=PAGE_SIZE):
+    """
+    The changes visible to `user` since the watermark `since` (None for a
+    full snapshot): {'watermark', 'more', 'reset', 'deleted': {resource:
+    [ids]}, 'changes': {resource: {'fields': [...], 'rows': [[...]]}}}.
+    """
+    now = timezone.now()
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    state = read_watermark(since) if since else None
+    reset = state is None or state['issued'] < now - RETENTION
+    result = {'more': False, 'reset': reset, 'deleted': {}, 'changes': {}}
+
+    if reset:
+        cursors = {}
+        tombstone = Tombstone.objects.order_by('-pk').values_list('pk', flat=True).first() or 0
+    else:
+        cursors = state['cursors']
+        tombstone = state['tombstone']
+        removed = list(Tombstone.objects.filter(pk__gt=tombstone, resource__in=RESOURCES).order_by('pk')
+                       .values_list('pk', 'resource', 'object_id')[:limit + 1])
+        if len(removed) > limit:
+            # Removals first; the changes wait for the next page.
+            removed = removed[:limit]
+            result['more'] = True
+        for pk, resource, object_id in removed:
+            result['deleted'].setdefault(resource, []).append(object_id)
+        if removed:
+            tombstone = removed[-1][0]
+        if result['more']:
+            result['watermark'] = watermark(state['issued'], tombstone, cursors)
+            return result
+
+    for name, resource in RESOURCES.items():
+        records = resource.visible(user).order_by('updated_at', 'pk')
+        cursor = cursors.get(name)
+        if cursor is not None:
+            updated_at = datetime.fromisoformat(cursor[0])
+            records = records.filter(Q(updated_at__gt=updated_at) | Q(updated_at=updated_at, pk__gt=cursor[1]))
+        rows = list(records.values_list(*resource.fields)[:limit + 1])
+        if len(rows) > limit:
+            rows = rows[:limit]
+            result['more'] = True
+            last = dict(zip(resource.fields, rows[-1]))
+            cursors[name] = [last['updated_at'].isoformat(), last['id']]
+        elif cursor is None or datetime.fromisoformat(cursor[0]) < now - SYNC_LAG:
+            cursors[name] = [(now - SYNC_LAG).isoformat(), 0]
+        if rows:
+            result['changes'][name] = {'fields': resource.fields, 'rows': rows}
+    result['watermark'] = watermark(now, tombstone, cursors)
+    return result
+
+
+def _apply(user, change):
+    resource = RESOURCES.get(change.get('resource'))
+    op = change.get('op')
+    result = {'client_id': change.get('client_id'), 'resource': change.get('resource'), 'id': change.get('id')}
+    if resource is None or op not in ('create', 'update', 'delete'):
+        return dict(result, status='invalid', errors={'resource': 'Unknown resource or operation.'})
+
+    if op == 'create':
+        client_id = str(change.get('client_id') or '')[:64]
+        if not client_id:
+            return dict(result, status='invalid', errors={'client_id': 'A create needs a client id.'})
+        try:
+            with transaction.atomic():
+                receipt = SyncReceipt.objects.filter(user=user, client_id=client_id).first()
+                if receipt is not None:
+                    return dict(result, status='created', id=receipt.object_id, replayed=True)
+                if not resource.writable(user, op):
+                    return dict(result, status='forbidden')
+                serializer = resource.serializer_class(data=change.get('data') or {})
+                if not serializer.is_valid():
+                    return dict(result, status='invalid', errors=serializer.errors)
+                instance = serializer.save(**resource.create_kwargs(user))
+                if not resource.editable(user).filter(pk=instance.pk).exists():
+                    transaction.set_rollback(True)
+                    return dict(result, status='forbidden')
+                SyncReceipt.objects.create(user=user, client_id=client_id, resource=resource.name,
+                                           object_id=instance.pk)
+        except IntegrityError:
+            # A concurrent replay of the same upload committed its receipt first; ours was rolled back.
+            receipt = SyncReceipt.objects.filter(user=user, client_id=client_id).first()
+            if receipt is None:
+                raise
+            return dict(result, status='created', id=receipt.object_id, replayed=True)
+        return dict(result, status='created', id=instance.pk, record=resource.row(instance))
+
+    with transaction.atomic():
+        instance = resource.visible(user).select_for_update().filter(pk=change.get('id')).first()
+        if instance is None:
+            return dict(result, status='not_found')
+        base = parse_datetime(str(change.get('base') or ''))
+        if base is not None and base != instance.updated_at:
+            return dict(result, status='conflict', record=resource.row(instance))
+        if not resource.writable(user, op) or not resource.editable(user).filter(pk=instance.pk).exists():
+            return dict(result, status='forbidden', record=resource.row(instance))
+        if op == 'delete':
+            instance.delete()
+            return dict(result, status='deleted')
+        record = resource.row(instance)
+        serializer = resource.serializer_class(instance, data=change.get('data') or {}, partial=True)
+        if not serializer.is_valid():
+            return dict(result, status='invalid', errors=serializer.errors)
+        instance = serializer.save()
+        if not resource.editable(user).filter(pk=instance.pk).exists():
+            # It would leave the user's scope: keep the server copy.
+            transaction.set_rollback(True)
+            return dict(result, status='forbidden', record=record)
+        return dict(result, status='updated', record=resource.row(instance))
+
+
+def push(user, changes):
+    """Apply a client's queued `changes` in order; one result per change."""
+    return [_apply(user, change if isinstance(change, dict) else {}) for change in changes]
+
+
+def prune(now=None):
+    """Drop the tombstones and receipts older than RETENTION; returns how many rows went."""
+    cutoff = (now or timezone.now()) - RETENTION
+    tombstones, _ = Tombstone.objects.filter(removed_at__lt=cutoff).delete()
+    receipts, _ = SyncReceipt.objects.filter(created_at__lt=cutoff).delete()
+    return tombstones + receipts
@@ -0,0 +1,318 @@
+# core/testing.py
+"""
+Shared test harness for per-view query budgets.
+
+Each app declares, in its tests.py, the maximum number of SQL queries every
+one of its URLs may issue. The harness seeds a small data set, measures every
+view, grows the data set and measures again. A view fails when it exceeds its
+budget or when its query count changes with the volume of data (an N+1).
+"""
+import unittest
+from datetime import timedelta
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import URLPattern, URLResolver, include, path, reverse
+from django.utils import timezone
+
+from communication.models import (
+    InAppEmail, InAppChat, ChatMessage, Notification, Task, DepartmentAnnouncement, Newsletter
+)
+from core.models import (
+    Employee, Zone, State, LGA, Department, GradeLevel, File, FileHistory, Event, HelpArticle
+)
+from hr.models import (
+    EmployeeDetail, Promotion, Examination, LeaveRequest, Transfer, PerformanceReview,
+    Training, Repatriation, StaffVerification, ChangeOfVitalInformation, RecordOfService
+)
+from monitoring import kpi_series, status as project_status
+from monitoring.models import Project, ProjectStatus, Milestone, KPI, Risk
+
+# URLconf used by the harness: hr and communication are not mounted in the
+# project URLconf yet, but their views still need budgets.
+urlpatterns = [
+    path('', include('core.urls')),
+    path('hr/', include('hr.urls')),
+    path('communication/', include('communication.urls')),
+    path('monitoring/', include('monitoring.urls')),
+]
+
+SMALL_ROWS = 10
+LARGE_ROWS = 1000
+
+
+class DataSeeder:
+    """Creates a realistic, growing data set around a single signed-in user."""
+
+    def __init__(self):
+        self.offset = 0
+        self.zone = Zone.objects.create(code='NC', name='North Central')
+        self.state = State.objects.create(code='FCT', name='Federal Capital Territory', zone=self.zone)
+        self.lga = LGA.objects.create(code='AMAC', name='Abuja Municipal', state=self.state)
+        self.department = Department.objects.create(code='HRM', name='Human Resource Management')
+        self.other_department = Department.objects.create(code='FIN', name='Finance and Accounts')
+        self.grade = GradeLevel.objects.create(
+            level=8, name='GL 08', per_diem=Decimal('10000'), local_running=Decimal('5000'),
+            estacode=Decimal('200'), assumption_of_duty=Decimal('50000'))
+        self.next_grade = GradeLevel.objects.create(
+            level=9, name='GL 09', per_diem=Decimal('12000'), local_running=Decimal('6000'),
+            estacode=Decimal('250'), assumption_of_duty=Decimal('60000'))
+        self.user = Employee.objects.create_superuser(
+            employee_id='NDE0000', ippis_number='IPPIS0000', email='user@nde.gov.ng', password='pass',
+            first_name='Ada', last_name='Obi', current_department=self.department,
+            current_state=self.state, current_zone=self.zone, current_grade_level=self.grade,
+            password_change_required=False)
+        self.user_detail = EmployeeDetail.objects.create(
+            employee=self.user, first_name='Ada', surname='Obi', file_number='F0000')
+        self.chat = InAppChat.objects.create(is_group_chat=True, group_name='HRM Staff')
+        self.chat.participants.add(self.user)
+        self.project = None
+        self.file = None
+        self.email = None
+        self.task = None
+        self.notification = None
+        self.leave_request = None
+
+    def seed(self, rows):
+        """Add `rows` objects of every kind the views under test read."""
+        now = timezone.now()
+        today = now.date()
+        start = self.offset
+        self.offset += rows
+        numbers = range(start, self.offset)
+
+        colleagues = Employee.objects.bulk_create([
+            Employee(
+                employee_id=f'NDE{n + 1:05d}', ippis_number=f'IPPIS{n + 1:05d}',
+                email=f'staff{n + 1}@nde.gov.ng', first_name=f'Staff{n}', last_name='Member',
+                current_department=self.department, current_state=self.state,
+                current_zone=self.zone, current_grade_level=self.grade, password='!')
+            for n in numbers
+        ])
+        EmployeeDetail.objects.bulk_create([
+            EmployeeDetail(employee=colleague, first_name=colleague.first_name, surname='Member',
+                           file_number=f'F{n + 1:05d}')
+            for n, colleague in zip(numbers, colleagues)
+        ])
+        self.chat.participants.add(*colleagues)
+
+        emails = InAppEmail.objects.bulk_create([
+            InAppEmail(sender=colleague, subject=f'Memo {n}', body='Please review.')
+            for n, colleague in zip(numbers, colleagues)
+        ])
+        InAppEmail.recipients.through.objects.bulk_create([
+            InAppEmail.recipients.through(inappemail_id=email.id, employee_id=self.user.id)
+            for email in emails
+        ])
+        ChatMessage.objects.bulk_create([
+            ChatMessage(chat=self.chat, sender=colleague, content=f'Message {n}')
+            for n, colleague in zip(numbers, colleagues)
+        ])
+        tasks = Task.objects.bulk_create([
+            Task(title=f'Task {n}', description='Follow up.', assigned_by=colleague, assigned_to=self.user,
+                 created_by=colleague, department=self.department, due_date=now + timedelta(days=n % 30))
+            for n, colleague in zip(numbers, colleagues)
+        ])
+        DepartmentAnnouncement.objects.bulk_create([
+            DepartmentAnnouncement(department=self.department, title=f'Notice {n}', content='All staff.',
+                                   author=colleague)
+            for n, colleague in zip(numbers, colleagues)
+        ])
+        Newsletter.objects.bulk_create([
+            Newsletter(title=f'Bulletin {n}', content='News.', author=colleague, is_published=True,
+                       published_at=now)
+            for n, colleague in zip(numbers, colleagues)
+        ])
+        notifications = Notification.objects.bulk_create([
+            Notification(recipient=self.user, notification_type='TASK', title=f'Task {n}', content='Assigned.')
+            for n in numbers
+        ])
+        files = File.objects.bulk_create([
+            File(title=f'File {n}', file_number=f'NDE/F/{n}', file_type='OPEN',
+                 current_department=self.department, assigned_to=self.user, created_by=colleague)
+            for n, colleague in zip(numbers, colleagues)
+        ])
+        FileHistory.objects.bulk_create([
+            FileHistory(file=files[0], action=f'Minuted {n}', from_department=self.department,
+                        to_department=self.other_department, performed_by=colleague)
+            for n, colleague in zip(numbers, colleagues)
+        ])
+        Event.objects.bulk_create([
+            Event(user=self.user, title=f'Event {n}', start_date=now, end_date=now + timedelta(hours=1))
+            for n in numbers
+        ])
+        HelpArticle.objects.bulk_create([
+            HelpArticle(title=f'Article {n}', content='How to.', category='General') for n in numbers
+        ])
+
+        leave_requests = LeaveRequest.objects.bulk_create([
+            LeaveRequest(employee=employee, leave_type='annual', start_date=today, end_date=today + timedelta(days=5),
+                         reason='Rest')
+            for employee in [self.user] + colleagues[:-1]
+        ])
+        Promotion.objects.bulk_create([
+            Promotion(employee=self.user, from_grade=self.grade, to_grade=self.next_grade, from_step=n,
+                      to_step=n + 1, promotion_date=today, effective_date=today, approved_by=colleague)
+            for n, colleague in zip(numbers, colleagues)
+        ])
+        Examination.objects.bulk_create([
+            Examination(employee=self.user, exam_type='PROMOTION', exam_date=today, exam_title=f'Exam {n}',
+                        passing_score=Decimal('50'))
+            for n in numbers
+        ])
+        Transfer.objects.bulk_create([
+            Transfer(employee=self.user, from_department=self.other_department, to_department=self.department,
+                     transfer_date=today, reason='Posting', approved_by=colleague)
+            for colleague in colleagues
+        ])
+        PerformanceReview.objects.bulk_create([
+            PerformanceReview(employee=self.user, reviewer=colleague, review_date=today,
+                              performance_score=Decimal('4.50'), comments='Good', goals_set='More')
+            for colleague in colleagues
+        ])
+        Repatriation.objects.bulk_create([
+            Repatriation(employee=self.user, from_state=self.state, to_state=self.state,
+                         repatriation_date=today, reason='Request', approved_by=colleague)
+            for colleague in colleagues
+        ])
+        StaffVerification.objects.bulk_create([
+            StaffVerification(employee=self.user, verification_date=today, verified_by=colleague, is_verified=True)
+            for colleague in colleagues
+        ])
+        ChangeOfVitalInformation.objects.bulk_create([
+            ChangeOfVitalInformation(employee=self.user, field_changed='phone_number', old_value='0', new_value='1',
+                                     change_date=today, approved_by=colleague, reason='Update')
+            for colleague in colleagues
+        ])
+        RecordOfService.objects.bulk_create([
+            RecordOfService(employee=self.user, event_type='OTHER', event_date=today, description=f'Record {n}')
+            for n in numbers
+        ])
+        trainings = Training.objects.bulk_create([
+            Training(title=f'Training {n}', description='Course', start_date=today + timedelta(days=1),
+                     end_date=today + timedelta(days=3), trainer='ASCON')
+            for n in numbers
+        ])
+        Training.participants.through.objects.bulk_create([
+            Training.participants.through(training_id=training.id, employee_id=employee.id)
+            for training, employee in zip(trainings, [self.user] + colleagues[:-1])
+        ])
+
+        projects = Project.objects.bulk_create([
+            Project(title=f'Project {n}', description='Empowerment',
+                    start_date=today - timedelta(days=30), end_date=today + timedelta(days=30),
+                    department=self.department, state=self.state, project_manager=self.user,
+                    assigned_to=self.user)
+            for n in numbers
+        ])
+        ProjectStatus.objects.bulk_create([
+            ProjectStatus(project=project, status='IN_PROGRESS', updated_by=self.user) for project in projects
+        ])
+        project_status.sync([project.pk for project in projects])
+        Milestone.objects.bulk_create([
+            Milestone(project=project, title=f'Milestone {n}', description='Deliverable',
+                      due_date=today + timedelta(days=n % 30))
+            for n, project in zip(numbers, projects)
+        ])
+        KPI.objects.bulk_create([
+            KPI(project=project, name=f'KPI {n}', description='Trainees', target_value=100, actual_value=n % 100,
+                unit='people', date=today)
+            for n, project in zip(numbers, projects)
+        ])
+        kpi_series.rebuild((project.pk, f'KPI {n}') for n, project in zip(numbers, projects))
+        Risk.objects.bulk_create([
+            Risk(project=project, description='Funding delay', severity=Risk.SEVERITY_CHOICES[n % 4][0],
+                 mitigation_plan='Escalate.', identified_by=self.user)
+            for n, project in zip(numbers, projects)
+        ])
+
+        self.project = self.project or projects[0]
+        self.file = self.file or files[0]
+        self.email = self.email or emails[0]
+        self.task = self.task or tasks[0]
+        self.notification = self.notification or notifications[0]
+        self.leave_request = self.leave_request or leave_requests[0]
+
+
+@override_settings(ROOT_URLCONF='core.testing')
+class QueryBudgetTestCase(TestCase):
+    """
+    Base class for per-view query budgets.
+
+    Subclasses set `namespace` and `budgets`, a mapping of URL name to a dict
+    with `max_queries` and, for URLs with parameters, a `kwargs` callable that
+    receives the DataSeeder and returns the reverse() kwargs. A budgeted URL
+    must answer GET with a 2xx or 3xx response. URLs that cannot (POST-only
+    endpoints, views that do not render yet) go in `unbudgeted`, a mapping of
+    URL name to the reason.
+    """
+
+    namespace = None
+    budgets = {}
+    unbudgeted = {}
+
+    @classmethod
+    def setUpClass(cls):
+        if cls.namespace is None:
+            raise unittest.SkipTest('QueryBudgetTestCase is a base class')
+        super().setUpClass()
+
+    def setUp(self):
+        self.seeder = DataSeeder()
+
+    def url_for(self, name, budget):
+        kwargs = budget['kwargs'](self.seeder) if 'kwargs' in budget else {}
+        return reverse(f'{self.namespace}:{name}', kwargs=kwargs)
+
+    def prepare_request(self):
+        # Cached pages would hide the queries of the view itself, and
+        # core:logout ends the session of the previous request.
+        cache.clear()
+        self.client.force_login(self.seeder.user)
+
+    def count_queries(self, url):
+        """The status code of a GET of `url` and the number of queries it issued."""
+        # The first visit may create per-user rows (settings, read receipts);
+        # budgets describe the steady state.
+        self.prepare_request()
+        self.client.get(url)
+        self.prepare_request()
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url)
+        return response.status_code, len(context.captured_queries)
+
+    def measure(self):
+        """URL name -> query count; fails on the first URL that does not answer with a 2xx or 3xx."""
+        counts = {}
+        for name, budget in self.budgets.items():
+            status, counts[name] = self.count_queries(self.url_for(name, budget))
+            self.assertLess(status, 400, f'{self.namespace}:{name} returned {status}; a budget needs a page that renders')
+        return counts
+
+    def test_every_url_has_a_budget(self):
+        resolver = next(
+            pattern for pattern in urlpatterns
+            if isinstance(pattern, URLResolver) and pattern.namespace == self.namespace
+        )
+        names = {pattern.name for pattern in resolver.url_patterns if isinstance(pattern, URLPattern)}
+        self.assertEqual(names - set(self.budgets) - set(self.unbudgeted), set(), 'URLs without a declared query budget')
+        self.assertEqual(set(self.budgets) & set(self.unbudgeted), set(), 'URLs both budgeted and unbudgeted')
+
+    def test_query_counts_stay_within_budget(self):
+        self.seeder.seed(SMALL_ROWS)
+        small = self.measure()
+        self.seeder.seed(LARGE_ROWS - SMALL_ROWS)
+        large = self.measure()
+
+        for name, budget in self.budgets.items():
+            with self.subTest(view=name):
+                self.assertLessEqual(
+                    large[name], budget['max_queries'],
+                    f'{self.namespace}:{name} issued {large[name]} queries, budget is {budget["max_queries"]}')
+                self.assertEqual(
+                    small[name], large[name],
+                    f'{self.namespace}:{name} issued {small[name]} queries at {SMALL_ROWS} rows '
+                    f'and {large[name]} at {LARGE_ROWS} rows')
@@ -1,3 +1,663 @@
-from django.test import TestCase
+import csv
+import io
+import json
+import shutil
+import sqlite3
+import tempfile
+from datetime import date, timedelta
+from decimal import Decimal
+from pathlib import Path
+from unittest import mock
 
-# Create your tests here.
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import OperationalError, connections, transaction
+from django.db.models import QuerySet
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from communication.models import Task
+from core import change_log, profiling, replica, sync, testing, write_contention
+from core.benchmark import ENDPOINTS, compare_reports, format_diff_table, run_benchmark
+from core.models import ChangeLog, Department, Employee, SlowQuery, State, SyncReceipt, Tombstone, Zone
+from core.national_reports import REPORTS, SNAPSHOT, generate_national_report
+from core.routers import ReplicaRouter
+from core.slow_query_log import fingerprint, normalize_sql, record_slow_query, redact_params
+from finance.models import Expenditure
+from hr.models import EmployeeDetail, LeaveRequest
+
+
+NO_TEMPLATE = 'its template does not exist yet'
+
+
+class CoreQueryBudgetTests(testing.QueryBudgetTestCase):
+    namespace = 'core'
+    # performance_overview reads the reporting database; only queries on the default one count.
+    databases = {'default', 'reporting'}
+    budgets = {
+        'login': {'max_queries': 5},
+        'logout': {'max_queries': 6},
+        'dashboard': {'max_queries': 30},
+        'calendar': {'max_queries': 8},
+        'reports': {'max_queries': 9},
+        'settings': {'max_queries': 6},
+        'help': {'max_queries': 6},
+        'employee_list': {'max_queries': 7},
+        'performance_overview': {'max_queries': 5},
+        'password_reset': {'max_queries': 5},
+        'password_reset_done': {'max_queries': 5},
+        'password_reset_complete': {'max_queries': 5},
+        'search': {'max_queries': 5},
+        'get_messages': {'max_queries': 9},
+        'mark_notification_read': {'max_queries': 7, 'kwargs': lambda s: {'notification_id': s.notification.id}},
+        'sync': {'max_queries': 9},
+        'change_feed': {'max_queries': 7},
+    }
+    unbudgeted = {
+        'change_password': 'core.forms.PasswordChangeForm is a ModelForm and takes no user argument',
+        'profile': NO_TEMPLATE,
+        'file_list': NO_TEMPLATE,
+        'file_create': NO_TEMPLATE,
+        'file_detail': NO_TEMPLATE,
+        'file_update': NO_TEMPLATE,
+        'file_history_add': NO_TEMPLATE,
+        'employee_create': NO_TEMPLATE,
+        'employee_detail': NO_TEMPLATE,
+        'employee_update': NO_TEMPLATE,
+        'employee_delete': NO_TEMPLATE,
+        'data_upload': NO_TEMPLATE,
+        'assign_role': NO_TEMPLATE,
+        'assign_unit': NO_TEMPLATE,
+        'password_reset_confirm': "the template links to the missing 'password_reset_request' URL",
+        'get_notifications': 'filters Notification on a recipients field it does not have',
+    }
+
+
+@override_settings(ROOT_URLCONF='core.testing')
+class RoleDashboardTests(TestCase):
+    def setUp(self):
+        self.seeder = testing.DataSeeder()
+        self.seeder.seed(5)
+
+    def dashboard(self, user):
+        self.client.force_login(user)
+        response = self.client.get(reverse('core:dashboard'))
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def test_each_role_sees_its_panels(self):
+        response = self.dashboard(self.seeder.user)
+        self.assertEqual(set(response.context['dg']), {
+            'total_budget', 'total_expenditure', 'budget_utilization', 'total_projects', 'ongoing_projects',
+            'completed_projects', 'delayed_projects', 'project_completion_rate', 'expenditure_forecast',
+            'departments_at_risk', 'states_at_risk', 'schedule_risks'})
+        self.assertContains(response, 'Projected year-end')
+        self.assertContains(response, 'Schedule risks')
+
+        director = Employee.objects.create_user(
+            employee_id='NDE1000', ippis_number='IPPIS1000', email='dir@nde.gov.ng', password='pass',
+            current_role='DIR', current_department=self.seeder.department)
+        response = self.dashboard(director)
+        self.assertNotIn('dg', response.context)
+        self.assertEqual(response.context['management']['department_employees'], 7)
+        self.assertContains(response, 'Projected year-end')
+
+        coordinator = Employee.objects.create_user(
+            employee_id='NDE1001', ippis_number='IPPIS1001', email='sc@nde.gov.ng', password='pass',
+            current_role='SC', current_state=self.seeder.state)
+        response = self.dashboard(coordinator)
+        self.assertIn('program_coverage', response.context['state'])
+        self.assertContains(response, 'Programme Coverage')
+
+        staff = Employee.objects.create_user(employee_id='NDE1002', ippis_number='IPPIS1002',
+                                             email='staff@nde.gov.ng', password='pass')
+        response = self.dashboard(staff)
+        self.assertNotContains(response, 'Projected year-end')
+
+    def test_employee_list_follows_the_current_role(self):
+        staff = Employee.objects.create_user(employee_id='NDE1002', ippis_number='IPPIS1002',
+                                             email='staff@nde.gov.ng', password='pass')
+        self.client.force_login(staff)
+        self.assertEqual(self.client.get(reverse('core:employee_list')).status_code, 302)
+
+        state = State.objects.create(code='NAS', name='Nasarawa', zone=self.seeder.zone)
+        coordinator = Employee.objects.create_user(
+            employee_id='NDE1001', ippis_number='IPPIS1001', email='sc@nde.gov.ng', password='pass',
+            current_role='SC', current_state=state)
+        self.client.force_login(coordinator)
+        response = self.client.get(reverse('core:employee_list'))
+        self.assertEqual([employee.pk for employee in response.context['page_obj']], [coordinator.pk])
+
+
+class ScaleBenchmarkTests(TransactionTestCase):
+    # The benchmark's worker threads open their own connections, which only see committed rows.
+    databases = {'default', 'reporting'}
+
+    def test_seed_a_small_data_set_and_benchmark_it(self):
+        call_command('seed_scale', employees=20, years=1, projects=5, expenditures=40, chats=2, chat_messages=30,
+                     emails=20, tasks=20, files=5, file_history=10, batch_size=7, stdout=io.StringIO())
+        self.assertEqual(Employee.objects.filter(employee_id__startswith='SCL').count(), 20)
+        self.assertEqual(EmployeeDetail.objects.count(), 20)
+        self.assertEqual(Expenditure.objects.count(), 40)
+        with self.assertRaises(CommandError):
+            call_command('seed_scale', employees=1, stdout=io.StringIO())
+
+        # One thread: concurrent session saves hit table locks in the shared-cache in-memory test database.
+        report = run_benchmark(Employee.objects.get(employee_id='SCL00000'), requests=4, concurrency=1)
+        self.assertEqual(list(report['endpoints']), list(ENDPOINTS))
+        for name, result in report['endpoints'].items():
+            self.assertEqual((result['requests'], result['errors']), (4, 0), name)
+        self.assertEqual(report['data_set']['finance.Expenditure'], 40)
+
+
+class PerformanceRegressionTests(SimpleTestCase):
+    def report(self, **endpoints):
+        return {'endpoints': {
+            name: {'p95_ms': p95, 'queries': queries, 'errors': 0} for name, (p95, queries) in endpoints.items()
+        }}
+
+    def test_flags_latency_and_query_regressions(self):
+        baseline = self.report(dashboard=(100, 10), inbox=(50, 4), search=(80, 5))
+        current = self.report(dashboard=(119, 10), inbox=(70, 4), search=(80, 6))
+        rows = {row['endpoint']: row for row in compare_reports(baseline, current, tolerance=0.2)}
+
+        self.assertEqual(rows['dashboard']['regressions'], [])
+        self.assertEqual(rows['inbox']['regressions'], ['p95_ms +40%'])
+        self.assertEqual(rows['search']['regressions'], ['queries +1'])
+
+    def test_failing_requests_are_regressions(self):
+        baseline = self.report(dashboard=(100, 10), inbox=(50, 4))
+        baseline['endpoints']['inbox']['errors'] = 20
+        current = self.report(dashboard=(100, 10), inbox=(50, 4), calendar=(30, 2))
+        for result in current['endpoints'].values():
+            result['errors'] = 20
+        rows = {row['endpoint']: row for row in compare_reports(baseline, current)}
+
+        self.assertEqual(rows['dashboard']['regressions'], ['20 errors'])
+        # Failing in the baseline as well, or not in it at all, is no excuse.
+        self.assertEqual(rows['inbox']['regressions'], ['20 errors'])
+        self.assertRegex(format_diff_table(rows.values()), r'calendar .* REGRESSED: 20 errors')
+
+    def test_diff_table_lists_new_and_missing_endpoints(self):
+        rows = compare_reports(self.report(dashboard=(100, 10)), self.report(calendar=(30, 2)))
+        table = format_diff_table(rows)
+
+        self.assertRegex(table, r'dashboard .* not run')
+        self.assertRegex(table, r'calendar .* new')
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp())
+class NationalReportTests(TestCase):
+    def test_merges_every_shard_into_one_file(self):
+        seeder = testing.DataSeeder()
+        seeder.seed(5)
+        Employee.objects.filter(employee_id='NDE00001').update(current_state=None)
+
+        name, stats = generate_national_report('nominal_roll', workers=1)
+
+        with default_storage.open(name) as handle:
+            rows = list(csv.reader(handle.read().decode().splitlines()))
+        self.assertEqual(rows[0], ['Staff nominal roll'])
+        self.assertEqual(rows[1][:3], ['Zone', 'State', 'Employee ID'])
+        employee_ids = [row[2] for row in rows[2:] if row]
+        self.assertCountEqual(employee_ids, Employee.objects.values_list('employee_id', flat=True))
+        # Staff without a state come last, from their own shard.
+        self.assertEqual(employee_ids[-1], 'NDE00001')
+        self.assertEqual({stat['shard'] for stat in stats}, {'Federal Capital Territory', 'Unassigned'})
+
+    def test_every_report_runs(self):
+        testing.DataSeeder().seed(5)
+        for report_name in REPORTS:
+            with self.subTest(report_name):
+                name, stats = generate_national_report(report_name, {'year': 2026}, workers=1)
+                with default_storage.open(name) as handle:
+                    rows = list(csv.reader(handle.read().decode().splitlines()))
+                self.assertEqual(rows[1], REPORTS[report_name].headers)
+
+
+class SyncTests(TestCase):
+    def setUp(self):
+        zone = Zone.objects.create(code='NC', name='North Central')
+        self.state = State.objects.create(code='FCT', name='Federal Capital Territory', zone=zone)
+        self.department = Department.objects.create(code='FIN', name='Finance and Accounts')
+        self.officer = Employee.objects.create_user(employee_id='NDE0001', ippis_number='IPPIS0001',
+                                                    email='officer@nde.gov.ng', password='pass')
+        self.coordinator = Employee.objects.create_user(employee_id='NDE0002', ippis_number='IPPIS0002',
+                                                        email='sc@nde.gov.ng', password='pass', current_role='SC',
+                                                        current_state=self.state)
+        self.due = timezone.now() + timedelta(days=7)
+        self.task = Task.objects.create(title='Visit Bwari centre', description='Inspection', due_date=self.due,
+                                        assigned_to=self.officer, assigned_by=self.coordinator,
+                                        created_by=self.coordinator)
+        Task.objects.create(title='Someone else', description='', due_date=self.due, assigned_to=self.coordinator,
+                            assigned_by=self.coordinator, created_by=self.coordinator)
+        self.client = APIClient()
+        self.client.force_authenticate(self.officer)
+
+    def test_pull_sends_changes_and_removals_since_the_watermark(self):
+        with self.assertNumQueries(4):  # The latest tombstone and one query per resource.
+            snapshot = sync.pull(self.officer)
+        self.assertTrue(snapshot['reset'])
+        tasks = snapshot['changes']['tasks']
+        self.assertEqual([dict(zip(tasks['fields'], row))['title'] for row in tasks['rows']], ['Visit Bwari centre'])
+
+        leave = LeaveRequest.objects.create(employee=self.officer, leave_type='annual', reason='Rest',
+                                            start_date=date(2026, 12, 1), end_date=date(2026, 12, 5))
+        self.task.assigned_to = self.coordinator  # Reassigned away from the officer.
+        self.task.save()
+        delta = sync.pull(self.officer, snapshot['watermark'])
+        self.assertFalse(delta['reset'])
+        self.assertEqual(delta['deleted'], {'tasks': [self.task.pk]})
+        self.assertEqual(delta['changes']['leave_requests']['rows'][0][0], leave.pk)
+        self.assertNotIn('tasks', delta['changes'])
+
+        # Paged: removals come first, then the changes, `limit` at a time.
+        for n in range(3):
+            LeaveRequest.objects.create(employee=self.officer, leave_type='sick', reason=str(n),
+                                        start_date=date(2026, 11, 1), end_date=date(2026, 11, 2))
+        removed = leave.pk
+        leave.delete()
+        pages = []
+        watermark = delta['watermark']
+        while True:
+            page = sync.pull(self.officer, watermark, limit=2)
+            pages.append((page['deleted'], len(page['changes'].get('leave_requests', {}).get('rows', []))))
+            watermark = page['watermark']
+            if not page['more']:
+                break
+        self.assertEqual(pages[0][0], {'leave_requests': [removed]})
+        self.assertEqual([rows for _, rows in pages], [2, 1])
+
+    def test_push_applies_changes_with_per_record_results(self):
+        base = self.task.updated_at.isoformat()
+        changes = [
+            {'resource': 'tasks', 'op': 'update', 'id': self.task.pk, 'base': base, 'data': {'status': 'COMPLETED'}},
+            {'resource': 'tasks', 'op': 'update', 'id': self.task.pk, 'base': base, 'data': {'status': 'PENDING'}},
+            {'resource': 'leave_requests', 'op': 'create', 'client_id': 'c-1',
+             'data': {'leave_type': 'annual', 'reason': 'Rest', 'start_date': '2026-12-01', 'end_date': '2026-12-05'}},
+            {'resource': 'leave_requests', 'op': 'create', 'client_id': 'c-2',
+             'data': {'leave_type': 'annual', 'reason': 'Rest', 'start_date': '2026-12-05', 'end_date': '2026-12-01'}},
+            {'resource': 'expenditures', 'op': 'create', 'client_id': 'c-3',
+             'data': {'amount': '1500.00', 'description': 'Fuel', 'date': '2026-10-01',
+                      'expenditure_type': 'OPERATIONAL', 'department': 'FIN', 'state': 'FCT'}},
+            {'resource': 'tasks', 'op': 'delete', 'id': 999999},
+        ]
+        response = self.client.post(reverse('core:sync'), {'changes': changes, 'since': None}, format='json')
+        self.assertEqual(response.status_code, 200, response.content)
+        results = response.json()['results']
+        self.assertEqual([result['status'] for result in results],
+                         ['updated', 'conflict', 'created', 'invalid', 'forbidden', 'not_found'])
+        self.assertEqual(results[1]['record']['status'], 'COMPLETED')
+        self.assertIn('end_date', results[3]['errors'])
+        self.assertFalse(Expenditure.objects.exists())  # Staff do not record expenditures.
+        self.assertEqual(set(response.json()['changes']), {'tasks', 'leave_requests'})
+
+        # A replayed upload does not create the records again.
+        replay = self.client.post(reverse('core:sync'), {'changes': changes[2:3]}, format='json').json()
+        self.assertEqual(replay['results'][0]['id'], results[2]['id'])
+        self.assertEqual(LeaveRequest.objects.count(), 1)
+        self.assertEqual(SyncReceipt.objects.count(), 1)
+
+        # The officer may not touch approved leave.
+        leave = LeaveRequest.objects.get()
+        leave.status = 'approved'
+        leave.save()
+        result = sync.push(self.officer, [{'resource': 'leave_requests', 'op': 'delete', 'id': leave.pk}])[0]
+        self.assertEqual(result['status'], 'forbidden')
+
+    def test_writes_stay_in_the_users_scope(self):
+        State.objects.create(code='NI', name='Niger', zone=self.state.zone)
+        Department.objects.create(code='HRM', name='Human Resource Management')
+
+        def expenditure(client_id, state, department='FIN'):
+            return {'resource': 'expenditures', 'op': 'create', 'client_id': client_id,
+                    'data': {'amount': '1500.00', 'description': 'Fuel', 'date': '2026-10-01',
+                             'expenditure_type': 'OPERATIONAL', 'department': department, 'state': state}}
+
+        officer = sync.push(self.officer, [expenditure('c-1', 'NI')])[0]
+        coordinator = sync.push(self.coordinator, [expenditure('c-2', 'FCT'), expenditure('c-3', 'NI')])
+        self.assertEqual([officer['status']] + [result['status'] for result in coordinator],
+                         ['forbidden', 'created', 'forbidden'])
+        self.assertEqual(list(Expenditure.objects.values_list('state', flat=True)), ['FCT'])
+        self.assertEqual(SyncReceipt.objects.count(), 1)
+
+        # A director may not move an expenditure out of their department.
+        director = Employee.objects.create_user(employee_id='NDE0003', ippis_number='IPPIS0003',
+                                                email='dir@nde.gov.ng', password='pass', current_role='DIR',
+                                                current_department=self.department)
+        moved = sync.push(director, [{'resource': 'expenditures', 'op': 'update', 'id': coordinator[0]['id'],
+                                      'data': {'department': 'HRM'}}])[0]
+        self.assertEqual((moved['status'], moved['record']['department']), ('forbidden', 'FIN'))
+        self.assertEqual(Expenditure.objects.get().department_id, 'FIN')
+
+        # Nor may the officer hand their task to someone else.
+        moved = sync.push(self.officer, [{'resource': 'tasks', 'op': 'update', 'id': self.task.pk,
+                                          'data': {'assigned_to': self.coordinator.pk}}])[0]
+        self.assertEqual(moved['status'], 'forbidden')
+        self.task.refresh_from_db()
+        self.assertEqual(self.task.assigned_to, self.officer)
+
+    def test_concurrent_replay_returns_the_first_upload(self):
+        change = {'resource': 'leave_requests', 'op': 'create', 'client_id': 'c-1',
+                  'data': {'leave_type': 'annual', 'reason': 'Rest', 'start_date': '2026-12-01',
+                           'end_date': '2026-12-05'}}
+        first = sync.push(self.officer, [change])[0]
+        self.assertEqual(first['status'], 'created')
+
+        # The other replay's receipt commits between our lookup and our insert.
+        lookup = SyncReceipt.objects.filter
+        calls = []
+
+        def racing_filter(*args, **kwargs):
+            calls.append(kwargs)
+            return SyncReceipt.objects.none() if len(calls) == 1 else lookup(*args, **kwargs)
+
+        with mock.patch.object(SyncReceipt.objects, 'filter', side_effect=racing_filter):
+            replay = sync.push(self.officer, [change])[0]
+        self.assertEqual((replay['status'], replay['id'], replay['replayed']), ('created', first['id'], True))
+        self.assertEqual(LeaveRequest.objects.count(), 1)
+
+    def test_stale_or_forged_watermarks(self):
+        response = self.client.get(reverse('core:sync'), {'since': 'forged'})
+        self.assertEqual(response.status_code, 400)
+        old = sync.watermark(timezone.now() - sync.RETENTION - timedelta(days=1), 0, {})
+        self.assertTrue(sync.pull(self.officer, old)['reset'])
+        Tombstone.objects.create(resource='tasks', object_id=1)
+        Tombstone.objects.filter(pk__gt=0).update(removed_at=timezone.now() - sync.RETENTION - timedelta(days=1))
+        self.assertEqual(sync.prune(), 1)
+
+
+class ChangeLogTests(TestCase):
+    def setUp(self):
+        zone = Zone.objects.create(code='NC', name='North Central')
+        State.objects.create(code='FCT', name='Federal Capital Territory', zone=zone)
+        Department.objects.create(code='FIN', name='Finance and Accounts')
+        self.start = ChangeLog.objects.order_by('-seq').values_list('seq', flat=True).first() or 0
+
+    def spend(self, amount):
+        return Expenditure.objects.create(amount=Decimal(amount), description='Fuel', date=date(2026, 3, 1),
+                                          expenditure_type='OPERATIONAL', department_id='FIN', state_id='FCT')
+
+    def test_writes_are_captured_in_their_transaction(self):
+        expenditure = self.spend('100.00')
+        Expenditure.objects.filter(pk=expenditure.pk).update(description='Diesel')  # Bypasses signals.
+        pk = expenditure.pk
+        expenditure.delete()
+        try:
+            with transaction.atomic():
+                self.spend('50.00')
+                raise RuntimeError
+        except RuntimeError:
+            pass
+        user = Employee.objects.create_user(employee_id='NDE0001', ippis_number='IPPIS0001', email='a@nde.gov.ng',
+                                            password='secret')
+
+        entries = change_log.changes(self.start)
+        self.assertEqual([(entry.model, entry.operation) for entry in entries], [
+            ('finance.Expenditure', 'INSERT'), ('finance.Expenditure', 'UPDATE'), ('finance.Expenditure', 'DELETE'),
+            ('core.Employee', 'INSERT')])
+        self.assertEqual(entries[0].object_id, str(pk))
+        self.assertEqual(entries[1].data['description'], 'Diesel')
+        self.assertEqual(entries[3].data['email'], user.email)
+        self.assertNotIn('password', entries[3].data)
+        self.assertEqual([entry.seq for entry in change_log.changes(self.start, models=['core.Employee'])],
+                         [entries[3].seq])
+
+    def test_feed_and_command_resume_after_a_cursor(self):
+        first, second = self.spend('10.00'), self.spend('20.00')
+        admin = Employee.objects.create_user(employee_id='NDE0002', ippis_number='IPPIS0002', email='it@nde.gov.ng',
+                                             password='pass', is_staff=True)
+        client = APIClient()
+        client.force_authenticate(admin)
+        page = client.get(reverse('core:change_feed'), {'after': self.start, 'limit': 1,
+                                                         'models': 'finance.Expenditure'}).json()
+        self.assertEqual([row['object_id'] for row in page['results']], [str(first.pk)])
+        self.assertTrue(page['more'])
+        page = client.get(reverse('core:change_feed'), {'after': page['next'], 'models': 'finance.Expenditure'})
+        self.assertEqual([row['object_id'] for row in page.json()['results']], [str(second.pk)])
+        self.assertFalse(page.json()['more'])
+        self.assertEqual(client.get(reverse('core:change_feed'), {'models': 'core.Zone'}).status_code, 400)
+
+        client.force_authenticate(Employee.objects.create_user(
+            employee_id='NDE0003', ippis_number='IPPIS0003', email='o@nde.gov.ng', password='pass'))
+        self.assertEqual(client.get(reverse('core:change_feed')).status_code, 403)
+
+        output = io.StringIO()
+        call_command('stream_changes', after=self.start, models='finance.Expenditure', batch_size=1, stdout=output)
+        self.assertEqual([json.loads(line)['data']['amount'] for line in output.getvalue().splitlines()], [10, 20])
+
+    def test_sign_ins_are_not_logged(self):
+        user = Employee.objects.create_user(employee_id='NDE0001', ippis_number='IPPIS0001', email='a@nde.gov.ng',
+                                            password='secret')
+        self.client.force_login(user)  # Updates last_login only.
+        Employee.objects.filter(pk=user.pk).update(email='b@nde.gov.ng')
+        self.assertEqual([entry.operation for entry in change_log.changes(self.start)], ['INSERT', 'UPDATE'])
+
+    def test_pruned_changes_expire_older_cursors(self):
+        old, new = self.spend('10.00'), self.spend('20.00')
+        ChangeLog.objects.filter(seq__gt=self.start, object_id=str(old.pk)).update(
+            changed_at=timezone.now() - change_log.RETENTION - timedelta(days=1))
+        output = io.StringIO()
+        call_command('prune_change_log', stdout=output)
+        self.assertIn('Removed 1 change log row(s).', output.getvalue())
+
+        with self.assertRaises(change_log.CursorExpired):
+            change_log.changes(self.start)
+        admin = Employee.objects.create_user(employee_id='NDE0002', ippis_number='IPPIS0002', email='it@nde.gov.ng',
+                                             password='pass', is_staff=True)
+        client = APIClient()
+        client.force_authenticate(admin)
+        self.assertEqual(client.get(reverse('core:change_feed'), {'after': self.start}).status_code, 410)
+        self.assertEqual([entry.object_id for entry in change_log.changes(self.start + 1)][:1], [str(new.pk)])
+
+
+class ReplicaRefreshTests(TransactionTestCase):
+    # The backup waits for open write transactions on the primary, so this cannot run inside TestCase's.
+    def test_refresh_writes_a_readable_snapshot(self):
+        Department.objects.create(code='FIN', name='Finance and Accounts')
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory) / 'replica.sqlite3'
+            replica.refresh(path=path)
+            with override_settings(REPLICA_PATH=path):
+                self.assertLess(replica.age(), 60)
+            snapshot = sqlite3.connect(f'file:{path}?mode=ro', uri=True)
+            try:
+                self.assertEqual(snapshot.execute('SELECT name FROM core_department').fetchall(),
+                                 [('Finance and Accounts',)])
+                self.assertEqual(snapshot.execute('PRAGMA journal_mode').fetchone(), ('delete',))
+            finally:
+                snapshot.close()
+            self.assertEqual(list(path.parent.iterdir()), [path])
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp())
+class NationalReportSnapshotTests(TransactionTestCase):
+    # replica.refresh() waits for open write transactions on the primary, as in ReplicaRefreshTests.
+    def test_shards_read_one_snapshot_across_a_refresh(self):
+        testing.DataSeeder().seed(5)
+        copy = shutil.copyfile
+
+        def copy_then_refresh(source, target):
+            # A refresh_replica run right after the report took its copy.
+            result = copy(source, target)
+            Employee.objects.filter(employee_id='NDE00001').update(last_name='Refreshed')
+            replica.refresh(path=source)
+            return result
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory) / 'replica.sqlite3'
+            replica.refresh(path=path)
+            with override_settings(REPLICA_PATH=path), \
+                    mock.patch.object(replica, 'available', return_value=True), \
+                    mock.patch('core.national_reports.shutil.copyfile', copy_then_refresh), \
+                    mock.patch.object(type(self), 'databases', {'default', SNAPSHOT}):
+                name, _ = generate_national_report('nominal_roll', workers=1)
+
+        with default_storage.open(name) as handle:
+            rows = list(csv.reader(handle.read().decode().splitlines()))
+        surnames = [row[4] for row in rows[2:] if row]
+        self.assertEqual(len(surnames), Employee.objects.count())
+        self.assertNotIn('Refreshed', surnames)
+        self.assertNotIn(SNAPSHOT, connections.settings)
+
+
+class ReplicaTests(TestCase):
+    # The replica alias mirrors the primary in tests; only where reads are sent is checked here.
+    def setUp(self):
+        Department.objects.create(code='FIN', name='Finance and Accounts')
+
+    def test_reads_are_routed_to_a_fresh_replica_and_writes_to_the_primary(self):
+        # A replica that is the primary itself is not used.
+        self.assertFalse(replica.available())
+        with replica.replica_reads():
+            self.assertEqual(Department.objects.all().db, 'default')
+
+        with mock.patch('core.replica.available', return_value=True):
+            self.assertEqual(replica.using_reporting(Department.objects.all()).db, 'replica')
+            with replica.replica_reads():
+                self.assertEqual(Department.objects.all().db, 'replica')
+            self.assertEqual(Department.objects.all().db, 'default')
+
+        router = ReplicaRouter()
+        self.assertFalse(router.allow_migrate('replica', 'core'))
+        department = Department.objects.get()
+        department._state.db = 'replica'  # As if read from the snapshot.
+        self.assertEqual(router.db_for_write(Department, instance=department), 'default')
+        department.name = 'Finance'
+        department.save()
+        self.assertEqual(department._state.db, 'default')
+        self.assertEqual(Department.objects.get().name, 'Finance')
+
+
+class WriteContentionTests(SimpleTestCase):
+    def setUp(self):
+        write_contention.reset_stats()
+
+    def test_busy_begin_is_retried_but_not_a_statement_inside_a_transaction(self):
+        calls = []
+
+        def execute(sql, params, many, context):
+            calls.append(sql)
+            if len(calls) == 1:
+                raise OperationalError('database is locked')
+
+        connection = mock.Mock(alias='default', in_atomic_block=False)
+        with override_settings(WRITE_RETRY_BACKOFF=0):
+            write_contention.write_contention_wrapper(execute, 'BEGIN IMMEDIATE', None, False,
+                                                      {'connection': connection})
+            self.assertEqual(calls, ['BEGIN IMMEDIATE'] * 2)
+
+            calls.clear()
+            connection.in_atomic_block = True
+            with self.assertRaises(OperationalError), self.assertLogs('core.write_contention', 'ERROR'):
+                write_contention.write_contention_wrapper(execute, 'UPDATE chat SET updated_at = 1', None, False,
+                                                          {'connection': connection})
+            self.assertEqual(len(calls), 1)
+        stats = write_contention.stats()
+        self.assertEqual((stats['transactions'], stats['busy'], stats['retries'], stats['failures']), (1, 2, 1, 1))
+
+    def test_concurrent_writers_do_not_fail(self):
+        # stress() adds its scratch database alias only while it runs.
+        with mock.patch.object(type(self), 'databases', {write_contention.STRESS_ALIAS}):
+            report = write_contention.stress(workers=8, transactions=50)
+        self.assertEqual(report['errors'], [])
+        self.assertEqual((report['committed'], report['failed']), (400, 0))
+        self.assertEqual(report['lock']['failures'], 0)
+
+
+class SlowQueryLogTests(TestCase):
+    def slow_query(self, sql, elapsed_ms, minutes_ago=0, params=(1,)):
+        return {
+            'alias': 'default', 'sql': sql, 'params': list(params), 'many': False, 'elapsed_ms': elapsed_ms,
+            'view_name': 'core:dashboard', 'stack': 'core/views.py:1 in dashboard',
+            'seen_at': timezone.now() - timedelta(minutes=minutes_ago),
+        }
+
+    def test_equivalent_statements_share_a_fingerprint(self):
+        self.assertEqual(
+            normalize_sql("SELECT *  FROM t\n WHERE name = 'O''Brien' AND id IN (%s, %s, %s) AND age > 42"),
+            'SELECT * FROM t WHERE name = ? AND id IN (...) AND age > ?',
+        )
+        self.assertEqual(fingerprint(normalize_sql('SELECT * FROM t WHERE id IN (%s, %s) LIMIT 21')),
+                         fingerprint(normalize_sql('SELECT * FROM t WHERE id IN (?, ?, ?, ?) LIMIT 5')))
+        self.assertNotEqual(fingerprint(normalize_sql('SELECT * FROM t WHERE id = %s')),
+                            fingerprint(normalize_sql('SELECT * FROM u WHERE id = %s')))
+
+    def test_counts_add_up_and_keep_the_worst_example(self):
+        sql = 'SELECT "core_department"."id" FROM "core_department" WHERE "core_department"."id" = %s'
+        record_slow_query(self.slow_query(sql, 300, params=[1]))
+        record_slow_query(self.slow_query(sql, 500, params=[2]))
+        record_slow_query(self.slow_query(sql, 400, params=[3]))
+
+        entry = SlowQuery.objects.get()
+        self.assertEqual((entry.count, entry.total_ms, entry.worst_ms), (3, 1200, 500))
+        self.assertEqual(entry.example_params, '[int]')
+        self.assertIn('core_department', entry.explain_plan)
+
+    def test_examples_keep_no_values(self):
+        sql = ('SELECT "id" FROM "core_employee" '
+               'WHERE "email" = \'a@nde.gov.ng\' AND "password" = %s AND "id" > 12')
+        record_slow_query(self.slow_query(sql, 300, params=['pbkdf2_sha256$secret']))
+
+        entry = SlowQuery.objects.get()
+        self.assertEqual(entry.example_sql,
+                         'SELECT "id" FROM "core_employee" WHERE "email" = ? AND "password" = %s AND "id" > ?')
+        self.assertEqual(entry.example_params, '[str]')
+        self.assertEqual(redact_params([(1, None), {'nin': '12345678901'}]), '[[int, None], {\'nin\': str}]')
+
+    def test_a_fingerprint_inserted_by_another_process_is_counted_on_its_row(self):
+        sql = 'SELECT 1 FROM "core_department" WHERE "id" = %s'
+        record_slow_query(self.slow_query(sql, 300))
+        update, calls = QuerySet.update, []
+
+        def racing_update(queryset, **kwargs):
+            # The first UPDATE runs before the other process's INSERT is committed.
+            calls.append(kwargs)
+            return 0 if len(calls) == 1 else update(queryset, **kwargs)
+
+        with mock.patch.object(QuerySet, 'update', racing_update):
+            record_slow_query(self.slow_query(sql, 250))
+        entry = SlowQuery.objects.get()
+        self.assertEqual((entry.count, entry.total_ms, entry.worst_ms), (2, 550, 300))
+
+    @override_settings(SLOW_QUERY_LOG_MAX_ROWS=2)
+    def test_least_recently_seen_statements_are_evicted(self):
+        for table, minutes_ago in [('a', 5), ('b', 1), ('c', 10), ('d', 0)]:
+            record_slow_query(self.slow_query(f'SELECT * FROM {table} WHERE id = %s', 300, minutes_ago))
+        self.assertEqual(sorted(SlowQuery.objects.values_list('normalized_sql', flat=True)),
+                         ['SELECT * FROM b WHERE id = ?', 'SELECT * FROM d WHERE id = ?'])
+
+
+class ProfilingTests(SimpleTestCase):
+    def test_cache_counts_every_key_looked_up(self):
+        cache = profiling.ProfilingLocMemCache('profiling-tests', {})
+        cache.set('present', 1)
+        cache.set('other', 2)
+        profile = profiling.RequestProfile()
+        token = profiling.current_profile.set(profile)
+        try:
+            self.assertEqual(cache.get('present'), 1)
+            self.assertIsNone(cache.get('absent'))
+            self.assertEqual(cache.get_many(['present', 'other', 'absent']), {'present': 1, 'other': 2})
+        finally:
+            profiling.current_profile.reset(token)
+        self.assertEqual((profile.cache_hits, profile.cache_misses), (3, 2))
+
+    def test_profiles_are_aggregated_per_view(self):
+        def entry(url_name, wall_ms, sql_count, hits=0, misses=0):
+            return {'url_name': url_name, 'path': '/', 'wall_ms': wall_ms, 'sql_count': sql_count,
+                    'sql_ms': sql_count * 2.0, 'template_ms': 10.0, 'cache_hits': hits, 'cache_misses': misses}
+
+        entries = [entry('core:dashboard', wall_ms, 10, hits=3, misses=1) for wall_ms in range(10, 110, 10)]
+        entries += [entry('', 900, 1), entry('', 950, 3)]
+        # Slowest p95 first; profiles without a URL name are grouped by path.
+        root, dashboard = profiling.summarize_profiles(entries)
+
+        self.assertEqual((root['url_name'], root['count'], root['avg_sql_count']), ('/', 2, 2.0))
+        self.assertIsNone(root['cache_hit_rate'])
+        self.assertEqual((dashboard['count'], dashboard['avg_sql_ms'], dashboard['cache_hit_rate']),
+                         (10, 20.0, 75.0))
+        self.assertEqual((dashboard['p50_ms'], dashboard['p95_ms'], dashboard['p99_ms']), (50, 100, 100))
@@ -45,4 +45,9 @@ urlpatterns = [
     path('get-notifications/', views.get_notifications, name='get_notifications'),
     path('get-messages/', views.get_messages, name='get_messages'),
     path('mark-notification-read/<int:notification_id>/', views.mark_notification_read, name='mark_notification_read'),
+
+    # Offline sync for field officers
+    path('api/sync/', views.SyncView.as_view(), name='sync'),
+    # Change feed for downstream systems
+    path('api/changes/', views.ChangeFeedView.as_view(), name='change_feed'),
 ]
\ No newline at end of file
@@ -23,14 +23,27 @@ from django.contrib.auth.tokens import default_token_generator
 from django.utils.http import urlsafe_base64_encode, urlsafe_base64_decode
 from django.utils.encoding import force_bytes, force_str
 from django.contrib.auth import get_user_model
+from django.contrib import admin
+from django.contrib.admin.views.decorators import staff_member_required
+from .profiling import recent_profiles, summarize_profiles, sample_rate
 
 from communication.models import *
 from hr.models import *
 from monitoring.models import *
 from finance.models import *
+from finance import forecasting, ledger
+from monitoring import kpi_series, schedule_risk, status as project_status
 from programs.models import *
-from django.db.models import Count, Q, Sum, Avg
+from reporting import summaries
+from django.db.models import Count, F, Q, Sum, Avg
+from collections import defaultdict
 from datetime import datetime, timedelta
+from . import change_log, replica, sync, write_contention
+from django.core import signing
+from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+from rest_framework.views import APIView
 
 
 def login_view(request):
@@ -113,10 +126,23 @@ def dashboard(request):
         'quick_actions': get_quick_actions(request.user),
         'tasks': Task.objects.filter(assigned_to=request.user).order_by('-created_at')[:5],
         'announcements': DepartmentAnnouncement.objects.filter(department=request.user.current_department).order_by('-created_at')[:5],
-        'recent_emails': InAppEmail.objects.filter(recipients=request.user).order_by('-sent_at')[:5],
+        'recent_emails': InAppEmail.objects.filter(recipients=request.user).select_related('sender').order_by('-sent_at')[:5],
     }
+    context.update(get_role_context(request.user))
     return render(request, 'core/dashboard.html', context)
 
+def get_role_context(user):
+    """The dashboard panels of the user's role, each under its own key."""
+    current_year = timezone.localdate().year
+    if user.is_superuser or user.current_role == 'DG':
+        return {'dg': get_dg_context(current_year), 'monitoring': get_monitoring_summary()}
+    if user.current_role == 'DIR':
+        return {'management': get_management_context(user, current_year)}
+    if user.current_role == 'SC' and user.current_state:
+        return {'state': {**get_state_coordinator_context(user, current_year),
+                          **get_recent_state_activities(user.current_state)}}
+    return {}
+
 # In utils.py
 def get_quick_stats(user):
     return [
@@ -142,14 +168,20 @@ def get_quick_actions(user):
 
 @login_required
 def calendar(request):
-    current_date = timezone.now().date()
+    current_date = timezone.localdate()
     year = current_date.year
     month = current_date.month
     day = current_date.day
 
-    calendar_data = generate_calendar_data(year, month, request.user)
-    week_data = generate_week_data(year, month, day, request.user)
-    day_data = generate_day_data(year, month, day, request.user)
+    # One lookup for every date shown: the month and the current week, which may run into the next month.
+    start_of_week = current_date - timedelta(days=current_date.weekday())
+    last_of_month = current_date.replace(day=monthrange(year, month)[1])
+    events = get_events_between(min(current_date.replace(day=1), start_of_week),
+                                max(last_of_month, start_of_week + timedelta(days=6)), request.user)
+
+    calendar_data = generate_calendar_data(year, month, events)
+    week_data = generate_week_data(year, month, day, events)
+    day_data = generate_day_data(year, month, day, events)
 
     context = {
         'calendar_data': calendar_data,
@@ -161,7 +193,7 @@ def calendar(request):
     }
     return render(request, 'core/calendar.html', context)
 
-def generate_calendar_data(year, month, user):
+def generate_calendar_data(year, month, events):
     _, num_days = monthrange(year, month)
     first_day = datetime(year, month, 1)
     start_day = (first_day.weekday() - 1) % 7  # Adjust to make Monday the first day of the week
@@ -177,7 +209,7 @@ def generate_calendar_data(year, month, user):
                 date = datetime(year, month, day).date()
                 week_data.append({
                     'date': day,
-                    'events': get_events_for_date(date, user)
+                    'events': events[date]
                 })
                 day += 1
         calendar_data.append(week_data)
@@ -186,7 +218,7 @@ def generate_calendar_data(year, month, user):
 
     return calendar_data
 
-def generate_week_data(year, month, day, user):
+def generate_week_data(year, month, day, events):
     date = datetime(year, month, day).date()
     start_of_week = date - timedelta(days=date.weekday())
     week_data = []
@@ -194,42 +226,49 @@ def generate_week_data(year, month, day, user):
         current_date = start_of_week + timedelta(days=i)
         week_data.append({
             'date': current_date,
-            'events': get_events_for_date(current_date, user)
+            'events': events[current_date]
         })
     return week_data
 
-def generate_day_data(year, month, day, user):
+def generate_day_data(year, month, day, events):
     date = datetime(year, month, day).date()
     return {
         'date': date,
-        'events': get_events_for_date(date, user)
+        'events': events[date]
     }
 
-def get_events_for_date(date, user):
-    # Fetch tasks, projects, and milestones for the given date
-    tasks = Task.objects.filter(due_date=date, assigned_to=user)
-    projects = Project.objects.filter(start_date__lte=date, end_date__gte=date, assigned_to=user)
-    milestones = Milestone.objects.filter(due_date=date, project__assigned_to=user)
+def get_events_between(start, end, user):
+    """Date -> the user's tasks due, projects running and milestones due that day, from start to end inclusive."""
+    events = defaultdict(list)
+    tasks = Task.objects.filter(due_date__date__range=(start, end), assigned_to=user).only('title', 'due_date')
+    projects = Project.objects.filter(start_date__lte=end, end_date__gte=start, assigned_to=user).only(
+        'title', 'start_date', 'end_date')
+    milestones = Milestone.objects.filter(due_date__range=(start, end), project__assigned_to=user).only(
+        'title', 'due_date')
 
-    events = []
     for task in tasks:
-        events.append({
+        due = timezone.localdate(task.due_date)
+        events[due].append({
             'id': f'task_{task.id}',
             'title': task.title,
             'type': 'task',
-            'start': task.due_date.isoformat(),
-            'end': task.due_date.isoformat(),
+            'start': due.isoformat(),
+            'end': due.isoformat(),
         })
     for project in projects:
-        events.append({
+        event = {
             'id': f'project_{project.id}',
-            'title': project.name,
+            'title': project.title,
             'type': 'project',
             'start': project.start_date.isoformat(),
             'end': project.end_date.isoformat(),
-        })
+        }
+        date = max(project.start_date, start)
+        while date <= min(project.end_date, end):
+            events[date].append(event)
+            date += timedelta(days=1)
     for milestone in milestones:
-        events.append({
+        events[milestone.due_date].append({
             'id': f'milestone_{milestone.id}',
             'title': milestone.title,
             'type': 'milestone',
@@ -242,18 +281,26 @@ def get_events_for_date(date, user):
 
 @login_required
 def reports(request):
-    # Get overall project status
-    project_statuses = ProjectStatus.objects.values('status').annotate(count=models.Count('status'))
-    
-    # Get KPIs
-    kpis = KPI.objects.filter(date__gte=timezone.now() - timedelta(days=30))
+    # The reporting star schema has no project facts, so these scans read the
+    # replica snapshot rather than the primary.
+    with replica.replica_reads():
+        # Get overall project status
+        project_statuses = project_status.distribution()
+
+        # Latest monthly value of every KPI series measured in the last year
+        kpi_trends = kpi_series.latest(since=timezone.now().date() - timedelta(days=365))
+        titles = dict(Project.objects.filter(pk__in={row['project_id'] for row in kpi_trends})
+                      .values_list('pk', 'title'))
+    for row in kpi_trends:
+        row['project'] = titles.get(row['project_id'])
     
     # Get upcoming milestones
-    upcoming_milestones = Milestone.objects.filter(due_date__gte=timezone.now()).order_by('due_date')[:5]
+    upcoming_milestones = replica.using_reporting(
+        Milestone.objects.filter(due_date__gte=timezone.now()).order_by('due_date')[:5])
 
     context = {
         'project_statuses': project_statuses,
-        'kpis': kpis,
+        'kpi_trends': kpi_trends,
         'upcoming_milestones': upcoming_milestones,
     }
     return render(request, 'core/reports.html', context)
@@ -286,15 +333,14 @@ def help(request):
 
          
 def get_dg_context(current_year):
-    total_budget = Budget.objects.filter(year=current_year).aggregate(Sum('amount'))['amount__sum'] or 0
-    total_expenditure = Expenditure.objects.filter(date__year=current_year).aggregate(Sum('amount'))['amount__sum'] or 0
-    budget_utilization = (total_expenditure / total_budget * 100) if total_budget > 0 else 0
-
-    projects = Project.objects.all()
-    total_projects = projects.count()
-    ongoing_projects = projects.filter(status='ONGOING').count()
-    completed_projects = projects.filter(status='COMPLETED').count()
-    delayed_projects = projects.filter(status='DELAYED').count()
+    with replica.replica_reads():
+        total_budget, total_expenditure, budget_utilization = ledger.budget_utilization(current_year)
+        projects = project_status.counts()
+        schedule_risks = schedule_risk.ranked(limit=5)
+    total_projects = projects['total']
+    ongoing_projects = projects['ongoing']
+    completed_projects = projects['completed']
+    delayed_projects = projects['delayed']
     project_completion_rate = (completed_projects / total_projects * 100) if total_projects > 0 else 0
 
 
@@ -307,20 +353,25 @@ def get_dg_context(current_year):
         'completed_projects': completed_projects,
         'delayed_projects': delayed_projects,
         'project_completion_rate': round(project_completion_rate, 2),
-        
+        # Forecasts are cached until the next expenditure in their scope, so they are computed on the primary:
+        # one computed from an older snapshot would stay cached.
+        'expenditure_forecast': forecasting.forecast(year=current_year),
+        'departments_at_risk': forecasting.at_risk('DEPARTMENT', current_year, limit=5),
+        'states_at_risk': forecasting.at_risk('STATE', current_year, limit=5),
+        'schedule_risks': schedule_risks,
     }
 
 def get_management_context(user, current_year):
     department = user.current_department
-    department_budget = Budget.objects.filter(department=department, year=current_year).aggregate(Sum('amount'))['amount__sum'] or 0
-    department_expenditure = Expenditure.objects.filter(department=department, date__year=current_year).aggregate(Sum('amount'))['amount__sum'] or 0
-    budget_utilization = (department_expenditure / department_budget * 100) if department_budget > 0 else 0
+    department_budget, department_expenditure, budget_utilization = ledger.budget_utilization(
+        current_year, 'DEPARTMENT', department.pk if department else '')
 
     return {
         'department_employees': Employee.objects.filter(current_department=department).count(),
         'department_budget': department_budget,
         'department_expenditure': department_expenditure,
         'budget_utilization': round(budget_utilization, 2),
+        'expenditure_forecast': forecasting.forecast('DEPARTMENT', department.pk, current_year) if department else None,
         'department_tasks': Task.objects.filter(department=department).aggregate(
             total=Count('id'),
             completed=Count('id', filter=Q(status='COMPLETED')),
@@ -334,21 +385,15 @@ def get_management_context(user, current_year):
 
 def get_state_coordinator_context(user, current_year):
     state = user.current_state
-    state_budget = Budget.objects.filter(state=state, year=current_year).aggregate(Sum('amount'))['amount__sum'] or 0
-    state_expenditure = Expenditure.objects.filter(state=state, date__year=current_year).aggregate(Sum('amount'))['amount__sum'] or 0
-    budget_utilization = (state_expenditure / state_budget * 100) if state_budget > 0 else 0
+    state_budget, state_expenditure, budget_utilization = ledger.budget_utilization(
+        current_year, 'STATE', state.pk if state else '')
 
     return {
         'state_employees': Employee.objects.filter(current_state=state).count(),
         'state_budget': state_budget,
         'state_expenditure': state_expenditure,
         'budget_utilization': round(budget_utilization, 2),
-        'state_projects': Project.objects.filter(state=state).aggregate(
-            total=Count('id'),
-            ongoing=Count('id', filter=Q(status='ONGOING')),
-            completed=Count('id', filter=Q(status='COMPLETED')),
-            delayed=Count('id', filter=Q(status='DELAYED'))
-        ),
+        'state_projects': project_status.counts(Project.objects.filter(state=state)),
     }
     
 @login_required
@@ -442,29 +487,37 @@ def file_history_add(request, file_id):
 
 @login_required
 def performance_overview(request):
-    # Implement performance overview logic here
-    return render(request, 'core/performance_overview.html')
+    # Read from the reporting star schema, off the operational database.
+    today = timezone.localdate()
+    context = {
+        'year': today.year,
+        'as_of': summaries.as_of(),
+        'spend_by_zone': summaries.spend_by_zone(today.year),
+        'task_completion': summaries.task_completion(today - timedelta(days=90)),
+        'leave_by_type': summaries.leave_by_type(today.year),
+        'headcount': summaries.headcount(),
+    }
+    return render(request, 'core/performance_overview.html', context)
 
+@replica.replica_reads()
 def get_monitoring_summary():
     today = timezone.now().date()
     thirty_days_ago = today - timedelta(days=30)
     
     summary = {
-        'project_status': ProjectStatus.objects.values('status').annotate(count=Count('status')),
-        'kpi_performance': KPI.objects.filter(date__gte=thirty_days_ago).aggregate(
-            avg_performance=Avg('performance_score')
+        'project_status': project_status.distribution(),
+        'kpi_performance': KPI.objects.filter(date__gte=thirty_days_ago, target_value__gt=0).aggregate(
+            avg_performance=Avg(F('actual_value') * 100 / F('target_value'))
         )['avg_performance'],
-        'upcoming_milestones': Milestone.objects.filter(
+        # Evaluated by the template, after the replica block.
+        'upcoming_milestones': replica.using_reporting(Milestone.objects.filter(
             due_date__gt=today,
             due_date__lte=today + timedelta(days=30)
-        ).order_by('due_date')[:5],
+        ).order_by('due_date')[:5]),
         'completed_milestones': Milestone.objects.filter(
-            completion_date__gte=thirty_days_ago
-        ).count(),
-        'delayed_projects': ProjectStatus.objects.filter(
-            status='DELAYED',
-            last_updated__gte=thirty_days_ago
+            completed_date__gte=thirty_days_ago
         ).count(),
+        'delayed_projects': project_status.delayed(today=today).count(),
     }
     
     return summary
@@ -475,17 +528,16 @@ def get_recent_state_activities(state):
     
     activities = {
         'recent_programs': Program.objects.filter(
-            state=state,
+            coverage__state=state,
             start_date__gte=thirty_days_ago
-        ).order_by('-start_date')[:5],
+        ).distinct().order_by('-start_date')[:5],
+        'program_coverage': ProgramCoverage.objects.filter(state=state).values('program__name').annotate(
+            beneficiaries=Sum('beneficiaries'), spend=Sum('spend')).order_by('-beneficiaries'),
         'recent_expenditures': Expenditure.objects.filter(
             state=state,
             date__gte=thirty_days_ago
         ).order_by('-date')[:5],
-        'ongoing_projects': ProjectStatus.objects.filter(
-            project__state=state,
-            status='ONGOING'
-        ).count(),
+        'ongoing_projects': Project.objects.filter(state=state, current_status='IN_PROGRESS').count(),
     }
     
     return activities
@@ -535,22 +587,19 @@ def get_department_summary(department):
     
     summary = {
         'total_employees': department.employees.count(),
-        'active_projects': ProjectStatus.objects.filter(
-            project__department=department,
-            status__in=['ONGOING', 'DELAYED']
+        'active_projects': Project.objects.filter(
+            department=department,
+            current_status__in=project_status.OPEN
         ).count(),
-        'completed_projects': ProjectStatus.objects.filter(
-            project__department=department,
-            status='COMPLETED',
-            completion_date__gte=thirty_days_ago
+        'completed_projects': Project.objects.filter(
+            department=department,
+            current_status='COMPLETED',
+            status_updated_at__date__gte=thirty_days_ago
         ).count(),
         'department_budget': department.budgets.filter(year=today.year).aggregate(
             total_budget=Sum('amount')
         )['total_budget'] or 0,
-        'department_expenditure': Expenditure.objects.filter(
-            department=department,
-            date__year=today.year
-        ).aggregate(total_expenditure=Sum('amount'))['total_expenditure'] or 0,
+        'department_expenditure': ledger.year_to_date(today.year, 'DEPARTMENT', department.pk),
         'employees_on_leave': LeaveRequest.objects.filter(
             employee__current_department=department,
             status='approved',
@@ -576,7 +625,7 @@ def get_department_summary(department):
 @login_required
 @role_required(['DG', 'DIR', 'ZD', 'SC'])
 def employee_list_view(request):
-    employees = Employee.objects.all()
+    employees = Employee.objects.order_by('employee_id')
     
     if request.user.current_role == 'DIR':
         employees = employees.filter(current_department=request.user.current_department)
@@ -894,4 +943,78 @@ def mark_notification_read(request, notification_id):
     notification = Notification.objects.get(id=notification_id, recipient=request.user)
     notification.is_read = True
     notification.save()
-    return JsonResponse({'status': 'success'})
\ No newline at end of file
+    return JsonResponse({'status': 'success'})
+
+
+@staff_member_required
+def request_profiles(request):
+    entries = recent_profiles()
+    context = {
+        **admin.site.each_context(request),
+        'title': 'Request profiles',
+        'summaries': summarize_profiles(entries),
+        'profile_count': len(entries),
+        'sample_rate_percent': sample_rate() * 100,
+        'write_locks': write_contention.stats(),
+    }
+    return render(request, 'admin/request_profiles.html', context)
+
+
+class SyncView(APIView):
+    """
+    Offline sync (see core.sync). GET `?since=<watermark>&limit=` pulls the
+    changes since a watermark; POST {"changes": [...], "since": ...} applies
+    a batch of queued changes and, when `since` is given (null for a full
+    snapshot), pulls in the same round trip.
+    """
+
+    def pull(self, request, since):
+        try:
+            limit = int(request.query_params.get('limit', sync.PAGE_SIZE))
+            return sync.pull(request.user, since, limit)
+        except (ValueError, signing.BadSignature):
+            raise ValidationError({'since': 'Not a watermark from this server.'})
+
+    def get(self, request):
+        return Response(self.pull(request, request.query_params.get('since')))
+
+    def post(self, request):
+        changes = request.data.get('changes', []) if isinstance(request.data, dict) else None
+        if not isinstance(changes, list):
+            raise ValidationError({'changes': 'Expected a list of changes.'})
+        if len(changes) > sync.MAX_CHANGES:
+            raise ValidationError({'changes': f'At most {sync.MAX_CHANGES} changes per request.'})
+        data = {'results': sync.push(request.user, changes)}
+        if 'since' in request.data:
+            data.update(self.pull(request, request.data['since']))
+        return Response(data)
+
+
+class ChangeFeedView(APIView):
+    """
+    Change feed for downstream systems (see core.change_log): GET
+    `?after=<seq>&limit=&models=finance.Expenditure,...` returns the changes
+    after a sequence number, oldest first, and the cursor to pass next, or
+    410 Gone once changes after the cursor have been pruned.
+    """
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        try:
+            after = int(request.query_params.get('after', 0))
+            limit = int(request.query_params.get('limit', change_log.PAGE_SIZE))
+        except ValueError:
+            raise ValidationError({'after': 'Sequence numbers and limits are integers.'})
+        models = [label for label in request.query_params.get('models', '').split(',') if label]
+        unknown = set(models) - set(change_log.CAPTURED)
+        if unknown:
+            raise ValidationError({'models': f'Not captured: {", ".join(sorted(unknown))}.'})
+        try:
+            entries = change_log.changes(after, limit, models)
+        except change_log.CursorExpired as exc:
+            return Response({'detail': str(exc)}, status=410)
+        return Response({
+            'results': [change_log.serialize(entry) for entry in entries],
+            'next': entries[-1].seq if entries else after,
+            'more': len(entries) == max(1, min(limit, change_log.MAX_PAGE_SIZE)),
+        })
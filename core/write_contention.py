@@ -0,0 +1,258 @@
+# core/write_contention.py
+"""
+Write contention on the SQLite databases.
+
+Several workers write to db.sqlite3 at once (chat messages, leave requests,
+a session save on every request), and SQLite lets one writer in at a time.
+Three things keep them from failing with "database is locked":
+
+* The connection OPTIONS in settings (SQLITE_OPTIONS) switch the database
+  to WAL journaling on connect, so readers and the writer no longer block
+  each other, and apply the other SQLITE_PRAGMAS.
+* They also make Django open every transaction with BEGIN IMMEDIATE. A
+  deferred transaction that reads before it writes has to upgrade its read
+  lock, and when another writer holds the lock SQLite fails the upgrade at
+  once instead of waiting; an immediate one queues for the write lock at
+  BEGIN, where the busy timeout applies.
+* write_contention_wrapper(), added to every connection, retries a BEGIN
+  or an autocommit write that still timed out on the lock, after a jittered
+  exponential backoff so that the workers that timed out together do not
+  retry together. Nothing has run in the transaction at that point, so the
+  retry is safe; a statement inside a transaction is never retried.
+
+The time each BEGIN IMMEDIATE waited for the lock, busy errors, retries and
+writes that failed are counted per process by stats(), shown on the request
+profiles admin page, and long waits and failures are logged.
+
+stress() runs concurrent writers against a scratch database, for
+`manage.py stress_writes`.
+"""
+import logging
+import random
+import statistics
+import tempfile
+import threading
+import time
+from collections import deque
+from pathlib import Path
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, OperationalError, connections, transaction
+from django.test import override_settings
+
+from .profiling import PERCENTILES, percentile
+
+logger = logging.getLogger(__name__)
+
+_WRITES = ('INSERT', 'UPDATE', 'DELETE', 'REPLACE')
+
+_lock = threading.Lock()
+_waits = deque(maxlen=getattr(settings, 'WRITE_LOCK_WAIT_SAMPLES', 5000))
+_counts = {'transactions': 0, 'busy': 0, 'retries': 0, 'failures': 0}
+_max_wait_ms = 0.0
+
+
+def retry_attempts():
+    return getattr(settings, 'WRITE_RETRY_ATTEMPTS', 3)
+
+
+def backoff(attempt):
+    """Seconds to sleep before retry `attempt` (from 1): full jitter over an exponential ceiling."""
+    base = getattr(settings, 'WRITE_RETRY_BACKOFF', 0.05)
+    return random.uniform(0, min(base * 2 ** (attempt - 1), 1.0))
+
+
+def is_busy(exc):
+    # "database table is locked" is a shared-cache table lock (in-memory test databases), not a busy database.
+    return 'database is locked' in str(exc)
+
+
+def write_contention_wrapper(execute, sql, params, many, context):
+    connection = context['connection']
+    begin = sql.startswith('BEGIN')
+    retry = begin or not connection.in_atomic_block and sql.lstrip()[:7].upper().startswith(_WRITES)
+    start = time.perf_counter()
+    attempt = 0
+    try:
+        while True:
+            try:
+                return execute(sql, params, many, context)
+            except OperationalError as exc:
+                if not is_busy(exc):
+                    raise
+                attempt += 1
+                _count('busy')
+                if not retry or attempt > retry_attempts():
+                    _count('failures')
+                    logger.error('Statement on %s failed, database locked after %d attempts and %.0f ms',
+                                 connection.alias, attempt, (time.perf_counter() - start) * 1000)
+                    raise
+                _count('retries')
+                time.sleep(backoff(attempt))
+    finally:
+        if begin:
+            _record_wait(connection.alias, (time.perf_counter() - start) * 1000)
+
+
+def install_write_contention_wrapper(sender, connection, **kwargs):
+    """connection_created receiver; reconnects reuse the same wrapper list."""
+    if connection.vendor == 'sqlite' and write_contention_wrapper not in connection.execute_wrappers:
+        connection.execute_wrappers.append(write_contention_wrapper)
+
+
+def _count(name):
+    with _lock:
+        _counts[name] += 1
+
+
+def _record_wait(alias, wait_ms):
+    global _max_wait_ms
+    with _lock:
+        _counts['transactions'] += 1
+        _waits.append(wait_ms)
+        _max_wait_ms = max(_max_wait_ms, wait_ms)
+    if wait_ms >= getattr(settings, 'WRITE_LOCK_WAIT_WARN_MS', 1000):
+        logger.warning('Waited %.0f ms for the write lock on %s', wait_ms, alias)
+
+
+def stats():
+    """Write transactions, lock wait percentiles and busy errors in this process since the last reset."""
+    with _lock:
+        waits = sorted(_waits)
+        summary = dict(_counts, max_wait_ms=round(_max_wait_ms, 1))
+    summary['avg_wait_ms'] = round(statistics.fmean(waits), 2) if waits else 0
+    for pct in PERCENTILES:
+        summary[f'p{pct}_wait_ms'] = round(percentile(waits, pct), 2)
+    return summary
+
+
+def reset_stats():
+    global _max_wait_ms
+    with _lock:
+        _waits.clear()
+        _counts.update(dict.fromkeys(_counts, 0))
+        _max_wait_ms = 0.0
+
+
+# Stress test: the writes of a chat message, a leave request and a session
+# save, on tables of the same shape in a scratch database.
+STRESS_ALIAS = 'write_contention_stress'
+
+STRESS_SCHEMA = [
+    'CREATE TABLE chat (id integer PRIMARY KEY, updated_at real NOT NULL)',
+    'CREATE TABLE chat_message (id integer PRIMARY KEY AUTOINCREMENT, chat_id integer NOT NULL, '
+    'sender_id integer NOT NULL, content text NOT NULL, timestamp real NOT NULL)',
+    'CREATE INDEX chat_message_chat ON chat_message (chat_id, timestamp)',
+    'CREATE TABLE leave_request (id integer PRIMARY KEY AUTOINCREMENT, employee_id integer NOT NULL, '
+    'start_date integer NOT NULL, end_date integer NOT NULL, reason text NOT NULL)',
+    'CREATE INDEX leave_request_employee ON leave_request (employee_id, start_date)',
+    'CREATE TABLE session (session_key text PRIMARY KEY, session_data text NOT NULL, expire_date real NOT NULL)',
+]
+STRESS_CHATS = 20
+STRESS_EMPLOYEES = 200
+
+
+def _send_message(cursor, rng):
+    chat_id, now = rng.randrange(STRESS_CHATS), time.time()
+    cursor.execute('INSERT INTO chat_message (chat_id, sender_id, content, timestamp) VALUES (%s, %s, %s, %s)',
+                   [chat_id, rng.randrange(STRESS_EMPLOYEES), 'x' * rng.randrange(20, 400), now])
+    cursor.execute('UPDATE chat SET updated_at = %s WHERE id = %s', [now, chat_id])
+
+
+def _request_leave(cursor, rng):
+    # Reads before it writes: the transaction shape that fails outright under BEGIN DEFERRED.
+    employee_id, start = rng.randrange(STRESS_EMPLOYEES), rng.randrange(365)
+    cursor.execute('SELECT COUNT(*) FROM leave_request WHERE employee_id = %s AND start_date <= %s '
+                   'AND end_date >= %s', [employee_id, start + 5, start])
+    if not cursor.fetchone()[0]:
+        cursor.execute('INSERT INTO leave_request (employee_id, start_date, end_date, reason) '
+                       'VALUES (%s, %s, %s, %s)', [employee_id, start, start + 5, 'Annual leave'])
+
+
+def _save_session(cursor, rng):
+    key, data, expires = f'session-{rng.randrange(STRESS_EMPLOYEES)}', 'x' * rng.randrange(100, 2000), time.time()
+    cursor.execute('UPDATE session SET session_data = %s, expire_date = %s WHERE session_key = %s',
+                   [data, expires, key])
+    if not cursor.rowcount:
+        cursor.execute('INSERT INTO session (session_key, session_data, expire_date) VALUES (%s, %s, %s)',
+                       [key, data, expires])
+
+
+STRESS_WRITES = [_send_message, _request_leave, _save_session]
+
+
+def _stress_worker(seed, transactions, pause, latencies, errors, lock):
+    rng = random.Random(seed)
+    connection = connections[STRESS_ALIAS]
+    try:
+        for _ in range(transactions):
+            write = rng.choice(STRESS_WRITES)
+            start = time.perf_counter()
+            try:
+                with transaction.atomic(using=STRESS_ALIAS), connection.cursor() as cursor:
+                    write(cursor, rng)
+            except OperationalError as exc:
+                with lock:
+                    errors.append(f'{write.__name__.lstrip("_")}: {exc}')
+            else:
+                with lock:
+                    latencies.append((time.perf_counter() - start) * 1000)
+            if pause:
+                time.sleep(rng.uniform(0, 2 * pause))
+    finally:
+        connection.close()
+
+
+def stress(workers=8, transactions=200, pause=0.0, tuned=True, path=None):
+    """
+    Commit `transactions` writes from each of `workers` threads, each with its
+    own connection, to a scratch database at `path` (default: a temporary
+    file), sleeping about `pause` seconds between writes. With tuned=False the
+    scratch database uses Django's stock SQLite settings and nothing is
+    retried, for comparison. Returns a JSON-serialisable report.
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        settings_dict = dict(connections.settings[DEFAULT_DB_ALIAS],
+                             NAME=str(path or Path(directory) / 'stress.sqlite3'))
+        if not tuned:
+            settings_dict['OPTIONS'] = {}
+        connections.settings[STRESS_ALIAS] = settings_dict
+        try:
+            with connections[STRESS_ALIAS].cursor() as cursor:
+                for statement in STRESS_SCHEMA:
+                    cursor.execute(statement)
+                cursor.executemany('INSERT INTO chat (id, updated_at) VALUES (%s, 0)',
+                                   [[chat_id] for chat_id in range(STRESS_CHATS)])
+            connections[STRESS_ALIAS].close()
+
+            latencies, errors, lock = [], [], threading.Lock()
+            reset_stats()
+            with override_settings(WRITE_RETRY_ATTEMPTS=retry_attempts() if tuned else 0):
+                threads = [
+                    threading.Thread(target=_stress_worker, args=(seed, transactions, pause, latencies, errors, lock))
+                    for seed in range(workers)
+                ]
+                start = time.perf_counter()
+                for thread in threads:
+                    thread.start()
+                for thread in threads:
+                    thread.join()
+                seconds = time.perf_counter() - start
+        finally:
+            del connections.settings[STRESS_ALIAS]
+
+    latencies.sort()
+    report = {
+        'tuned': tuned,
+        'workers': workers,
+        'transactions': workers * transactions,
+        'committed': len(latencies),
+        'failed': len(errors),
+        'seconds': round(seconds, 2),
+        'throughput_per_s': round(len(latencies) / seconds, 1),
+        'lock': stats(),
+        'errors': sorted(set(errors))[:5],
+    }
+    for pct in PERCENTILES:
+        report[f'p{pct}_ms'] = round(percentile(latencies, pct), 2)
+    return report
@@ -4,3 +4,12 @@ from django.apps import AppConfig
 class FinanceConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'finance'
+
+    def ready(self):
+        from django.db.models.signals import post_delete, post_save
+        from .grants import grant_saved
+        from .ledger import record_delete
+        from .models import Expenditure, Grant
+
+        post_delete.connect(record_delete, sender=Expenditure, dispatch_uid='finance.ledger')
+        post_save.connect(grant_saved, sender=Grant, dispatch_uid='finance.grants')
@@ -0,0 +1,141 @@
+# finance/budget_alerts.py
+"""
+Budget threshold alerts.
+
+check_budgets() compares each department's and state's expenditure for the
+year (from the ledger's monthly rollups) with its budget and notifies the
+people responsible when it passes 80%, 90% or 100%:
+
+* a department's directors (active employees with the DIR role in it);
+* a state's coordinator and its active employees with the SC role.
+
+A BudgetAlertCheckpoint per scope stores the expenditure and budget seen by
+the previous run. Each run reads the year's totals from the small rollup
+and budget tables, and only scopes whose figures changed since then are
+looked at further. A BudgetAlert row records every threshold that has
+fired: a threshold is announced once even if spending later dips below it
+and rises again, and re-running the job sends nothing new. When a scope
+jumps several thresholds at once, one notification names the highest.
+
+`manage.py check_budget_alerts` runs the job; schedule it with cron.
+"""
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Q, Sum
+from django.utils import timezone
+
+from communication.models import Notification
+from core.models import Department, Employee, State
+
+from .ledger import SCOPE_FIELDS
+from .models import Budget, BudgetAlert, BudgetAlertCheckpoint, ScopeMonthlyExpenditure
+
+THRESHOLDS = (80, 90, 100)
+SCOPES = ('DEPARTMENT', 'STATE')
+
+
+def _expenditure(year):
+    rows = (
+        ScopeMonthlyExpenditure.objects.filter(year=year, scope__in=SCOPES)
+        .values('scope', 'scope_id').annotate(total=Sum('total')).values_list('scope', 'scope_id', 'total')
+    )
+    # SQLite sums decimals as floats; round back to the column's precision.
+    return {(scope, scope_id): Decimal(total).quantize(Decimal('0.01')) for scope, scope_id, total in rows}
+
+
+def _budgets(year):
+    budgets = {}
+    for scope in SCOPES:
+        field = SCOPE_FIELDS[scope]
+        rows = (
+            Budget.objects.filter(year=year, **{f'{field}__isnull': False})
+            .values(field).annotate(total=Sum('amount')).values_list(field, 'total')
+        )
+        budgets.update({(scope, str(key)): Decimal(total).quantize(Decimal('0.01')) for key, total in rows})
+    return budgets
+
+
+def _recipients(scopes):
+    """{(scope, scope_id): {employee ids}} for the departments and states in `scopes`."""
+    departments = [scope_id for scope, scope_id in scopes if scope == 'DEPARTMENT']
+    states = [scope_id for scope, scope_id in scopes if scope == 'STATE']
+    recipients = {key: set() for key in scopes}
+    people = Employee.objects.filter(active_status=True).filter(
+        Q(current_role='DIR', current_department_id__in=departments)
+        | Q(current_role='SC', current_state_id__in=states)
+    ).values_list('pk', 'current_role', 'current_department_id', 'current_state_id')
+    for pk, role, department_id, state_id in people:
+        key = ('DEPARTMENT', department_id) if role == 'DIR' else ('STATE', state_id)
+        recipients[key].add(pk)
+    for code, coordinator_id in State.objects.filter(pk__in=states, coordinator__isnull=False).values_list(
+            'pk', 'coordinator_id'):
+        recipients[('STATE', code)].add(coordinator_id)
+    return recipients
+
+
+def _names(scopes):
+    names = {
+        'DEPARTMENT': dict(Department.objects.filter(pk__in=[i for s, i in scopes if s == 'DEPARTMENT'])
+                           .values_list('pk', 'name')),
+        'STATE': dict(State.objects.filter(pk__in=[i for s, i in scopes if s == 'STATE']).values_list('pk', 'name')),
+    }
+    return {(scope, scope_id): names[scope].get(scope_id, scope_id) for scope, scope_id in scopes}
+
+
+def check_budgets(year=None):
+    """
+    Fire the budget thresholds passed since the last run. Returns
+    (scopes checked, alerts recorded, notifications sent).
+    """
+    year = year or timezone.now().year
+    with transaction.atomic():
+        expenditure = _expenditure(year)
+        budgets = _budgets(year)
+        checkpoints = {
+            (row.scope, row.scope_id): (row.expenditure, row.budget)
+            for row in BudgetAlertCheckpoint.objects.filter(year=year)
+        }
+        figures = {key: (expenditure.get(key, Decimal('0.00')), budgets.get(key, Decimal('0.00')))
+                   for key in set(expenditure) | set(budgets)}
+        changed = {key: value for key, value in figures.items() if checkpoints.get(key) != value}
+        if not changed:
+            return 0, 0, 0
+
+        fired = set(
+            BudgetAlert.objects.filter(year=year, scope__in=SCOPES, scope_id__in={i for _, i in changed})
+            .values_list('scope', 'scope_id', 'threshold')
+        )
+        alerts, announce = [], {}
+        for (scope, scope_id), (spent, budget) in changed.items():
+            if budget <= 0:
+                continue
+            for threshold in THRESHOLDS:
+                if spent * 100 >= budget * threshold and (scope, scope_id, threshold) not in fired:
+                    alerts.append(BudgetAlert(year=year, scope=scope, scope_id=scope_id, threshold=threshold,
+                                              budget=budget, expenditure=spent))
+                    announce[(scope, scope_id)] = alerts[-1]
+
+        BudgetAlert.objects.bulk_create(alerts)
+        notifications = []
+        if announce:
+            recipients = _recipients(list(announce))
+            names = _names(list(announce))
+            for key, alert in announce.items():
+                utilization = alert.expenditure / alert.budget * 100
+                title = f'{names[key]} has passed {alert.threshold}% of its {year} budget'
+                content = (f'Expenditure of {alert.expenditure:,.2f} is {utilization:.1f}% of the '
+                           f'{year} budget of {alert.budget:,.2f}.')
+                notifications += [
+                    Notification(recipient_id=recipient, notification_type='SYSTEM', title=title, content=content,
+                                 related_object_id=alert.pk, related_object_type='BudgetAlert')
+                    for recipient in sorted(recipients[key])
+                ]
+
+        Notification.objects.bulk_create(notifications, batch_size=500)
+        BudgetAlertCheckpoint.objects.bulk_create(
+            [BudgetAlertCheckpoint(year=year, scope=scope, scope_id=scope_id, expenditure=spent, budget=budget)
+             for (scope, scope_id), (spent, budget) in changed.items()],
+            update_conflicts=True, unique_fields=['year', 'scope', 'scope_id'],
+            update_fields=['expenditure', 'budget', 'checked_at'])
+    return len(changed), len(alerts), len(notifications)
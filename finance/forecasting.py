@@ -0,0 +1,207 @@
+# finance/forecasting.py
+"""
+Year-end expenditure forecasts.
+
+For every scope (everything, each department, each state) the monthly
+series from the ledger's ScopeMonthlyExpenditure rows, covering the
+current year and HISTORY_YEARS before it, is fitted by least squares with
+a linear trend plus a level for each calendar month (the seasonality). All
+scopes of one kind are fitted together with NumPy: one least-squares solve
+for every series at once.
+
+The projected year-end total is the spend to date plus the fitted values
+for the rest of the year. The overrun probability treats the fit's residual
+spread as normal noise on each remaining month and gives the chance that
+the year-end total exceeds the scope's budget.
+
+Forecasts are cached per scope. The ledger bumps a scope's generation (see
+core.cache_generations) when an expenditure counting towards it commits,
+which retires the cached forecast in every worker, so cached figures are
+never older than the last expenditure.
+"""
+import math
+from dataclasses import dataclass
+from decimal import Decimal
+
+import numpy as np
+from django.core.cache import cache
+from django.db.models import Sum
+from django.utils import timezone
+
+from core import cache_generations
+from core.models import Department, State
+from monitoring.models import Project
+
+from .models import Budget, ScopeMonthlyExpenditure
+
+HISTORY_YEARS = 3
+CACHE_TIMEOUT = 60 * 60 * 24
+# Seasonal terms need two full years of history to mean anything.
+SEASONAL_MIN_MONTHS = 24
+
+BUDGET_FIELDS = {'DEPARTMENT': 'department_id', 'STATE': 'state_id', 'PROJECT': 'project_id'}
+
+
+@dataclass
+class Forecast:
+    scope: str
+    scope_id: str
+    year: int
+    actual: Decimal
+    projected: Decimal
+    budget: Decimal
+    overrun_probability: float
+    monthly: list
+
+    @property
+    def projected_utilization(self):
+        return round(self.projected / self.budget * 100, 2) if self.budget else None
+
+    @property
+    def variance(self):
+        return self.projected - self.budget
+
+
+def _generation_key(scope, scope_id):
+    return f'finance.forecast.generation:{scope}:{scope_id}'
+
+
+def invalidate(scopes):
+    """Retire the cached forecasts of `scopes`, a collection of (scope, scope_id)."""
+    cache_generations.bump([_generation_key(scope, scope_id) for scope, scope_id in scopes])
+
+
+def _money(value):
+    return Decimal(f'{value:.2f}')
+
+
+def _normal_tail(margin, spread):
+    """P(X > 0) for X ~ N(-margin, spread²)."""
+    if spread <= 0:
+        return 1.0 if margin < 0 else 0.0
+    return 0.5 * math.erfc(margin / (spread * math.sqrt(2)))
+
+
+def fit(history, months_ahead):
+    """
+    Fit every row of `history` (scopes × months, oldest first, starting in
+    January) and return the forecasts for the next `months_ahead` months
+    and the residual standard deviation, row by row.
+    """
+    scopes, observed = history.shape
+    future = np.arange(observed, observed + months_ahead)
+    if observed < 2:
+        level = history.mean(axis=1, keepdims=True) if observed else np.zeros((scopes, 1))
+        return np.repeat(level, months_ahead, axis=1), np.zeros(scopes)
+
+    def design(months):
+        # A slope plus one level per calendar month (seasonal), or a single level.
+        if observed >= SEASONAL_MIN_MONTHS:
+            levels = np.eye(12)[months % 12]
+        else:
+            levels = np.ones((len(months), 1))
+        return np.column_stack([months, levels])
+
+    past = design(np.arange(observed))
+    coefficients, *_ = np.linalg.lstsq(past, history.T, rcond=None)
+    residuals = history - (past @ coefficients).T
+    spread = np.sqrt((residuals ** 2).sum(axis=1) / max(observed - past.shape[1], 1))
+    return np.maximum((design(future) @ coefficients).T, 0), spread
+
+
+def _compute(scope, scope_ids, year, today):
+    first_year = year - HISTORY_YEARS
+    if year < today.year:
+        complete = 12
+    elif year == today.year:
+        complete = today.month - 1
+    else:
+        complete = 0
+    observed = HISTORY_YEARS * 12 + complete
+
+    index = {scope_id: row for row, scope_id in enumerate(scope_ids)}
+    series = np.zeros((len(scope_ids), HISTORY_YEARS * 12 + 12))
+    rows = ScopeMonthlyExpenditure.objects.filter(
+        scope=scope, year__range=(first_year, year), scope_id__in=scope_ids,
+    ).values_list('scope_id', 'year', 'month', 'total')
+    for scope_id, row_year, month, total in rows:
+        series[index[scope_id], (row_year - first_year) * 12 + month - 1] = float(total)
+
+    budgets = Budget.objects.filter(year=year)
+    if scope == 'ALL':
+        budget_totals = {'': budgets.aggregate(total=Sum('amount'))['total'] or 0}
+    else:
+        field = BUDGET_FIELDS[scope]
+        budget_totals = {
+            str(key): total for key, total in
+            budgets.filter(**{f'{field}__in': scope_ids}).values_list(field).annotate(total=Sum('amount'))
+            .values_list(field, 'total')
+        }
+
+    remaining = 12 - complete
+    predicted, spread = fit(series[:, :observed], remaining)
+    current_year = series[:, HISTORY_YEARS * 12:]
+    actual = current_year.sum(axis=1)
+    monthly = current_year.copy()
+    if remaining:
+        # The current month has partly happened: count the larger of what has
+        # been spent so far and what the model expects for it.
+        monthly[:, complete:] = np.maximum(predicted, current_year[:, complete:])
+    projected = monthly.sum(axis=1)
+    uncertainty = spread * math.sqrt(remaining)
+
+    result = {}
+    for scope_id, row in index.items():
+        budget = Decimal(budget_totals.get(scope_id) or 0)
+        result[scope_id] = Forecast(
+            scope=scope, scope_id=scope_id, year=year, actual=_money(actual[row]),
+            projected=_money(projected[row]), budget=budget,
+            overrun_probability=round(_normal_tail(float(budget) - projected[row], uncertainty[row]), 4)
+            if budget else None,
+            monthly=[_money(value) for value in monthly[row]],
+        )
+    return result
+
+
+def forecasts(scope, scope_ids=None, year=None, today=None):
+    """
+    {scope_id: Forecast} for `scope_ids` (default: every department, state
+    or project, or the single '' for ALL), served from the cache where the
+    scope has not changed since.
+    """
+    today = today or timezone.now().date()
+    year = year or today.year
+    if scope_ids is None and scope == 'ALL':
+        scope_ids = ['']
+    elif scope_ids is None:
+        model = {'DEPARTMENT': Department, 'STATE': State, 'PROJECT': Project}[scope]
+        scope_ids = list(model.objects.order_by('pk').values_list('pk', flat=True))
+    scope_ids = [str(scope_id) for scope_id in scope_ids]
+
+    generations = cache_generations.get_many([_generation_key(scope, scope_id) for scope_id in scope_ids])
+    keys = {
+        scope_id: f'finance.forecast:{scope}:{scope_id}:{year}:{today:%Y%m}:'
+                  f'{generations[_generation_key(scope, scope_id)]}'
+        for scope_id in scope_ids
+    }
+    cached = cache.get_many(list(keys.values()))
+    result = {scope_id: cached[key] for scope_id, key in keys.items() if key in cached}
+
+    missing = [scope_id for scope_id in scope_ids if scope_id not in result]
+    if missing:
+        computed = _compute(scope, missing, year, today)
+        cache.set_many({keys[scope_id]: item for scope_id, item in computed.items()}, CACHE_TIMEOUT)
+        result.update(computed)
+    return {scope_id: result[scope_id] for scope_id in scope_ids}
+
+
+def forecast(scope='ALL', scope_id='', year=None, today=None):
+    return forecasts(scope, [scope_id], year, today)[str(scope_id)]
+
+
+def at_risk(scope, year=None, today=None, limit=10):
+    """The `limit` scopes most likely to overspend their budget."""
+    ranked = [item for item in forecasts(scope, year=year, today=today).values()
+              if item.overrun_probability is not None]
+    ranked.sort(key=lambda item: (item.overrun_probability, item.variance), reverse=True)
+    return ranked[:limit]
@@ -0,0 +1,149 @@
+# finance/grants.py
+"""
+Grant burn rate and runway.
+
+An expenditure counts towards a grant when it falls within the grant's
+period and either belongs to the grant's project or, for a grant without a
+project, belongs to the grant's department and to no project.
+
+GrantMonthlySpend holds each grant's spending per month. The expenditure
+ledger keeps it current on every save, bulk write and delete (see
+finance.ledger), and saving a grant rebuilds that grant's series, since a
+new period or project changes which expenditures it covers. overview()
+works out burn rate, runway and an over/under-spend flag from those rows
+without touching the Expenditure table.
+"""
+from dataclasses import dataclass
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import ExtractMonth, ExtractYear
+from django.utils import timezone
+
+from .models import Expenditure, Grant, GrantMonthlySpend
+
+# Spending within this fraction of the straight-line plan counts as on track.
+TOLERANCE = Decimal('0.10')
+
+
+def candidates(values_list):
+    """(id, project, department, start, end) for the grants any of these expenditures could count towards."""
+    projects = {values['project_id'] for values in values_list if values['project_id'] is not None}
+    departments = {values['department_id'] for values in values_list if values['project_id'] is None}
+    if not projects and not departments:
+        return []
+    return list(
+        Grant.objects.filter(Q(project_id__in=projects) | Q(project__isnull=True, department_id__in=departments))
+        .values_list('pk', 'project_id', 'department_id', 'start_date', 'end_date')
+    )
+
+
+def matching(grants, values):
+    """Ids of the grants in `grants` (from candidates()) that an expenditure counts towards."""
+    for pk, project_id, department_id, start_date, end_date in grants:
+        if not start_date <= values['date'] <= end_date:
+            continue
+        if project_id is not None:
+            if values['project_id'] == project_id:
+                yield pk
+        elif values['project_id'] is None and values['department_id'] == department_id:
+            yield pk
+
+
+def linked_expenditures(grant):
+    expenditures = Expenditure.objects.filter(date__range=(grant.start_date, grant.end_date))
+    if grant.project_id is not None:
+        return expenditures.filter(project_id=grant.project_id)
+    return expenditures.filter(project__isnull=True, department_id=grant.department_id)
+
+
+def expected_series(grant):
+    """{(year, month): (total, entries)} recomputed from the raw Expenditure table."""
+    rows = (
+        linked_expenditures(grant)
+        .annotate(year=ExtractYear('date'), month=ExtractMonth('date'))
+        .values('year', 'month').annotate(total=Sum('amount'), entries=Count('id')).order_by()
+    )
+    # SQLite sums decimals as floats; round back to the column's precision.
+    return {(row['year'], row['month']): (row['total'].quantize(Decimal('0.01')), row['entries']) for row in rows}
+
+
+def rebuild_series(grant):
+    with transaction.atomic():
+        GrantMonthlySpend.objects.filter(grant=grant).delete()
+        GrantMonthlySpend.objects.bulk_create([
+            GrantMonthlySpend(grant=grant, year=year, month=month, total=total, entries=entries)
+            for (year, month), (total, entries) in expected_series(grant).items()
+        ])
+
+
+def grant_saved(sender, instance, **kwargs):
+    """post_save receiver for Grant."""
+    rebuild_series(instance)
+
+
+@dataclass
+class GrantBurn:
+    grant: Grant
+    spent: Decimal
+    remaining: Decimal
+    expected: Decimal
+    monthly_burn: Decimal
+    exhaustion_date: date
+    status: str
+
+    @property
+    def spent_percentage(self):
+        return round(self.spent / self.grant.amount * 100, 2) if self.grant.amount else Decimal('0')
+
+
+def burn(grant, spent, today=None):
+    """
+    Burn figures for `grant` given what has been spent on it so far.
+
+    The burn rate is the average spend per month since the grant started.
+    The exhaustion date extends that rate over the remaining balance, and
+    the status compares spending with a straight-line plan over the grant
+    period: OVER when it is more than TOLERANCE ahead of plan (so the money
+    runs out before the end date), UNDER when it is that far behind,
+    ON_TRACK otherwise.
+    """
+    today = today or timezone.now().date()
+    amount = grant.amount
+    remaining = amount - spent
+    duration = (grant.end_date - grant.start_date).days + 1
+    elapsed = min(max((today - grant.start_date).days + 1, 0), duration)
+    expected = (amount * elapsed / duration).quantize(Decimal('0.01'))
+
+    daily = spent / elapsed if elapsed else Decimal('0')
+    monthly_burn = (daily * Decimal('30.4375')).quantize(Decimal('0.01'))
+    if remaining <= 0:
+        exhaustion_date = today
+    elif daily > 0:
+        exhaustion_date = today + timedelta(days=int(remaining / daily))
+    else:
+        exhaustion_date = None
+
+    if elapsed == 0:
+        status = 'NOT_STARTED'
+    elif spent > expected * (1 + TOLERANCE):
+        status = 'OVER'
+    elif spent < expected * (1 - TOLERANCE):
+        status = 'UNDER'
+    else:
+        status = 'ON_TRACK'
+    return GrantBurn(grant, spent, remaining, expected, monthly_burn, exhaustion_date, status)
+
+
+def overview(queryset=None, today=None):
+    """GrantBurn for every grant in `queryset`, read from the monthly series in two queries."""
+    queryset = Grant.objects.all() if queryset is None else queryset
+    grants = list(queryset.select_related('department', 'project').order_by('end_date', 'pk'))
+    spent = dict(
+        GrantMonthlySpend.objects.filter(grant__in=[grant.pk for grant in grants])
+        .values('grant').annotate(spent=Sum('total')).values_list('grant', 'spent')
+    )
+    return [burn(grant, Decimal(spent.get(grant.pk) or 0).quantize(Decimal('0.01')), today) for grant in grants]
+
@@ -0,0 +1,273 @@
+# finance/ledger.py
+"""
+Expenditure ledger.
+
+Every saved or deleted Expenditure adjusts, in the same transaction, two
+sets of monthly rollups:
+
+* ExpenditureRollup, one row per (year, month, department, state, project,
+  expenditure_type), the full breakdown.
+* ScopeMonthlyExpenditure, one row per month for everything, for the
+  expenditure's department, for its state and for its project, so that
+  year-to-date and utilization figures for any of those scopes read at most
+  twelve rows.
+
+It also keeps each grant's monthly spending (GrantMonthlySpend) current for
+the grants the expenditure counts towards (see finance.grants), and the
+spending of the programme it is booked against in the programme coverage
+matrix (see programs.coverage).
+
+Once a change commits, the cached forecasts of the scopes it touched are
+retired (finance.forecasting).
+
+Bulk writes call record_bulk() themselves. Writes that bypass both
+(queryset update, raw SQL) leave the rollups stale; `manage.py
+reconcile_ledger` finds and repairs the drift.
+"""
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import ExtractMonth, ExtractYear
+
+from programs import coverage
+
+from . import grants as grant_spend
+from .models import (
+    Budget, Expenditure, ExpenditureRollup, Grant, GrantMonthlySpend, ScopeMonthlyExpenditure, LEDGER_FIELDS,
+)
+
+CENT = Decimal('0.01')
+
+SCOPE_FIELDS = {'DEPARTMENT': 'department_id', 'STATE': 'state_id', 'PROJECT': 'project_id'}
+
+
+def _values(expenditure):
+    # An unsaved or freshly saved instance keeps values as assigned, e.g. an ISO date string.
+    fields = {field.attname: field for field in Expenditure._meta.concrete_fields}
+    return {field: fields[field].to_python(getattr(expenditure, field)) for field in LEDGER_FIELDS}
+
+
+def _scopes(values):
+    """The ScopeMonthlyExpenditure keys an expenditure counts towards."""
+    scopes = [('ALL', '')]
+    for scope, field in SCOPE_FIELDS.items():
+        if values[field] is not None:
+            scopes.append((scope, str(values[field])))
+    return scopes
+
+
+def _adjust(model, lookup, amount, entries):
+    """Add `amount` and `entries` to the row matching `lookup`, creating it if needed."""
+    updated = model.objects.filter(**lookup).update(total=F('total') + amount, entries=F('entries') + entries)
+    if updated:
+        if entries < 0:
+            model.objects.filter(**lookup, entries=0).delete()
+        return
+    if entries < 0:
+        # The row went with a cascading delete of its department, state or project.
+        return
+    try:
+        with transaction.atomic():
+            model.objects.create(**lookup, total=amount, entries=entries)
+    except IntegrityError:
+        # Another transaction created the row first.
+        model.objects.filter(**lookup).update(total=F('total') + amount, entries=F('entries') + entries)
+
+
+def _deltas(values, sign, grants=()):
+    """
+    (model, lookup, amount, entries) for every rollup row an expenditure
+    counts towards; `grants` are grant_spend.candidates() for it.
+    """
+    amount = Decimal(str(values['amount'])) * sign
+    period = {'year': values['date'].year, 'month': values['date'].month}
+    yield ExpenditureRollup, {
+        **period,
+        'department_id': values['department_id'],
+        'state_id': values['state_id'],
+        'project_id': values['project_id'],
+        'expenditure_type': values['expenditure_type'],
+    }, amount, sign
+    for scope, scope_id in _scopes(values):
+        yield ScopeMonthlyExpenditure, {**period, 'scope': scope, 'scope_id': scope_id}, amount, sign
+    for grant_id in grant_spend.matching(grants, values):
+        yield GrantMonthlySpend, {**period, 'grant_id': grant_id}, amount, sign
+
+
+def _retire_forecasts(values_list):
+    from .forecasting import invalidate
+    scopes = {scope for values in values_list for scope in _scopes(values)}
+    transaction.on_commit(lambda: invalidate(scopes))
+
+
+def _post(values, sign, grants):
+    for model, lookup, amount, entries in _deltas(values, sign, grants):
+        _adjust(model, lookup, amount, entries)
+
+
+def record_save(previous, expenditure):
+    """Called by Expenditure.save() with the row's ledger fields before the save (None for a new row)."""
+    current = _values(expenditure)
+    if previous == current:
+        return
+    changed = [values for values in (previous, current) if values is not None]
+    grants = grant_spend.candidates(changed)
+    with transaction.atomic():
+        if previous is not None:
+            _post(previous, -1, grants)
+        _post(current, 1, grants)
+        coverage.record_spend([(values, sign) for values, sign in ((previous, -1), (current, 1)) if values is not None])
+        _retire_forecasts(changed)
+
+
+def record_bulk(changes):
+    """
+    Ledger counterpart of bulk_create and bulk_update: `changes` is a list of
+    (previous ledger fields or None, expenditure). Deltas are summed per
+    rollup row first, so each affected row is adjusted once.
+    """
+    changed = []
+    for previous, expenditure in changes:
+        current = _values(expenditure)
+        if previous != current:
+            changed += [(values, sign) for values, sign in ((previous, -1), (current, 1)) if values is not None]
+    grants = grant_spend.candidates([values for values, _ in changed])
+
+    totals = {}
+    for values, sign in changed:
+        for model, lookup, amount, entries in _deltas(values, sign, grants):
+            key = (model, tuple(sorted(lookup.items())))
+            total = totals.setdefault(key, [Decimal('0'), 0])
+            total[0] += amount
+            total[1] += entries
+    with transaction.atomic():
+        for (model, lookup), (amount, entries) in totals.items():
+            if amount or entries:
+                _adjust(model, dict(lookup), amount, entries)
+        coverage.record_spend(changed)
+        _retire_forecasts([values for values, _ in changed])
+
+
+def record_delete(sender, instance, **kwargs):
+    """post_delete receiver for Expenditure; runs inside the delete's transaction."""
+    values = _values(instance)
+    _post(values, -1, grant_spend.candidates([values]))
+    coverage.record_spend([(values, -1)])
+    _retire_forecasts([values])
+
+
+def monthly_totals(year, scope='ALL', scope_id=''):
+    """{month: total} for one scope and year; a single query over at most 12 rows."""
+    return dict(
+        ScopeMonthlyExpenditure.objects.filter(scope=scope, scope_id=str(scope_id), year=year)
+        .values_list('month', 'total')
+    )
+
+
+def year_to_date(year, scope='ALL', scope_id='', through_month=12):
+    totals = monthly_totals(year, scope, scope_id)
+    return sum((total for month, total in totals.items() if month <= through_month), Decimal('0'))
+
+
+def budget_utilization(year, scope='ALL', scope_id=''):
+    """(budget, expenditure, utilization percentage) for one scope and year."""
+    budgets = Budget.objects.filter(year=year)
+    if scope != 'ALL':
+        budgets = budgets.filter(**{SCOPE_FIELDS[scope]: scope_id})
+    budget = budgets.aggregate(total=Sum('amount'))['total'] or 0
+    expenditure = year_to_date(year, scope, scope_id)
+    utilization = (expenditure / budget * 100) if budget > 0 else 0
+    return budget, expenditure, round(utilization, 2)
+
+
+def _expected():
+    """Rollups recomputed from the raw Expenditure table."""
+    rollups = {}
+    scopes = defaultdict(lambda: [Decimal('0'), 0])
+    rows = (
+        Expenditure.objects
+        .annotate(year=ExtractYear('date'), month=ExtractMonth('date'))
+        .values('year', 'month', 'department_id', 'state_id', 'project_id', 'expenditure_type')
+        .annotate(total=Sum('amount'), entries=Count('id'))
+        .order_by()
+    )
+    for row in rows.iterator():
+        key = (row['year'], row['month'], row['department_id'], row['state_id'], row['project_id'],
+               row['expenditure_type'])
+        # SQLite sums decimals as floats; round back to the column's precision.
+        row['total'] = row['total'].quantize(CENT)
+        rollups[key] = (row['total'], row['entries'])
+        for scope_key in _scopes(row):
+            totals = scopes[(*scope_key, row['year'], row['month'])]
+            totals[0] += row['total']
+            totals[1] += row['entries']
+    grants = {
+        (grant.pk, year, month): totals
+        for grant in Grant.objects.all()
+        for (year, month), totals in grant_spend.expected_series(grant).items()
+    }
+    return rollups, {key: tuple(value) for key, value in scopes.items()}, grants
+
+
+def _stored():
+    rollups = {
+        (row.year, row.month, row.department_id, row.state_id, row.project_id, row.expenditure_type):
+            (row.total, row.entries)
+        for row in ExpenditureRollup.objects.iterator()
+    }
+    scopes = {
+        (row.scope, row.scope_id, row.year, row.month): (row.total, row.entries)
+        for row in ScopeMonthlyExpenditure.objects.iterator()
+    }
+    grants = {
+        (row.grant_id, row.year, row.month): (row.total, row.entries)
+        for row in GrantMonthlySpend.objects.iterator()
+    }
+    return rollups, scopes, grants
+
+
+def reconcile():
+    """
+    Compare the stored rollups with the raw table. Returns a list of
+    (table, key, stored, expected) tuples, where stored or expected is None
+    for a missing row.
+    """
+    expected_rollups, expected_scopes, expected_grants = _expected()
+    stored_rollups, stored_scopes, stored_grants = _stored()
+    mismatches = []
+    for table, expected, stored in (
+        ('rollup', expected_rollups, stored_rollups),
+        ('scope', expected_scopes, stored_scopes),
+        ('grant', expected_grants, stored_grants),
+    ):
+        for key in sorted(set(expected) | set(stored), key=str):
+            if expected.get(key) != stored.get(key):
+                mismatches.append((table, key, stored.get(key), expected.get(key)))
+    return mismatches
+
+
+def rebuild():
+    """Replace every rollup with totals recomputed from the raw table."""
+    expected_rollups, expected_scopes, expected_grants = _expected()
+    with transaction.atomic():
+        ExpenditureRollup.objects.all().delete()
+        ScopeMonthlyExpenditure.objects.all().delete()
+        GrantMonthlySpend.objects.all().delete()
+        ExpenditureRollup.objects.bulk_create([
+            ExpenditureRollup(year=year, month=month, department_id=department, state_id=state, project_id=project,
+                              expenditure_type=expenditure_type, total=total, entries=entries)
+            for (year, month, department, state, project, expenditure_type), (total, entries)
+            in expected_rollups.items()
+        ], batch_size=1000)
+        ScopeMonthlyExpenditure.objects.bulk_create([
+            ScopeMonthlyExpenditure(scope=scope, scope_id=scope_id, year=year, month=month, total=total,
+                                    entries=entries)
+            for (scope, scope_id, year, month), (total, entries) in expected_scopes.items()
+        ], batch_size=1000)
+        GrantMonthlySpend.objects.bulk_create([
+            GrantMonthlySpend(grant_id=grant, year=year, month=month, total=total, entries=entries)
+            for (grant, year, month), (total, entries) in expected_grants.items()
+        ], batch_size=1000)
+    return len(expected_rollups) + len(expected_scopes) + len(expected_grants)
@@ -0,0 +1,16 @@
+# finance/management/commands/check_budget_alerts.py
+from django.core.management.base import BaseCommand
+
+from finance.budget_alerts import check_budgets
+
+
+class Command(BaseCommand):
+    help = 'Notify directors and state coordinators whose budgets have passed 80%, 90% or 100%'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--year', type=int, help='Budget year (default: the current year)')
+
+    def handle(self, *args, **options):
+        checked, alerts, notifications = check_budgets(options['year'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Checked {checked} changed scope(s): {alerts} threshold(s) passed, {notifications} notification(s) sent.'))
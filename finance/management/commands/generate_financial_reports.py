@@ -0,0 +1,47 @@
+# finance/management/commands/generate_financial_reports.py
+from django.core.management.base import BaseCommand, CommandError
+
+from core.models import Employee, Department, State
+from finance import reports
+from finance.models import FinancialReport
+
+
+class Command(BaseCommand):
+    help = (
+        'Generate the financial report for the last complete month, quarter or year, '
+        'or, without --type, every report still waiting to be generated'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--type', choices=[choice for choice, _ in FinancialReport.REPORT_TYPE_CHOICES])
+        parser.add_argument('--format', default='CSV', choices=[choice for choice, _ in FinancialReport.FORMAT_CHOICES])
+        parser.add_argument('--department', help='Department code')
+        parser.add_argument('--state', help='State code')
+        parser.add_argument('--requested-by', help='Employee ID to notify when the report is ready')
+
+    def handle(self, *args, **options):
+        if options['type']:
+            self.request(options)
+        processed = reports.run_pending()
+        for report in processed:
+            style = self.style.SUCCESS if report.status == 'COMPLETED' else self.style.ERROR
+            self.stdout.write(style(f'{report.title}: {report.status.lower()} {report.file.name or report.error}'))
+        if not processed:
+            self.stdout.write('No reports waiting.')
+
+    def request(self, options):
+        try:
+            department = Department.objects.get(pk=options['department']) if options['department'] else None
+            state = State.objects.get(pk=options['state']) if options['state'] else None
+            requester = (
+                Employee.objects.get(employee_id=options['requested_by']) if options['requested_by'] else None
+            )
+        except (Department.DoesNotExist, State.DoesNotExist, Employee.DoesNotExist) as exc:
+            raise CommandError(exc)
+
+        start_date, end_date = reports.period_bounds(options['type'])
+        try:
+            reports.request_report(options['type'], start_date, end_date, requester, department, state,
+                                   options['format'], background=False)
+        except reports.ReportError as exc:
+            raise CommandError(exc)
@@ -0,0 +1,31 @@
+# finance/management/commands/reconcile_ledger.py
+from django.core.management.base import BaseCommand, CommandError
+
+from finance import ledger
+
+
+class Command(BaseCommand):
+    help = 'Verify the monthly expenditure rollups against the Expenditure table'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--fix', action='store_true', help='Rebuild the rollups from the Expenditure table')
+        parser.add_argument('--limit', type=int, default=20, help='Mismatches to list (default 20)')
+
+    def handle(self, *args, **options):
+        mismatches = ledger.reconcile()
+        if not mismatches:
+            self.stdout.write(self.style.SUCCESS('Ledger rollups match the Expenditure table.'))
+            return
+
+        for table, key, stored, expected in mismatches[:options['limit']]:
+            self.stdout.write(f'{table} {key}: stored {self.describe(stored)}, expected {self.describe(expected)}')
+        if len(mismatches) > options['limit']:
+            self.stdout.write(f'... and {len(mismatches) - options["limit"]} more')
+
+        if not options['fix']:
+            raise CommandError(f'{len(mismatches)} rollup row(s) do not match; run with --fix to rebuild.')
+        rows = ledger.rebuild()
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {rows} rollup rows.'))
+
+    def describe(self, totals):
+        return 'nothing' if totals is None else f'{totals[0]} in {totals[1]} entries'
@@ -0,0 +1,37 @@
+# finance/management/commands/revalue_assets.py
+import time
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from finance import depreciation
+
+
+class Command(BaseCommand):
+    help = (
+        'Depreciate every asset to its book value at a date (default today, or 31 December of --year), '
+        'update Asset.current_value and record a valuation snapshot'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--year', type=int, help='Revalue at the end of this financial year')
+        parser.add_argument('--as-of', type=date.fromisoformat, help='Revalue at this date (YYYY-MM-DD)')
+        parser.add_argument('--backfill-from', type=int,
+                            help='Also write year-end snapshots from this year up to the revaluation year')
+
+    def handle(self, *args, **options):
+        if options['year'] and options['as_of']:
+            raise CommandError('Give either --year or --as-of, not both.')
+        as_of = depreciation.year_end(options['year']) if options['year'] else options['as_of']
+
+        start = time.perf_counter()
+        changed = depreciation.revalue(as_of)
+        self.stdout.write(f'Revalued assets: {changed} value(s) changed in {time.perf_counter() - start:.2f}s.')
+
+        if options['backfill_from']:
+            last_year = (as_of or date.today()).year - 1
+            period_ends = [depreciation.year_end(year) for year in range(options['backfill_from'], last_year + 1)]
+            start = time.perf_counter()
+            written = depreciation.write_snapshots(period_ends)
+            self.stdout.write(f'Wrote {written} year-end snapshot(s) in {time.perf_counter() - start:.2f}s.')
+        self.stdout.write(self.style.SUCCESS('Done.'))
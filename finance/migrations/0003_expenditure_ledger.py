@@ -0,0 +1,49 @@
+# Generated by Django 5.1.1 on 2026-10-19 12:36
+
+import django.db.models.deletion
+import django.db.models.functions.comparison
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_slowquery'),
+        ('finance', '0002_initial'),
+        ('monitoring', '0003_project_assigned_to'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ScopeMonthlyExpenditure',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('scope', models.CharField(choices=[('ALL', 'All'), ('DEPARTMENT', 'Department'), ('STATE', 'State'), ('PROJECT', 'Project')], max_length=20)),
+                ('scope_id', models.CharField(blank=True, max_length=20)),
+                ('year', models.PositiveIntegerField()),
+                ('month', models.PositiveSmallIntegerField()),
+                ('total', models.DecimalField(decimal_places=2, default=0, max_digits=17)),
+                ('entries', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'unique_together': {('scope', 'scope_id', 'year', 'month')},
+            },
+        ),
+        migrations.CreateModel(
+            name='ExpenditureRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('year', models.PositiveIntegerField()),
+                ('month', models.PositiveSmallIntegerField()),
+                ('expenditure_type', models.CharField(choices=[('OPERATIONAL', 'Operational'), ('CAPITAL', 'Capital'), ('PROJECT', 'Project')], max_length=20)),
+                ('total', models.DecimalField(decimal_places=2, default=0, max_digits=17)),
+                ('entries', models.PositiveIntegerField(default=0)),
+                ('department', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='expenditure_rollups', to='core.department')),
+                ('project', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='expenditure_rollups', to='monitoring.project')),
+                ('state', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='expenditure_rollups', to='core.state')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(models.F('year'), models.F('month'), models.F('department'), models.F('state'), django.db.models.functions.comparison.Coalesce(models.F('project'), models.Value(0)), models.F('expenditure_type'), name='unique_expenditure_rollup')],
+            },
+        ),
+    ]
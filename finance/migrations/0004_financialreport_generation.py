@@ -0,0 +1,43 @@
+# Generated by Django 5.1.1 on 2026-10-19 12:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finance', '0003_expenditure_ledger'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='financialreport',
+            name='completed_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='financialreport',
+            name='error',
+            field=models.TextField(blank=True),
+        ),
+        migrations.AddField(
+            model_name='financialreport',
+            name='file_format',
+            field=models.CharField(choices=[('CSV', 'CSV'), ('XLSX', 'Excel')], default='CSV', max_length=4),
+        ),
+        migrations.AddField(
+            model_name='financialreport',
+            name='started_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='financialreport',
+            name='status',
+            field=models.CharField(choices=[('PENDING', 'Pending'), ('RUNNING', 'Running'), ('COMPLETED', 'Completed'), ('FAILED', 'Failed')], default='PENDING', max_length=20),
+        ),
+        migrations.AlterField(
+            model_name='financialreport',
+            name='file',
+            field=models.FileField(blank=True, upload_to='financial_reports/'),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.1.1 on 2026-10-19 12:46
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finance', '0004_financialreport_generation'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AssetValuation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('period_end', models.DateField(db_index=True)),
+                ('method', models.CharField(max_length=20)),
+                ('book_value', models.DecimalField(decimal_places=2, max_digits=15)),
+                ('accumulated_depreciation', models.DecimalField(decimal_places=2, max_digits=15)),
+                ('asset', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='valuations', to='finance.asset')),
+            ],
+            options={
+                'unique_together': {('asset', 'period_end')},
+            },
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.1.1 on 2026-10-19 12:49
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finance', '0005_assetvaluation'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GrantMonthlySpend',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('year', models.PositiveIntegerField()),
+                ('month', models.PositiveSmallIntegerField()),
+                ('total', models.DecimalField(decimal_places=2, default=0, max_digits=17)),
+                ('entries', models.PositiveIntegerField(default=0)),
+                ('grant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='monthly_spend', to='finance.grant')),
+            ],
+            options={
+                'unique_together': {('grant', 'year', 'month')},
+            },
+        ),
+    ]
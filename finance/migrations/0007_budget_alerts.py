@@ -0,0 +1,44 @@
+# Generated by Django 5.1.1 on 2026-10-19 12:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finance', '0006_grantmonthlyspend'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BudgetAlert',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('year', models.PositiveIntegerField()),
+                ('scope', models.CharField(choices=[('DEPARTMENT', 'Department'), ('STATE', 'State')], max_length=20)),
+                ('scope_id', models.CharField(max_length=20)),
+                ('threshold', models.PositiveSmallIntegerField()),
+                ('budget', models.DecimalField(decimal_places=2, max_digits=17)),
+                ('expenditure', models.DecimalField(decimal_places=2, max_digits=17)),
+                ('fired_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'unique_together': {('year', 'scope', 'scope_id', 'threshold')},
+            },
+        ),
+        migrations.CreateModel(
+            name='BudgetAlertCheckpoint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('year', models.PositiveIntegerField()),
+                ('scope', models.CharField(choices=[('DEPARTMENT', 'Department'), ('STATE', 'State')], max_length=20)),
+                ('scope_id', models.CharField(max_length=20)),
+                ('budget', models.DecimalField(decimal_places=2, max_digits=17)),
+                ('expenditure', models.DecimalField(decimal_places=2, max_digits=17)),
+                ('checked_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'unique_together': {('year', 'scope', 'scope_id')},
+            },
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 5.1.1 on 2026-10-19 13:14
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finance', '0007_budget_alerts'),
+        ('programs', '0003_program_coverage'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='expenditure',
+            name='program',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='expenditures', to='programs.program'),
+        ),
+    ]
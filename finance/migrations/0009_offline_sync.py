@@ -0,0 +1,24 @@
+# Generated by Django 5.1.1 on 2026-10-19 13:19
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finance', '0008_expenditure_program'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='expenditure',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        migrations.AddIndex(
+            model_name='expenditure',
+            index=models.Index(fields=['updated_at', 'id'], name='finance_exp_updated_da2871_idx'),
+        ),
+    ]
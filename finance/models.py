@@ -1,9 +1,12 @@
 # finance/models.py
 
-from django.db import models
+from django.db import models, transaction
+from django.db.models import F, Value
+from django.db.models.functions import Coalesce
 from django.conf import settings
 from core.models import Department, State
 from monitoring.models import Project
+from programs.models import Program
 
 class Budget(models.Model):
     BUDGET_TYPE_CHOICES = [
@@ -32,6 +35,9 @@ class Budget(models.Model):
         else:
             return f"{self.year} {self.state.name} Budget"
 
+# Fields of an expenditure that decide which ledger rows it counts towards.
+LEDGER_FIELDS = ('amount', 'date', 'department_id', 'state_id', 'project_id', 'program_id', 'expenditure_type')
+
 class Expenditure(models.Model):
     EXPENDITURE_TYPE_CHOICES = [
         ('OPERATIONAL', 'Operational'),
@@ -45,13 +51,107 @@ class Expenditure(models.Model):
     expenditure_type = models.CharField(max_length=20, choices=EXPENDITURE_TYPE_CHOICES)
     department = models.ForeignKey(Department, on_delete=models.CASCADE, related_name='expenditures')
     project = models.ForeignKey(Project, on_delete=models.CASCADE, null=True, blank=True, related_name='expenditures')
+    program = models.ForeignKey(Program, on_delete=models.SET_NULL, null=True, blank=True, related_name='expenditures')
     state = models.ForeignKey(State, on_delete=models.CASCADE, related_name='expenditures')
     approved_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, related_name='approved_expenditures')
     submitted_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, related_name='submitted_expenditures')
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [models.Index(fields=['updated_at', 'id'])]
     
     def __str__(self):
         return f"{self.date} - {self.description[:50]}..."
 
+    def save(self, *args, **kwargs):
+        # The ledger rollups change in the same transaction as the row.
+        from .ledger import record_save
+        with transaction.atomic():
+            previous = None
+            if self.pk:
+                previous = Expenditure.objects.filter(pk=self.pk).values(*LEDGER_FIELDS).first()
+            super().save(*args, **kwargs)
+            record_save(previous, self)
+
+
+class ExpenditureRollup(models.Model):
+    """Monthly expenditure totals per department, state, project and expenditure type."""
+    year = models.PositiveIntegerField()
+    month = models.PositiveSmallIntegerField()
+    department = models.ForeignKey(Department, on_delete=models.CASCADE, related_name='expenditure_rollups')
+    state = models.ForeignKey(State, on_delete=models.CASCADE, related_name='expenditure_rollups')
+    project = models.ForeignKey(Project, on_delete=models.CASCADE, null=True, blank=True, related_name='expenditure_rollups')
+    expenditure_type = models.CharField(max_length=20, choices=Expenditure.EXPENDITURE_TYPE_CHOICES)
+    total = models.DecimalField(max_digits=17, decimal_places=2, default=0)
+    entries = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            # Coalesce so that rows without a project are unique too.
+            models.UniqueConstraint(
+                F('year'), F('month'), F('department'), F('state'), Coalesce(F('project'), Value(0)),
+                F('expenditure_type'), name='unique_expenditure_rollup'),
+        ]
+
+    def __str__(self):
+        return f"{self.year}-{self.month:02d} {self.department_id}/{self.state_id} {self.expenditure_type}"
+
+
+class ScopeMonthlyExpenditure(models.Model):
+    """Monthly expenditure totals for a reporting scope: everything, a department, a state or a project."""
+    SCOPE_CHOICES = [
+        ('ALL', 'All'),
+        ('DEPARTMENT', 'Department'),
+        ('STATE', 'State'),
+        ('PROJECT', 'Project'),
+    ]
+
+    scope = models.CharField(max_length=20, choices=SCOPE_CHOICES)
+    scope_id = models.CharField(max_length=20, blank=True)
+    year = models.PositiveIntegerField()
+    month = models.PositiveSmallIntegerField()
+    total = models.DecimalField(max_digits=17, decimal_places=2, default=0)
+    entries = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ('scope', 'scope_id', 'year', 'month')
+
+    def __str__(self):
+        return f"{self.year}-{self.month:02d} {self.scope} {self.scope_id}"
+
+class BudgetAlert(models.Model):
+    """A budget threshold crossed by a department or state, recorded so that it is announced once."""
+    SCOPE_CHOICES = [
+        ('DEPARTMENT', 'Department'),
+        ('STATE', 'State'),
+    ]
+
+    year = models.PositiveIntegerField()
+    scope = models.CharField(max_length=20, choices=SCOPE_CHOICES)
+    scope_id = models.CharField(max_length=20)
+    threshold = models.PositiveSmallIntegerField()
+    budget = models.DecimalField(max_digits=17, decimal_places=2)
+    expenditure = models.DecimalField(max_digits=17, decimal_places=2)
+    fired_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = ('year', 'scope', 'scope_id', 'threshold')
+
+    def __str__(self):
+        return f"{self.year} {self.scope} {self.scope_id} passed {self.threshold}%"
+
+class BudgetAlertCheckpoint(models.Model):
+    """Expenditure and budget of a scope when the budget alert job last checked it."""
+    year = models.PositiveIntegerField()
+    scope = models.CharField(max_length=20, choices=BudgetAlert.SCOPE_CHOICES)
+    scope_id = models.CharField(max_length=20)
+    budget = models.DecimalField(max_digits=17, decimal_places=2)
+    expenditure = models.DecimalField(max_digits=17, decimal_places=2)
+    checked_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ('year', 'scope', 'scope_id')
+
 class FinancialReport(models.Model):
     REPORT_TYPE_CHOICES = [
         ('MONTHLY', 'Monthly'),
@@ -59,6 +159,17 @@ class FinancialReport(models.Model):
         ('ANNUAL', 'Annual'),
     ]
     
+    STATUS_CHOICES = [
+        ('PENDING', 'Pending'),
+        ('RUNNING', 'Running'),
+        ('COMPLETED', 'Completed'),
+        ('FAILED', 'Failed'),
+    ]
+    FORMAT_CHOICES = [
+        ('CSV', 'CSV'),
+        ('XLSX', 'Excel'),
+    ]
+    
     title = models.CharField(max_length=255)
     report_type = models.CharField(max_length=20, choices=REPORT_TYPE_CHOICES)
     start_date = models.DateField()
@@ -67,7 +178,12 @@ class FinancialReport(models.Model):
     state = models.ForeignKey(State, on_delete=models.CASCADE, null=True, blank=True)
     generated_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True)
     generated_at = models.DateTimeField(auto_now_add=True)
-    file = models.FileField(upload_to='financial_reports/')
+    file = models.FileField(upload_to='financial_reports/', blank=True)
+    file_format = models.CharField(max_length=4, choices=FORMAT_CHOICES, default='CSV')
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='PENDING')
+    started_at = models.DateTimeField(null=True, blank=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+    error = models.TextField(blank=True)
     
     def __str__(self):
         return f"{self.get_report_type_display()} Report - {self.start_date} to {self.end_date}"
@@ -85,6 +201,20 @@ class Grant(models.Model):
     def __str__(self):
         return f"{self.name} - {self.granting_agency}"
 
+class GrantMonthlySpend(models.Model):
+    """Monthly spending against a grant, maintained by the expenditure ledger (see finance.grants)."""
+    grant = models.ForeignKey(Grant, on_delete=models.CASCADE, related_name='monthly_spend')
+    year = models.PositiveIntegerField()
+    month = models.PositiveSmallIntegerField()
+    total = models.DecimalField(max_digits=17, decimal_places=2, default=0)
+    entries = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ('grant', 'year', 'month')
+
+    def __str__(self):
+        return f"{self.grant.name} {self.year}-{self.month:02d}: {self.total}"
+
 class Asset(models.Model):
     ASSET_TYPE_CHOICES = [
         ('EQUIPMENT', 'Equipment'),
@@ -103,4 +233,18 @@ class Asset(models.Model):
     state = models.ForeignKey(State, on_delete=models.CASCADE, related_name='assets')
     
     def __str__(self):
-        return f"{self.name} - {self.get_asset_type_display()}"
\ No newline at end of file
+        return f"{self.name} - {self.get_asset_type_display()}"
+
+class AssetValuation(models.Model):
+    """Book value of an asset at the end of a reporting period, written by finance.depreciation."""
+    asset = models.ForeignKey(Asset, on_delete=models.CASCADE, related_name='valuations')
+    period_end = models.DateField(db_index=True)
+    method = models.CharField(max_length=20)
+    book_value = models.DecimalField(max_digits=15, decimal_places=2)
+    accumulated_depreciation = models.DecimalField(max_digits=15, decimal_places=2)
+
+    class Meta:
+        unique_together = ('asset', 'period_end')
+
+    def __str__(self):
+        return f"{self.asset.name} at {self.period_end}: {self.book_value}"
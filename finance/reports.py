@@ -0,0 +1,279 @@
+# finance/reports.py
+"""
+Financial report engine.
+
+request_report() records a PENDING FinancialReport and, once the request's
+transaction commits, hands it to a background worker thread. The worker
+streams the period's expenditures, budgets and grants from the read replica
+(core.replica) in chunks (QuerySet.iterator) straight into a CSV or XLSX
+file, stores the file on the report and notifies the requester. Memory use
+depends on the chunk size, not on the length of the period.
+
+Users request reports through the API (finance:financialreport-list).
+`manage.py generate_financial_reports` produces scheduled monthly, quarterly
+and annual reports and picks up reports left PENDING by a restarted server,
+or left RUNNING for longer than FINANCIAL_REPORT_TIMEOUT by a worker that
+died.
+"""
+import csv
+import logging
+import queue
+import tempfile
+import threading
+from datetime import date, timedelta
+from pathlib import Path
+
+from django.conf import settings
+from django.core.files import File
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from communication.models import Notification
+from core.replica import using_reporting
+
+from .models import Budget, Expenditure, FinancialReport, Grant
+
+try:
+    import openpyxl
+except ImportError:  # XLSX output needs tablib's xlsx extra (openpyxl)
+    openpyxl = None
+
+logger = logging.getLogger(__name__)
+
+_queue = queue.Queue()
+_worker = None
+_worker_lock = threading.Lock()
+
+
+class ReportError(Exception):
+    pass
+
+
+def chunk_size():
+    return getattr(settings, 'FINANCIAL_REPORT_CHUNK_SIZE', 2000)
+
+
+def waiting():
+    """Reports not yet generated: PENDING ones, and RUNNING ones whose worker has not finished in time."""
+    timeout = timedelta(seconds=getattr(settings, 'FINANCIAL_REPORT_TIMEOUT', 3600))
+    return Q(status='PENDING') | Q(status='RUNNING', started_at__lt=timezone.now() - timeout)
+
+
+def period_bounds(report_type, day=None):
+    """First and last day of the last complete month, quarter or year before `day`."""
+    day = day or timezone.now().date()
+    if report_type == 'MONTHLY':
+        end = day.replace(day=1) - timedelta(days=1)
+        return end.replace(day=1), end
+    if report_type == 'QUARTERLY':
+        quarter_start = date(day.year, 3 * ((day.month - 1) // 3) + 1, 1)
+        end = quarter_start - timedelta(days=1)
+        return date(end.year, end.month - 2, 1), end
+    if report_type == 'ANNUAL':
+        return date(day.year - 1, 1, 1), date(day.year - 1, 12, 31)
+    raise ReportError(f'Unknown report type {report_type!r}')
+
+
+class CsvReportWriter:
+    """Writes each section as a title row, a header row, the rows and a blank line."""
+
+    extension = 'csv'
+
+    def __init__(self, path):
+        self.handle = open(path, 'w', newline='', encoding='utf-8')
+        self.writer = csv.writer(self.handle)
+
+    def write_section(self, title, headers, rows):
+        self.writer.writerow([title])
+        self.writer.writerow(headers)
+        self.writer.writerows(rows)
+        self.writer.writerow([])
+
+    def close(self):
+        self.handle.close()
+
+
+class XlsxReportWriter:
+    """Writes each section to its own sheet of a write-only (streaming) workbook."""
+
+    extension = 'xlsx'
+
+    def __init__(self, path):
+        if openpyxl is None:
+            raise ReportError('XLSX reports need openpyxl (pip install "tablib[xlsx]")')
+        self.path = path
+        self.workbook = openpyxl.Workbook(write_only=True)
+
+    def write_section(self, title, headers, rows):
+        sheet = self.workbook.create_sheet(title[:31])
+        sheet.append(headers)
+        for row in rows:
+            sheet.append(row)
+
+    def close(self):
+        self.workbook.save(self.path)
+
+
+WRITERS = {'CSV': CsvReportWriter, 'XLSX': XlsxReportWriter}
+
+
+def _with_total(rows, amount_index, label_index=0):
+    """Yield `rows` and then a TOTAL row summing the amount column as it streams past."""
+    total = 0
+    width = None
+    for row in rows:
+        total += row[amount_index]
+        width = len(row)
+        yield row
+    if width:
+        footer = [''] * width
+        footer[label_index] = 'TOTAL'
+        footer[amount_index] = total
+        yield footer
+
+
+def report_sections(report, size=None):
+    """(title, headers, rows) for every section of `report`; rows are lazy iterators."""
+    size = size or chunk_size()
+    scope = Q()
+    if report.department_id:
+        scope &= Q(department_id=report.department_id)
+    if report.state_id:
+        scope &= Q(state_id=report.state_id)
+
+    expenditures = using_reporting(
+        Expenditure.objects.filter(scope, date__range=(report.start_date, report.end_date))
+        .order_by('date', 'id')
+        .values_list('date', 'department__name', 'state__name', 'project__title', 'expenditure_type', 'amount',
+                     'description')
+    )
+    yield (
+        'Expenditures',
+        ['Date', 'Department', 'State', 'Project', 'Type', 'Amount', 'Description'],
+        _with_total(expenditures.iterator(chunk_size=size), amount_index=5),
+    )
+
+    budgets = using_reporting(
+        Budget.objects.filter(scope, year__range=(report.start_date.year, report.end_date.year))
+        .order_by('year', 'budget_type', 'id')
+        .values_list('year', 'budget_type', 'department__name', 'state__name', 'project__title', 'amount')
+    )
+    yield (
+        'Budgets',
+        ['Year', 'Type', 'Department', 'State', 'Project', 'Amount'],
+        _with_total(budgets.iterator(chunk_size=size), amount_index=5),
+    )
+
+    # Grants belong to a department, not a state.
+    grants = Grant.objects.filter(start_date__lte=report.end_date, end_date__gte=report.start_date)
+    if report.department_id:
+        grants = grants.filter(department_id=report.department_id)
+    grants = using_reporting(grants.order_by('start_date', 'id').values_list(
+        'name', 'granting_agency', 'department__name', 'project__title', 'start_date', 'end_date', 'amount'))
+    yield (
+        'Grants',
+        ['Name', 'Granting agency', 'Department', 'Project', 'Start', 'End', 'Amount'],
+        _with_total(grants.iterator(chunk_size=size), amount_index=6),
+    )
+
+
+def _notify(report):
+    if report.generated_by_id is None:
+        return
+    if report.status == 'COMPLETED':
+        title = f'{report.title} is ready'
+        content = f'Your {report.get_report_type_display().lower()} financial report is ready to download.'
+    else:
+        title = f'{report.title} failed'
+        content = f'The report could not be generated: {report.error}'
+    Notification.objects.create(
+        recipient_id=report.generated_by_id, notification_type='SYSTEM', title=title, content=content,
+        related_object_id=report.pk, related_object_type='FinancialReport')
+
+
+def generate_report(report_id):
+    """Build the file for a waiting report, store it and notify the requester."""
+    claimed = FinancialReport.objects.filter(waiting(), pk=report_id).update(
+        status='RUNNING', started_at=timezone.now())
+    if not claimed:
+        return None
+    report = FinancialReport.objects.get(pk=report_id)
+    try:
+        writer_class = WRITERS[report.file_format]
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory) / f'report.{writer_class.extension}'
+            writer = writer_class(path)
+            try:
+                for title, headers, rows in report_sections(report):
+                    writer.write_section(title, headers, rows)
+            finally:
+                writer.close()
+            name = (f'{report.report_type.lower()}_{report.start_date:%Y%m%d}_{report.end_date:%Y%m%d}'
+                    f'_{report.pk}.{writer_class.extension}')
+            with open(path, 'rb') as handle:
+                report.file.save(name, File(handle), save=False)
+        report.status = 'COMPLETED'
+        report.completed_at = timezone.now()
+        report.error = ''
+    except Exception as exc:
+        logger.exception('Financial report %s failed', report_id)
+        report.status = 'FAILED'
+        report.error = str(exc)
+    report.save(update_fields=['file', 'status', 'completed_at', 'error'])
+    _notify(report)
+    return report
+
+
+def request_report(report_type, start_date, end_date, requested_by, department=None, state=None,
+                   file_format='CSV', title=None, background=True):
+    """
+    Record a report. With `background`, a worker thread generates it once the
+    current transaction commits; otherwise the caller runs generate_report().
+    """
+    if file_format not in WRITERS:
+        raise ReportError(f'Unknown report format {file_format!r}')
+    if file_format == 'XLSX' and openpyxl is None:
+        raise ReportError('XLSX reports need openpyxl (pip install "tablib[xlsx]")')
+    if start_date > end_date:
+        raise ReportError('The report period ends before it starts')
+
+    report = FinancialReport.objects.create(
+        title=title or f'{dict(FinancialReport.REPORT_TYPE_CHOICES)[report_type]} financial report '
+                       f'{start_date:%d %b %Y} to {end_date:%d %b %Y}',
+        report_type=report_type, start_date=start_date, end_date=end_date, department=department, state=state,
+        generated_by=requested_by, file_format=file_format)
+    if background:
+        transaction.on_commit(lambda: enqueue(report.pk))
+    return report
+
+
+def enqueue(report_id):
+    _queue.put(report_id)
+    _ensure_worker()
+
+
+def _ensure_worker():
+    global _worker
+    with _worker_lock:
+        if _worker is None or not _worker.is_alive():
+            _worker = threading.Thread(target=_drain_queue, name='financial-reports', daemon=True)
+            _worker.start()
+
+
+def _drain_queue():
+    while True:
+        report_id = _queue.get()
+        try:
+            generate_report(report_id)
+        except Exception:
+            logger.exception('Could not run financial report %s', report_id)
+        finally:
+            connection.close()
+            _queue.task_done()
+
+
+def run_pending():
+    """Generate every waiting report in this process; returns the reports processed."""
+    pending = FinancialReport.objects.filter(waiting()).order_by('generated_at').values_list('pk', flat=True)
+    return [report for report in map(generate_report, list(pending)) if report is not None]
@@ -0,0 +1,195 @@
+# finance/serializers.py
+from django.db import transaction
+from django.utils import timezone
+from rest_framework import serializers
+from rest_framework.permissions import SAFE_METHODS
+
+from . import ledger, reports
+from .models import Budget, Expenditure, FinancialReport, Grant, Asset, LEDGER_FIELDS
+
+
+def requested_fields(request):
+    """Field names from the `fields` query parameter, or None for all fields."""
+    if request is None or not request.query_params.get('fields'):
+        return None
+    return {name.strip() for name in request.query_params['fields'].split(',') if name.strip()}
+
+
+class SparseFieldsMixin:
+    """Drops the fields not listed in `?fields=a,b,c` from read responses."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        request = self.context.get('request')
+        fields = requested_fields(request)
+        if fields is not None and request.method in SAFE_METHODS:
+            for name in set(self.fields) - fields - {'id'}:
+                self.fields.pop(name)
+
+
+class PrefetchedPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    """Resolves ids from a cache primed by BulkListSerializer instead of one query per item."""
+
+    def to_internal_value(self, data):
+        cache = self.context.get('related_cache', {}).get(self.field_name)
+        if cache is None:
+            return super().to_internal_value(data)
+        try:
+            return cache[str(data)]
+        except KeyError:
+            self.fail('does_not_exist', pk_value=data)
+
+
+class BulkListSerializer(serializers.ListSerializer):
+    """
+    Validates a list of expenditures with one query per related field and
+    writes it with bulk_create or bulk_update, in one transaction, keeping
+    the ledger rollups in step.
+    """
+
+    def to_internal_value(self, data):
+        if isinstance(data, list):
+            cache = {}
+            for name, field in self.child.fields.items():
+                if isinstance(field, PrefetchedPrimaryKeyRelatedField) and not field.read_only:
+                    ids = {item[name] for item in data if isinstance(item, dict) and item.get(name) is not None}
+                    try:
+                        objects = field.get_queryset().in_bulk(ids)
+                    except (TypeError, ValueError):
+                        continue  # Malformed ids; let per-item validation report them.
+                    cache[name] = {str(pk): obj for pk, obj in objects.items()}
+            self.context['related_cache'] = cache
+        return super().to_internal_value(data)
+
+    def create(self, validated_data):
+        model = self.child.Meta.model
+        with transaction.atomic():
+            objects = model.objects.bulk_create([model(**item) for item in validated_data])
+            ledger.record_bulk([(None, obj) for obj in objects])
+        return objects
+
+    def update(self, instances, validated_data):
+        from core import sync  # core.sync imports this module.
+
+        previous = [{field: getattr(instance, field) for field in LEDGER_FIELDS} for instance in instances]
+        scopes = [sync.scope(instance) for instance in instances]
+        fields = set()
+        for instance, item in zip(instances, validated_data):
+            for name, value in item.items():
+                setattr(instance, name, value)
+                fields.add(name)
+        with transaction.atomic():
+            if fields:
+                # bulk_update() skips auto_now; offline clients sync on updated_at.
+                now = timezone.now()
+                for instance in instances:
+                    instance.updated_at = now
+                self.child.Meta.model.objects.bulk_update(instances, sorted(fields | {'updated_at'}), batch_size=500)
+            ledger.record_bulk(list(zip(previous, instances)))
+            # Records that left a scope must leave the offline copies of its holders.
+            sync.record_bulk_saved(zip(scopes, instances))
+        return instances
+
+
+class BudgetSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    department_name = serializers.CharField(source='department.name', read_only=True, default=None)
+    state_name = serializers.CharField(source='state.name', read_only=True, default=None)
+    project_title = serializers.CharField(source='project.title', read_only=True, default=None)
+
+    class Meta:
+        model = Budget
+        fields = ['id', 'year', 'amount', 'budget_type', 'department', 'department_name', 'state', 'state_name',
+                  'project', 'project_title', 'approved_by', 'approved_at']
+        read_only_fields = ['approved_by', 'approved_at']
+        # Budget.unique_together includes nullable fields; checked in validate().
+        validators = []
+
+    def validate(self, attrs):
+        key = {name: attrs.get(name, getattr(self.instance, name, None))
+               for name in ('year', 'budget_type', 'department', 'project', 'state')}
+        duplicates = Budget.objects.filter(**key)
+        if self.instance is not None:
+            duplicates = duplicates.exclude(pk=self.instance.pk)
+        if duplicates.exists():
+            raise serializers.ValidationError('A budget for this year, type and scope already exists.')
+        return attrs
+
+
+class ExpenditureSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    serializer_related_field = PrefetchedPrimaryKeyRelatedField
+
+    department_name = serializers.CharField(source='department.name', read_only=True)
+    state_name = serializers.CharField(source='state.name', read_only=True)
+    project_title = serializers.CharField(source='project.title', read_only=True, default=None)
+    program_name = serializers.CharField(source='program.name', read_only=True, default=None)
+
+    class Meta:
+        model = Expenditure
+        fields = ['id', 'amount', 'description', 'date', 'expenditure_type', 'department', 'department_name',
+                  'state', 'state_name', 'project', 'project_title', 'program', 'program_name', 'approved_by',
+                  'submitted_by', 'updated_at']
+        read_only_fields = ['approved_by', 'submitted_by', 'updated_at']
+        list_serializer_class = BulkListSerializer
+
+
+class GrantSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    department_name = serializers.CharField(source='department.name', read_only=True)
+    project_title = serializers.CharField(source='project.title', read_only=True, default=None)
+
+    class Meta:
+        model = Grant
+        fields = ['id', 'name', 'description', 'amount', 'start_date', 'end_date', 'granting_agency', 'project',
+                  'project_title', 'department', 'department_name']
+
+
+class GrantBurnSerializer(serializers.Serializer):
+    """Read-only burn figures from finance.grants.GrantBurn."""
+    id = serializers.IntegerField(source='grant.pk')
+    name = serializers.CharField(source='grant.name')
+    department_name = serializers.CharField(source='grant.department.name')
+    project_title = serializers.CharField(source='grant.project.title', default=None)
+    amount = serializers.DecimalField(source='grant.amount', max_digits=15, decimal_places=2)
+    start_date = serializers.DateField(source='grant.start_date')
+    end_date = serializers.DateField(source='grant.end_date')
+    spent = serializers.DecimalField(max_digits=17, decimal_places=2)
+    spent_percentage = serializers.DecimalField(max_digits=9, decimal_places=2)
+    remaining = serializers.DecimalField(max_digits=17, decimal_places=2)
+    expected = serializers.DecimalField(max_digits=17, decimal_places=2)
+    monthly_burn = serializers.DecimalField(max_digits=17, decimal_places=2)
+    exhaustion_date = serializers.DateField()
+    status = serializers.CharField()
+
+
+class AssetSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    department_name = serializers.CharField(source='department.name', read_only=True)
+    state_name = serializers.CharField(source='state.name', read_only=True)
+
+    class Meta:
+        model = Asset
+        fields = ['id', 'name', 'asset_type', 'purchase_date', 'purchase_value', 'current_value', 'department',
+                  'department_name', 'state', 'state_name']
+
+
+class FinancialReportSerializer(serializers.ModelSerializer):
+    """Requests a report; without dates it covers the last complete period of its type."""
+
+    class Meta:
+        model = FinancialReport
+        fields = ['id', 'title', 'report_type', 'start_date', 'end_date', 'department', 'state', 'file_format',
+                  'status', 'file', 'generated_by', 'generated_at', 'started_at', 'completed_at', 'error']
+        read_only_fields = ['status', 'file', 'generated_by', 'generated_at', 'started_at', 'completed_at', 'error']
+        extra_kwargs = {'title': {'required': False}, 'start_date': {'required': False},
+                        'end_date': {'required': False}}
+
+    def validate(self, attrs):
+        if 'start_date' not in attrs or 'end_date' not in attrs:
+            if 'start_date' in attrs or 'end_date' in attrs:
+                raise serializers.ValidationError('Give both start_date and end_date, or neither.')
+            attrs['start_date'], attrs['end_date'] = reports.period_bounds(attrs['report_type'])
+        return attrs
+
+    def create(self, validated_data):
+        try:
+            return reports.request_report(requested_by=validated_data.pop('generated_by'), **validated_data)
+        except reports.ReportError as exc:
+            raise serializers.ValidationError(str(exc))
@@ -1,3 +1,481 @@
-from django.test import TestCase
+import tempfile
+from datetime import date, timedelta
+from decimal import Decimal
+from io import StringIO
 
-# Create your tests here.
+import numpy as np
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from communication.models import Notification
+from core.models import Employee, Zone, State, Department, Tombstone
+from finance import budget_alerts, depreciation, forecasting, grants, ledger, reports
+from finance.models import (
+    Asset, AssetValuation, Budget, BudgetAlert, Expenditure, ExpenditureRollup, FinancialReport, Grant,
+    GrantMonthlySpend,
+)
+from monitoring.models import Project
+
+
+class LedgerTests(TestCase):
+    def setUp(self):
+        zone = Zone.objects.create(code='NC', name='North Central')
+        self.state = State.objects.create(code='FCT', name='Federal Capital Territory', zone=zone)
+        self.other_state = State.objects.create(code='NI', name='Niger', zone=zone)
+        self.department = Department.objects.create(code='FIN', name='Finance and Accounts')
+
+    def spend(self, amount, day, **kwargs):
+        fields = {'department': self.department, 'state': self.state, 'expenditure_type': 'OPERATIONAL'}
+        fields.update(kwargs)
+        return Expenditure.objects.create(amount=Decimal(amount), description='Fuel', date=day, **fields)
+
+    def test_create_edit_and_delete_keep_rollups_current(self):
+        first = self.spend('100.00', date(2026, 1, 15))
+        second = self.spend('50.00', date(2026, 1, 20))
+        self.assertEqual(ledger.monthly_totals(2026), {1: Decimal('150.00')})
+
+        second.amount = Decimal('75.00')
+        second.date = date(2026, 2, 1)
+        second.state = self.other_state
+        second.save()
+        self.assertEqual(ledger.monthly_totals(2026), {1: Decimal('100.00'), 2: Decimal('75.00')})
+        self.assertEqual(ledger.monthly_totals(2026, 'STATE', 'NI'), {2: Decimal('75.00')})
+        self.assertEqual(ledger.monthly_totals(2026, 'STATE', 'FCT'), {1: Decimal('100.00')})
+
+        first.delete()
+        self.assertEqual(ledger.monthly_totals(2026), {2: Decimal('75.00')})
+        self.assertFalse(ExpenditureRollup.objects.filter(state=self.state).exists())
+        self.assertEqual(ledger.reconcile(), [])
+
+    def test_values_as_assigned_are_posted(self):
+        spent = Expenditure.objects.create(amount='20.00', description='Fuel', date='2026-04-30',
+                                           expenditure_type='OPERATIONAL', department=self.department, state=self.state)
+        spent.date = '2026-05-02'
+        spent.save()
+        self.assertEqual(ledger.monthly_totals(2026), {5: Decimal('20.00')})
+        self.assertEqual(ledger.reconcile(), [])
+
+    def test_utilization_reads_monthly_rows(self):
+        Budget.objects.create(year=2026, budget_type='DEPARTMENT', department=self.department, amount=Decimal('1000'))
+        for month in range(1, 13):
+            self.spend('10.00', date(2026, month, 1))
+            self.spend('15.00', date(2026, month, 2), state=self.other_state)
+
+        with self.assertNumQueries(2):
+            budget, spent, utilization = ledger.budget_utilization(2026, 'DEPARTMENT', 'FIN')
+        self.assertEqual((budget, spent, utilization), (Decimal('1000'), Decimal('300.00'), Decimal('30.00')))
+        self.assertEqual(ledger.year_to_date(2026, 'DEPARTMENT', 'FIN', through_month=6), Decimal('150.00'))
+
+    def test_reconcile_command_detects_and_repairs_drift(self):
+        self.spend('100.00', date(2026, 3, 1))
+        Expenditure.objects.bulk_create([
+            Expenditure(amount=Decimal('40.00'), description='Imported', date=date(2026, 3, 5),
+                        expenditure_type='OPERATIONAL', department=self.department, state=self.state),
+        ])
+
+        with self.assertRaises(CommandError):
+            call_command('reconcile_ledger', stdout=StringIO())
+        call_command('reconcile_ledger', '--fix', stdout=StringIO())
+        self.assertEqual(ledger.reconcile(), [])
+        self.assertEqual(ledger.year_to_date(2026), Decimal('140.00'))
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp())
+class FinancialReportTests(TestCase):
+    def setUp(self):
+        zone = Zone.objects.create(code='NC', name='North Central')
+        self.state = State.objects.create(code='FCT', name='Federal Capital Territory', zone=zone)
+        self.department = Department.objects.create(code='FIN', name='Finance and Accounts')
+        self.user = Employee.objects.create_user(
+            employee_id='NDE0001', ippis_number='IPPIS0001', email='fin@nde.gov.ng', password='pass')
+        for day in (date(2026, 1, 31), date(2026, 2, 1), date(2026, 2, 28), date(2026, 3, 1)):
+            Expenditure.objects.create(amount=Decimal('10.50'), description=f'Spend {day}', date=day,
+                                       expenditure_type='OPERATIONAL', department=self.department, state=self.state)
+        Budget.objects.create(year=2026, budget_type='STATE', state=self.state, amount=Decimal('5000'))
+        Grant.objects.create(name='Youth grant', description='Skills', amount=Decimal('700'), start_date=date(2025, 6, 1),
+                             end_date=date(2026, 6, 1), granting_agency='UNDP', department=self.department)
+
+    def test_period_bounds(self):
+        self.assertEqual(reports.period_bounds('MONTHLY', date(2026, 3, 15)), (date(2026, 2, 1), date(2026, 2, 28)))
+        self.assertEqual(reports.period_bounds('QUARTERLY', date(2026, 1, 5)), (date(2025, 10, 1), date(2025, 12, 31)))
+        self.assertEqual(reports.period_bounds('ANNUAL', date(2026, 1, 5)), (date(2025, 1, 1), date(2025, 12, 31)))
+
+    def test_generates_csv_and_notifies_requester(self):
+        report = reports.request_report('MONTHLY', date(2026, 2, 1), date(2026, 2, 28), self.user,
+                                        state=self.state, background=False)
+        self.assertEqual(report.status, 'PENDING')
+
+        # A small chunk size makes the expenditure query stream in several fetches.
+        with self.settings(FINANCIAL_REPORT_CHUNK_SIZE=1):
+            reports.generate_report(report.pk)
+
+        report.refresh_from_db()
+        self.assertEqual(report.status, 'COMPLETED')
+        with report.file.open('r') as handle:
+            lines = handle.read().splitlines()
+        self.assertEqual(lines[0], 'Expenditures')
+        self.assertEqual(sum(1 for line in lines if line.startswith('2026-02-')), 2)
+        self.assertIn('TOTAL,,,,,21.00,', lines)
+        self.assertIn('Youth grant,UNDP,Finance and Accounts,,2025-06-01,2026-06-01,700.00', lines)
+        notification = Notification.objects.get(recipient=self.user)
+        self.assertEqual(notification.related_object_id, report.pk)
+
+        # A report is only generated once.
+        self.assertIsNone(reports.generate_report(report.pk))
+
+    def test_a_report_whose_worker_died_is_reclaimed(self):
+        report = reports.request_report('MONTHLY', date(2026, 2, 1), date(2026, 2, 28), self.user, background=False)
+        FinancialReport.objects.filter(pk=report.pk).update(status='RUNNING', started_at=timezone.now())
+        self.assertEqual(reports.run_pending(), [])
+
+        FinancialReport.objects.filter(pk=report.pk).update(started_at=timezone.now() - timedelta(hours=2))
+        with self.settings(FINANCIAL_REPORT_TIMEOUT=3600):
+            [reclaimed] = reports.run_pending()
+        self.assertEqual((reclaimed.pk, reclaimed.status), (report.pk, 'COMPLETED'))
+
+    def test_users_request_reports_for_their_scope(self):
+        coordinator = Employee.objects.create_user(
+            employee_id='NDE0002', ippis_number='IPPIS0002', email='sc@nde.gov.ng', password='pass',
+            current_role='SC', current_state=self.state)
+        client = APIClient()
+        client.force_authenticate(coordinator)
+        url = reverse('finance:financialreport-list')
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            response = client.post(url, {'report_type': 'MONTHLY', 'state': 'FCT'}, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(len(callbacks), 1)
+        start_date, end_date = reports.period_bounds('MONTHLY')
+        self.assertEqual((response.json()['status'], response.json()['start_date']),
+                         ('PENDING', start_date.isoformat()))
+
+        # Not outside their state, and not with half a period.
+        self.assertEqual(client.post(url, {'report_type': 'MONTHLY'}, format='json').status_code, 403)
+        response = client.post(url, {'report_type': 'MONTHLY', 'state': 'FCT', 'start_date': '2026-02-01'},
+                               format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(FinancialReport.objects.count(), 1)
+
+        report = FinancialReport.objects.get()
+        reports.generate_report(report.pk)
+        self.assertTrue(Notification.objects.filter(recipient=coordinator, related_object_id=report.pk).exists())
+        [listed] = client.get(url).json()['results']
+        self.assertEqual((listed['id'], listed['status']), (report.pk, 'COMPLETED'))
+        self.assertEqual(APIClient().get(url).status_code, 401)
+
+
+class FinanceApiTests(TestCase):
+    def setUp(self):
+        zone = Zone.objects.create(code='NC', name='North Central')
+        self.state = State.objects.create(code='FCT', name='Federal Capital Territory', zone=zone)
+        self.other_state = State.objects.create(code='NG', name='Niger', zone=zone)
+        self.department = Department.objects.create(code='FIN', name='Finance and Accounts')
+        self.user = Employee.objects.create_user(
+            employee_id='NDE0001', ippis_number='IPPIS0001', email='fin@nde.gov.ng', password='pass',
+            current_role='SC', current_state=self.state)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.url = reverse('finance:expenditure-list')
+
+    def rows(self, count, amount='10.00', state='FCT'):
+        return [{'amount': amount, 'description': f'Batch {n}', 'date': f'2026-03-{n % 28 + 1:02d}',
+                 'expenditure_type': 'OPERATIONAL', 'department': 'FIN', 'state': state} for n in range(count)]
+
+    def as_user(self, employee_id, **fields):
+        user = Employee.objects.create_user(employee_id=employee_id, ippis_number=f'IPPIS-{employee_id}',
+                                            email=f'{employee_id}@nde.gov.ng', password='pass', **fields)
+        client = APIClient()
+        client.force_authenticate(user)
+        return client
+
+    def test_bulk_create_and_update_keep_ledger_current(self):
+        # Inserts go in batches of 99 rows and the ledger adjusts one rollup row per month, so the
+        # query count follows the number of batches, not of rows.
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(self.url + 'bulk/', self.rows(300), format='json')
+        self.assertEqual(response.status_code, 201, response.content)
+        self.assertLessEqual(len(queries), 30)
+        self.assertEqual(Expenditure.objects.filter(submitted_by=self.user).count(), 300)
+        self.assertEqual(ledger.monthly_totals(2026), {3: Decimal('3000.00')})
+
+        updates = [{'id': pk, 'amount': '12.50', 'date': '2026-04-01'}
+                   for pk in Expenditure.objects.values_list('pk', flat=True)[:100]]
+        response = self.client.patch(self.url + 'bulk/', updates, format='json')
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(ledger.monthly_totals(2026), {3: Decimal('2000.00'), 4: Decimal('1250.00')})
+        self.assertEqual(ledger.reconcile(), [])
+
+        # Expenditures moved to another state leave the offline copies of the old state's holders.
+        first, second, third = Expenditure.objects.order_by('pk').values_list('pk', flat=True)[:3]
+        updates = [{'id': first, 'state': 'NG'}, {'id': second, 'state': 'NG'}, {'id': third, 'amount': '11.00'}]
+        response = self.as_user('NDE0002', current_role='DG').patch(self.url + 'bulk/', updates, format='json')
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(sorted(Tombstone.objects.values_list('resource', 'object_id')),
+                         [('expenditures', first), ('expenditures', second)])
+
+    def test_bulk_create_is_all_or_nothing(self):
+        rows = self.rows(3)
+        rows[1]['state'] = 'XX'
+        response = self.client.post(self.url + 'bulk/', rows, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('state', response.json()[1])
+        self.assertFalse(Expenditure.objects.exists())
+
+    def test_cursor_pages_with_sparse_fields(self):
+        self.client.post(self.url + 'bulk/', self.rows(5), format='json')
+        response = self.client.get(self.url, {'page_size': 2, 'fields': 'amount,state_name'})
+        page = response.json()
+        self.assertEqual(len(page['results']), 2)
+        self.assertEqual(set(page['results'][0]), {'id', 'amount', 'state_name'})
+        seen = [row['id'] for row in page['results']]
+        while page['next']:
+            page = self.client.get(page['next']).json()
+            seen += [row['id'] for row in page['results']]
+        self.assertEqual(seen, sorted(Expenditure.objects.values_list('pk', flat=True), reverse=True))
+
+    def test_budget_uniqueness_with_empty_scope(self):
+        url = reverse('finance:budget-list')
+        budget = {'year': 2026, 'amount': '5000.00', 'budget_type': 'STATE', 'state': 'FCT'}
+        # State coordinators read budgets but do not set them.
+        self.assertEqual(self.client.post(url, budget, format='json').status_code, 403)
+        client = self.as_user('NDE0009', current_role='DG')
+        self.assertEqual(client.post(url, budget, format='json').status_code, 201)
+        self.assertEqual(client.post(url, budget, format='json').status_code, 400)
+
+    def test_records_are_scoped_to_the_users_state(self):
+        self.client.post(self.url + 'bulk/', self.rows(2), format='json')
+        response = self.client.post(self.url + 'bulk/', self.rows(2, state='NG'), format='json')
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(Expenditure.objects.count(), 2)
+        mine = Expenditure.objects.first()
+
+        # Another state's coordinator neither sees nor updates them, and cannot move one into their state.
+        other = self.as_user('NDE0002', current_role='SC', current_state=self.other_state)
+        self.assertEqual(other.get(self.url).json()['results'], [])
+        response = other.patch(self.url + 'bulk/', [{'id': mine.pk, 'amount': '1.00'}], format='json')
+        self.assertEqual(response.status_code, 400)
+        response = self.client.patch(f'{self.url}{mine.pk}/', {'state': 'NG'}, format='json')
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(Expenditure.objects.get(pk=mine.pk).state_id, 'FCT')
+
+        # Staff see only what they submitted and cannot write; only superusers delete.
+        staff = self.as_user('NDE0003')
+        self.assertEqual(staff.get(self.url).json()['results'], [])
+        self.assertEqual(staff.post(self.url, self.rows(1)[0], format='json').status_code, 403)
+        self.assertEqual(self.client.delete(f'{self.url}{mine.pk}/').status_code, 403)
+        admin = self.as_user('NDE0004', is_superuser=True)
+        self.assertEqual(admin.delete(f'{self.url}{mine.pk}/').status_code, 204)
+
+
+class DepreciationTests(TestCase):
+    def setUp(self):
+        zone = Zone.objects.create(code='NC', name='North Central')
+        self.state = State.objects.create(code='FCT', name='Federal Capital Territory', zone=zone)
+        self.department = Department.objects.create(code='FIN', name='Finance and Accounts')
+
+    def asset(self, asset_type, value, purchased):
+        return Asset.objects.create(name=asset_type.title(), asset_type=asset_type, purchase_date=purchased,
+                                    purchase_value=Decimal(value), current_value=Decimal(value),
+                                    department=self.department, state=self.state)
+
+    def test_book_values_follow_each_policy(self):
+        equipment = self.asset('EQUIPMENT', '1200.00', date(2024, 1, 15))
+        vehicle = self.asset('VEHICLE', '10000.00', date(2024, 1, 15))
+        land = self.asset('LAND', '50000.00', date(2024, 1, 15))
+
+        # Eleven whole months on 14 January 2025, twelve on the 15th.
+        ids, matrix = depreciation.schedule([date(2025, 1, 14), date(2025, 1, 15), date(2034, 1, 15)])
+        values = dict(zip(ids.tolist(), matrix.tolist()))
+        self.assertEqual(values[equipment.pk], [980.0, 960.0, 0.0])
+        self.assertEqual(values[vehicle.pk][1:], [7500.0, 1000.0])
+        self.assertEqual(values[land.pk], [50000.0] * 3)
+
+    def test_month_end_purchases_count_whole_months(self):
+        purchased = np.array(['2026-01-31', '2024-02-29', '2026-01-15'], dtype='datetime64[D]')
+        self.assertEqual(depreciation.months_held(purchased, date(2026, 2, 27)).tolist(), [0, 23, 1])
+        self.assertEqual(depreciation.months_held(purchased, date(2026, 2, 28)).tolist(), [1, 24, 1])
+        self.assertEqual(depreciation.months_held(purchased, date(2026, 3, 30)).tolist(), [1, 25, 2])
+        self.assertEqual(depreciation.months_held(purchased, date(2026, 3, 31)).tolist(), [2, 25, 2])
+
+    def test_revalue_updates_current_values_and_snapshots(self):
+        building = self.asset('BUILDING', '600000.00', date(2020, 1, 1))
+        self.asset('EQUIPMENT', '500.00', date(2026, 6, 1))
+
+        with self.assertNumQueries(7):
+            changed = depreciation.revalue(date(2025, 12, 31))
+        self.assertEqual(changed, 1)
+        building.refresh_from_db()
+        self.assertEqual(building.current_value, Decimal('529000.00'))
+        snapshot = AssetValuation.objects.get()
+        self.assertEqual((snapshot.asset_id, snapshot.accumulated_depreciation), (building.pk, Decimal('71000.00')))
+
+        # Running the revaluation again changes nothing.
+        self.assertEqual(depreciation.revalue(date(2025, 12, 31)), 0)
+        call_command('revalue_assets', '--year', '2026', '--backfill-from', '2021', stdout=StringIO())
+        self.assertEqual(AssetValuation.objects.filter(asset=building).count(), 6)
+        self.assertEqual(AssetValuation.objects.count(), 7)
+
+
+class GrantBurnTests(TestCase):
+    def setUp(self):
+        zone = Zone.objects.create(code='NC', name='North Central')
+        self.state = State.objects.create(code='FCT', name='Federal Capital Territory', zone=zone)
+        self.department = Department.objects.create(code='FIN', name='Finance and Accounts')
+        manager = Employee.objects.create_user(
+            employee_id='NDE0001', ippis_number='IPPIS0001', email='pm@nde.gov.ng', password='pass')
+        self.project = Project.objects.create(
+            title='Skills acquisition', description='Training', start_date=date(2026, 1, 1),
+            end_date=date(2026, 12, 31), department=self.department, state=self.state, assigned_to=manager)
+        self.grant = Grant.objects.create(
+            name='Youth grant', description='Skills', amount=Decimal('1200.00'), start_date=date(2026, 1, 1),
+            end_date=date(2026, 12, 31), granting_agency='UNDP', project=self.project, department=self.department)
+
+    def spend(self, amount, day, project=None):
+        return Expenditure.objects.create(
+            amount=Decimal(amount), description='Training', date=day, expenditure_type='PROJECT',
+            department=self.department, state=self.state, project=project or self.project)
+
+    def series(self):
+        return list(GrantMonthlySpend.objects.order_by('year', 'month').values_list('month', 'total'))
+
+    def test_ledger_keeps_grant_series_current(self):
+        first = self.spend('100.00', date(2026, 1, 10))
+        self.spend('50.00', date(2025, 12, 31))  # Before the grant started.
+        imported = Expenditure.objects.bulk_create([
+            Expenditure(amount=Decimal('25.00'), description='Imported', date=date(2026, 2, day),
+                        expenditure_type='PROJECT', department=self.department, state=self.state,
+                        project=self.project)
+            for day in (1, 2)
+        ])
+        ledger.record_bulk([(None, expenditure) for expenditure in imported])
+        self.assertEqual(self.series(), [(1, Decimal('100.00')), (2, Decimal('50.00'))])
+
+        first.amount = Decimal('40.00')
+        first.save()
+        self.assertEqual(self.series(), [(1, Decimal('40.00')), (2, Decimal('50.00'))])
+        first.delete()
+        self.assertEqual(self.series(), [(2, Decimal('50.00'))])
+
+        # Widening the grant period takes in the December expenditure.
+        self.grant.start_date = date(2025, 12, 1)
+        self.grant.save()
+        self.assertEqual(self.series(), [(12, Decimal('50.00')), (2, Decimal('50.00'))])
+        self.assertEqual(ledger.reconcile(), [])
+
+    def test_burn_rate_runway_and_status(self):
+        for month in range(1, 4):
+            self.spend('200.00', date(2026, month, 5))
+
+        with self.assertNumQueries(2):
+            burn, = grants.overview(today=date(2026, 3, 31))
+        self.assertEqual((burn.spent, burn.remaining, burn.expected), (
+            Decimal('600.00'), Decimal('600.00'), Decimal('295.89')))
+        self.assertEqual(burn.monthly_burn, Decimal('202.92'))
+        self.assertEqual(burn.exhaustion_date, date(2026, 6, 29))
+        self.assertEqual(burn.status, 'OVER')
+
+        self.assertEqual(grants.burn(self.grant, Decimal('300.00'), date(2026, 3, 31)).status, 'ON_TRACK')
+        self.assertEqual(grants.burn(self.grant, Decimal('100.00'), date(2026, 3, 31)).status, 'UNDER')
+        self.assertEqual(grants.burn(self.grant, Decimal('0'), date(2025, 6, 1)).status, 'NOT_STARTED')
+
+
+class ForecastTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        zone = Zone.objects.create(code='NC', name='North Central')
+        self.state = State.objects.create(code='FCT', name='Federal Capital Territory', zone=zone)
+        self.department = Department.objects.create(code='FIN', name='Finance and Accounts')
+
+    def spend(self, amount, day):
+        return Expenditure.objects.create(amount=Decimal(amount), description='Fuel', date=day,
+                                          expenditure_type='OPERATIONAL', department=self.department,
+                                          state=self.state)
+
+    def test_fit_recovers_trend_and_seasonality(self):
+        t = np.arange(48)
+        season = np.tile([30, -10, -10, -10, -10, 0, 0, 0, 0, 0, 0, 20], 4)
+        history = np.vstack([100 + 2 * t + season, np.full(48, 50.0)])
+        predicted, spread = forecasting.fit(history[:, :42], 6)
+        np.testing.assert_allclose(predicted, history[:, 42:], atol=1e-6)
+        np.testing.assert_allclose(spread, [0, 0], atol=1e-6)
+
+    def test_projection_overrun_probability_and_cache(self):
+        for year in (2023, 2024, 2025):
+            for month in range(1, 13):
+                self.spend('100.00', date(year, month, 10))
+        for month in range(1, 7):
+            self.spend('100.00', date(2026, month, 10))
+        Budget.objects.create(year=2026, budget_type='DEPARTMENT', department=self.department, amount=Decimal('1000'))
+
+        today = date(2026, 7, 15)
+        result = forecasting.forecast('DEPARTMENT', 'FIN', 2026, today)
+        self.assertEqual((result.actual, result.projected), (Decimal('600.00'), Decimal('1200.00')))
+        self.assertEqual(result.overrun_probability, 1.0)
+        self.assertEqual(forecasting.at_risk('DEPARTMENT', 2026, today), [result])
+
+        with self.assertNumQueries(0):
+            forecasting.forecast('DEPARTMENT', 'FIN', 2026, today)
+
+        # A new expenditure retires the cached forecast once it commits.
+        with self.captureOnCommitCallbacks(execute=True):
+            self.spend('50.00', date(2026, 7, 1))
+        self.assertEqual(forecasting.forecast('DEPARTMENT', 'FIN', 2026, today).actual, Decimal('650.00'))
+
+    def test_project_forecasts_cover_every_project(self):
+        manager = Employee.objects.create_user(employee_id='NDE0001', ippis_number='IPPIS0001',
+                                               email='pm@nde.gov.ng', password='pass')
+        project = Project.objects.create(title='Bwari skills centre', description='', start_date=date(2026, 1, 1),
+                                         end_date=date(2026, 12, 31), department=self.department, state=self.state,
+                                         assigned_to=manager)
+        Budget.objects.create(year=2026, budget_type='PROJECT', project=project, amount=Decimal('1000'))
+        result = forecasting.forecasts('PROJECT', year=2026, today=date(2026, 7, 15))
+        self.assertEqual(list(result), [str(project.pk)])
+        self.assertEqual(result[str(project.pk)].budget, Decimal('1000'))
+
+
+class BudgetAlertTests(TestCase):
+    def setUp(self):
+        zone = Zone.objects.create(code='NC', name='North Central')
+        self.department = Department.objects.create(code='FIN', name='Finance and Accounts')
+        self.coordinator = Employee.objects.create_user(
+            employee_id='NDE0001', ippis_number='IPPIS0001', email='sc@nde.gov.ng', password='pass')
+        self.state = State.objects.create(code='FCT', name='Federal Capital Territory', zone=zone,
+                                          coordinator=self.coordinator)
+        self.director = Employee.objects.create_user(
+            employee_id='NDE0002', ippis_number='IPPIS0002', email='dir@nde.gov.ng', password='pass',
+            current_role='DIR', current_department=self.department)
+        Budget.objects.create(year=2026, budget_type='DEPARTMENT', department=self.department, amount=Decimal('1000'))
+        Budget.objects.create(year=2026, budget_type='STATE', state=self.state, amount=Decimal('2000'))
+
+    def spend(self, amount):
+        Expenditure.objects.create(amount=Decimal(amount), description='Fuel', date=date(2026, 5, 1),
+                                   expenditure_type='OPERATIONAL', department=self.department, state=self.state)
+
+    def test_thresholds_fire_once_for_changed_scopes(self):
+        self.spend('500.00')
+        self.assertEqual(budget_alerts.check_budgets(2026), (2, 0, 0))
+
+        self.spend('450.00')  # Department at 95%, state at 47.5%.
+        self.assertEqual(budget_alerts.check_budgets(2026), (2, 2, 1))
+        notification = Notification.objects.get()
+        self.assertEqual(notification.recipient, self.director)
+        self.assertEqual(notification.title, 'Finance and Accounts has passed 90% of its 2026 budget')
+
+        # Nothing changed, so nothing is checked or sent again.
+        with self.assertNumQueries(6):
+            self.assertEqual(budget_alerts.check_budgets(2026), (0, 0, 0))
+
+        self.spend('700.00')  # Department at 165%, state at 82.5%.
+        call_command('check_budget_alerts', '--year', '2026', stdout=StringIO())
+        self.assertEqual(
+            sorted(BudgetAlert.objects.values_list('scope', 'threshold')),
+            [('DEPARTMENT', 80), ('DEPARTMENT', 90), ('DEPARTMENT', 100), ('STATE', 80)])
+        self.assertEqual(Notification.objects.filter(recipient=self.coordinator).count(), 1)
+        self.assertEqual(Notification.objects.filter(recipient=self.director).count(), 2)
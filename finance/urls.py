@@ -1,6 +1,17 @@
-from django.urls import path
+from django.urls import include, path
+from rest_framework.routers import DefaultRouter
+
 from . import views
 
 app_name = 'finance'
 
-urlpatterns = []
\ No newline at end of file
+router = DefaultRouter()
+router.register('budgets', views.BudgetViewSet)
+router.register('expenditures', views.ExpenditureViewSet)
+router.register('grants', views.GrantViewSet)
+router.register('assets', views.AssetViewSet)
+router.register('reports', views.FinancialReportViewSet)
+
+urlpatterns = [
+    path('api/', include(router.urls)),
+]
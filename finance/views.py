@@ -1,3 +1,218 @@
-from django.shortcuts import render
+# finance/views.py
+"""
+Finance REST API.
 
-# Create your views here.
+Lists use cursor pagination, so paging deep into 300k expenditures costs the
+same as the first page, and `?fields=a,b` trims both the response and the
+joins (only the relations behind the requested fields are select_related).
+State offices sync expenditures in batches through `expenditures/bulk/`:
+POST creates and PATCH updates up to BULK_LIMIT rows in one transaction.
+`grants/burn/` reports each grant's burn rate and runway. `reports/` lists
+the user's financial reports and, on POST, requests one, which a background
+worker generates (finance.reports) before notifying the requester.
+
+Every user sees only the records in their scope: directors those of their
+department, zonal directors and state coordinators those of their zone or
+state, the DG everything (see FinanceViewSet.scope()). A viewset's
+`write_roles` may create and change records, only within their scope, and
+only superusers may delete.
+"""
+import django_filters
+from django.db import transaction
+from rest_framework import status, viewsets
+from rest_framework.decorators import action
+from rest_framework.exceptions import PermissionDenied, ValidationError
+from rest_framework.pagination import CursorPagination
+from rest_framework.permissions import SAFE_METHODS, BasePermission, IsAuthenticated
+from rest_framework.response import Response
+
+from . import grants
+from .models import Asset, Budget, Expenditure, FinancialReport, Grant
+from .serializers import (
+    AssetSerializer, BudgetSerializer, ExpenditureSerializer, FinancialReportSerializer, GrantBurnSerializer,
+    GrantSerializer, requested_fields,
+)
+
+BULK_LIMIT = 1000
+
+
+class FinanceCursorPagination(CursorPagination):
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 500
+    ordering = '-id'
+
+
+class FinanceWritePermission(BasePermission):
+    """Reads for any signed-in user; writes for the view's write_roles; deletes for superusers."""
+
+    def has_permission(self, request, view):
+        if request.method in SAFE_METHODS:
+            return True
+        if request.method == 'DELETE':
+            return request.user.is_superuser
+        return request.user.is_superuser or request.user.current_role in view.write_roles
+
+
+class FinanceViewSet(viewsets.ModelViewSet):
+    pagination_class = FinanceCursorPagination
+    permission_classes = [IsAuthenticated, FinanceWritePermission]
+    # Serializer field -> relation it reads, joined only when the field is returned.
+    related = {}
+    # Roles, besides superusers, that may create and change records in their scope.
+    write_roles = {'DG', 'DIR'}
+    # Lookups from the model to the department and the state of a record.
+    department_lookup = 'department'
+    state_lookup = 'state'
+
+    def scope(self, queryset):
+        """The records of `queryset` the user may see, as monitoring.portfolio.visible_projects scopes projects."""
+        user = self.request.user
+        if user.is_superuser or user.current_role == 'DG':
+            return queryset
+        if user.current_role == 'DIR':
+            return queryset.filter(**{self.department_lookup: user.current_department_id})
+        if user.current_role == 'ZD':
+            return queryset.filter(**{f'{self.state_lookup}__zone': user.current_zone_id})
+        if user.current_role == 'SC':
+            return queryset.filter(**{self.state_lookup: user.current_state_id})
+        return self.own(queryset)
+
+    def own(self, queryset):
+        """The records of a user without a scoping role."""
+        return queryset.none()
+
+    def get_queryset(self):
+        fields = requested_fields(self.request)
+        joins = {path for name, path in self.related.items() if fields is None or name in fields}
+        queryset = self.scope(self.queryset.all())
+        return queryset.select_related(*sorted(joins)) if joins else queryset
+
+    def save_kwargs(self):
+        """Extra values saved with every created record."""
+        return {}
+
+    def check_scope(self, instances):
+        """Refuse a write that leaves records outside the user's scope; call inside the write's transaction."""
+        pks = {instance.pk for instance in instances}
+        if self.scope(self.queryset.model.objects.filter(pk__in=pks)).count() != len(pks):
+            raise PermissionDenied('You may only write records in your own department or state.')
+
+    def perform_create(self, serializer):
+        with transaction.atomic():
+            serializer.save(**self.save_kwargs())
+            self.check_scope([serializer.instance])
+
+    def perform_update(self, serializer):
+        with transaction.atomic():
+            serializer.save()
+            self.check_scope([serializer.instance])
+
+
+class ExpenditureFilter(django_filters.FilterSet):
+    date_from = django_filters.DateFilter(field_name='date', lookup_expr='gte')
+    date_to = django_filters.DateFilter(field_name='date', lookup_expr='lte')
+
+    class Meta:
+        model = Expenditure
+        fields = ['department', 'state', 'project', 'program', 'expenditure_type']
+
+
+class BudgetViewSet(FinanceViewSet):
+    queryset = Budget.objects.all()
+    serializer_class = BudgetSerializer
+    filterset_fields = ['year', 'budget_type', 'department', 'state', 'project']
+    related = {'department_name': 'department', 'state_name': 'state', 'project_title': 'project'}
+
+    def save_kwargs(self):
+        return {'approved_by': self.request.user}
+
+
+class ExpenditureViewSet(FinanceViewSet):
+    queryset = Expenditure.objects.all()
+    serializer_class = ExpenditureSerializer
+    filterset_class = ExpenditureFilter
+    related = {'department_name': 'department', 'state_name': 'state', 'project_title': 'project',
+               'program_name': 'program'}
+    write_roles = {'DG', 'DIR', 'ZD', 'SC'}
+
+    def own(self, queryset):
+        return queryset.filter(submitted_by=self.request.user)
+
+    def save_kwargs(self):
+        return {'submitted_by': self.request.user}
+
+    @action(detail=False, methods=['post', 'patch'], url_path='bulk')
+    def bulk(self, request):
+        """Create (POST) or update (PATCH, each item with its `id`) a batch of expenditures."""
+        rows = request.data
+        if not isinstance(rows, list) or not rows:
+            raise ValidationError('Expected a non-empty list of expenditures.')
+        if len(rows) > BULK_LIMIT:
+            raise ValidationError(f'At most {BULK_LIMIT} expenditures per request.')
+
+        if request.method == 'POST':
+            serializer = self.get_serializer(data=rows, many=True)
+            serializer.is_valid(raise_exception=True)
+            with transaction.atomic():
+                serializer.save(**self.save_kwargs())
+                self.check_scope(serializer.instance)
+            return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+        ids = [row.get('id') if isinstance(row, dict) else None for row in rows]
+        if None in ids or len(set(ids)) != len(ids):
+            raise ValidationError('Every expenditure needs a distinct id.')
+        with transaction.atomic():
+            try:
+                found = self.scope(Expenditure.objects.select_for_update()).in_bulk(ids)
+            except (TypeError, ValueError):
+                raise ValidationError('Expenditure ids must be integers.')
+            missing = [pk for pk in ids if int(pk) not in found]
+            if missing:
+                raise ValidationError({'id': [f'Unknown expenditures: {missing}']})
+            serializer = self.get_serializer([found[int(pk)] for pk in ids], data=rows, many=True, partial=True)
+            serializer.is_valid(raise_exception=True)
+            serializer.save()
+            self.check_scope(serializer.instance)
+        return Response(serializer.data)
+
+
+class GrantViewSet(FinanceViewSet):
+    queryset = Grant.objects.all()
+    serializer_class = GrantSerializer
+    filterset_fields = ['department', 'project', 'granting_agency']
+    related = {'department_name': 'department', 'project_title': 'project'}
+    state_lookup = 'project__state'
+
+    @action(detail=False, url_path='burn')
+    def burn(self, request):
+        """Burn rate, runway and spend status of every grant, from the precomputed monthly series."""
+        burns = grants.overview(self.filter_queryset(self.scope(Grant.objects.all())))
+        return Response(GrantBurnSerializer(burns, many=True).data)
+
+
+class AssetViewSet(FinanceViewSet):
+    queryset = Asset.objects.all()
+    serializer_class = AssetSerializer
+    filterset_fields = ['asset_type', 'department', 'state']
+    related = {'department_name': 'department', 'state_name': 'state'}
+
+
+class FinancialReportViewSet(FinanceViewSet):
+    """Reports in the user's scope, and those they requested; a report may only be requested for that scope."""
+    queryset = FinancialReport.objects.all()
+    serializer_class = FinancialReportSerializer
+    filterset_fields = ['report_type', 'status', 'department', 'state']
+    # Reports are generated, not edited.
+    http_method_names = ['get', 'post', 'head', 'options']
+    write_roles = {'DG', 'DIR', 'ZD', 'SC'}
+
+    def get_queryset(self):
+        # Only scope() limits what may be requested; the user's own reports stay visible outside it.
+        return super().get_queryset() | self.own(self.queryset.all())
+
+    def own(self, queryset):
+        return queryset.filter(generated_by=self.request.user)
+
+    def save_kwargs(self):
+        return {'generated_by': self.request.user}
@@ -0,0 +1,17 @@
+# Generated by Django 5.1.1 on 2026-10-19 13:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hr', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='leaverequest',
+            index=models.Index(fields=['updated_at', 'id'], name='hr_leavereq_updated_036ece_idx'),
+        ),
+    ]
@@ -1,3 +1,53 @@
-from django.test import TestCase
+from core import testing
 
-# Create your tests here.
+NO_TEMPLATE = 'its template does not exist yet'
+NO_FORM = 'its form class is not defined in hr.forms'
+
+
+class HRQueryBudgetTests(testing.QueryBudgetTestCase):
+    namespace = 'hr'
+    budgets = {
+        'department_dashboard': {'max_queries': 10, 'kwargs': lambda s: {'department_id': s.department.pk}},
+    }
+    unbudgeted = {
+        'employee_list': "the template links to the missing 'employee_update' URL",
+        'employee_detail': NO_TEMPLATE,
+        'update_employee_detail': NO_FORM,
+        'create_promotion': NO_FORM,
+        'promotion_list': NO_TEMPLATE,
+        'create_examination': NO_FORM,
+        'create_leave_request': NO_FORM,
+        'leave_request_list': NO_TEMPLATE,
+        'approve_leave_request': NO_TEMPLATE,
+        'create_transfer': NO_FORM,
+        'create_temporary_access': NO_FORM,
+        'create_performance_review': NO_FORM,
+        'create_training': NO_FORM,
+        'training_list': NO_TEMPLATE,
+        'create_retirement': NO_FORM,
+        'create_repatriation': NO_FORM,
+        'update_documentation': NO_FORM,
+        'employee_data_upload': NO_FORM,
+        'update_employee_details': NO_FORM,
+        'verify_employee': 'get_or_create() fails once an employee has more than one verification',
+        'educational_discrepancies': 'reads EmployeeDetail.education, which the model does not have',
+        'update_ippis_management': 'get_or_create() omits the required date_enrolled',
+        'create_change_of_vital_information': NO_FORM,
+        'create_record_of_service': NO_FORM,
+        'record_of_service_list': NO_TEMPLATE,
+        'department_employees': 'looks Department up by id; its primary key is code',
+        'promotion_history': NO_TEMPLATE,
+        'examination_history': NO_TEMPLATE,
+        'transfer_history': NO_TEMPLATE,
+        'performance_review_history': NO_TEMPLATE,
+        'employee_trainings': NO_TEMPLATE,
+        'assign_training': NO_TEMPLATE,
+        'employee_leave_history': NO_TEMPLATE,
+        'temporary_access_history': NO_TEMPLATE,
+        'vital_information_changes': NO_TEMPLATE,
+        'staff_verification_history': NO_TEMPLATE,
+        'retirement_details': NO_TEMPLATE,
+        'repatriation_history': NO_TEMPLATE,
+        'employee_search': 'calls Employee.get_full_name(), which the model does not define',
+        'employee_dashboard': NO_TEMPLATE,
+    }
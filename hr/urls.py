@@ -54,5 +54,5 @@ urlpatterns = [
     
     path('employee-search/' , views.employee_search, name='employee_search'),
     path('employees/<str:employee_id>/dashboard/', views.employee_dashboard, name='employee_dashboard'),
-    path('departments/<int:department_id>/dashboard/', views.department_dashboard, name='department_dashboard'),
+    path('departments/<str:department_id>/dashboard/', views.department_dashboard, name='department_dashboard'),
 ]
\ No newline at end of file
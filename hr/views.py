@@ -22,7 +22,7 @@ from .models import (
 )
 from .forms import *
 from core.models import Employee, Department
-from datetime import timezone
+from django.utils import timezone
 
 class CachedListView(View):
     @method_decorator(cache_page(60 * 15))  # Cache for 15 minutes
@@ -680,15 +680,18 @@ def employee_dashboard(request, employee_id):
 @login_required
 @permission_required('hr.view_employeedetail')
 def department_dashboard(request, department_id):
-    department = get_object_or_404(Department, id=department_id)
+    department = get_object_or_404(Department, pk=department_id)
     employees = Employee.objects.filter(current_department=department)
     
     context = {
         'department': department,
         'employee_count': employees.count(),
-        'recent_transfers': Transfer.objects.filter(to_department=department).order_by('-transfer_date')[:5],
-        'upcoming_trainings': Training.objects.filter(participants__in=employees, start_date__gte=timezone.now()).order_by('start_date')[:5],
-        'pending_leave_requests': LeaveRequest.objects.filter(employee__in=employees, status='pending').order_by('start_date')[:5],
+        'recent_transfers': Transfer.objects.filter(to_department=department).select_related(
+            'employee', 'from_department').order_by('-transfer_date')[:5],
+        'upcoming_trainings': Training.objects.filter(
+            participants__in=employees, start_date__gte=timezone.localdate()).distinct().order_by('start_date')[:5],
+        'pending_leave_requests': LeaveRequest.objects.filter(
+            employee__in=employees, status='pending').select_related('employee').order_by('start_date')[:5],
     }
     return render(request, 'hr/department_dashboard.html', context)
 
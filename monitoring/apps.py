@@ -4,3 +4,23 @@ from django.apps import AppConfig
 class MonitoringConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'monitoring'
+
+    def ready(self):
+        from django.db.models.signals import post_delete, post_save, pre_save
+        from .kpi_series import kpi_deleted, kpi_pre_save, kpi_saved
+        from .models import KPI, Milestone, Project, ProjectStatus, Risk
+        from .risk_heatmap import risk_changed
+        from .schedule_risk import schedule_changed
+        from .status import status_deleted, status_saved
+
+        post_save.connect(status_saved, sender=ProjectStatus, dispatch_uid='monitoring.status')
+        post_delete.connect(status_deleted, sender=ProjectStatus, dispatch_uid='monitoring.status')
+        pre_save.connect(kpi_pre_save, sender=KPI, dispatch_uid='monitoring.kpi_series')
+        post_save.connect(kpi_saved, sender=KPI, dispatch_uid='monitoring.kpi_series')
+        post_delete.connect(kpi_deleted, sender=KPI, dispatch_uid='monitoring.kpi_series')
+        for model in (Milestone, Risk):
+            post_save.connect(schedule_changed, sender=model, dispatch_uid='monitoring.schedule_risk')
+            post_delete.connect(schedule_changed, sender=model, dispatch_uid='monitoring.schedule_risk')
+        for model in (Risk, Project):
+            post_save.connect(risk_changed, sender=model, dispatch_uid='monitoring.risk_heatmap')
+            post_delete.connect(risk_changed, sender=model, dispatch_uid='monitoring.risk_heatmap')
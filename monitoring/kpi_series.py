@@ -0,0 +1,284 @@
+# monitoring/kpi_series.py
+"""
+KPI time series.
+
+A KPI series is a project's measurements under one KPI name. Besides the KPI
+rows themselves, every series is kept as KPISeriesChunk rows: one per
+calendar year and resolution, each holding NumPy arrays packed as bytes:
+
+* DAY: one bucket per day with measurements;
+* WEEK: one bucket per week, starting on Monday;
+* MONTH: one bucket per calendar month.
+
+A bucket holds the mean actual value, the mean target and the number of
+measurements. A multi-year monthly chart of a series therefore reads a few
+small rows instead of every measurement, and a chart of every project reads
+one row per series and year. Rolling averages and target attainment are
+computed on the unpacked arrays.
+
+Saving or deleting a KPI rebuilds the chunks of its series for the year of
+the measurement, plus the previous year when the measurement falls in a
+week that began in December (and likewise for its old series and date when
+a save moves it); KPI.objects.bulk_create() sends no signals, so bulk
+imports call rebuild() or run `manage.py rebuild_kpi_series`.
+"""
+import operator
+from dataclasses import dataclass
+from datetime import date, timedelta
+from functools import reduce
+
+import numpy as np
+from django.db import transaction
+from django.db.models import Q
+
+from .models import KPI, KPISeriesChunk
+
+RESOLUTIONS = ('DAY', 'WEEK', 'MONTH')
+ROLLING_WINDOW = 3
+
+
+@dataclass
+class Series:
+    """A KPI series at one resolution, one element per bucket."""
+    project_id: int
+    name: str
+    unit: str
+    dates: np.ndarray
+    actual: np.ndarray
+    target: np.ndarray
+    counts: np.ndarray
+
+    def __len__(self):
+        return len(self.dates)
+
+    def rolling_mean(self, window=ROLLING_WINDOW):
+        return rolling_mean(self.actual, window)
+
+    def attainment(self):
+        return attainment(self.actual, self.target)
+
+
+def bucket_starts(dates, resolution):
+    """The first day of the DAY, WEEK (Monday) or MONTH bucket of each date."""
+    dates = np.asarray(dates, dtype='datetime64[D]')
+    if resolution == 'DAY':
+        return dates
+    if resolution == 'WEEK':
+        # 1970-01-01 was a Thursday.
+        return dates - (dates.astype(np.int64) + 3) % 7
+    if resolution == 'MONTH':
+        return dates.astype('datetime64[M]').astype('datetime64[D]')
+    raise ValueError(f'Unknown resolution {resolution!r}')
+
+
+def _mean(inverse, values, size):
+    """Per-bucket mean of `values`, ignoring NaN; NaN for buckets without any value."""
+    present = ~np.isnan(values)
+    totals = np.bincount(inverse, weights=np.where(present, values, 0.0), minlength=size)
+    counts = np.bincount(inverse, weights=present, minlength=size)
+    return np.divide(totals, counts, out=np.full(size, np.nan), where=counts > 0)
+
+
+def downsample(dates, actual, target, resolution):
+    """(bucket starts, mean actual, mean target, counts) of measurements at `resolution`."""
+    starts, inverse = np.unique(bucket_starts(dates, resolution), return_inverse=True)
+    size = len(starts)
+    counts = np.bincount(inverse, minlength=size)
+    return starts, _mean(inverse, actual, size), _mean(inverse, target, size), counts
+
+
+def rolling_mean(values, window=ROLLING_WINDOW):
+    """Trailing mean over the last `window` buckets, skipping NaN; NaN where the window holds no value."""
+    present = ~np.isnan(values)
+    totals = np.concatenate([[0.0], np.cumsum(np.where(present, values, 0.0))])
+    counts = np.concatenate([[0], np.cumsum(present)])
+    end = np.arange(1, len(values) + 1)
+    start = np.maximum(end - window, 0)
+    sums, sizes = totals[end] - totals[start], counts[end] - counts[start]
+    return np.divide(sums, sizes, out=np.full(len(values), np.nan), where=sizes > 0)
+
+
+def attainment(actual, target):
+    """actual / target per bucket (1.0 = on target); NaN where either is missing or the target is not positive."""
+    valid = ~np.isnan(actual) & ~np.isnan(target) & (target > 0)
+    return np.divide(actual, target, out=np.full(len(actual), np.nan), where=valid)
+
+
+def _chunks(project_id, name, unit, dates, actual, target):
+    for resolution in RESOLUTIONS:
+        starts, means, targets, counts = downsample(dates, actual, target, resolution)
+        years = starts.astype('datetime64[Y]').astype(np.int64) + 1970
+        for year in np.unique(years):
+            mask = years == year
+            yield KPISeriesChunk(
+                project_id=project_id, name=name, resolution=resolution, year=int(year), unit=unit,
+                days=starts[mask].astype(np.int32).tobytes(), actual=means[mask].tobytes(),
+                target=targets[mask].tobytes(), counts=counts[mask].astype(np.int32).tobytes())
+
+
+def _series_filter(keys):
+    """Q matching exactly the series in `keys`, a list of (project id, name)."""
+    return reduce(operator.or_, (Q(project=project_id, name=name) for project_id, name in keys))
+
+
+def chunk_years(day):
+    """The years of the chunks holding a measurement taken on `day`."""
+    return {day.year, (day - timedelta(days=day.weekday())).year}
+
+
+def _years_filter(years):
+    """Q matching the measurements that make up the chunks of `years`."""
+    # The last week of a year runs up to six days into the next one.
+    return reduce(operator.or_, (Q(date__gte=date(year, 1, 1), date__lte=date(year, 12, 31) + timedelta(days=6))
+                                 for year in years))
+
+
+def rebuild(keys=None, batch_size=200, years=None):
+    """
+    Rebuild the chunks of the series in `keys`, a collection of
+    (project id, name), or of every series; only the chunks of `years`
+    when given. Returns the chunks written.
+    """
+    if years is not None:
+        years = set(years)
+    if keys is None:
+        batches = [None]
+    else:
+        keys = sorted(set(keys))
+        batches = [keys[start:start + batch_size] for start in range(0, len(keys), batch_size)]
+
+    written = 0
+    with transaction.atomic():
+        for batch in batches:
+            measurements, chunks = KPI.objects.all(), KPISeriesChunk.objects.all()
+            if batch is not None:
+                measurements, chunks = measurements.filter(_series_filter(batch)), chunks.filter(_series_filter(batch))
+            if years is not None:
+                measurements, chunks = measurements.filter(_years_filter(years)), chunks.filter(year__in=years)
+            rows = {}
+            for project_id, name, unit, day, actual, target in measurements.order_by(
+                    'project', 'name', 'date').values_list(
+                    'project', 'name', 'unit', 'date', 'actual_value', 'target_value').iterator():
+                rows.setdefault((project_id, name), []).append((unit, day, actual, target))
+
+            chunks.delete()
+            created = []
+            for (project_id, name), series in rows.items():
+                units, days, actual, target = zip(*series)
+                created += [chunk for chunk in _chunks(
+                    project_id, name, units[-1], np.array(days, dtype='datetime64[D]'),
+                    np.array(actual, dtype=float), np.array(target, dtype=float))
+                    if years is None or chunk.year in years]
+            written += len(KPISeriesChunk.objects.bulk_create(created, batch_size=500))
+    return written
+
+
+def kpi_pre_save(sender, instance, raw=False, **kwargs):
+    """pre_save receiver for KPI: remember the series and date a moved measurement leaves."""
+    if raw or instance.pk is None:
+        return
+    instance._previous_series = KPI.objects.filter(pk=instance.pk).values_list('project', 'name', 'date').first()
+
+
+def _measured_on(instance):
+    return KPI._meta.get_field('date').to_python(instance.date)
+
+
+def kpi_saved(sender, instance, raw=False, **kwargs):
+    """post_save receiver for KPI."""
+    if raw:
+        return
+    keys, years = {(instance.project_id, instance.name)}, chunk_years(_measured_on(instance))
+    if getattr(instance, '_previous_series', None):
+        project_id, name, day = instance._previous_series
+        keys.add((project_id, name))
+        years |= chunk_years(day)
+    rebuild(keys, years=years)
+
+
+def kpi_deleted(sender, instance, **kwargs):
+    """post_delete receiver for KPI."""
+    rebuild([(instance.project_id, instance.name)], years=chunk_years(_measured_on(instance)))
+
+
+def load(projects=None, resolution='MONTH', start=None, end=None, names=None):
+    """
+    {(project id, name): Series} at `resolution` for the series of
+    `projects` (ids or a queryset; default all), between `start` and `end`,
+    read in one query.
+    """
+    chunks = KPISeriesChunk.objects.filter(resolution=resolution)
+    if projects is not None:
+        chunks = chunks.filter(project__in=projects)
+    if names is not None:
+        chunks = chunks.filter(name__in=names)
+    if start is not None:
+        chunks = chunks.filter(year__gte=start.year)
+    if end is not None:
+        chunks = chunks.filter(year__lte=end.year)
+
+    parts = {}
+    for project_id, name, unit, days, actual, target, counts in chunks.order_by('project', 'name', 'year').values_list(
+            'project', 'name', 'unit', 'days', 'actual', 'target', 'counts'):
+        parts.setdefault((project_id, name), [unit, [], [], [], []])
+        entry = parts[(project_id, name)]
+        entry[0] = unit
+        for column, data, dtype in zip(entry[1:], (days, actual, target, counts),
+                                       (np.int32, np.float64, np.float64, np.int32)):
+            column.append(np.frombuffer(data, dtype=dtype))
+
+    result = {}
+    for (project_id, name), (unit, days, actual, target, counts) in parts.items():
+        dates = np.concatenate(days).astype('datetime64[D]')
+        keep = np.ones(len(dates), dtype=bool)
+        if start is not None:
+            keep &= dates >= np.datetime64(start, 'D')
+        if end is not None:
+            keep &= dates <= np.datetime64(end, 'D')
+        result[(project_id, name)] = Series(
+            project_id=project_id, name=name, unit=unit, dates=dates[keep], actual=np.concatenate(actual)[keep],
+            target=np.concatenate(target)[keep], counts=np.concatenate(counts)[keep])
+    return result
+
+
+def _listed(values, digits=4):
+    return [None if np.isnan(value) else round(float(value), digits) for value in values]
+
+
+def chart(projects=None, resolution='MONTH', start=None, end=None, window=ROLLING_WINDOW):
+    """
+    JSON-ready series for charts: {(project id, name): {'unit', 'dates',
+    'actual', 'target', 'rolling_mean', 'attainment'}}.
+    """
+    return {
+        key: {
+            'unit': series.unit,
+            'dates': [day.isoformat() for day in series.dates.astype(date)],
+            'actual': _listed(series.actual),
+            'target': _listed(series.target),
+            'rolling_mean': _listed(series.rolling_mean(window)),
+            'attainment': _listed(series.attainment()),
+        }
+        for key, series in load(projects, resolution, start, end).items()
+    }
+
+
+def latest(projects=None, resolution='MONTH', since=None, until=None, window=ROLLING_WINDOW):
+    """
+    The last bucket of every series with a value between `since` and
+    `until`: dicts of project_id, name, unit, date, actual, rolling_mean
+    and attainment.
+    """
+    rows = []
+    for (project_id, name), series in load(projects, resolution, since, until).items():
+        present = np.flatnonzero(~np.isnan(series.actual))
+        if not len(present):
+            continue
+        last = present[-1]
+        rolling, ratio = series.rolling_mean(window)[last], series.attainment()[last]
+        rows.append({
+            'project_id': project_id, 'name': name, 'unit': series.unit,
+            'date': series.dates[last].astype(date), 'actual': float(series.actual[last]),
+            'rolling_mean': float(rolling), 'attainment': None if np.isnan(ratio) else float(ratio),
+        })
+    return rows
@@ -0,0 +1,12 @@
+# monitoring/management/commands/rebuild_kpi_series.py
+from django.core.management.base import BaseCommand
+
+from monitoring.kpi_series import rebuild
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the packed daily, weekly and monthly KPI series, e.g. after a bulk import of measurements'
+
+    def handle(self, *args, **options):
+        written = rebuild()
+        self.stdout.write(self.style.SUCCESS(f'Wrote {written} KPI series chunk(s).'))
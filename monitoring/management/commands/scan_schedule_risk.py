@@ -0,0 +1,18 @@
+# monitoring/management/commands/scan_schedule_risk.py
+from datetime import date
+
+from django.core.management.base import BaseCommand
+
+from monitoring.schedule_risk import scan
+
+
+class Command(BaseCommand):
+    help = 'Detect milestones that slipped since the last run and update project schedule-risk scores'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--date', type=date.fromisoformat, help='Scan as of this date (default: today)')
+
+    def handle(self, *args, **options):
+        recomputed, rescored = scan(options['date'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Recomputed {recomputed} project(s); {rescored} schedule-risk score(s) brought up to date.'))
@@ -0,0 +1,113 @@
+# Generated by Django 5.1.1 on 2026-10-19 12:57
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.utils import timezone
+
+# Legacy Project.status -> current status. DELAYED projects are in progress;
+# whether they are late now follows from their end date.
+LEGACY_STATUSES = {'ONGOING': 'IN_PROGRESS', 'DELAYED': 'IN_PROGRESS', 'COMPLETED': 'COMPLETED'}
+
+
+def backfill(apps, schema_editor):
+    """Copy each project's latest status onto it and rebuild its status durations."""
+    Project = apps.get_model('monitoring', 'Project')
+    ProjectStatus = apps.get_model('monitoring', 'ProjectStatus')
+    ProjectStatusDuration = apps.get_model('monitoring', 'ProjectStatusDuration')
+
+    latest, durations = {}, []
+    history = ProjectStatus.objects.order_by('project', 'updated_at', 'pk').values_list(
+        'project', 'status', 'updated_at', 'updated_by')
+    for project, status, updated_at, updated_by in history.iterator():
+        current = durations[-1] if durations and durations[-1].project_id == project else None
+        latest[project] = (status, updated_at, updated_by)
+        if current is not None and current.status == status:
+            continue
+        if current is not None:
+            current.ended_at = updated_at
+        durations.append(ProjectStatusDuration(project_id=project, status=status, started_at=updated_at))
+    ProjectStatusDuration.objects.bulk_create(durations, batch_size=500)
+    Project.objects.bulk_update(
+        [Project(pk=pk, current_status=status, status_updated_at=updated_at, status_updated_by_id=updated_by)
+         for pk, (status, updated_at, updated_by) in latest.items()],
+        ['current_status', 'status_updated_at', 'status_updated_by'], batch_size=500)
+
+
+def carry_over_legacy_statuses(apps, schema_editor):
+    """Record the legacy status of projects without a status history as their first ProjectStatus."""
+    Project = apps.get_model('monitoring', 'Project')
+    ProjectStatus = apps.get_model('monitoring', 'ProjectStatus')
+    ProjectStatusDuration = apps.get_model('monitoring', 'ProjectStatusDuration')
+    now = timezone.now()
+    for legacy, status in LEGACY_STATUSES.items():
+        projects = Project.objects.filter(status=legacy, status_updated_at__isnull=True)
+        ids = list(projects.values_list('pk', flat=True))
+        ProjectStatus.objects.bulk_create([
+            ProjectStatus(project_id=pk, status=status, comment='Carried over from the retired project status.')
+            for pk in ids
+        ], batch_size=500)
+        ProjectStatusDuration.objects.bulk_create(
+            [ProjectStatusDuration(project_id=pk, status=status, started_at=now) for pk in ids], batch_size=500)
+        projects.update(current_status=status, status_updated_at=now)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('monitoring', '0003_project_assigned_to'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProjectStatusDuration',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('NOT_STARTED', 'Not Started'), ('IN_PROGRESS', 'In Progress'), ('ON_HOLD', 'On Hold'), ('COMPLETED', 'Completed'), ('CANCELLED', 'Cancelled')], max_length=20)),
+                ('started_at', models.DateTimeField()),
+                ('ended_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'ordering': ['project', 'started_at'],
+            },
+        ),
+        migrations.AddField(
+            model_name='project',
+            name='current_status',
+            field=models.CharField(choices=[('NOT_STARTED', 'Not Started'), ('IN_PROGRESS', 'In Progress'), ('ON_HOLD', 'On Hold'), ('COMPLETED', 'Completed'), ('CANCELLED', 'Cancelled')], db_index=True, default='NOT_STARTED', max_length=20),
+        ),
+        migrations.AddField(
+            model_name='project',
+            name='status_updated_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='project',
+            name='status_updated_by',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddIndex(
+            model_name='project',
+            index=models.Index(fields=['current_status', 'end_date'], name='monitoring__current_079863_idx'),
+        ),
+        migrations.AddField(
+            model_name='projectstatusduration',
+            name='project',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='status_durations', to='monitoring.project'),
+        ),
+        migrations.AddIndex(
+            model_name='projectstatusduration',
+            index=models.Index(fields=['project', 'ended_at'], name='monitoring__project_97947b_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='projectstatusduration',
+            index=models.Index(fields=['status', 'ended_at'], name='monitoring__status_5cebb0_idx'),
+        ),
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+        migrations.RunPython(carry_over_legacy_statuses, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='project',
+            name='status',
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 5.1.1 on 2026-10-19 13:01
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('monitoring', '0004_project_current_status'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='KPISeriesChunk',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255)),
+                ('resolution', models.CharField(choices=[('DAY', 'Daily'), ('WEEK', 'Weekly'), ('MONTH', 'Monthly')], max_length=5)),
+                ('year', models.PositiveSmallIntegerField()),
+                ('unit', models.CharField(blank=True, max_length=50)),
+                ('days', models.BinaryField()),
+                ('actual', models.BinaryField()),
+                ('target', models.BinaryField()),
+                ('counts', models.BinaryField()),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='kpi',
+            index=models.Index(fields=['project', 'name', 'date'], name='monitoring__project_b9b84e_idx'),
+        ),
+        migrations.AddField(
+            model_name='kpiserieschunk',
+            name='project',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='kpi_chunks', to='monitoring.project'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='kpiserieschunk',
+            unique_together={('project', 'name', 'resolution', 'year')},
+        ),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 5.1.1 on 2026-10-19 13:06
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('monitoring', '0005_kpi_series'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProjectScheduleRisk',
+            fields=[
+                ('project', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='schedule_risk', serialize=False, to='monitoring.project')),
+                ('milestones', models.PositiveIntegerField(default=0)),
+                ('overdue', models.PositiveIntegerField(default=0)),
+                ('overdue_due_days', models.BigIntegerField(default=0)),
+                ('earliest_overdue', models.DateField(blank=True, null=True)),
+                ('late_slip_days', models.PositiveIntegerField(default=0)),
+                ('slip_days', models.PositiveIntegerField(default=0)),
+                ('risk_points', models.PositiveIntegerField(default=0)),
+                ('score', models.FloatField(db_index=True, default=0)),
+                ('computed_on', models.DateField(blank=True, null=True)),
+                ('stale', models.BooleanField(db_index=True, default=False)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ScheduleRiskScan',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('scanned_through', models.DateField()),
+                ('ran_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='milestone',
+            index=models.Index(fields=['completed_date', 'due_date'], name='monitoring__complet_2d34fa_idx'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.1.1 on 2026-10-19 13:07
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('monitoring', '0006_schedule_risk'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='risk',
+            index=models.Index(fields=['severity', 'id'], name='monitoring__severit_5e75ca_idx'),
+        ),
+    ]
@@ -4,34 +4,40 @@ from django.db import models
 from django.conf import settings
 from core.models import *
 
+PROJECT_STATUS_CHOICES = [
+    ('NOT_STARTED', 'Not Started'),
+    ('IN_PROGRESS', 'In Progress'),
+    ('ON_HOLD', 'On Hold'),
+    ('COMPLETED', 'Completed'),
+    ('CANCELLED', 'Cancelled')
+]
+
 class Project(models.Model):
     title = models.CharField(max_length=255)
     description = models.TextField()
-    STATUS_CHOICES =[
-        ('NOT_STARTED', 'Not Started'),
-        ('ONGOING', 'Ongoing'),
-        ('COMPLETED', 'Completed'),
-        ('DELAYED', 'Delayed')
-    ]
-    status = models.CharField(max_length=15, choices=STATUS_CHOICES, default='active')
     start_date = models.DateField()
     end_date = models.DateField()
     department = models.ForeignKey(Department, on_delete=models.CASCADE, related_name='projects')
     state = models.ForeignKey(State, on_delete=models.CASCADE, related_name='projects', null=True, blank=True)
     project_manager = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, related_name='managed_projects')
     assigned_to = models.ForeignKey(Employee, on_delete=models.CASCADE, related_name='assigned_projects')
+    # The latest ProjectStatus, kept here by monitoring.status so dashboards
+    # filter on the project row instead of the status history. It is the
+    # project's only status; "delayed" is derived from it and end_date.
+    current_status = models.CharField(max_length=20, choices=PROJECT_STATUS_CHOICES, default='NOT_STARTED',
+                                      db_index=True)
+    status_updated_at = models.DateTimeField(null=True, blank=True)
+    status_updated_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True,
+                                          related_name='+')
+
+    class Meta:
+        indexes = [models.Index(fields=['current_status', 'end_date'])]
 
     def __str__(self):
         return self.title
 
 class ProjectStatus(models.Model):
-    STATUS_CHOICES = [
-        ('NOT_STARTED', 'Not Started'),
-        ('IN_PROGRESS', 'In Progress'),
-        ('ON_HOLD', 'On Hold'),
-        ('COMPLETED', 'Completed'),
-        ('CANCELLED', 'Cancelled')
-    ]
+    STATUS_CHOICES = PROJECT_STATUS_CHOICES
     
     project = models.ForeignKey(Project, on_delete=models.CASCADE, related_name='statuses')
     status = models.CharField(max_length=20, choices=STATUS_CHOICES)
@@ -46,12 +52,33 @@ class ProjectStatus(models.Model):
     def __str__(self):
         return f"{self.project.title} - {self.get_status_display()}"
 
+class ProjectStatusDuration(models.Model):
+    """A stretch of time a project spent in one status; the open one has no end."""
+    project = models.ForeignKey(Project, on_delete=models.CASCADE, related_name='status_durations')
+    status = models.CharField(max_length=20, choices=ProjectStatus.STATUS_CHOICES)
+    started_at = models.DateTimeField()
+    ended_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['project', 'started_at']
+        indexes = [
+            models.Index(fields=['project', 'ended_at']),
+            models.Index(fields=['status', 'ended_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.project.title} - {self.status} from {self.started_at:%Y-%m-%d}"
+
 class Milestone(models.Model):
     project = models.ForeignKey(Project, on_delete=models.CASCADE, related_name='milestones')
     title = models.CharField(max_length=255)
     description = models.TextField()
     due_date = models.DateField()
     completed_date = models.DateField(null=True, blank=True)
+
+    class Meta:
+        # Open milestones by due date, for the schedule-risk scan.
+        indexes = [models.Index(fields=['completed_date', 'due_date'])]
     
     def __str__(self):
         return f"{self.project.title} - {self.title}"
@@ -68,10 +95,40 @@ class KPI(models.Model):
     class Meta:
         verbose_name = 'KPI'
         verbose_name_plural = 'KPIs'
+        indexes = [models.Index(fields=['project', 'name', 'date'])]
 
     def __str__(self):
         return f"{self.project.title} - {self.name}"
 
+class KPISeriesChunk(models.Model):
+    """
+    One calendar year of a KPI series (a project's measurements under one
+    name) at one resolution, packed as arrays by monitoring.kpi_series.
+    """
+    RESOLUTION_CHOICES = [
+        ('DAY', 'Daily'),
+        ('WEEK', 'Weekly'),
+        ('MONTH', 'Monthly'),
+    ]
+
+    project = models.ForeignKey(Project, on_delete=models.CASCADE, related_name='kpi_chunks')
+    name = models.CharField(max_length=255)
+    resolution = models.CharField(max_length=5, choices=RESOLUTION_CHOICES)
+    year = models.PositiveSmallIntegerField()
+    unit = models.CharField(max_length=50, blank=True)
+    # Bucket start dates (int32 days since 1970-01-01), mean actual and target
+    # values (float64, NaN where no measurement had one) and measurement counts (int32).
+    days = models.BinaryField()
+    actual = models.BinaryField()
+    target = models.BinaryField()
+    counts = models.BinaryField()
+
+    class Meta:
+        unique_together = ('project', 'name', 'resolution', 'year')
+
+    def __str__(self):
+        return f"{self.project.title} - {self.name} {self.resolution} {self.year}"
+
 class Risk(models.Model):
     SEVERITY_CHOICES = [
         ('LOW', 'Low'),
@@ -86,6 +143,39 @@ class Risk(models.Model):
     mitigation_plan = models.TextField()
     identified_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True)
     identified_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        # Heatmap drill-down: one severity, newest first.
+        indexes = [models.Index(fields=['severity', 'id'])]
     
     def __str__(self):
-        return f"{self.project.title} - {self.get_severity_display()} Risk"
\ No newline at end of file
+        return f"{self.project.title} - {self.get_severity_display()} Risk"
+
+class ProjectScheduleRisk(models.Model):
+    """
+    A project's schedule-risk score, kept by monitoring.schedule_risk.
+    Slip counts the days open milestones are past due plus the days late
+    milestones were completed after theirs.
+    """
+    project = models.OneToOneField(Project, on_delete=models.CASCADE, primary_key=True, related_name='schedule_risk')
+    milestones = models.PositiveIntegerField(default=0)
+    overdue = models.PositiveIntegerField(default=0)
+    # Sum of the due dates of the open overdue milestones, in days since
+    # 1970-01-01, so their slip on any later day is overdue * day - this.
+    overdue_due_days = models.BigIntegerField(default=0)
+    earliest_overdue = models.DateField(null=True, blank=True)
+    late_slip_days = models.PositiveIntegerField(default=0)
+    slip_days = models.PositiveIntegerField(default=0)
+    risk_points = models.PositiveIntegerField(default=0)
+    score = models.FloatField(default=0, db_index=True)
+    computed_on = models.DateField(null=True, blank=True)
+    # Set when a milestone or risk of the project changes; the next scan recomputes it.
+    stale = models.BooleanField(default=False, db_index=True)
+
+    def __str__(self):
+        return f"{self.project.title}: schedule risk {self.score:.1f}"
+
+class ScheduleRiskScan(models.Model):
+    """Watermark of the schedule-risk scan: milestones due up to this date have been looked at."""
+    scanned_through = models.DateField()
+    ran_at = models.DateTimeField(auto_now=True)
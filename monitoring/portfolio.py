@@ -0,0 +1,79 @@
+# monitoring/portfolio.py
+"""
+Portfolio timeline.
+
+timeline() loads every project a user may see, with what a Gantt view
+draws for it, in a fixed number of queries however many projects there
+are:
+
+1. the projects, joined to their department, state and schedule-risk score
+   (see monitoring.schedule_risk), with their current status (kept on the
+   project, see monitoring.status) and the number of risks at each
+   severity counted in the same query;
+2. their milestones, through one Prefetch;
+3. the latest monthly value of their KPI series, read from the packed
+   series chunks (see monitoring.kpi_series).
+
+Visibility follows the employee list: the DG (and superusers) see every
+project, a director their department's, a zonal director their zone's, a
+state coordinator their state's, and other staff the projects they manage
+or are assigned to.
+"""
+from django.db.models import Count, Prefetch, Q
+
+from . import kpi_series
+from .models import Milestone, Project, Risk
+
+SEVERITIES = [severity for severity, _ in Risk.SEVERITY_CHOICES]
+
+
+def visible_projects(user):
+    projects = Project.objects.all()
+    if user.is_superuser or user.current_role == 'DG':
+        return projects
+    if user.current_role == 'DIR':
+        return projects.filter(department=user.current_department_id)
+    if user.current_role == 'ZD':
+        return projects.filter(state__zone=user.current_zone_id)
+    if user.current_role == 'SC':
+        return projects.filter(state=user.current_state_id)
+    return projects.filter(Q(project_manager=user) | Q(assigned_to=user))
+
+
+def in_window(queryset, start=None, end=None):
+    """Projects running at some point between `start` and `end` (either may be open)."""
+    if start is not None:
+        queryset = queryset.filter(end_date__gte=start)
+    if end is not None:
+        queryset = queryset.filter(start_date__lte=end)
+    return queryset
+
+
+def timeline(queryset, start=None, end=None):
+    """
+    The projects of `queryset` running between `start` and `end`, ordered by
+    start date, each with `timeline_milestones` (those due in the window),
+    `kpi_latest` (latest monthly value per series) and `risk_<severity>` counts.
+    """
+    milestones = Milestone.objects.order_by('due_date', 'pk')
+    if start is not None:
+        milestones = milestones.filter(due_date__gte=start)
+    if end is not None:
+        milestones = milestones.filter(due_date__lte=end)
+
+    projects = list(
+        in_window(queryset, start, end)
+        .select_related('department', 'state', 'schedule_risk')
+        .annotate(**{f'risk_{severity.lower()}': Count('risks', filter=Q(risks__severity=severity))
+                     for severity in SEVERITIES})
+        .prefetch_related(Prefetch('milestones', queryset=milestones, to_attr='timeline_milestones'))
+        .order_by('start_date', 'pk')
+    )
+
+    kpis = {}
+    if projects:
+        for row in kpi_series.latest(in_window(queryset, start, end).values('pk'), 'MONTH', start, end):
+            kpis.setdefault(row['project_id'], []).append(row)
+    for project in projects:
+        project.kpi_latest = kpis.get(project.pk, [])
+    return projects
@@ -0,0 +1,86 @@
+# monitoring/risk_heatmap.py
+"""
+Risk heatmap.
+
+heatmap() counts risks by severity, department and state (with the state's
+zone) in one grouped query and caches the cells. Saving or deleting a risk
+or a project, once the transaction commits, bumps a generation that is
+part of the cache key and shared by every worker (core.cache_generations),
+so the next request recomputes the grid; between changes every request is
+served from the cache.
+
+The grid is cached whole. cells() narrows it to what a user may see: a
+director their department, a zonal director their zone, a state
+coordinator their state. The drill-down behind each cell is the keyset
+paginated risk list of the monitoring API.
+"""
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count
+
+from core import cache_generations
+
+from .models import Risk
+
+CACHE_TIMEOUT = 60 * 60 * 24
+GENERATION_KEY = 'monitoring.risk_heatmap.generation'
+SEVERITIES = [severity for severity, _ in Risk.SEVERITY_CHOICES]
+
+
+def invalidate():
+    cache_generations.bump([GENERATION_KEY])
+
+
+def risk_changed(sender, instance, raw=False, **kwargs):
+    """post_save and post_delete receiver for Risk and Project."""
+    if not raw:
+        transaction.on_commit(invalidate)
+
+
+def heatmap():
+    """[{severity, department, department_name, state, state_name, zone, count}] for every non-empty cell."""
+    key = f'monitoring.risk_heatmap:{cache_generations.get(GENERATION_KEY)}'
+    grid = cache.get(key)
+    if grid is None:
+        rows = (
+            Risk.objects.order_by().values('severity', 'project__department', 'project__state')
+            .annotate(count=Count('pk'))
+            .values_list('severity', 'project__department', 'project__department__name', 'project__state',
+                         'project__state__name', 'project__state__zone', 'count')
+        )
+        grid = [
+            {'severity': severity, 'department': department, 'department_name': department_name, 'state': state,
+             'state_name': state_name, 'zone': zone, 'count': count}
+            for severity, department, department_name, state, state_name, zone, count in rows
+        ]
+        grid.sort(key=lambda cell: (SEVERITIES.index(cell['severity']) if cell['severity'] in SEVERITIES else 99,
+                                    cell['department'] or '', cell['state'] or ''))
+        cache.set(key, grid, CACHE_TIMEOUT)
+    return grid
+
+
+def cells(user, severity=None, department=None, state=None):
+    """The heatmap cells `user` may see, optionally narrowed to one severity, department or state."""
+    grid = heatmap()
+    if not (user.is_superuser or user.current_role == 'DG'):
+        if user.current_role == 'DIR':
+            grid = [cell for cell in grid if cell['department'] == user.current_department_id]
+        elif user.current_role == 'ZD':
+            grid = [cell for cell in grid if cell['zone'] is not None and cell['zone'] == user.current_zone_id]
+        elif user.current_role == 'SC':
+            grid = [cell for cell in grid if cell['state'] is not None and cell['state'] == user.current_state_id]
+        else:
+            grid = []
+    for field, value in (('severity', severity), ('department', department), ('state', state)):
+        if value:
+            grid = [cell for cell in grid if cell[field] == value]
+    return grid
+
+
+def totals(grid):
+    """Risk counts per severity, department and state over `grid`."""
+    result = {'severity': {}, 'department': {}, 'state': {}}
+    for cell in grid:
+        for field in result:
+            result[field][cell[field]] = result[field].get(cell[field], 0) + cell['count']
+    return result
@@ -0,0 +1,124 @@
+# monitoring/schedule_risk.py
+"""
+Milestone slip detection and schedule-risk scores.
+
+scan() keeps a ProjectScheduleRisk row per project with overdue or late
+milestones or with recorded risks:
+
+* slip_days: days its open milestones are past due plus the days its late
+  milestones were completed after their due date;
+* risk_points: its risks weighted by SEVERITY_POINTS;
+* score: the average slip per milestone, scaled up by a tenth for every
+  risk point, so a slipping project with critical risks sorts first.
+
+A scan does not read every milestone. The ScheduleRiskScan watermark
+records the last day covered; a run looks up only the open milestones
+that have fallen due since (an index range scan on (completed_date,
+due_date)) and the projects marked stale because one of their milestones
+or risks was saved or deleted, and recomputes those projects. The slip of
+the other open overdue milestones just grows by a day per day, which one
+UPDATE applies to every scored project from the stored sums.
+
+`manage.py scan_schedule_risk` runs the scan; schedule it daily with cron.
+"""
+from datetime import date, timedelta
+
+from django.db import transaction
+from django.db.models import Count, F, FloatField, Q, Value
+from django.db.models.functions import Cast, Greatest
+from django.utils import timezone
+
+from .models import Milestone, ProjectScheduleRisk, Risk, ScheduleRiskScan
+
+SEVERITY_POINTS = {'LOW': 1, 'MEDIUM': 3, 'HIGH': 6, 'CRITICAL': 10}
+EPOCH = date(1970, 1, 1)
+BATCH_SIZE = 500
+
+
+def _day(value):
+    return (value - EPOCH).days
+
+
+def mark_stale(project_ids):
+    """Have the next scan recompute `project_ids`."""
+    ProjectScheduleRisk.objects.bulk_create(
+        [ProjectScheduleRisk(project_id=pk, stale=True) for pk in set(project_ids)],
+        update_conflicts=True, unique_fields=['project'], update_fields=['stale'])
+
+
+def schedule_changed(sender, instance, raw=False, origin=None, **kwargs):
+    """post_save and post_delete receiver for Milestone and Risk."""
+    # Rows removed along with their project need no rescoring.
+    if raw or (origin is not None and not isinstance(origin, sender) and getattr(origin, 'model', None) is not sender):
+        return
+    mark_stale([instance.project_id])
+
+
+def _components(project_ids, today):
+    """ProjectScheduleRisk rows for `project_ids`, computed from their milestones and risks."""
+    rows = {pk: ProjectScheduleRisk(project_id=pk) for pk in project_ids}
+    milestones = Milestone.objects.filter(project__in=project_ids).values_list('project', 'due_date', 'completed_date')
+    for project_id, due_date, completed_date in milestones.iterator():
+        row = rows[project_id]
+        row.milestones += 1
+        if completed_date is None and due_date < today:
+            row.overdue += 1
+            row.overdue_due_days += _day(due_date)
+            row.earliest_overdue = min(row.earliest_overdue or due_date, due_date)
+        elif completed_date is not None and completed_date > due_date:
+            row.late_slip_days += (completed_date - due_date).days
+    for project_id, severity, count in (Risk.objects.filter(project__in=project_ids).order_by()
+                                        .values('project', 'severity').annotate(count=Count('pk'))
+                                        .values_list('project', 'severity', 'count')):
+        rows[project_id].risk_points += SEVERITY_POINTS.get(severity, 0) * count
+    return rows.values()
+
+
+def _rescore(today):
+    """Bring slip_days and score up to `today` for the rows just recomputed or with open overdue milestones."""
+    slip = F('late_slip_days') + F('overdue') * Value(_day(today)) - F('overdue_due_days')
+    return ProjectScheduleRisk.objects.filter(Q(overdue__gt=0) | Q(computed_on__isnull=True)).update(
+        slip_days=slip,
+        score=Cast(slip, FloatField()) / Greatest(F('milestones'), 1) * (1 + Cast(F('risk_points'), FloatField()) / 10),
+        computed_on=today,
+    )
+
+
+def scan(today=None):
+    """
+    Recompute the projects with milestones newly past due or changes since
+    the last scan, and age every score to `today`. Returns (projects
+    recomputed, rows rescored).
+    """
+    today = today or timezone.now().date()
+    with transaction.atomic():
+        watermark = ScheduleRiskScan.objects.select_for_update().first()
+        if watermark is None:
+            # First scan: every project with a milestone or a risk.
+            projects = set(Milestone.objects.values_list('project', flat=True).distinct())
+            projects |= set(Risk.objects.values_list('project', flat=True).distinct())
+            watermark = ScheduleRiskScan(scanned_through=today - timedelta(days=1))
+        else:
+            projects = set(
+                Milestone.objects.filter(
+                    completed_date__isnull=True, due_date__gt=watermark.scanned_through, due_date__lt=today)
+                .values_list('project', flat=True).distinct())
+            watermark.scanned_through = max(watermark.scanned_through, today - timedelta(days=1))
+        projects |= set(ProjectScheduleRisk.objects.filter(stale=True).values_list('project', flat=True))
+
+        projects = sorted(projects)
+        rows = [row for start in range(0, len(projects), BATCH_SIZE)
+                for row in _components(projects[start:start + BATCH_SIZE], today)]
+        ProjectScheduleRisk.objects.bulk_create(
+            rows, batch_size=500, update_conflicts=True, unique_fields=['project'],
+            update_fields=['milestones', 'overdue', 'overdue_due_days', 'earliest_overdue', 'late_slip_days',
+                           'risk_points', 'computed_on', 'stale'])
+        rescored = _rescore(today)
+        watermark.save()
+    return len(rows), rescored
+
+
+def ranked(queryset=None, limit=10):
+    """The `limit` projects most at risk of slipping, with their projects joined."""
+    queryset = ProjectScheduleRisk.objects.all() if queryset is None else queryset
+    return list(queryset.filter(score__gt=0).select_related('project').order_by('-score')[:limit])
@@ -0,0 +1,58 @@
+# monitoring/serializers.py
+from rest_framework import serializers
+
+from .models import Milestone, Project, ProjectScheduleRisk, Risk
+from .portfolio import SEVERITIES
+
+
+class TimelineMilestoneSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Milestone
+        fields = ['id', 'title', 'due_date', 'completed_date']
+
+
+class TimelineKPISerializer(serializers.Serializer):
+    """The latest monthly value of a KPI series, from monitoring.kpi_series.latest()."""
+    name = serializers.CharField()
+    unit = serializers.CharField()
+    date = serializers.DateField()
+    actual = serializers.FloatField()
+    rolling_mean = serializers.FloatField()
+    attainment = serializers.FloatField(allow_null=True)
+
+
+class PortfolioProjectSerializer(serializers.ModelSerializer):
+    """A project as loaded by monitoring.portfolio.timeline()."""
+    department_name = serializers.CharField(source='department.name')
+    state_name = serializers.CharField(source='state.name', default=None)
+    milestones = TimelineMilestoneSerializer(source='timeline_milestones', many=True)
+    kpis = TimelineKPISerializer(source='kpi_latest', many=True)
+    risks = serializers.SerializerMethodField()
+    schedule_risk = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Project
+        fields = ['id', 'title', 'department', 'department_name', 'state', 'state_name', 'start_date', 'end_date',
+                  'current_status', 'status_updated_at', 'milestones', 'kpis', 'risks', 'schedule_risk']
+
+    def get_risks(self, project):
+        return {severity: getattr(project, f'risk_{severity.lower()}') for severity in SEVERITIES}
+
+    def get_schedule_risk(self, project):
+        try:
+            risk = project.schedule_risk
+        except ProjectScheduleRisk.DoesNotExist:
+            return None
+        return {'score': round(risk.score, 2), 'slip_days': risk.slip_days, 'overdue': risk.overdue,
+                'computed_on': risk.computed_on}
+
+
+class RiskSerializer(serializers.ModelSerializer):
+    project_title = serializers.CharField(source='project.title', read_only=True)
+    department = serializers.CharField(source='project.department_id', read_only=True)
+    state = serializers.CharField(source='project.state_id', read_only=True, default=None)
+
+    class Meta:
+        model = Risk
+        fields = ['id', 'project', 'project_title', 'department', 'state', 'severity', 'description',
+                  'mitigation_plan', 'identified_by', 'identified_at']
@@ -0,0 +1,134 @@
+# monitoring/status.py
+"""
+Current project status.
+
+ProjectStatus is an append-only history of status changes. The latest entry
+is copied onto its Project (current_status, status_updated_at,
+status_updated_by) whenever a status is written, so dashboards filter and
+group the project table rather than the whole history, and
+ProjectStatusDuration records every stretch of time a project spent in one
+status: each change closes the open stretch and opens a new one.
+
+Saving a new, latest status is handled incrementally. An entry saved out of
+order, an edited entry or a deleted one makes the project's figures be
+rebuilt from its history (sync()); so does a bulk_create of statuses, which
+sends no signals, once the caller hands the projects to sync().
+"""
+from django.db import transaction
+from django.db.models import Count, DurationField, ExpressionWrapper, F, Q, Sum, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import Project, ProjectStatus, ProjectStatusDuration
+
+# Statuses of projects that are still meant to be running.
+OPEN = ('NOT_STARTED', 'IN_PROGRESS', 'ON_HOLD')
+
+
+def sync(project_ids):
+    """Rebuild the current status and the status durations of `project_ids` from their history."""
+    project_ids = list(project_ids)
+    history = {}
+    for row in (ProjectStatus.objects.filter(project__in=project_ids)
+                .order_by('project', 'updated_at', 'pk').values('project', 'status', 'updated_at', 'updated_by')):
+        history.setdefault(row['project'], []).append(row)
+
+    with transaction.atomic():
+        ProjectStatusDuration.objects.filter(project__in=project_ids).delete()
+        durations, projects = [], []
+        for pk in project_ids:
+            entries = history.get(pk, [])
+            current = None
+            for entry in entries:
+                if current is not None:
+                    if current.status == entry['status']:
+                        continue
+                    current.ended_at = entry['updated_at']
+                current = ProjectStatusDuration(project_id=pk, status=entry['status'], started_at=entry['updated_at'])
+                durations.append(current)
+            latest = entries[-1] if entries else {'status': 'NOT_STARTED', 'updated_at': None, 'updated_by': None}
+            projects.append(Project(pk=pk, current_status=latest['status'], status_updated_at=latest['updated_at'],
+                                    status_updated_by_id=latest['updated_by']))
+        ProjectStatusDuration.objects.bulk_create(durations, batch_size=500)
+        Project.objects.bulk_update(projects, ['current_status', 'status_updated_at', 'status_updated_by'],
+                                    batch_size=500)
+
+
+def record(status):
+    """Apply a newly written ProjectStatus that is later than every other one of its project."""
+    with transaction.atomic():
+        moved = Project.objects.filter(
+            Q(status_updated_at__isnull=True) | Q(status_updated_at__lte=status.updated_at), pk=status.project_id,
+        ).update(current_status=status.status, status_updated_at=status.updated_at,
+                 status_updated_by=status.updated_by_id)
+        if not moved:
+            # Older than the current status: it lands in the middle of the history.
+            return sync([status.project_id])
+        current = ProjectStatusDuration.objects.filter(project=status.project_id, ended_at__isnull=True).first()
+        if current is not None and current.status == status.status:
+            return
+        if current is not None:
+            ProjectStatusDuration.objects.filter(pk=current.pk).update(ended_at=status.updated_at)
+        ProjectStatusDuration.objects.create(project_id=status.project_id, status=status.status,
+                                             started_at=status.updated_at)
+
+
+def status_saved(sender, instance, created, raw=False, **kwargs):
+    """post_save receiver for ProjectStatus."""
+    if raw:
+        return
+    if created:
+        record(instance)
+    else:
+        sync([instance.project_id])
+
+
+def status_deleted(sender, instance, origin=None, **kwargs):
+    """post_delete receiver for ProjectStatus."""
+    # Statuses removed along with their project (or its department) need no rebuild.
+    if isinstance(origin, ProjectStatus) or getattr(origin, 'model', None) is ProjectStatus:
+        sync([instance.project_id])
+
+
+def distribution(queryset=None):
+    """[{'status', 'count'}] of projects by current status."""
+    queryset = Project.objects.all() if queryset is None else queryset
+    return [
+        {'status': status, 'count': count}
+        for status, count in queryset.order_by('current_status').values('current_status')
+        .annotate(count=Count('pk')).values_list('current_status', 'count')
+    ]
+
+
+def delayed_filter(today=None):
+    """Q for projects still open after their end date."""
+    today = today or timezone.now().date()
+    return Q(current_status__in=OPEN, end_date__lt=today)
+
+
+def delayed(queryset=None, today=None):
+    queryset = Project.objects.all() if queryset is None else queryset
+    return queryset.filter(delayed_filter(today))
+
+
+def counts(queryset=None, today=None):
+    """Total, ongoing, completed and delayed projects in `queryset` by current status, in one query."""
+    queryset = Project.objects.all() if queryset is None else queryset
+    return queryset.aggregate(
+        total=Count('pk'),
+        ongoing=Count('pk', filter=Q(current_status='IN_PROGRESS')),
+        completed=Count('pk', filter=Q(current_status='COMPLETED')),
+        delayed=Count('pk', filter=delayed_filter(today)),
+    )
+
+
+def time_in_status(queryset=None, now=None):
+    """{status: timedelta} of the total time the projects in `queryset` have spent in each status."""
+    now = now or timezone.now()
+    durations = ProjectStatusDuration.objects.all()
+    if queryset is not None:
+        durations = durations.filter(project__in=queryset)
+    length = ExpressionWrapper(Coalesce('ended_at', Value(now)) - F('started_at'), output_field=DurationField())
+    return dict(
+        durations.order_by().values('status').annotate(total=Sum(length)).values_list('status', 'total')
+    )
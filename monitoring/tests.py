@@ -1,3 +1,287 @@
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+from io import StringIO
+from unittest import mock
+
+import numpy as np
+from django.core.cache import cache
+from django.core.management import call_command
 from django.test import TestCase
+from django.urls import reverse
+
+from core import testing
+from core.models import Department, Employee, State, Zone
+from core.views import get_monitoring_summary
+from monitoring import kpi_series, risk_heatmap, schedule_risk, status
+from monitoring.models import (
+    KPI, KPISeriesChunk, Milestone, Project, ProjectScheduleRisk, ProjectStatus, ProjectStatusDuration, Risk,
+)
+
+START = datetime(2026, 3, 1, 9, tzinfo=dt_timezone.utc)
+
+
+class ProjectStatusTests(TestCase):
+    def setUp(self):
+        self.department = Department.objects.create(code='SKD', name='Skills Development')
+        self.officer = Employee.objects.create_user(
+            employee_id='NDE0001', ippis_number='IPPIS0001', email='po@nde.gov.ng', password='pass')
+        self.project = Project.objects.create(
+            title='Vocational training', description='Empowerment', start_date=date(2026, 1, 1),
+            end_date=date(2026, 6, 30), department=self.department, assigned_to=self.officer)
+
+    def set_status(self, value, days, project=None):
+        with mock.patch('django.utils.timezone.now', return_value=START + timedelta(days=days)):
+            return ProjectStatus.objects.create(project=project or self.project, status=value,
+                                                updated_by=self.officer)
+
+    def durations(self):
+        return list(ProjectStatusDuration.objects.filter(project=self.project).values_list(
+            'status', 'started_at', 'ended_at'))
+
+    def test_latest_status_is_kept_on_project(self):
+        self.assertEqual(self.project.current_status, 'NOT_STARTED')
+        self.set_status('IN_PROGRESS', 0)
+        self.set_status('IN_PROGRESS', 5)
+        self.set_status('ON_HOLD', 10)
+
+        self.project.refresh_from_db()
+        self.assertEqual(self.project.current_status, 'ON_HOLD')
+        self.assertEqual(self.project.status_updated_at, START + timedelta(days=10))
+        self.assertEqual(self.project.status_updated_by, self.officer)
+        self.assertEqual(self.durations(), [
+            ('IN_PROGRESS', START, START + timedelta(days=10)),
+            ('ON_HOLD', START + timedelta(days=10), None),
+        ])
+        self.assertEqual(status.time_in_status(now=START + timedelta(days=12)),
+                         {'IN_PROGRESS': timedelta(days=10), 'ON_HOLD': timedelta(days=2)})
+
+    def test_out_of_order_edit_and_delete_rebuild(self):
+        self.set_status('IN_PROGRESS', 0)
+        completed = self.set_status('COMPLETED', 20)
+        self.set_status('ON_HOLD', 10)  # Backdated entry between the two.
+        self.project.refresh_from_db()
+        self.assertEqual(self.project.current_status, 'COMPLETED')
+        self.assertEqual([row[0] for row in self.durations()], ['IN_PROGRESS', 'ON_HOLD', 'COMPLETED'])
+
+        completed.status = 'CANCELLED'
+        completed.save()
+        self.project.refresh_from_db()
+        self.assertEqual(self.project.current_status, 'CANCELLED')
+
+        completed.delete()
+        self.project.refresh_from_db()
+        self.assertEqual(self.project.current_status, 'ON_HOLD')
+        self.assertEqual(self.durations()[-1], ('ON_HOLD', START + timedelta(days=10), None))
+
+        self.project.delete()
+        self.assertFalse(ProjectStatusDuration.objects.exists())
+
+    def test_summaries_read_current_status(self):
+        late = Project.objects.create(
+            title='Start-your-business', description='Empowerment', start_date=date(2025, 1, 1),
+            end_date=date(2025, 6, 30), department=self.department, assigned_to=self.officer)
+        self.set_status('IN_PROGRESS', 0)
+        self.set_status('IN_PROGRESS', 0, project=late)
+        self.set_status('COMPLETED', 30)
+
+        self.assertEqual(status.distribution(), [{'status': 'COMPLETED', 'count': 1},
+                                                 {'status': 'IN_PROGRESS', 'count': 1}])
+        self.assertEqual(status.counts(today=date(2026, 10, 1)),
+                         {'total': 2, 'ongoing': 1, 'completed': 1, 'delayed': 1})
+        self.assertEqual(list(status.delayed(today=date(2026, 10, 1))), [late])
+        self.assertEqual(get_monitoring_summary()['delayed_projects'], 1)
+
+
+class KPISeriesTests(TestCase):
+    def setUp(self):
+        department = Department.objects.create(code='SKD', name='Skills Development')
+        officer = Employee.objects.create_user(
+            employee_id='NDE0001', ippis_number='IPPIS0001', email='po@nde.gov.ng', password='pass')
+        self.project = Project.objects.create(
+            title='Vocational training', description='Empowerment', start_date=date(2025, 1, 1),
+            end_date=date(2026, 12, 31), department=department, assigned_to=officer)
+
+    def measure(self, day, actual, target=100):
+        return KPI.objects.create(project=self.project, name='Trainees', description='Trained', unit='people',
+                                  target_value=target, actual_value=actual, date=day)
+
+    def test_downsampling_and_rolling_figures(self):
+        dates = np.array(['2025-12-29', '2026-01-01', '2026-01-04', '2026-01-05', '2026-02-10'], dtype='datetime64[D]')
+        actual = np.array([10.0, np.nan, 30.0, 40.0, 50.0])
+        target = np.full(5, 50.0)
+        starts, means, _, counts = kpi_series.downsample(dates, actual, target, 'WEEK')
+        self.assertEqual([str(day) for day in starts], ['2025-12-29', '2026-01-05', '2026-02-09'])
+        np.testing.assert_array_equal(means, [20.0, 40.0, 50.0])
+        np.testing.assert_array_equal(counts, [3, 1, 1])
+
+        np.testing.assert_array_equal(kpi_series.rolling_mean(np.array([1.0, np.nan, 5.0, 6.0]), 2),
+                                      [1.0, 1.0, 5.0, 5.5])
+        np.testing.assert_array_equal(kpi_series.attainment(np.array([25.0, np.nan]), np.array([50.0, 50.0])),
+                                      [0.5, np.nan])
+
+    def test_chunks_follow_saves_and_deletes(self):
+        self.measure(date(2025, 11, 3), 40)
+        self.measure(date(2025, 12, 1), 60)
+        self.measure(date(2026, 1, 5), 80)
+        moved = self.measure(date(2026, 1, 20), 100)
+        self.assertEqual(KPISeriesChunk.objects.filter(resolution='MONTH').count(), 2)
+
+        with self.assertNumQueries(1):
+            series = kpi_series.load(resolution='MONTH')[(self.project.pk, 'Trainees')]
+        self.assertEqual([str(day) for day in series.dates], ['2025-11-01', '2025-12-01', '2026-01-01'])
+        np.testing.assert_array_equal(series.actual, [40.0, 60.0, 90.0])
+        np.testing.assert_array_equal(series.rolling_mean(2), [40.0, 50.0, 75.0])
+        np.testing.assert_array_equal(series.attainment(), [0.4, 0.6, 0.9])
+
+        moved.name = 'Graduates'
+        moved.save()
+        self.assertEqual(kpi_series.chart(resolution='MONTH', start=date(2026, 1, 1))[(self.project.pk, 'Trainees')]
+                         ['actual'], [80.0])
+        self.assertEqual({row['name']: row['attainment'] for row in kpi_series.latest()},
+                         {'Trainees': 0.8, 'Graduates': 1.0})
+
+        moved.delete()
+        KPISeriesChunk.objects.all().delete()
+        call_command('rebuild_kpi_series', stdout=StringIO())
+        self.assertEqual(set(KPISeriesChunk.objects.values_list('name', flat=True)), {'Trainees'})
+
+
+    def test_saves_rebuild_only_the_measurements_years(self):
+        self.measure(date(2024, 6, 3), 10)
+        self.measure(date(2025, 12, 30), 20)
+        untouched = set(KPISeriesChunk.objects.filter(year=2024).values_list('pk', flat=True))
+        moved = self.measure(date(2026, 1, 2), 40)  # In the week of Monday 2025-12-29.
+        self.measure(date(2026, 12, 31), 50)  # In a week that runs into 2027.
+        moved.date = date(2026, 3, 4)
+        moved.save()
+        self.measure(date(2027, 1, 1), 70).delete()
+
+        self.assertEqual(set(KPISeriesChunk.objects.filter(year=2024).values_list('pk', flat=True)), untouched)
+        incremental = set(KPISeriesChunk.objects.values_list(
+            'resolution', 'year', 'days', 'actual', 'target', 'counts'))
+        kpi_series.rebuild()
+        self.assertEqual(set(KPISeriesChunk.objects.values_list(
+            'resolution', 'year', 'days', 'actual', 'target', 'counts')), incremental)
+        self.assertEqual(kpi_series.chart(resolution='WEEK', start=date(2025, 12, 1))[(self.project.pk, 'Trainees')]
+                         ['dates'], ['2025-12-29', '2026-03-02', '2026-12-28'])
+
+
+class MonitoringQueryBudgetTests(testing.QueryBudgetTestCase):
+    namespace = 'monitoring'
+    budgets = {
+        'portfolio': {'max_queries': 8},
+        'risk-list': {'max_queries': 6},
+        'risk-heatmap': {'max_queries': 6},
+    }
+
+
+class PortfolioTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        zone = Zone.objects.create(code='NC', name='North Central')
+        self.state = State.objects.create(code='FCT', name='Federal Capital Territory', zone=zone)
+        self.department = Department.objects.create(code='SKD', name='Skills Development')
+        self.director = Employee.objects.create_user(
+            employee_id='NDE0001', ippis_number='IPPIS0001', email='dir@nde.gov.ng', password='pass',
+            current_role='DIR', current_department=self.department)
+        other = Department.objects.create(code='FIN', name='Finance and Accounts')
+        self.project = self.create_project('Vocational training', self.department, date(2026, 1, 1))
+        self.create_project('Audit', other, date(2026, 1, 1))
+        self.create_project('Old scheme', self.department, date(2024, 1, 1))
+
+        Milestone.objects.create(project=self.project, title='Kick-off', description='', due_date=date(2026, 1, 10))
+        Milestone.objects.create(project=self.project, title='Graduation', description='', due_date=date(2026, 9, 1))
+        Risk.objects.create(project=self.project, description='Funding', severity='HIGH', mitigation_plan='')
+        Risk.objects.create(project=self.project, description='Venue', severity='HIGH', mitigation_plan='')
+        KPI.objects.create(project=self.project, name='Trainees', description='', unit='people', target_value=50,
+                           actual_value=40, date=date(2026, 8, 3))
+
+    def create_project(self, title, department, start):
+        return Project.objects.create(
+            title=title, description='Empowerment', start_date=start, end_date=start + timedelta(days=364),
+            department=department, state=self.state, assigned_to=self.director)
+
+    def test_risk_heatmap_and_drill_down(self):
+        other = Project.objects.get(title='Audit')
+        Risk.objects.create(project=other, description='Staffing', severity='LOW', mitigation_plan='')
+        dg = Employee.objects.create_user(employee_id='NDE0002', ippis_number='IPPIS0002', email='dg@nde.gov.ng',
+                                          password='pass', current_role='DG')
+        self.client.force_login(dg)
+        url = reverse('monitoring:risk-heatmap')
+        with self.captureOnCommitCallbacks(execute=True):
+            cells = self.client.get(url).json()['cells']
+        self.assertEqual([(cell['severity'], cell['department'], cell['state'], cell['count']) for cell in cells],
+                         [('LOW', 'FIN', 'FCT', 1), ('HIGH', 'SKD', 'FCT', 2)])
+
+        with self.assertNumQueries(0):
+            risk_heatmap.heatmap()
+        with self.captureOnCommitCallbacks(execute=True):
+            Risk.objects.create(project=self.project, description='Floods', severity='CRITICAL', mitigation_plan='')
+        totals = self.client.get(url, {'state': 'FCT'}).json()['totals']
+        self.assertEqual(totals['severity'], {'LOW': 1, 'HIGH': 2, 'CRITICAL': 1})
+
+        # Directors see their own department, and drill into a cell page by page.
+        self.client.force_login(self.director)
+        self.assertEqual(self.client.get(url).json()['totals']['department'], {'SKD': 3})
+        page = self.client.get(reverse('monitoring:risk-list'),
+                               {'severity': 'HIGH', 'department': 'SKD', 'page_size': 1}).json()
+        self.assertEqual([risk['description'] for risk in page['results']], ['Venue'])
+        page = self.client.get(page['next']).json()
+        self.assertEqual([risk['description'] for risk in page['results']], ['Funding'])
+        self.assertIsNone(page['next'])
+
+    def test_visible_projects_in_window(self):
+        self.client.force_login(self.director)
+        response = self.client.get(reverse('monitoring:portfolio'),
+                                   {'start': '2026-03-01', 'end': '2026-12-31', 'state': 'FCT'})
+        self.assertEqual(response.status_code, 200)
+        [project] = response.json()
+        self.assertEqual(project['title'], 'Vocational training')
+        self.assertEqual([milestone['title'] for milestone in project['milestones']], ['Graduation'])
+        self.assertEqual(project['risks'], {'LOW': 0, 'MEDIUM': 0, 'HIGH': 2, 'CRITICAL': 0})
+        self.assertEqual(project['kpis'][0]['attainment'], 0.8)
+
+        response = self.client.get(reverse('monitoring:portfolio'), {'end': 'soon'})
+        self.assertEqual(response.status_code, 400)
+
+
+class ScheduleRiskTests(TestCase):
+    def setUp(self):
+        department = Department.objects.create(code='SKD', name='Skills Development')
+        officer = Employee.objects.create_user(
+            employee_id='NDE0001', ippis_number='IPPIS0001', email='po@nde.gov.ng', password='pass')
+        self.projects = [
+            Project.objects.create(title=title, description='Empowerment', start_date=date(2026, 1, 1),
+                                   end_date=date(2026, 12, 31), department=department, assigned_to=officer)
+            for title in ('Vocational training', 'Start-your-business')
+        ]
+        first, second = self.projects
+        self.open = Milestone.objects.create(project=first, title='Kick-off', description='',
+                                             due_date=date(2026, 3, 1))
+        Milestone.objects.create(project=first, title='Report', description='', due_date=date(2026, 2, 1),
+                                 completed_date=date(2026, 2, 11))
+        Milestone.objects.create(project=second, title='Launch', description='', due_date=date(2026, 3, 20))
+        Risk.objects.create(project=second, description='Funding', severity='CRITICAL', mitigation_plan='')
+
+    def scores(self):
+        return {row.project_id: (row.slip_days, row.score) for row in ProjectScheduleRisk.objects.all()}
+
+    def test_scan_ages_and_picks_up_changes(self):
+        first, second = self.projects
+        self.assertEqual(schedule_risk.scan(date(2026, 3, 11)), (2, 2))
+        # 10 days late completing plus 10 days open: 20 over 2 milestones; nothing due yet for the second.
+        self.assertEqual(self.scores(), {first.pk: (20, 10.0), second.pk: (0, 0.0)})
+
+        # A week on: the second project's milestone fell due, the first one's only aged.
+        with self.assertNumQueries(10):
+            self.assertEqual(schedule_risk.scan(date(2026, 3, 25)), (1, 2))
+        self.assertEqual(self.scores(), {first.pk: (34, 17.0), second.pk: (5, 10.0)})
+        self.assertEqual([row.project for row in schedule_risk.ranked()], [first, second])
+
+        self.open.completed_date = date(2026, 3, 26)
+        self.open.save()
+        self.assertTrue(ProjectScheduleRisk.objects.get(project=first).stale)
+        call_command('scan_schedule_risk', '--date', '2026-04-01', stdout=StringIO())
+        self.assertEqual(self.scores(), {first.pk: (35, 17.5), second.pk: (12, 24.0)})
 
-# Create your tests here.
+        first.delete()
+        self.assertEqual(list(ProjectScheduleRisk.objects.values_list('project', flat=True)), [second.pk])
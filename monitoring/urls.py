@@ -1,9 +1,14 @@
-# hr/urls.py
+from django.urls import include, path
+from rest_framework.routers import DefaultRouter
 
-from django.urls import path
 from . import views
 
 app_name = 'monitoring'
 
+router = DefaultRouter()
+router.register('risks', views.RiskViewSet, basename='risk')
+
 urlpatterns = [
- ]
\ No newline at end of file
+    path('api/portfolio/', views.PortfolioView.as_view(), name='portfolio'),
+    path('api/', include(router.urls)),
+]
@@ -1,3 +1,90 @@
-from django.shortcuts import render
+# monitoring/views.py
+"""
+Monitoring REST API.
 
-# Create your views here.
+`portfolio/` returns every project visible to the user with its
+milestones, current status, latest KPI attainment and risk counts for a
+Gantt/timeline view, in a fixed number of queries (see
+monitoring.portfolio). Filter with `department`, `state`, `current_status`
+and a `start`/`end` date window.
+
+`risks/heatmap/` counts risks by severity, department and state from a
+cached grid (see monitoring.risk_heatmap); `risks/` is the drill-down
+behind a cell, filtered the same way and paged with a keyset cursor.
+"""
+import django_filters
+from rest_framework import generics, viewsets
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.pagination import CursorPagination
+from rest_framework.response import Response
+
+from . import portfolio, risk_heatmap
+from .models import Project, Risk
+from .serializers import PortfolioProjectSerializer, RiskSerializer
+
+
+class PortfolioFilter(django_filters.FilterSet):
+    # The window is applied by portfolio.timeline(), which also trims the milestones.
+    start = django_filters.DateFilter(method='window')
+    end = django_filters.DateFilter(method='window')
+
+    class Meta:
+        model = Project
+        fields = ['department', 'state', 'current_status']
+
+    def window(self, queryset, name, value):
+        return queryset
+
+
+class PortfolioView(generics.ListAPIView):
+    serializer_class = PortfolioProjectSerializer
+    filterset_class = PortfolioFilter
+    pagination_class = None
+
+    def get_queryset(self):
+        return portfolio.visible_projects(self.request.user)
+
+    def list(self, request, *args, **kwargs):
+        filterset = PortfolioFilter(request.query_params, queryset=self.get_queryset(), request=request)
+        if not filterset.is_valid():
+            raise ValidationError(filterset.errors)
+        window = filterset.form.cleaned_data
+        projects = portfolio.timeline(filterset.qs, window.get('start'), window.get('end'))
+        return Response(self.get_serializer(projects, many=True).data)
+
+
+class RiskCursorPagination(CursorPagination):
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 500
+    ordering = '-id'
+
+
+class RiskFilter(django_filters.FilterSet):
+    department = django_filters.CharFilter(field_name='project__department')
+    state = django_filters.CharFilter(field_name='project__state')
+
+    class Meta:
+        model = Risk
+        fields = ['severity', 'department', 'state', 'project']
+
+
+class RiskViewSet(viewsets.ReadOnlyModelViewSet):
+    serializer_class = RiskSerializer
+    filterset_class = RiskFilter
+    pagination_class = RiskCursorPagination
+
+    def get_queryset(self):
+        projects = portfolio.visible_projects(self.request.user)
+        return Risk.objects.filter(project__in=projects.values('pk')).select_related('project')
+
+    @action(detail=False, url_path='heatmap', pagination_class=None)
+    def heatmap(self, request):
+        """Risk counts by severity, department and state, with totals, from the cached grid."""
+        filters = RiskFilter(request.query_params, queryset=Risk.objects.none(), request=request)
+        if not filters.is_valid():
+            raise ValidationError(filters.errors)
+        cells = risk_heatmap.cells(request.user, **{
+            field: filters.form.cleaned_data.get(field) for field in ('severity', 'department', 'state')})
+        return Response({'cells': cells, 'totals': risk_heatmap.totals(cells)})
@@ -12,6 +12,7 @@ https://docs.djangoproject.com/en/5.1/ref/settings/
 
 from pathlib import Path
 import os
+import tempfile
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -48,6 +49,7 @@ INSTALLED_APPS = [
     'hr',
     'monitoring',
     'programs',
+    'reporting',
     
     'tailwind',
     'crispy_forms',
@@ -81,6 +83,8 @@ INTERNAL_IPS = [
 
 
 MIDDLEWARE = [
+    'core.middleware.RequestProfilingMiddleware',
+    'core.middleware.SlowQueryContextMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -99,7 +103,7 @@ ROOT_URLCONF = 'nde_management_system.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'BACKEND': 'core.profiling.ProfilingDjangoTemplates',
         'DIRS': [],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -119,13 +123,47 @@ WSGI_APPLICATION = 'nde_management_system.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.1/ref/settings/#databases
 
+# Read replica (core.replica): a read-only snapshot of 'default' for heavy
+# reads, refreshed by `manage.py refresh_replica`.
+REPLICA_PATH = BASE_DIR / 'replica.sqlite3'
+REPLICA_MAX_AGE = 15 * 60  # Seconds; an older snapshot is ignored and reads go to the primary
+
+# Concurrent writers (core.write_contention): WAL journaling and tuned pragmas
+# on connect, and transactions that take the write lock at BEGIN.
+SQLITE_PRAGMAS = [
+    'journal_mode=WAL',  # Readers and the writer do not block each other
+    'synchronous=NORMAL',  # Safe under WAL; syncs at checkpoints instead of every commit
+    'cache_size=-20000',  # 20 MB page cache per connection
+    'temp_store=MEMORY',
+]
+SQLITE_OPTIONS = {
+    'init_command': ';'.join(f'PRAGMA {pragma}' for pragma in SQLITE_PRAGMAS),
+    'transaction_mode': 'IMMEDIATE',
+    'timeout': 5,  # Seconds a connection waits for the write lock before "database is locked"
+}
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
-    }
+        'OPTIONS': SQLITE_OPTIONS,
+    },
+    # Star schema for reports, filled by `manage.py extract_reporting`
+    # (reporting.extract); create it with `manage.py migrate --database reporting`.
+    'reporting': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': BASE_DIR / 'reporting.sqlite3',
+        'OPTIONS': SQLITE_OPTIONS,
+    },
+    'replica': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': f'file:{REPLICA_PATH}?mode=ro',
+        'TEST': {'MIRROR': 'default'},
+    },
 }
 
+DATABASE_ROUTERS = ['reporting.routers.ReportingRouter', 'core.routers.ReplicaRouter']
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
@@ -218,13 +256,71 @@ AUTHENTICATION_BACKENDS = [
 
 CACHES = {
     'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'BACKEND': 'core.profiling.ProfilingLocMemCache',
         'LOCATION': 'unique-snowflake',
-    }
+    },
+    # Generations of the per-process caches (see core.cache_generations): a
+    # file cache, so that every worker on the host sees a bump made by another.
+    'shared': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.path.join(tempfile.gettempdir(), 'nde_ims_shared_cache'),
+        'OPTIONS': {'MAX_ENTRIES': 100000},
+    },
 }
 
 IMPORT_EXPORT_USE_TRANSACTIONS = True
 
+# Request profiling (core.middleware.RequestProfilingMiddleware)
+PROFILING_SAMPLE_RATE = 0.05  # Fraction of requests profiled, 0 disables
+PROFILING_BUFFER_SIZE = 5000  # Profiles kept in memory per process for the admin page
+
+# Slow-query log (core.slow_query_log)
+SLOW_QUERY_THRESHOLD_MS = 200  # Statements at least this slow are logged
+SLOW_QUERY_LOG_MAX_ROWS = 500  # Distinct fingerprints kept, least recently seen dropped first
+
+# Programme enrolment (programs.enrolment)
+# Key of the NIN and phone blocking hashes used to find duplicate beneficiaries,
+# read from the environment. Stored hashes only match under the same key: keep
+# it stable and do not tie it to SECRET_KEY. Changing it means recomputing
+# Beneficiary.nin_key and phone_key.
+BENEFICIARY_HASH_KEY = os.environ.get('BENEFICIARY_HASH_KEY', '')
+
+# Write contention (core.write_contention)
+WRITE_RETRY_ATTEMPTS = 3  # Retries of a BEGIN or autocommit write that timed out on the lock
+WRITE_RETRY_BACKOFF = 0.05  # Seconds; ceiling of the first jittered backoff, doubled per retry up to 1 s
+WRITE_LOCK_WAIT_WARN_MS = 1000  # Lock waits at least this long are logged
+WRITE_LOCK_WAIT_SAMPLES = 5000  # Lock waits kept in memory per process for the admin page
+
+# Financial reports (finance.reports)
+FINANCIAL_REPORT_CHUNK_SIZE = 2000  # Rows fetched per query while streaming a report
+FINANCIAL_REPORT_TIMEOUT = 3600  # Seconds after which a RUNNING report is taken to have lost its worker
+NATIONAL_REPORT_WORKERS = None  # Processes per sharded national report, None uses every CPU
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'message': {'format': '%(message)s'},
+    },
+    'handlers': {
+        'request_profiles': {
+            'class': 'logging.handlers.RotatingFileHandler',
+            'filename': BASE_DIR / 'request_profiles.log',
+            'maxBytes': 10 * 1024 * 1024,
+            'backupCount': 5,
+            'delay': True,
+            'formatter': 'message',
+        },
+    },
+    'loggers': {
+        'core.profiling': {
+            'handlers': ['request_profiles'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+    },
+}
+
 AUTO_LOGOUT = {
     'IDLE_TIME': 3600,  # Logout after 5 minutes of inactivity
     'MESSAGE': 'You have been logged out due to inactivity. Please log in again.',
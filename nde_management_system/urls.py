@@ -2,17 +2,18 @@
 from django.contrib import admin
 from django.urls import path, include
 from django.contrib.auth.decorators import login_required
-from core.views import login_view, dashboard
+from core.views import login_view, dashboard, request_profiles
 
 urlpatterns = [
+    path('admin/request-profiles/', request_profiles, name='request_profiles'),
     path('admin/', admin.site.urls),
     path('', login_required(dashboard), name='root'),
     path('login/', login_view, name='login'),
     path('', include('core.urls')),
     # path('/communication/', include('communication.urls')),
     # path('hr/', include('hr.urls')),
-    # path('finance/', include('finance.urls')),
-    # path('monitoring/', include('monitoring.urls')),
-    # path('programs/', include('programs.urls')),
+    path('finance/', include('finance.urls')),
+    path('monitoring/', include('monitoring.urls')),
+    path('programs/', include('programs.urls')),
     path('__reload__/', include('django_browser_reload.urls')),
 ]
\ No newline at end of file
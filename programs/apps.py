@@ -4,3 +4,12 @@ from django.apps import AppConfig
 class ProgramsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'programs'
+
+    def ready(self):
+        from django.db.models.signals import post_delete, post_save, pre_save
+        from .coverage import beneficiary_deleted, beneficiary_pre_save, beneficiary_saved
+        from .models import Beneficiary
+
+        pre_save.connect(beneficiary_pre_save, sender=Beneficiary, dispatch_uid='programs.coverage')
+        post_save.connect(beneficiary_saved, sender=Beneficiary, dispatch_uid='programs.coverage')
+        post_delete.connect(beneficiary_deleted, sender=Beneficiary, dispatch_uid='programs.coverage')
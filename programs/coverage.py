@@ -0,0 +1,197 @@
+# programs/coverage.py
+"""
+Programme coverage by state and LGA.
+
+ProgramCoverage holds, for every programme and LGA it reaches, the number
+of beneficiaries enrolled there and the number and total of expenditures
+booked against the programme in the state (on the state's row without an
+LGA, since expenditures carry none). The cells are adjusted as the rows
+behind them change, never recounted:
+
+* enrolment (programs.enrolment) records each chunk of new beneficiaries
+  with record_beneficiaries(); single saves and deletes of a Beneficiary go
+  through the receivers below, which also move a beneficiary between cells
+  when its programme, state or LGA changes;
+* the expenditure ledger (finance.ledger) passes every expenditure change
+  to record_spend(), in the same transaction as the rollups.
+
+Once a change commits, the cache generation, which every worker shares
+(core.cache_generations), is bumped. matrix() serves
+the programme x state (or, within one state, programme x LGA) matrix in
+sparse form, computed by one grouped query over the coverage rows and
+cached until the next change, so a nationwide heatmap is a single cache
+read.
+
+Writes that bypass both (queryset update, raw SQL) leave the cells stale;
+`manage.py rebuild_coverage` recounts them.
+"""
+from collections import defaultdict
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Sum
+
+from core import cache_generations
+
+from .models import Beneficiary, Program, ProgramCoverage
+
+CACHE_TIMEOUT = 60 * 60 * 24
+GENERATION_KEY = 'programs.coverage.generation'
+CENT = Decimal('0.01')
+
+
+def invalidate():
+    cache_generations.bump([GENERATION_KEY])
+
+
+def _adjust(cells):
+    """Apply {(program, state, lga): [beneficiaries, expenditures, spend]} deltas to the coverage rows."""
+    cells = {key: deltas for key, deltas in cells.items() if any(deltas)}
+    if not cells:
+        return
+    with transaction.atomic():
+        for (program, state, lga), (beneficiaries, expenditures, spend) in cells.items():
+            lookup = {'program_id': program, 'state_id': state, 'lga_id': lga}
+            rows = ProgramCoverage.objects.filter(**lookup)
+            if rows.update(beneficiaries=F('beneficiaries') + beneficiaries,
+                           expenditures=F('expenditures') + expenditures, spend=F('spend') + spend):
+                if beneficiaries < 0 or expenditures < 0:
+                    rows.filter(beneficiaries=0, expenditures=0).delete()
+                continue
+            if beneficiaries < 0 or expenditures < 0:
+                # The row went with a cascading delete of its programme, state or LGA.
+                continue
+            try:
+                with transaction.atomic():
+                    ProgramCoverage.objects.create(**lookup, beneficiaries=beneficiaries,
+                                                   expenditures=expenditures, spend=spend)
+            except IntegrityError:
+                # Another transaction created the row first.
+                rows.update(beneficiaries=F('beneficiaries') + beneficiaries,
+                            expenditures=F('expenditures') + expenditures, spend=F('spend') + spend)
+        transaction.on_commit(invalidate)
+
+
+def record_beneficiaries(beneficiaries, sign=1):
+    """Count (or, with sign=-1, uncount) `beneficiaries` in their cells; one UPDATE per cell touched."""
+    cells = defaultdict(lambda: [0, 0, Decimal('0')])
+    for beneficiary in beneficiaries:
+        cells[(beneficiary.program_id, beneficiary.state_id, beneficiary.lga_id)][0] += sign
+    _adjust(cells)
+
+
+def record_spend(changes):
+    """
+    Called by the expenditure ledger with (ledger fields, sign) pairs: the
+    fields of an expenditure before a change with -1, after it with +1.
+    """
+    cells = defaultdict(lambda: [0, 0, Decimal('0')])
+    for values, sign in changes:
+        if values['program_id'] is not None:
+            cell = cells[(values['program_id'], values['state_id'], None)]
+            cell[1] += sign
+            cell[2] += Decimal(str(values['amount'])) * sign
+    _adjust(cells)
+
+
+def _cell(instance):
+    return instance.program_id, instance.state_id, instance.lga_id
+
+
+def beneficiary_pre_save(sender, instance, raw=False, **kwargs):
+    """pre_save receiver for Beneficiary: remember the cell a moved beneficiary leaves."""
+    if raw or instance.pk is None:
+        return
+    instance._previous_cell = (Beneficiary.objects.filter(pk=instance.pk)
+                               .values_list('program', 'state', 'lga').first())
+
+
+def beneficiary_saved(sender, instance, created, raw=False, **kwargs):
+    """post_save receiver for Beneficiary."""
+    if raw:
+        return
+    previous = getattr(instance, '_previous_cell', None)
+    if created or previous is None:
+        _adjust({_cell(instance): [1, 0, Decimal('0')]})
+    elif previous != _cell(instance):
+        _adjust({previous: [-1, 0, Decimal('0')], _cell(instance): [1, 0, Decimal('0')]})
+    instance._previous_cell = _cell(instance)
+
+
+def beneficiary_deleted(sender, instance, origin=None, **kwargs):
+    """post_delete receiver for Beneficiary."""
+    # The cells of a deleted programme go with it.
+    if isinstance(origin, Program) or getattr(origin, 'model', None) is Program:
+        return
+    record_beneficiaries([instance], sign=-1)
+
+
+def rebuild():
+    """Recount every cell from the beneficiaries and expenditures; returns the number of cells."""
+    from finance.models import Expenditure
+
+    cells = defaultdict(lambda: [0, 0, Decimal('0')])
+    beneficiaries = (Beneficiary.objects.order_by().values('program', 'state', 'lga').annotate(count=Count('pk'))
+                     .values_list('program', 'state', 'lga', 'count'))
+    for program, state, lga, count in beneficiaries.iterator():
+        cells[(program, state, lga)][0] = count
+    spend = (Expenditure.objects.filter(program__isnull=False).order_by().values('program', 'state')
+             .annotate(count=Count('pk'), total=Sum('amount')).values_list('program', 'state', 'count', 'total'))
+    for program, state, count, total in spend.iterator():
+        # SQLite sums decimals as floats; round back to the column's precision.
+        cells[(program, state, None)][1:] = [count, Decimal(str(total)).quantize(CENT)]
+    with transaction.atomic():
+        ProgramCoverage.objects.all().delete()
+        ProgramCoverage.objects.bulk_create([
+            ProgramCoverage(program_id=program, state_id=state, lga_id=lga, beneficiaries=beneficiaries,
+                            expenditures=expenditures, spend=spend)
+            for (program, state, lga), (beneficiaries, expenditures, spend) in cells.items()
+        ], batch_size=500)
+        transaction.on_commit(invalidate)
+    return len(cells)
+
+
+def matrix(state=None):
+    """
+    The coverage matrix in sparse form: programme x state, or programme x
+    LGA of `state` when one is given (spending without an LGA is on a
+    column with id None). Returns {'rows': [{id, name}], 'columns': [{id,
+    name}], 'cells': [[row index, column index, beneficiaries,
+    expenditures, spend]]} with only the non-empty cells.
+    """
+    key = f'programs.coverage:{cache_generations.get(GENERATION_KEY)}:{state or ""}'
+    result = cache.get(key)
+    if result is not None:
+        return result
+
+    rows = ProgramCoverage.objects.order_by()
+    if state:
+        rows = rows.filter(state=state).values('program', 'lga')
+    else:
+        rows = rows.values('program', 'state')
+    rows = rows.annotate(beneficiaries=Sum('beneficiaries'), expenditures=Sum('expenditures'), spend=Sum('spend'))
+    if state:
+        rows = rows.values_list('program', 'program__name', 'lga', 'lga__name', 'beneficiaries', 'expenditures',
+                                'spend')
+    else:
+        rows = rows.values_list('program', 'program__name', 'state', 'state__name', 'beneficiaries',
+                                'expenditures', 'spend')
+
+    programs, columns, cells = {}, {}, []
+    for program, program_name, column, column_name, beneficiaries, expenditures, spend in rows:
+        programs[program] = program_name
+        columns[column] = column_name
+        cells.append((program, column, beneficiaries, expenditures, Decimal(str(spend)).quantize(CENT)))
+    program_ids = sorted(programs, key=lambda pk: (programs[pk], pk))
+    column_ids = sorted(columns, key=lambda pk: (pk is None, columns[pk] or '', pk or ''))
+    row_index = {pk: index for index, pk in enumerate(program_ids)}
+    column_index = {pk: index for index, pk in enumerate(column_ids)}
+    result = {
+        'rows': [{'id': pk, 'name': programs[pk]} for pk in program_ids],
+        'columns': [{'id': pk, 'name': columns[pk]} for pk in column_ids],
+        'cells': sorted([row_index[program], column_index[column], beneficiaries, expenditures, str(spend)]
+                        for program, column, beneficiaries, expenditures, spend in cells),
+    }
+    cache.set(key, result, CACHE_TIMEOUT)
+    return result
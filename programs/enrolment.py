@@ -0,0 +1,230 @@
+# programs/enrolment.py
+"""
+Bulk beneficiary enrolment.
+
+enrol() streams a CSV of beneficiaries into a programme as one
+EnrolmentBatch. Rows are read one at a time and handled in chunks of
+CHUNK_SIZE: each chunk costs two lookups of existing keys and a couple of
+bulk inserts, never a query per row, so a 100k-row file stays a few
+hundred round trips.
+
+Duplicates are found through blocking keys: BLAKE2 hashes of the
+normalised NIN and phone number, keyed with BENEFICIARY_HASH_KEY from the
+environment. Keys only match keys made with the same hash key, so it is a
+setting of its own that is never rotated with SECRET_KEY. A row whose NIN or
+phone key
+* was already seen earlier in the same file is rejected as
+  DUPLICATE_IN_BATCH;
+* belongs to someone already enrolled in the programme (by an earlier
+  batch) is rejected as DUPLICATE.
+Rows that fail validation are rejected as INVALID. Every rejected row is
+kept as an EnrolmentRejection with its line number and data. The enrolled
+rows of each chunk are counted into the coverage matrix
+(programs.coverage) in the chunk's transaction.
+
+Columns: first_name, last_name, other_names, gender, date_of_birth
+(YYYY-MM-DD), nin, phone_number, state (code or name), lga (code or name).
+"""
+import csv
+import hashlib
+import io
+import re
+from datetime import date
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import transaction
+from django.utils import timezone
+
+from core.models import LGA, State
+
+from . import coverage
+from .models import Beneficiary, EnrolmentBatch, EnrolmentRejection
+
+CHUNK_SIZE = 2000
+FIELDS = ['first_name', 'last_name', 'other_names', 'gender', 'date_of_birth', 'nin', 'phone_number', 'state', 'lga']
+
+
+def normalise_nin(value):
+    digits = re.sub(r'\D', '', value or '')
+    return digits if len(digits) == 11 else None
+
+
+def normalise_phone(value):
+    """A Nigerian number as 11 digits starting with 0, from local or +234 forms; None if not one."""
+    digits = re.sub(r'\D', '', value or '')
+    if digits.startswith('234') and len(digits) == 13:
+        digits = '0' + digits[3:]
+    elif len(digits) == 10:
+        digits = '0' + digits
+    return digits if len(digits) == 11 and digits.startswith('0') else None
+
+
+def blocking_key(kind, value):
+    """Keyed hash of a normalised identifier; '' when there is none."""
+    if not value:
+        return ''
+    if not settings.BENEFICIARY_HASH_KEY:
+        raise ImproperlyConfigured('Set the BENEFICIARY_HASH_KEY environment variable.')
+    return hashlib.blake2b(f'{kind}:{value}'.encode(), digest_size=16,
+                           key=settings.BENEFICIARY_HASH_KEY.encode()).hexdigest()
+
+
+class Places:
+    """States and LGAs by code and by name, loaded once per batch."""
+
+    def __init__(self, states=None):
+        self.states = {}
+        for code, name in State.objects.values_list('code', 'name'):
+            self.states[code.lower()] = self.states[name.lower()] = code
+        # Codes of the states rows may be enrolled into; None for all of them.
+        self.allowed = None if states is None else set(states)
+        self.lgas = {}
+        for code, name, state in LGA.objects.values_list('code', 'name', 'state'):
+            self.lgas[(state, code.lower())] = self.lgas[(state, name.lower())] = code
+
+    def state(self, value):
+        return self.states.get((value or '').strip().lower())
+
+    def lga(self, state, value):
+        return self.lgas.get((state, (value or '').strip().lower()))
+
+    def allows(self, state):
+        return self.allowed is None or state in self.allowed
+
+
+def _clean(row, places):
+    """(Beneficiary fields, None) for a valid row, or (None, reason detail)."""
+    row = {field: (row.get(field) or '').strip() for field in FIELDS}
+    if not row['first_name'] or not row['last_name']:
+        return None, 'First and last name are required.'
+    state = places.state(row['state'])
+    if state is None:
+        return None, f'Unknown state {row["state"]!r}.'
+    if not places.allows(state):
+        return None, f'{state} is outside the uploader\'s area.'
+    lga = None
+    if row['lga']:
+        lga = places.lga(state, row['lga'])
+        if lga is None:
+            return None, f'Unknown LGA {row["lga"]!r} in {state}.'
+    nin = normalise_nin(row['nin'])
+    if row['nin'] and nin is None:
+        return None, 'NIN must have 11 digits.'
+    phone = normalise_phone(row['phone_number'])
+    if row['phone_number'] and phone is None:
+        return None, 'Phone number is not a Nigerian mobile number.'
+    if not nin and not phone:
+        return None, 'A NIN or phone number is required.'
+    gender = row['gender'][:1].upper()
+    if gender and gender not in ('M', 'F'):
+        return None, f'Unknown gender {row["gender"]!r}.'
+    try:
+        born = date.fromisoformat(row['date_of_birth']) if row['date_of_birth'] else None
+    except ValueError:
+        return None, f'Date of birth {row["date_of_birth"]!r} is not YYYY-MM-DD.'
+    return {
+        'first_name': row['first_name'][:100], 'last_name': row['last_name'][:100],
+        'other_names': row['other_names'][:100], 'gender': gender, 'date_of_birth': born,
+        'nin': nin or '', 'phone_number': phone or '', 'state_id': state, 'lga_id': lga,
+        'nin_key': blocking_key('nin', nin), 'phone_key': blocking_key('phone', phone),
+    }, None
+
+
+class _Enrolment:
+    def __init__(self, batch, states=None):
+        self.batch = batch
+        self.places = Places(states)
+        # Blocking key -> the Beneficiary (or, once saved, its id) enrolled by this batch.
+        self.seen = {}
+
+    def _existing(self, field, keys):
+        if not keys:
+            return {}
+        return dict(
+            Beneficiary.objects.filter(program=self.batch.program_id, **{f'{field}__in': keys})
+            .values_list(field, 'pk')
+        )
+
+    def chunk(self, rows):
+        """Enrol one chunk of (line, row) pairs."""
+        cleaned, rejections = [], []
+        for line, row in rows:
+            fields, detail = _clean(row, self.places)
+            if fields is None:
+                rejections.append(EnrolmentRejection(batch=self.batch, line=line, reason='INVALID', detail=detail,
+                                                     data=row))
+            else:
+                cleaned.append((line, row, fields))
+
+        existing = self._existing('nin_key', {fields['nin_key'] for _, _, fields in cleaned if fields['nin_key']})
+        existing.update(self._existing(
+            'phone_key', {fields['phone_key'] for _, _, fields in cleaned if fields['phone_key']}))
+
+        beneficiaries, pending = [], []
+        for line, row, fields in cleaned:
+            keys = [key for key in (fields['nin_key'], fields['phone_key']) if key]
+            earlier = next((self.seen[key] for key in keys if key in self.seen), None)
+            enrolled = next((existing[key] for key in keys if key in existing), None)
+            if earlier is not None:
+                rejection = EnrolmentRejection(batch=self.batch, line=line, reason='DUPLICATE_IN_BATCH',
+                                               detail='Same NIN or phone number as an earlier row.', data=row)
+                pending.append((rejection, earlier))
+                rejections.append(rejection)
+            elif enrolled is not None:
+                rejections.append(EnrolmentRejection(
+                    batch=self.batch, line=line, reason='DUPLICATE', duplicate_of_id=enrolled,
+                    detail='Already enrolled in this programme.', data=row))
+            else:
+                beneficiary = Beneficiary(program_id=self.batch.program_id, batch=self.batch, **fields)
+                beneficiaries.append(beneficiary)
+                for key in keys:
+                    self.seen[key] = beneficiary
+
+        with transaction.atomic():
+            Beneficiary.objects.bulk_create(beneficiaries, batch_size=500)
+            coverage.record_beneficiaries(beneficiaries)
+            for rejection, earlier in pending:
+                rejection.duplicate_of_id = earlier if isinstance(earlier, int) else earlier.pk
+            EnrolmentRejection.objects.bulk_create(rejections, batch_size=500)
+        # Keep ids rather than model instances for the rest of the file.
+        for beneficiary in beneficiaries:
+            for key in (beneficiary.nin_key, beneficiary.phone_key):
+                if key:
+                    self.seen[key] = beneficiary.pk
+
+        self.batch.rows += len(rows)
+        self.batch.enrolled += len(beneficiaries)
+        self.batch.duplicates += sum(rejection.reason != 'INVALID' for rejection in rejections)
+        self.batch.rejected += len(rejections)
+
+
+def enrol(program, stream, name, uploaded_by=None, source='', chunk_size=CHUNK_SIZE, states=None):
+    """
+    Enrol the beneficiaries in `stream` (a binary or text file object
+    holding CSV with a header row) into `program` as a new batch, and
+    return the batch with its counts. With `states`, rows in any other
+    state are rejected as INVALID.
+    """
+    if isinstance(stream.read(0), bytes):
+        stream = io.TextIOWrapper(stream, encoding='utf-8-sig', newline='')
+    batch = EnrolmentBatch.objects.create(program=program, name=name, source=source, uploaded_by=uploaded_by)
+    enrolment = _Enrolment(batch, states)
+    try:
+        rows = []
+        # Line 1 is the header.
+        for line, row in enumerate(csv.DictReader(stream), start=2):
+            rows.append((line, row))
+            if len(rows) >= chunk_size:
+                enrolment.chunk(rows)
+                rows = []
+        if rows:
+            enrolment.chunk(rows)
+    except Exception:
+        batch.status = 'FAILED'
+        batch.save(update_fields=['status', 'rows', 'enrolled', 'duplicates', 'rejected'])
+        raise
+    batch.status = 'COMPLETED'
+    batch.completed_at = timezone.now()
+    batch.save(update_fields=['status', 'completed_at', 'rows', 'enrolled', 'duplicates', 'rejected'])
+    return batch
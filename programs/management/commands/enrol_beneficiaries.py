@@ -0,0 +1,28 @@
+# programs/management/commands/enrol_beneficiaries.py
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from programs.enrolment import enrol
+from programs.models import Program
+
+
+class Command(BaseCommand):
+    help = 'Enrol the beneficiaries listed in a CSV file into a programme as one batch'
+
+    def add_arguments(self, parser):
+        parser.add_argument('program', type=int, help='Programme id')
+        parser.add_argument('csv', type=Path, help='CSV file with a header row')
+        parser.add_argument('--name', help='Batch name (default: the file name)')
+
+    def handle(self, *args, **options):
+        try:
+            program = Program.objects.get(pk=options['program'])
+        except Program.DoesNotExist:
+            raise CommandError(f'No programme with id {options["program"]}.')
+        path = options['csv']
+        with path.open('rb') as stream:
+            batch = enrol(program, stream, options['name'] or path.name, source=path.name)
+        self.stdout.write(self.style.SUCCESS(
+            f'Batch {batch.pk}: {batch.rows} row(s), {batch.enrolled} enrolled, {batch.duplicates} duplicate(s), '
+            f'{batch.rejected - batch.duplicates} invalid.'))
@@ -0,0 +1,12 @@
+# programs/management/commands/rebuild_coverage.py
+from django.core.management.base import BaseCommand
+
+from programs import coverage
+
+
+class Command(BaseCommand):
+    help = 'Recount the programme coverage matrix from the beneficiaries and expenditures'
+
+    def handle(self, *args, **options):
+        cells = coverage.rebuild()
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {cells} coverage cell(s).'))
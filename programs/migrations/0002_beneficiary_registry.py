@@ -0,0 +1,92 @@
+# Generated by Django 5.1.1 on 2026-10-19 13:10
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_slowquery'),
+        ('programs', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EnrolmentBatch',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255)),
+                ('source', models.CharField(blank=True, max_length=255)),
+                ('status', models.CharField(choices=[('PROCESSING', 'Processing'), ('COMPLETED', 'Completed'), ('FAILED', 'Failed')], default='PROCESSING', max_length=10)),
+                ('rows', models.PositiveIntegerField(default=0)),
+                ('enrolled', models.PositiveIntegerField(default=0)),
+                ('duplicates', models.PositiveIntegerField(default=0)),
+                ('rejected', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('completed_at', models.DateTimeField(blank=True, null=True)),
+                ('program', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='enrolment_batches', to='programs.program')),
+                ('uploaded_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name_plural': 'Enrolment Batches',
+            },
+        ),
+        migrations.CreateModel(
+            name='Beneficiary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('first_name', models.CharField(max_length=100)),
+                ('last_name', models.CharField(max_length=100)),
+                ('other_names', models.CharField(blank=True, max_length=100)),
+                ('gender', models.CharField(blank=True, choices=[('M', 'Male'), ('F', 'Female')], max_length=1)),
+                ('date_of_birth', models.DateField(blank=True, null=True)),
+                ('nin', models.CharField(blank=True, max_length=11, verbose_name='NIN')),
+                ('phone_number', models.CharField(blank=True, max_length=11)),
+                ('status', models.CharField(choices=[('ENROLLED', 'Enrolled'), ('ACTIVE', 'Active'), ('GRADUATED', 'Graduated'), ('WITHDRAWN', 'Withdrawn')], default='ENROLLED', max_length=10)),
+                ('enrolled_at', models.DateTimeField(auto_now_add=True)),
+                ('nin_key', models.CharField(blank=True, max_length=32)),
+                ('phone_key', models.CharField(blank=True, max_length=32)),
+                ('lga', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='beneficiaries', to='core.lga')),
+                ('program', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='beneficiaries', to='programs.program')),
+                ('state', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='beneficiaries', to='core.state')),
+                ('batch', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='beneficiaries', to='programs.enrolmentbatch')),
+            ],
+            options={
+                'verbose_name_plural': 'Beneficiaries',
+            },
+        ),
+        migrations.CreateModel(
+            name='EnrolmentRejection',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('line', models.PositiveIntegerField()),
+                ('reason', models.CharField(choices=[('INVALID', 'Invalid'), ('DUPLICATE_IN_BATCH', 'Duplicate within the batch'), ('DUPLICATE', 'Already enrolled')], max_length=20)),
+                ('detail', models.CharField(blank=True, max_length=255)),
+                ('data', models.JSONField(default=dict)),
+                ('batch', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='rejections', to='programs.enrolmentbatch')),
+                ('duplicate_of', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='programs.beneficiary')),
+            ],
+            options={
+                'ordering': ['batch', 'line'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='beneficiary',
+            index=models.Index(fields=['program', 'nin_key'], name='programs_be_program_f26264_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='beneficiary',
+            index=models.Index(fields=['program', 'phone_key'], name='programs_be_program_4f454b_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='beneficiary',
+            index=models.Index(fields=['program', 'state', 'lga'], name='programs_be_program_89317d_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='beneficiary',
+            constraint=models.UniqueConstraint(condition=models.Q(('nin_key', ''), _negated=True), fields=('program', 'nin_key'), name='unique_beneficiary_nin'),
+        ),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 5.1.1 on 2026-10-19 13:14
+
+import django.db.models.deletion
+import django.db.models.functions.comparison
+from django.db import migrations, models
+
+
+def count_beneficiaries(apps, schema_editor):
+    Beneficiary = apps.get_model('programs', 'Beneficiary')
+    ProgramCoverage = apps.get_model('programs', 'ProgramCoverage')
+    cells = (Beneficiary.objects.order_by().values('program', 'state', 'lga')
+             .annotate(count=models.Count('pk')).values_list('program', 'state', 'lga', 'count'))
+    ProgramCoverage.objects.bulk_create([
+        ProgramCoverage(program_id=program, state_id=state, lga_id=lga, beneficiaries=count)
+        for program, state, lga, count in cells
+    ], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_slowquery'),
+        ('programs', '0002_beneficiary_registry'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProgramCoverage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('beneficiaries', models.PositiveIntegerField(default=0)),
+                ('expenditures', models.PositiveIntegerField(default=0)),
+                ('spend', models.DecimalField(decimal_places=2, default=0, max_digits=17)),
+                ('lga', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='program_coverage', to='core.lga')),
+                ('program', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='coverage', to='programs.program')),
+                ('state', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='program_coverage', to='core.state')),
+            ],
+            options={
+                'verbose_name_plural': 'Program Coverage',
+                'constraints': [models.UniqueConstraint(models.F('program'), models.F('state'), django.db.models.functions.comparison.Coalesce(models.F('lga'), models.Value('')), name='unique_program_coverage')],
+            },
+        ),
+        migrations.RunPython(count_beneficiaries, migrations.RunPython.noop),
+    ]
@@ -1,6 +1,11 @@
 # programs/models.py
 
+from django.conf import settings
 from django.db import models
+from django.db.models import F, Q, Value
+from django.db.models.functions import Coalesce
+
+from core.models import LGA, State
 
 class Program(models.Model):
     name = models.CharField(max_length=255)
@@ -15,4 +20,123 @@ class Program(models.Model):
     # Add other fields as necessary
 
     def __str__(self):
-        return self.name
\ No newline at end of file
+        return self.name
+
+class EnrolmentBatch(models.Model):
+    """One upload of beneficiaries into a programme, with what became of its rows."""
+    STATUS_CHOICES = [
+        ('PROCESSING', 'Processing'),
+        ('COMPLETED', 'Completed'),
+        ('FAILED', 'Failed'),
+    ]
+
+    program = models.ForeignKey(Program, on_delete=models.CASCADE, related_name='enrolment_batches')
+    name = models.CharField(max_length=255)
+    source = models.CharField(max_length=255, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='PROCESSING')
+    rows = models.PositiveIntegerField(default=0)
+    enrolled = models.PositiveIntegerField(default=0)
+    duplicates = models.PositiveIntegerField(default=0)
+    rejected = models.PositiveIntegerField(default=0)
+    uploaded_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        verbose_name_plural = 'Enrolment Batches'
+
+    def __str__(self):
+        return f"{self.program.name} - {self.name}"
+
+
+class Beneficiary(models.Model):
+    GENDER_CHOICES = [
+        ('M', 'Male'),
+        ('F', 'Female'),
+    ]
+    STATUS_CHOICES = [
+        ('ENROLLED', 'Enrolled'),
+        ('ACTIVE', 'Active'),
+        ('GRADUATED', 'Graduated'),
+        ('WITHDRAWN', 'Withdrawn'),
+    ]
+
+    program = models.ForeignKey(Program, on_delete=models.CASCADE, related_name='beneficiaries')
+    batch = models.ForeignKey(EnrolmentBatch, on_delete=models.CASCADE, related_name='beneficiaries')
+    first_name = models.CharField(max_length=100)
+    last_name = models.CharField(max_length=100)
+    other_names = models.CharField(max_length=100, blank=True)
+    gender = models.CharField(max_length=1, choices=GENDER_CHOICES, blank=True)
+    date_of_birth = models.DateField(null=True, blank=True)
+    nin = models.CharField(max_length=11, blank=True, verbose_name="NIN")
+    phone_number = models.CharField(max_length=11, blank=True)
+    state = models.ForeignKey(State, on_delete=models.PROTECT, related_name='beneficiaries')
+    lga = models.ForeignKey(LGA, on_delete=models.PROTECT, null=True, blank=True, related_name='beneficiaries')
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='ENROLLED')
+    enrolled_at = models.DateTimeField(auto_now_add=True)
+    # Keyed hashes of the normalised NIN and phone number (see programs.enrolment),
+    # used as blocking keys for duplicate detection; blank when not given.
+    nin_key = models.CharField(max_length=32, blank=True)
+    phone_key = models.CharField(max_length=32, blank=True)
+
+    class Meta:
+        verbose_name_plural = 'Beneficiaries'
+        indexes = [
+            models.Index(fields=['program', 'nin_key']),
+            models.Index(fields=['program', 'phone_key']),
+            models.Index(fields=['program', 'state', 'lga']),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=['program', 'nin_key'], condition=~Q(nin_key=''),
+                                    name='unique_beneficiary_nin'),
+        ]
+
+    def __str__(self):
+        return f"{self.first_name} {self.last_name} ({self.program.name})"
+
+
+class EnrolmentRejection(models.Model):
+    """A row of an enrolment batch that was not enrolled, and why."""
+    REASON_CHOICES = [
+        ('INVALID', 'Invalid'),
+        ('DUPLICATE_IN_BATCH', 'Duplicate within the batch'),
+        ('DUPLICATE', 'Already enrolled'),
+    ]
+
+    batch = models.ForeignKey(EnrolmentBatch, on_delete=models.CASCADE, related_name='rejections')
+    line = models.PositiveIntegerField()
+    reason = models.CharField(max_length=20, choices=REASON_CHOICES)
+    detail = models.CharField(max_length=255, blank=True)
+    duplicate_of = models.ForeignKey(Beneficiary, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    data = models.JSONField(default=dict)
+
+    class Meta:
+        ordering = ['batch', 'line']
+
+    def __str__(self):
+        return f"{self.batch} line {self.line}: {self.get_reason_display()}"
+
+
+class ProgramCoverage(models.Model):
+    """
+    Beneficiaries and spending of a programme in one LGA of a state, kept
+    current by programs.coverage. Expenditures carry no LGA, so spending is
+    counted on the state's row without one (lga NULL).
+    """
+    program = models.ForeignKey(Program, on_delete=models.CASCADE, related_name='coverage')
+    state = models.ForeignKey(State, on_delete=models.CASCADE, related_name='program_coverage')
+    lga = models.ForeignKey(LGA, on_delete=models.CASCADE, null=True, blank=True, related_name='program_coverage')
+    beneficiaries = models.PositiveIntegerField(default=0)
+    expenditures = models.PositiveIntegerField(default=0)
+    spend = models.DecimalField(max_digits=17, decimal_places=2, default=0)
+
+    class Meta:
+        verbose_name_plural = 'Program Coverage'
+        constraints = [
+            # Coalesce so that the rows without an LGA are unique too.
+            models.UniqueConstraint(F('program'), F('state'), Coalesce(F('lga'), Value('')),
+                                    name='unique_program_coverage'),
+        ]
+
+    def __str__(self):
+        return f"{self.program_id} in {self.lga_id or self.state_id}"
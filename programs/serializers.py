@@ -0,0 +1,63 @@
+# programs/serializers.py
+from rest_framework import serializers
+
+from .models import Beneficiary, EnrolmentBatch, EnrolmentRejection, Program
+
+
+class EnrolmentBatchSerializer(serializers.ModelSerializer):
+    file = serializers.FileField(write_only=True)
+
+    class Meta:
+        model = EnrolmentBatch
+        fields = ['id', 'program', 'name', 'source', 'status', 'rows', 'enrolled', 'duplicates', 'rejected',
+                  'uploaded_by', 'created_at', 'completed_at', 'file']
+        read_only_fields = ['source', 'status', 'rows', 'enrolled', 'duplicates', 'rejected', 'uploaded_by',
+                            'created_at', 'completed_at']
+
+
+def mask(value):
+    """An identifier with all but its last four characters hidden."""
+    return '*' * (len(value) - 4) + value[-4:] if value and len(value) > 4 else value
+
+
+class EnrolmentRejectionSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = EnrolmentRejection
+        fields = ['id', 'line', 'reason', 'detail', 'duplicate_of', 'data']
+
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        if self.context.get('mask'):
+            data['data'] = {key: mask(value) if key in ('nin', 'phone_number') else value
+                            for key, value in data['data'].items()}
+        return data
+
+
+class BeneficiarySerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Beneficiary
+        fields = ['id', 'program', 'batch', 'first_name', 'last_name', 'other_names', 'gender', 'date_of_birth',
+                  'nin', 'phone_number', 'state', 'lga', 'status', 'enrolled_at']
+        read_only_fields = ['program', 'batch', 'nin', 'phone_number', 'enrolled_at']
+
+    def validate(self, attrs):
+        state = attrs['state'].pk if 'state' in attrs else getattr(self.instance, 'state_id', None)
+        lga = attrs['lga'] if 'lga' in attrs else getattr(self.instance, 'lga', None)
+        if lga is not None and lga.state_id != state:
+            raise serializers.ValidationError({'lga': f'{lga.name} is not in {state}.'})
+        return attrs
+
+
+class BeneficiaryListSerializer(BeneficiarySerializer):
+    """Beneficiaries in a list, with their NIN and phone number masked."""
+
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        data['nin'], data['phone_number'] = mask(data['nin']), mask(data['phone_number'])
+        return data
+
+
+class ProgramSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Program
+        fields = ['id', 'name', 'description', 'status', 'start_date', 'end_date']
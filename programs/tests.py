@@ -1,3 +1,222 @@
-from django.test import TestCase
+import csv
+import io
+from datetime import date
+from decimal import Decimal
+from tempfile import NamedTemporaryFile
 
-# Create your tests here.
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from core.models import LGA, Department, Employee, State, Zone
+from finance.models import Expenditure
+from programs import coverage, enrolment
+from programs.models import Beneficiary, EnrolmentRejection, Program, ProgramCoverage
+
+HEADER = ['first_name', 'last_name', 'other_names', 'gender', 'date_of_birth', 'nin', 'phone_number', 'state', 'lga']
+
+
+def csv_file(rows):
+    output = io.StringIO()
+    writer = csv.writer(output)
+    writer.writerow(HEADER)
+    writer.writerows(rows)
+    return io.BytesIO(output.getvalue().encode())
+
+
+@override_settings(BENEFICIARY_HASH_KEY='test-beneficiary-key')
+class EnrolmentTests(TestCase):
+    def setUp(self):
+        zone = Zone.objects.create(code='NC', name='North Central')
+        self.state = State.objects.create(code='FCT', name='Federal Capital Territory', zone=zone)
+        LGA.objects.create(code='AMAC', name='Abuja Municipal', state=self.state)
+        self.program = Program.objects.create(name='Graduate Attachment Programme', description='GAP',
+                                              start_date=date(2026, 1, 1), end_date=date(2026, 12, 31))
+
+    def test_identifiers_are_normalised_and_hashed(self):
+        self.assertEqual(enrolment.normalise_phone('+234 803 123 4567'), '08031234567')
+        self.assertEqual(enrolment.normalise_phone('8031234567'), '08031234567')
+        self.assertIsNone(enrolment.normalise_phone('12345'))
+        self.assertEqual(enrolment.blocking_key('phone', '08031234567'), enrolment.blocking_key('phone', '08031234567'))
+        self.assertNotEqual(enrolment.blocking_key('nin', '08031234567'), enrolment.blocking_key('phone', '08031234567'))
+        self.assertEqual(enrolment.blocking_key('nin', None), '')
+
+    def test_duplicates_within_and_across_batches(self):
+        first = enrolment.enrol(self.program, csv_file([
+            ['Ada', 'Obi', '', 'F', '1998-04-02', '12345678901', '08031234567', 'FCT', 'Abuja Municipal'],
+            ['Musa', 'Bello', '', 'M', '', '', '+2348050000001', 'federal capital territory', ''],
+            ['Ada', 'Obi', '', 'F', '', '123-4567-8901', '', 'FCT', ''],  # Same NIN as line 2.
+            ['Ngozi', 'Eze', '', '', '', '', '', 'FCT', ''],  # No identifier.
+            ['Tunde', 'Ade', '', '', '', '', '08030000002', 'Lagos', ''],  # Unknown state.
+        ]), 'Cycle 1', chunk_size=2)
+        self.assertEqual((first.status, first.rows, first.enrolled, first.duplicates, first.rejected),
+                         ('COMPLETED', 5, 2, 1, 3))
+        ada = Beneficiary.objects.get(nin='12345678901')
+        self.assertEqual(ada.lga_id, 'AMAC')
+        self.assertEqual(
+            list(first.rejections.values_list('line', 'reason', 'duplicate_of')),
+            [(4, 'DUPLICATE_IN_BATCH', ada.pk), (5, 'INVALID', None), (6, 'INVALID', None)])
+
+        # Batch, places (2), one chunk (keys 2, inserts 2 and a coverage update, in savepoints), close.
+        with self.assertNumQueries(13):
+            second = enrolment.enrol(self.program, csv_file([
+                ['Musa', 'Bello', '', 'M', '', '', '08050000001', 'FCT', ''],
+                ['Chidi', 'Okafor', '', 'M', '', '23456789012', '08060000003', 'FCT', ''],
+            ]), 'Cycle 2')
+        self.assertEqual((second.enrolled, second.duplicates), (1, 1))
+        rejection = EnrolmentRejection.objects.get(batch=second)
+        self.assertEqual(rejection.duplicate_of, Beneficiary.objects.get(first_name='Musa'))
+        self.assertEqual(rejection.data['phone_number'], '08050000001')
+
+    def test_command_and_upload(self):
+        with NamedTemporaryFile('wb', suffix='.csv') as handle:
+            handle.write(csv_file([['Ada', 'Obi', '', 'F', '', '12345678901', '', 'FCT', '']]).getvalue())
+            handle.flush()
+            call_command('enrol_beneficiaries', self.program.pk, handle.name, stdout=io.StringIO())
+        self.assertEqual(Beneficiary.objects.count(), 1)
+
+        State.objects.create(code='NI', name='Niger', zone=self.state.zone)
+        user = Employee.objects.create_user(employee_id='NDE0001', ippis_number='IPPIS0001', email='po@nde.gov.ng',
+                                            password='pass', current_role='SC', current_state=self.state)
+        self.client.force_login(user)
+        upload = SimpleUploadedFile('cycle2.csv', csv_file([
+            ['Ada', 'Obi', '', 'F', '', '12345678901', '', 'FCT', ''],
+            ['Musa', 'Bello', '', 'M', '', '', '08050000001', 'FCT', ''],
+            ['Tunde', 'Ade', '', 'M', '', '12345678902', '', 'NI', ''],  # Outside the coordinator's state.
+        ]).getvalue(), content_type='text/csv')
+        response = self.client.post(reverse('programs:enrolmentbatch-list'),
+                                    {'program': self.program.pk, 'name': 'Cycle 2', 'file': upload})
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual((response.json()['enrolled'], response.json()['duplicates']), (1, 1))
+        rejections = self.client.get(reverse('programs:enrolmentbatch-rejections', args=[response.json()['id']]))
+        self.assertEqual([row['reason'] for row in rejections.json()['results']], ['DUPLICATE', 'INVALID'])
+        self.assertEqual(rejections.json()['results'][0]['data']['nin'], '12345678901')
+
+        # The DG sees the batch with its identifiers masked; other staff do not see it at all.
+        director = Employee.objects.create_user(employee_id='NDE0002', ippis_number='IPPIS0002',
+                                                email='dg@nde.gov.ng', password='pass', current_role='DG')
+        self.client.force_login(director)
+        rejections = self.client.get(reverse('programs:enrolmentbatch-rejections', args=[response.json()['id']]))
+        self.assertEqual(rejections.json()['results'][0]['data']['nin'], '*******8901')
+        other = Employee.objects.create_user(employee_id='NDE0003', ippis_number='IPPIS0003', email='x@nde.gov.ng',
+                                             password='pass')
+        self.client.force_login(other)
+        rejections = self.client.get(reverse('programs:enrolmentbatch-rejections', args=[response.json()['id']]))
+        self.assertEqual(rejections.status_code, 404)
+        upload = SimpleUploadedFile('cycle3.csv', csv_file([]).getvalue(), content_type='text/csv')
+        response = self.client.post(reverse('programs:enrolmentbatch-list'),
+                                    {'program': self.program.pk, 'name': 'Cycle 3', 'file': upload})
+        self.assertEqual(response.status_code, 403)
+
+    def test_registry_is_scoped_masked_and_programmes_admin_only(self):
+        zone = Zone.objects.get(code='NC')
+        niger = State.objects.create(code='NI', name='Niger', zone=zone)
+        LGA.objects.create(code='SUL', name='Suleja', state=niger)
+        enrolment.enrol(self.program, csv_file([
+            ['Ada', 'Obi', '', 'F', '', '12345678901', '08031234567', 'FCT', ''],
+            ['Tunde', 'Ade', '', 'M', '', '12345678902', '', 'NI', ''],
+        ]), 'Cycle 1')
+        coordinator = Employee.objects.create_user(employee_id='NDE0001', ippis_number='IPPIS0001',
+                                                   email='sc@nde.gov.ng', password='pass', current_role='SC',
+                                                   current_state=self.state)
+        self.client.force_login(coordinator)
+        results = self.client.get(reverse('programs:beneficiary-list')).json()['results']
+        self.assertEqual([(row['first_name'], row['nin'], row['phone_number']) for row in results],
+                         [('Ada', '*******8901', '*******4567')])
+        detail = self.client.get(reverse('programs:beneficiary-detail', args=[results[0]['id']])).json()
+        self.assertEqual((detail['nin'], detail['phone_number']), ('12345678901', '08031234567'))
+        tunde = Beneficiary.objects.get(first_name='Tunde')
+        self.assertEqual(self.client.get(reverse('programs:beneficiary-detail', args=[tunde.pk])).status_code, 404)
+
+        # Edits stay in the coordinator's state, with an LGA of the beneficiary's state.
+        url = reverse('programs:beneficiary-detail', args=[results[0]['id']])
+        response = self.client.patch(url, {'state': 'NI'}, content_type='application/json')
+        self.assertEqual(response.status_code, 403)
+        response = self.client.patch(url, {'lga': 'SUL'}, content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+        response = self.client.patch(url, {'lga': 'AMAC'}, content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(Beneficiary.objects.values_list('state', 'lga').get(first_name='Ada'), ('FCT', 'AMAC'))
+        staff = Employee.objects.create_user(employee_id='NDE0002', ippis_number='IPPIS0002', email='x@nde.gov.ng',
+                                             password='pass')
+        self.client.force_login(staff)
+        self.assertEqual(self.client.patch(url, {'status': 'WITHDRAWN'}, content_type='application/json').status_code,
+                         403)
+        self.client.force_login(coordinator)
+
+        url = reverse('programs:program-detail', args=[self.program.pk])
+        self.assertEqual(self.client.get(url).status_code, 200)
+        self.assertEqual(self.client.delete(url).status_code, 403)
+        self.assertEqual(self.client.patch(url, {'name': 'GAP'}, content_type='application/json').status_code, 403)
+        self.assertTrue(Beneficiary.objects.filter(program=self.program).exists())
+
+
+@override_settings(BENEFICIARY_HASH_KEY='test-beneficiary-key')
+class CoverageTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        zone = Zone.objects.create(code='NC', name='North Central')
+        self.fct = State.objects.create(code='FCT', name='Federal Capital Territory', zone=zone)
+        self.niger = State.objects.create(code='NI', name='Niger', zone=zone)
+        LGA.objects.create(code='AMAC', name='Abuja Municipal', state=self.fct)
+        LGA.objects.create(code='BWARI', name='Bwari', state=self.fct)
+        self.department = Department.objects.create(code='SDP', name='Skills Development')
+        self.gap = Program.objects.create(name='Graduate Attachment Programme', description='GAP',
+                                          start_date=date(2026, 1, 1), end_date=date(2026, 12, 31))
+        self.saed = Program.objects.create(name='Skills Acquisition', description='SAED',
+                                           start_date=date(2026, 1, 1), end_date=date(2026, 12, 31))
+        enrolment.enrol(self.gap, csv_file([
+            ['Ada', 'Obi', '', 'F', '', '12345678901', '', 'FCT', 'AMAC'],
+            ['Musa', 'Bello', '', 'M', '', '12345678902', '', 'FCT', 'AMAC'],
+            ['Ngozi', 'Eze', '', 'F', '', '12345678903', '', 'FCT', 'Bwari'],
+            ['Tunde', 'Ade', '', 'M', '', '12345678904', '', 'NI', ''],
+        ]), 'Cycle 1')
+        enrolment.enrol(self.saed, csv_file([['Chidi', 'Okafor', '', 'M', '', '12345678905', '', 'NI', '']]), 'Cycle 1')
+
+    def spend(self, program, amount, state=None):
+        return Expenditure.objects.create(amount=Decimal(amount), description='Stipends', date=date(2026, 3, 1),
+                                          expenditure_type='OPERATIONAL', department=self.department,
+                                          state=state or self.fct, program=program)
+
+    def test_cells_follow_enrolment_edits_and_spending(self):
+        first = self.spend(self.gap, '1000.00')
+        self.spend(self.gap, '250.50')
+        self.spend(None, '99.00')  # Not booked against a programme.
+        self.assertEqual(coverage.matrix(), {
+            'rows': [{'id': self.gap.pk, 'name': 'Graduate Attachment Programme'},
+                     {'id': self.saed.pk, 'name': 'Skills Acquisition'}],
+            'columns': [{'id': 'FCT', 'name': 'Federal Capital Territory'}, {'id': 'NI', 'name': 'Niger'}],
+            'cells': [[0, 0, 3, 2, '1250.50'], [0, 1, 1, 0, '0.00'], [1, 1, 1, 0, '0.00']],
+        })
+        self.assertEqual(coverage.matrix('FCT')['cells'], [[0, 0, 2, 0, '0.00'], [0, 1, 1, 0, '0.00'],
+                                                           [0, 2, 0, 2, '1250.50']])
+        with self.assertNumQueries(0):
+            coverage.matrix()
+
+        # A beneficiary moving LGA, one leaving and spending moving state.
+        with self.captureOnCommitCallbacks(execute=True):
+            ngozi = Beneficiary.objects.get(first_name='Ngozi')
+            ngozi.lga_id = 'AMAC'
+            ngozi.save()
+            Beneficiary.objects.get(first_name='Tunde').delete()
+            first.state = self.niger
+            first.save()
+        self.assertFalse(ProgramCoverage.objects.filter(lga='BWARI').exists())
+        self.assertEqual(coverage.matrix()['cells'], [[0, 0, 3, 1, '250.50'], [0, 1, 0, 1, '1000.00'],
+                                                      [1, 1, 1, 0, '0.00']])
+
+        fields = ['program', 'state', 'lga', 'beneficiaries', 'expenditures', 'spend']
+        cells = set(ProgramCoverage.objects.values_list(*fields))
+        call_command('rebuild_coverage', stdout=io.StringIO())
+        self.assertEqual(set(ProgramCoverage.objects.values_list(*fields)), cells)
+
+    def test_coverage_endpoint(self):
+        user = Employee.objects.create_user(employee_id='NDE0001', ippis_number='IPPIS0001', email='dg@nde.gov.ng',
+                                            password='pass')
+        self.client.force_login(user)
+        response = self.client.get(reverse('programs:coverage'), {'state': 'NI'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['columns'], [{'id': None, 'name': None}])
+        self.assertEqual(response.json()['cells'], [[0, 0, 1, 0, '0.00'], [1, 0, 1, 0, '0.00']])
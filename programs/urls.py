@@ -1,8 +1,16 @@
-from django.urls import path
+from django.urls import include, path
+from rest_framework.routers import DefaultRouter
+
 from . import views
 
 app_name = 'programs'
 
-urlpatterns = [
+router = DefaultRouter()
+router.register('programs', views.ProgramViewSet)
+router.register('batches', views.EnrolmentBatchViewSet)
+router.register('beneficiaries', views.BeneficiaryViewSet)
 
-]
\ No newline at end of file
+urlpatterns = [
+    path('api/coverage/', views.CoverageView.as_view(), name='coverage'),
+    path('api/', include(router.urls)),
+]
@@ -1,3 +1,162 @@
-from django.shortcuts import render
+# programs/views.py
+"""
+Programmes REST API.
 
-# Create your views here.
+`batches/` takes a CSV upload (multipart `file`, plus `program` and
+`name`) and enrols its rows as one batch, streaming the file through
+programs.enrolment; `batches/<id>/rejections/` lists the rows that were
+not enrolled. `beneficiaries/` lists the registry with cursor pagination,
+filtered by programme, batch, state, LGA and status.
+
+`coverage/` is the programme x state matrix of beneficiaries and spending
+in sparse form (programme x LGA with `?state=<code>`), read from the
+cached coverage cube (see programs.coverage).
+
+Beneficiaries are personal data. The DG and directors see the whole
+registry, zonal directors and state coordinators that of their zone or
+state, and other staff the beneficiaries of batches they uploaded. Lists
+mask NINs and phone numbers; a single beneficiary shows them in full.
+Enrolment batches, whose rejected rows keep the raw CSV data, are visible
+to the DG, directors and their uploader. Only admins create or change
+programmes.
+
+Enrolling and editing beneficiaries is for WRITE_ROLES, within the same
+area: zonal directors and state coordinators enrol rows of their zone or
+state only, and an edit that would move a beneficiary out of the user's
+area is refused.
+"""
+from django.db import transaction
+from rest_framework import mixins, status, viewsets
+from rest_framework.decorators import action
+from rest_framework.exceptions import PermissionDenied
+from rest_framework.pagination import CursorPagination
+from rest_framework.permissions import SAFE_METHODS, BasePermission, IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from core.models import State
+
+from . import coverage, enrolment
+from .models import Beneficiary, EnrolmentBatch, Program
+from .serializers import (
+    BeneficiaryListSerializer, BeneficiarySerializer, EnrolmentBatchSerializer, EnrolmentRejectionSerializer,
+    ProgramSerializer,
+)
+
+# Roles that see every beneficiary and every enrolment batch.
+NATIONAL_ROLES = {'DG', 'DIR'}
+# Roles, besides superusers, that may enrol and edit beneficiaries in their area.
+WRITE_ROLES = NATIONAL_ROLES | {'ZD', 'SC'}
+
+
+def national(user):
+    return user.is_superuser or user.current_role in NATIONAL_ROLES
+
+
+def visible_beneficiaries(user):
+    beneficiaries = Beneficiary.objects.all()
+    if national(user):
+        return beneficiaries
+    if user.current_role == 'ZD':
+        return beneficiaries.filter(state__zone=user.current_zone_id)
+    if user.current_role == 'SC':
+        return beneficiaries.filter(state=user.current_state_id)
+    return beneficiaries.filter(batch__uploaded_by=user)
+
+
+def writable_states(user):
+    """Codes of the states `user` may enrol beneficiaries into; None for all of them."""
+    if national(user):
+        return None
+    if user.current_role == 'ZD':
+        return list(State.objects.filter(zone=user.current_zone_id).values_list('code', flat=True))
+    return [user.current_state_id] if user.current_state_id else []
+
+
+class IsAdminOrReadOnly(BasePermission):
+    def has_permission(self, request, view):
+        return request.method in SAFE_METHODS or request.user.is_staff
+
+
+class BeneficiaryWritePermission(BasePermission):
+    """Reads for any signed-in user; enrolling and editing for WRITE_ROLES."""
+
+    def has_permission(self, request, view):
+        return request.method in SAFE_METHODS or request.user.is_superuser or request.user.current_role in WRITE_ROLES
+
+
+class ProgramsCursorPagination(CursorPagination):
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 500
+    ordering = '-id'
+
+
+class RejectionCursorPagination(ProgramsCursorPagination):
+    # Line numbers are unique within a batch.
+    ordering = 'line'
+
+
+class ProgramViewSet(viewsets.ModelViewSet):
+    queryset = Program.objects.all()
+    serializer_class = ProgramSerializer
+    pagination_class = ProgramsCursorPagination
+    permission_classes = [IsAdminOrReadOnly]
+    filterset_fields = ['status']
+
+
+class EnrolmentBatchViewSet(mixins.CreateModelMixin, viewsets.ReadOnlyModelViewSet):
+    queryset = EnrolmentBatch.objects.all()
+    serializer_class = EnrolmentBatchSerializer
+    pagination_class = ProgramsCursorPagination
+    permission_classes = [IsAuthenticated, BeneficiaryWritePermission]
+    filterset_fields = ['program', 'status']
+
+    def get_queryset(self):
+        if national(self.request.user):
+            return self.queryset.all()
+        return self.queryset.filter(uploaded_by=self.request.user)
+
+    def create(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        upload = serializer.validated_data['file']
+        batch = enrolment.enrol(serializer.validated_data['program'], upload, serializer.validated_data['name'],
+                                uploaded_by=request.user, source=upload.name,
+                                states=writable_states(request.user))
+        return Response(self.get_serializer(batch).data, status=status.HTTP_201_CREATED)
+
+    @action(detail=True)
+    def rejections(self, request, pk=None):
+        """The rows of the batch that were not enrolled, in file order."""
+        batch = self.get_object()
+        paginator = RejectionCursorPagination()
+        page = paginator.paginate_queryset(batch.rejections.all(), request, view=self)
+        # Only the uploader, who has the file anyway, sees the identifiers in full.
+        serializer = EnrolmentRejectionSerializer(page, many=True, context={'mask': batch.uploaded_by_id != request.user.pk})
+        return paginator.get_paginated_response(serializer.data)
+
+
+class BeneficiaryViewSet(mixins.UpdateModelMixin, viewsets.ReadOnlyModelViewSet):
+    queryset = Beneficiary.objects.all()
+    serializer_class = BeneficiarySerializer
+    pagination_class = ProgramsCursorPagination
+    permission_classes = [IsAuthenticated, BeneficiaryWritePermission]
+    filterset_fields = ['program', 'batch', 'state', 'lga', 'status']
+
+    def get_queryset(self):
+        return visible_beneficiaries(self.request.user)
+
+    def get_serializer_class(self):
+        return BeneficiaryListSerializer if self.action == 'list' else BeneficiarySerializer
+
+    def perform_update(self, serializer):
+        with transaction.atomic():
+            serializer.save()
+            if not visible_beneficiaries(self.request.user).filter(pk=serializer.instance.pk).exists():
+                raise PermissionDenied('You may only move beneficiaries within your own zone or state.')
+
+
+class CoverageView(APIView):
+    def get(self, request):
+        return Response(coverage.matrix(request.query_params.get('state') or None))
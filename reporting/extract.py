@@ -0,0 +1,268 @@
+# reporting/extract.py
+"""
+Extract into the reporting star schema.
+
+extract() keeps the facts in the reporting database in step with the
+operational one, so that analytical pages scan a separate SQLite file
+instead of competing with transactional writes on db.sqlite3:
+
+* The first run (or one with full=True) loads every expenditure, task and
+  leave request, and stores as its watermark the last change log sequence
+  number (core.change_log) it read before starting.
+* Later runs read the change log after the watermark in pages of
+  `batch_size`, re-extract the rows it names and drop the facts of rows
+  that no longer exist. Each page and its new watermark commit together,
+  so an interrupted run picks up where it stopped. When changes after
+  the watermark were pruned unread (core.change_log.CursorExpired), the
+  run falls back to a full load.
+* Dimensions are small and refreshed in full at the start of every run;
+  dates are added as facts reach them.
+* The headcount of the current month is snapshotted again when employees
+  changed; past months keep their last snapshot.
+
+Facts take the department, state and grade of their employee as they are
+when the fact is extracted. Source rows are read with short keyset-paged
+queries, so no read holds the operational database for long.
+
+Run `manage.py extract_reporting` from cron every few minutes.
+"""
+from collections import Counter, defaultdict
+from datetime import datetime
+
+from django.db import connections, transaction
+from django.db.models import Count, Max
+from django.utils import timezone
+
+from communication.models import Task
+from core import change_log
+from core.change_log import CursorExpired
+from core.models import ChangeLog, Department, Employee, GradeLevel, State
+from finance.models import Expenditure
+from hr.models import LeaveRequest
+
+from .models import (
+    UNKNOWN, UNKNOWN_GRADE, DimDate, DimDepartment, DimGeography, DimGrade, ExtractWatermark, FactExpenditure,
+    FactHeadcount, FactLeave, FactTask,
+)
+from .routers import DATABASE
+
+SOURCE = 'change_log'
+BATCH_SIZE = 2000
+
+
+def date_key(day):
+    return day.year * 10000 + day.month * 100 + day.day
+
+
+class Fact:
+    """How one fact table is built from its source model: build() turns a row of `fields` into `columns`."""
+    label = None
+    model = None
+    source = None
+    fields = []
+    columns = []
+
+    def build(self, extract, row):
+        raise NotImplementedError
+
+    def save(self, rows):
+        # Plain executemany: building and saving model instances cost four fifths of a full load.
+        connection = connections[DATABASE]
+        quote = connection.ops.quote_name
+        pk = self.model._meta.pk.column
+        sql = 'INSERT INTO {} ({}) VALUES ({}) ON CONFLICT ({}) DO UPDATE SET {}'.format(
+            quote(self.model._meta.db_table), ', '.join(quote(column) for column in self.columns),
+            ', '.join(['%s'] * len(self.columns)), quote(pk),
+            ', '.join(f'{quote(column)} = excluded.{quote(column)}' for column in self.columns if column != pk))
+        with connection.cursor() as cursor:
+            cursor.executemany(sql, rows)
+
+
+class ExpenditureFact(Fact):
+    label = 'finance.Expenditure'
+    model = FactExpenditure
+    source = Expenditure
+    fields = ['pk', 'date', 'state', 'department', 'program', 'project', 'expenditure_type', 'approved_by', 'amount']
+    columns = ['expenditure_id', 'date_id', 'geography_id', 'department_id', 'program_id', 'project_id',
+               'expenditure_type', 'approved', 'amount']
+
+    def build(self, extract, row):
+        pk, day, state, department, program, project, expenditure_type, approved_by, amount = row
+        return (pk, extract.day(day), state or UNKNOWN, department or UNKNOWN, program, project, expenditure_type,
+                approved_by is not None, amount)
+
+
+class TaskFact(Fact):
+    label = 'communication.Task'
+    model = FactTask
+    source = Task
+    fields = ['pk', 'created_at', 'due_date', 'updated_at', 'priority', 'status', 'department',
+              'assigned_to__current_department', 'assigned_to__current_state', 'assigned_to__current_grade_level']
+    columns = ['task_id', 'created_id', 'due_id', 'completed_id', 'department_id', 'geography_id', 'grade_id',
+               'priority', 'status', 'on_time']
+
+    def build(self, extract, row):
+        pk, created_at, due_date, updated_at, priority, status, department, officer_department, state, grade = row
+        completed = extract.day(updated_at) if status == 'COMPLETED' else None
+        due = extract.day(due_date)
+        return (pk, extract.day(created_at), due, completed, department or officer_department or UNKNOWN,
+                state or UNKNOWN, grade or UNKNOWN_GRADE, priority, status,
+                None if completed is None else completed <= due)
+
+
+class LeaveFact(Fact):
+    label = 'hr.LeaveRequest'
+    model = FactLeave
+    source = LeaveRequest
+    fields = ['pk', 'start_date', 'end_date', 'leave_type', 'status', 'employee__current_department',
+              'employee__current_state', 'employee__current_grade_level']
+    columns = ['leave_id', 'start_id', 'end_id', 'department_id', 'geography_id', 'grade_id', 'leave_type',
+               'status', 'days']
+
+    def build(self, extract, row):
+        pk, start, end, leave_type, status, department, state, grade = row
+        return (pk, extract.day(start), extract.day(end), department or UNKNOWN, state or UNKNOWN,
+                grade or UNKNOWN_GRADE, leave_type, status, max((end - start).days + 1, 0))
+
+
+FACTS = [ExpenditureFact(), TaskFact(), LeaveFact()]
+MODELS = [fact.label for fact in FACTS] + ['core.Employee']
+
+
+def refresh_dimensions():
+    """Upsert the geography, department and grade dimensions, with their UNKNOWN members."""
+    geographies = [DimGeography(state_code=UNKNOWN, state_name='Unknown', zone_code=UNKNOWN, zone_name='Unknown')]
+    geographies += [
+        DimGeography(state_code=code, state_name=name, zone_code=zone, zone_name=zone_name)
+        for code, name, zone, zone_name in State.objects.values_list('code', 'name', 'zone', 'zone__name')
+    ]
+    departments = [DimDepartment(code=UNKNOWN, name='Unknown')]
+    departments += [DimDepartment(code=code, name=name) for code, name in Department.objects.values_list('code', 'name')]
+    grades = [DimGrade(level=UNKNOWN_GRADE, name='Unknown')]
+    grades += [DimGrade(level=level, name=name) for level, name in GradeLevel.objects.values_list('level', 'name')]
+    with transaction.atomic(using=DATABASE):
+        DimGeography.objects.bulk_create(geographies, update_conflicts=True, unique_fields=['state_code'],
+                                         update_fields=['state_name', 'zone_code', 'zone_name'])
+        DimDepartment.objects.bulk_create(departments, update_conflicts=True, unique_fields=['code'],
+                                          update_fields=['name'])
+        DimGrade.objects.bulk_create(grades, update_conflicts=True, unique_fields=['level'], update_fields=['name'])
+
+
+class _Extract:
+    def __init__(self, batch_size):
+        self.batch_size = batch_size
+        self.dates = set(DimDate.objects.values_list('date_key', flat=True))
+        self.new_dates = []
+        self.counts = Counter()
+
+    def day(self, value):
+        """The DimDate key of a date, or of an aware datetime's local date; new dates are queued for insert."""
+        if value is None:
+            return None
+        if isinstance(value, datetime):
+            value = timezone.localdate(value)
+        key = date_key(value)
+        if key not in self.dates:
+            self.dates.add(key)
+            self.new_dates.append(DimDate(date_key=key, date=value, year=value.year,
+                                          quarter=(value.month - 1) // 3 + 1, month=value.month, day=value.day,
+                                          weekday=value.weekday()))
+        return key
+
+    def flush_dates(self):
+        if self.new_dates:
+            DimDate.objects.bulk_create(self.new_dates, batch_size=500, ignore_conflicts=True)
+            self.new_dates = []
+
+    def load(self, fact, ids=None):
+        """(Re)build the facts of all source rows, or of the rows with the given ids; facts of missing ids go."""
+        rows = fact.source.objects.order_by('pk')
+        if ids is not None:
+            rows = rows.filter(pk__in=ids)
+        present, last = set(), None
+        while True:
+            page = rows if last is None else rows.filter(pk__gt=last)
+            page = list(page.values_list(*fact.fields)[:self.batch_size])
+            if not page:
+                break
+            facts = [fact.build(self, row) for row in page]
+            self.flush_dates()
+            fact.save(facts)
+            present.update(row[0] for row in page)
+            last = page[-1][0]
+        if ids is not None:
+            gone = set(ids) - present
+            if gone:
+                self.counts[f'{fact.label} deleted'] += fact.model.objects.filter(pk__in=gone).delete()[0]
+        self.counts[fact.label] += len(present)
+
+    def headcount(self, today=None):
+        """Replace this month's headcount snapshot."""
+        month = self.day((today or timezone.localdate()).replace(day=1))
+        self.flush_dates()
+        cells = (Employee.objects.filter(active_status=True).order_by()
+                 .values('current_department', 'current_state', 'current_grade_level').annotate(employees=Count('pk'))
+                 .values_list('current_department', 'current_state', 'current_grade_level', 'employees'))
+        FactHeadcount.objects.filter(month=month).delete()
+        FactHeadcount.objects.bulk_create([
+            FactHeadcount(month_id=month, department_id=department or UNKNOWN, geography_id=state or UNKNOWN,
+                          grade_id=grade or UNKNOWN_GRADE, employees=employees)
+            for department, state, grade, employees in cells
+        ], batch_size=500)
+        self.counts['headcount'] += 1
+
+
+def _advance(seq):
+    ExtractWatermark.objects.update_or_create(source=SOURCE, defaults={'seq': seq, 'extracted_at': timezone.now()})
+
+
+def _full(run, today):
+    # Read first: changes made during the load are applied again next time, which is harmless.
+    seq = ChangeLog.objects.aggregate(seq=Max('seq'))['seq'] or 0
+    with transaction.atomic(using=DATABASE):
+        for fact in FACTS:
+            fact.model.objects.all().delete()
+            run.load(fact)
+        run.headcount(today)
+        _advance(seq)
+
+
+def _incremental(run, after, today):
+    employees_changed = False
+    while True:
+        entries = change_log.changes(after, run.batch_size, MODELS)
+        if not entries:
+            break
+        ids = defaultdict(set)
+        for entry in entries:
+            ids[entry.model].add(int(entry.object_id))
+        employees_changed = employees_changed or 'core.Employee' in ids
+        after = entries[-1].seq
+        with transaction.atomic(using=DATABASE):
+            for fact in FACTS:
+                if ids[fact.label]:
+                    run.load(fact, ids[fact.label])
+            _advance(after)
+
+    month = date_key((today or timezone.localdate()).replace(day=1))
+    with transaction.atomic(using=DATABASE):
+        if employees_changed or not FactHeadcount.objects.filter(month=month).exists():
+            run.headcount(today)
+        _advance(after)
+
+
+def extract(full=False, batch_size=BATCH_SIZE, today=None):
+    """Bring the reporting database up to date; returns a Counter of facts loaded and deleted per source."""
+    run = _Extract(batch_size)
+    watermark = ExtractWatermark.objects.filter(source=SOURCE).first()
+    refresh_dimensions()
+
+    if not full and watermark is not None:
+        try:
+            _incremental(run, watermark.seq, today)
+            return run.counts
+        except CursorExpired:
+            # Changes after the watermark were pruned before this run read them.
+            run = _Extract(batch_size)
+    _full(run, today)
+    return run.counts
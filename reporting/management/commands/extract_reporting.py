@@ -0,0 +1,18 @@
+# reporting/management/commands/extract_reporting.py
+from django.core.management.base import BaseCommand
+
+from reporting import extract
+
+
+class Command(BaseCommand):
+    help = 'Bring the reporting star schema up to date with the changes since the last extract'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--full', action='store_true', help='Reload every fact instead of applying changes')
+        parser.add_argument('--batch-size', type=int, default=extract.BATCH_SIZE,
+                            help='Change log rows (and source rows) read per query')
+
+    def handle(self, *args, **options):
+        counts = extract.extract(full=options['full'], batch_size=options['batch_size'])
+        summary = ', '.join(f'{label}: {count}' for label, count in sorted(counts.items())) or 'no changes'
+        self.stdout.write(self.style.SUCCESS(f'Extracted ({summary}).'))
@@ -0,0 +1,118 @@
+# Generated by Django 5.1.1 on 2026-10-19 13:32
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DimDepartment',
+            fields=[
+                ('code', models.CharField(max_length=10, primary_key=True, serialize=False)),
+                ('name', models.CharField(max_length=100)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='DimGeography',
+            fields=[
+                ('state_code', models.CharField(max_length=3, primary_key=True, serialize=False)),
+                ('state_name', models.CharField(max_length=50)),
+                ('zone_code', models.CharField(max_length=10)),
+                ('zone_name', models.CharField(max_length=50)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='DimGrade',
+            fields=[
+                ('level', models.PositiveIntegerField(primary_key=True, serialize=False)),
+                ('name', models.CharField(max_length=20)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ExtractWatermark',
+            fields=[
+                ('source', models.CharField(max_length=30, primary_key=True, serialize=False)),
+                ('seq', models.BigIntegerField()),
+                ('extracted_at', models.DateTimeField()),
+            ],
+        ),
+        migrations.CreateModel(
+            name='DimDate',
+            fields=[
+                ('date_key', models.PositiveIntegerField(primary_key=True, serialize=False)),
+                ('date', models.DateField(unique=True)),
+                ('year', models.PositiveSmallIntegerField()),
+                ('quarter', models.PositiveSmallIntegerField()),
+                ('month', models.PositiveSmallIntegerField()),
+                ('day', models.PositiveSmallIntegerField()),
+                ('weekday', models.PositiveSmallIntegerField()),
+            ],
+            options={
+                'indexes': [models.Index(fields=['year', 'month'], name='reporting_d_year_de7261_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='FactExpenditure',
+            fields=[
+                ('expenditure_id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('program_id', models.BigIntegerField(null=True)),
+                ('project_id', models.BigIntegerField(null=True)),
+                ('expenditure_type', models.CharField(max_length=20)),
+                ('approved', models.BooleanField()),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=15)),
+                ('date', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='expenditures', to='reporting.dimdate')),
+                ('department', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='expenditures', to='reporting.dimdepartment')),
+                ('geography', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='expenditures', to='reporting.dimgeography')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='FactLeave',
+            fields=[
+                ('leave_id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('leave_type', models.CharField(max_length=20)),
+                ('status', models.CharField(max_length=20)),
+                ('days', models.PositiveIntegerField()),
+                ('department', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='leave', to='reporting.dimdepartment')),
+                ('end', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='leave_ended', to='reporting.dimdate')),
+                ('geography', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='leave', to='reporting.dimgeography')),
+                ('grade', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='leave', to='reporting.dimgrade')),
+                ('start', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='leave_started', to='reporting.dimdate')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='FactTask',
+            fields=[
+                ('task_id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('priority', models.CharField(max_length=10)),
+                ('status', models.CharField(max_length=20)),
+                ('on_time', models.BooleanField(null=True)),
+                ('completed', models.ForeignKey(db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='tasks_completed', to='reporting.dimdate')),
+                ('created', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='tasks_created', to='reporting.dimdate')),
+                ('department', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='tasks', to='reporting.dimdepartment')),
+                ('due', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='tasks_due', to='reporting.dimdate')),
+                ('geography', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='tasks', to='reporting.dimgeography')),
+                ('grade', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='tasks', to='reporting.dimgrade')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='FactHeadcount',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('employees', models.PositiveIntegerField()),
+                ('department', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='headcounts', to='reporting.dimdepartment')),
+                ('geography', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='headcounts', to='reporting.dimgeography')),
+                ('grade', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='headcounts', to='reporting.dimgrade')),
+                ('month', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='headcounts', to='reporting.dimdate')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('month', 'department', 'geography', 'grade'), name='unique_headcount_cell')],
+            },
+        ),
+    ]
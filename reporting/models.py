@@ -0,0 +1,127 @@
+# reporting/models.py
+"""
+The reporting star schema, kept in the 'reporting' database (see
+reporting.routers) and filled by reporting.extract.
+
+Dimensions are keyed by the natural keys of their sources and carry an
+UNKNOWN member, so a fact whose employee has no department, state or
+grade still joins. Facts are keyed by the id of their source row; their
+dimension keys are plain columns without database constraints, as a
+fact may be loaded in the same run as the dimension row it points to.
+"""
+from django.db import models
+
+UNKNOWN = ''
+UNKNOWN_GRADE = 0
+
+
+def dimension(to, related_name, **kwargs):
+    return models.ForeignKey(to, on_delete=models.DO_NOTHING, db_constraint=False, related_name=related_name,
+                             **kwargs)
+
+
+class DimDate(models.Model):
+    date_key = models.PositiveIntegerField(primary_key=True)  # YYYYMMDD
+    date = models.DateField(unique=True)
+    year = models.PositiveSmallIntegerField()
+    quarter = models.PositiveSmallIntegerField()
+    month = models.PositiveSmallIntegerField()
+    day = models.PositiveSmallIntegerField()
+    weekday = models.PositiveSmallIntegerField()  # Monday is 0
+
+    class Meta:
+        indexes = [models.Index(fields=['year', 'month'])]
+
+    def __str__(self):
+        return self.date.isoformat()
+
+
+class DimGeography(models.Model):
+    state_code = models.CharField(max_length=3, primary_key=True)
+    state_name = models.CharField(max_length=50)
+    zone_code = models.CharField(max_length=10)
+    zone_name = models.CharField(max_length=50)
+
+    def __str__(self):
+        return self.state_name
+
+
+class DimDepartment(models.Model):
+    code = models.CharField(max_length=10, primary_key=True)
+    name = models.CharField(max_length=100)
+
+    def __str__(self):
+        return self.name
+
+
+class DimGrade(models.Model):
+    level = models.PositiveIntegerField(primary_key=True)
+    name = models.CharField(max_length=20)
+
+    def __str__(self):
+        return self.name
+
+
+class FactExpenditure(models.Model):
+    expenditure_id = models.BigIntegerField(primary_key=True)
+    date = dimension(DimDate, 'expenditures')
+    geography = dimension(DimGeography, 'expenditures')
+    department = dimension(DimDepartment, 'expenditures')
+    program_id = models.BigIntegerField(null=True)
+    project_id = models.BigIntegerField(null=True)
+    expenditure_type = models.CharField(max_length=20)
+    approved = models.BooleanField()
+    amount = models.DecimalField(max_digits=15, decimal_places=2)
+
+
+class FactTask(models.Model):
+    """A task, with the department, state and grade of the officer it is assigned to."""
+    task_id = models.BigIntegerField(primary_key=True)
+    created = dimension(DimDate, 'tasks_created')
+    due = dimension(DimDate, 'tasks_due')
+    # The day a completed task was last updated.
+    completed = dimension(DimDate, 'tasks_completed', null=True)
+    department = dimension(DimDepartment, 'tasks')
+    geography = dimension(DimGeography, 'tasks')
+    grade = dimension(DimGrade, 'tasks')
+    priority = models.CharField(max_length=10)
+    status = models.CharField(max_length=20)
+    on_time = models.BooleanField(null=True)
+
+
+class FactLeave(models.Model):
+    """A leave request, with the department, state and grade of the employee."""
+    leave_id = models.BigIntegerField(primary_key=True)
+    start = dimension(DimDate, 'leave_started')
+    end = dimension(DimDate, 'leave_ended')
+    department = dimension(DimDepartment, 'leave')
+    geography = dimension(DimGeography, 'leave')
+    grade = dimension(DimGrade, 'leave')
+    leave_type = models.CharField(max_length=20)
+    status = models.CharField(max_length=20)
+    days = models.PositiveIntegerField()
+
+
+class FactHeadcount(models.Model):
+    """Monthly snapshot: active employees per department, state and grade, as last extracted in the month."""
+    month = dimension(DimDate, 'headcounts')
+    department = dimension(DimDepartment, 'headcounts')
+    geography = dimension(DimGeography, 'headcounts')
+    grade = dimension(DimGrade, 'headcounts')
+    employees = models.PositiveIntegerField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['month', 'department', 'geography', 'grade'],
+                                    name='unique_headcount_cell'),
+        ]
+
+
+class ExtractWatermark(models.Model):
+    """The last change log sequence number applied to the facts."""
+    source = models.CharField(max_length=30, primary_key=True)
+    seq = models.BigIntegerField()
+    extracted_at = models.DateTimeField()
+
+    def __str__(self):
+        return f"{self.source} at #{self.seq}"
@@ -0,0 +1,26 @@
+# reporting/routers.py
+DATABASE = 'reporting'
+
+
+class ReportingRouter:
+    """Keeps the reporting app's tables in the reporting database, and every other app's out of it."""
+
+    def db_for_read(self, model, **hints):
+        if model._meta.app_label == 'reporting':
+            return DATABASE
+        return None
+
+    db_for_write = db_for_read
+
+    def allow_relation(self, obj1, obj2, **hints):
+        labels = {obj1._meta.app_label, obj2._meta.app_label}
+        if 'reporting' in labels:
+            return labels == {'reporting'}
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if app_label == 'reporting':
+            return db == DATABASE
+        if db == DATABASE:
+            return False
+        return None
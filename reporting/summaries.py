@@ -0,0 +1,66 @@
+# reporting/summaries.py
+"""
+Report queries over the star schema. The router sends them to the
+reporting database; figures are as of the last extract (as_of()).
+"""
+from decimal import Decimal
+
+from django.db.models import Count, Q, Sum
+
+from .extract import SOURCE
+from .models import ExtractWatermark, FactExpenditure, FactHeadcount, FactLeave, FactTask
+
+CENT = Decimal('0.01')
+
+
+def _money(value):
+    # SQLite sums decimals as floats; round back to the column's precision.
+    return Decimal(str(value or 0)).quantize(CENT)
+
+
+def as_of():
+    """When the reporting database was last brought up to date, or None before the first extract."""
+    return ExtractWatermark.objects.filter(source=SOURCE).values_list('extracted_at', flat=True).first()
+
+
+def spend_by_zone(year):
+    """[{'zone', 'months': [total for January..December], 'total'}] for the expenditures of `year`, by zone."""
+    rows = (FactExpenditure.objects.filter(date__year=year).order_by()
+            .values('geography__zone_name', 'date__month').annotate(total=Sum('amount'))
+            .values_list('geography__zone_name', 'date__month', 'total'))
+    zones = {}
+    for zone, month, total in rows:
+        zones.setdefault(zone, [Decimal('0.00')] * 12)[month - 1] = _money(total)
+    return [{'zone': zone, 'months': months, 'total': sum(months)} for zone, months in sorted(zones.items())]
+
+
+def task_completion(since):
+    """Tasks created on or after `since` per department: total, completed, on time and completion rate."""
+    rows = (FactTask.objects.filter(created__date__gte=since).order_by()
+            .values('department__name').annotate(
+                total=Count('pk'), completed=Count('pk', filter=Q(status='COMPLETED')),
+                on_time=Count('pk', filter=Q(on_time=True)))
+            .order_by('department__name'))
+    return [{'department': row['department__name'], 'total': row['total'], 'completed': row['completed'],
+             'on_time': row['on_time'], 'rate': round(row['completed'] * 100 / row['total'], 2)}
+            for row in rows]
+
+
+def leave_by_type(year):
+    """Leave requests starting in `year` per leave type: requests, approved requests and approved days."""
+    return list(FactLeave.objects.filter(start__year=year).order_by('leave_type').values('leave_type').annotate(
+        requests=Count('pk'), approved=Count('pk', filter=Q(status='approved')),
+        days=Sum('days', filter=Q(status='approved'), default=0)))
+
+
+def headcount():
+    """The latest monthly headcount by department and by grade: {'month', 'departments', 'grades', 'total'}."""
+    month = FactHeadcount.objects.order_by('-month').values_list('month__date', flat=True).first()
+    if month is None:
+        return {'month': None, 'departments': [], 'grades': [], 'total': 0}
+    cells = FactHeadcount.objects.filter(month__date=month).order_by()
+    departments = list(cells.values('department__name').annotate(employees=Sum('employees'))
+                       .order_by('-employees', 'department__name'))
+    grades = list(cells.values('grade', 'grade__name').annotate(employees=Sum('employees')).order_by('grade'))
+    return {'month': month, 'departments': departments, 'grades': grades,
+            'total': sum(row['employees'] for row in departments)}
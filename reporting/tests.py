@@ -0,0 +1,117 @@
+import io
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from communication.models import Task
+from core.models import ChangeLog, Department, Employee, GradeLevel, State, Zone
+from finance.models import Expenditure
+from hr.models import LeaveRequest
+from reporting import extract, summaries
+from reporting.models import (
+    DimGeography, ExtractWatermark, FactExpenditure, FactHeadcount, FactLeave, FactTask,
+)
+from reporting.routers import ReportingRouter
+
+
+class ReportingRouterTests(SimpleTestCase):
+    def test_reporting_tables_live_only_in_the_reporting_database(self):
+        router = ReportingRouter()
+        self.assertEqual(router.db_for_read(FactExpenditure), 'reporting')
+        self.assertEqual(router.db_for_write(FactExpenditure), 'reporting')
+        self.assertIsNone(router.db_for_read(Expenditure))
+        self.assertTrue(router.allow_migrate('reporting', 'reporting'))
+        self.assertFalse(router.allow_migrate('default', 'reporting'))
+        self.assertFalse(router.allow_migrate('reporting', 'finance'))
+        self.assertIsNone(router.allow_migrate('default', 'finance'))
+        self.assertFalse(router.allow_relation(FactExpenditure(), Expenditure()))
+
+
+class ExtractTests(TestCase):
+    databases = {'default', 'reporting'}
+
+    def setUp(self):
+        zone = Zone.objects.create(code='NC', name='North Central')
+        State.objects.create(code='FCT', name='Federal Capital Territory', zone=zone)
+        Department.objects.create(code='FIN', name='Finance and Accounts')
+        GradeLevel.objects.create(level=8, name='GL 08', per_diem=0, local_running=0, estacode=0,
+                                  assumption_of_duty=0)
+        self.officer = Employee.objects.create_user(
+            employee_id='NDE0001', ippis_number='IPPIS0001', email='a@nde.gov.ng', password='secret',
+            current_department_id='FIN', current_state_id='FCT', current_grade_level_id=8)
+        self.today = timezone.localdate()
+
+    def spend(self, amount, day):
+        return Expenditure.objects.create(amount=Decimal(amount), description='Fuel', date=day,
+                                          expenditure_type='OPERATIONAL', department_id='FIN', state_id='FCT')
+
+    def test_full_then_incremental_extract(self):
+        kept = self.spend('100.00', date(2026, 3, 1))
+        dropped = self.spend('40.00', date(2026, 3, 2))
+        task = Task.objects.create(title='Audit', description='Q1 audit', assigned_by=self.officer,
+                                   assigned_to=self.officer, created_by=self.officer,
+                                   due_date=timezone.now() + timedelta(days=3))
+        counts = extract.extract()
+        self.assertEqual((counts['finance.Expenditure'], counts['communication.Task']), (2, 1))
+        fact = FactExpenditure.objects.get(pk=kept.pk)
+        self.assertEqual((fact.date_id, fact.geography_id, fact.department_id, fact.amount),
+                         (20260301, 'FCT', 'FIN', Decimal('100.00')))
+        self.assertEqual(DimGeography.objects.get(pk='FCT').zone_name, 'North Central')
+        self.assertEqual(FactTask.objects.get(pk=task.pk).department_id, 'FIN')
+        self.assertEqual(list(FactHeadcount.objects.values_list('department', 'grade', 'employees')),
+                         [('FIN', 8, 1)])
+
+        Expenditure.objects.filter(pk=kept.pk).update(amount=Decimal('120.00'))  # Bypasses signals.
+        dropped_pk = dropped.pk
+        dropped.delete()
+        task.status = 'COMPLETED'
+        task.save()
+        leave = LeaveRequest.objects.create(employee=self.officer, leave_type='annual', reason='Rest',
+                                            start_date=date(2026, 4, 6), end_date=date(2026, 4, 10),
+                                            status='approved')
+        counts = extract.extract(batch_size=2)
+        self.assertEqual(counts['finance.Expenditure deleted'], 1)
+        self.assertEqual(FactExpenditure.objects.get(pk=kept.pk).amount, Decimal('120.00'))
+        self.assertFalse(FactExpenditure.objects.filter(pk=dropped_pk).exists())
+        completed = FactTask.objects.get(pk=task.pk)
+        self.assertEqual((completed.status, completed.on_time), ('COMPLETED', True))
+        self.assertEqual(FactLeave.objects.get(pk=leave.pk).days, 5)
+
+        # Nothing new: the watermark stays and nothing is reloaded.
+        seq = ExtractWatermark.objects.get().seq
+        self.assertFalse(+extract.extract())
+        self.assertEqual(ExtractWatermark.objects.get().seq, seq)
+
+    def test_pruned_changes_force_a_full_load(self):
+        extract.extract()
+        first = self.spend('100.00', date(2026, 3, 1))
+        self.spend('40.00', date(2026, 3, 2))
+        # The first new change is pruned before the next run reads it.
+        pruned = ChangeLog.objects.get(model='finance.Expenditure', object_id=first.pk).seq
+        ChangeLog.objects.filter(seq__lte=pruned).delete()
+        counts = extract.extract()
+        self.assertEqual(counts['finance.Expenditure'], 2)
+        self.assertEqual(FactExpenditure.objects.filter(pk=first.pk).count(), 1)
+
+    def test_summaries_and_page_read_the_star_schema(self):
+        self.spend('100.00', self.today.replace(month=1, day=1))
+        LeaveRequest.objects.create(employee=self.officer, leave_type='sick', reason='Flu', start_date=self.today,
+                                    end_date=self.today + timedelta(days=1), status='approved')
+        call_command('extract_reporting', stdout=io.StringIO())
+
+        zones = summaries.spend_by_zone(self.today.year)
+        self.assertEqual([(row['zone'], row['months'][0], row['total']) for row in zones],
+                         [('North Central', Decimal('100.00'), Decimal('100.00'))])
+        self.assertEqual(summaries.leave_by_type(self.today.year),
+                         [{'leave_type': 'sick', 'requests': 1, 'approved': 1, 'days': 2}])
+        self.assertEqual(summaries.headcount()['total'], 1)
+        self.assertIsInstance(summaries.as_of(), datetime)
+
+        self.client.force_login(self.officer)
+        response = self.client.get(reverse('core:performance_overview'))
+        self.assertContains(response, 'North Central')
+        self.assertContains(response, 'Finance and Accounts')